@@ -0,0 +1,20 @@
+"""Banco de pruebas de rendimiento (ver ``python -m benchmarks --help``),
+simulador de carga de recepción (``python -m benchmarks.carga --help``),
+regresiones de planes de ejecución (``python -m benchmarks.planes --help``),
+asesor de índices parciales y de cobertura (``python -m benchmarks.indices --help``),
+tiempo de arranque en frío (``python -m benchmarks.arranque --help``),
+tablero de habitaciones en vivo (``python -m benchmarks.tablero --help``),
+acceso síncrono vs async con latencia (``python -m benchmarks.latencia --help``) y
+carga de la API HTTP (``python -m benchmarks.api --help``)."""
+import os
+import sys
+from pathlib import Path
+
+# Igual que la app: src/ en el path para importar config, models, controllers...
+ROOT = Path(__file__).resolve().parent.parent
+for _ruta in (str(ROOT), str(ROOT / 'src')):
+    if _ruta not in sys.path:
+        sys.path.insert(0, _ruta)
+
+# Se mide la base, no la caché de datos (utils/cache.py): CACHE_ENABLED=true para medirla
+os.environ.setdefault('CACHE_ENABLED', 'false')
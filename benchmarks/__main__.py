@@ -0,0 +1,90 @@
+"""Banco de pruebas de rendimiento.
+
+Uso (desde la raíz del proyecto, con datos de scripts/generate_data.py):
+    python -m benchmarks                                  # todos los escenarios
+    python -m benchmarks disponibilidad reportes.kpis     # por grupo o prefijo
+    python -m benchmarks --guardar base.json
+    python -m benchmarks --comparar base.json --umbral 0.15   # sale con código 1 si hay regresiones o errores
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from benchmarks import runner
+
+
+def _positivo(valor: str) -> int:
+    n = int(valor)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"debe ser al menos 1 (recibido {n})")
+    return n
+
+
+def _no_negativo(valor: str) -> int:
+    n = int(valor)
+    if n < 0:
+        raise argparse.ArgumentTypeError(f"no puede ser negativo (recibido {n})")
+    return n
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description="Banco de pruebas de rendimiento")
+    parser.add_argument('filtro', nargs='*', help="Grupos o prefijos de escenario a ejecutar")
+    parser.add_argument('-n', '--repeticiones', type=_positivo, default=30, help="Iteraciones medidas por escenario")
+    parser.add_argument('--calentamiento', type=_no_negativo, default=3, help="Iteraciones previas sin medir")
+    parser.add_argument('--guardar', type=Path, help="Ruta del JSON de resultados (por defecto benchmarks/resultados/)")
+    parser.add_argument('--comparar', type=Path, help="JSON de una ejecución anterior contra la que comparar")
+    parser.add_argument('--umbral', type=float, default=0.20,
+                        help="Empeoramiento relativo de la mediana que cuenta como regresión (0.20 = 20%%)")
+    parser.add_argument('--listar', action='store_true', help="Lista los escenarios y termina")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    from benchmarks import escenarios as modulo_escenarios
+
+    seleccion = runner.escenarios(args.filtro)
+    if args.listar:
+        for esc in seleccion:
+            print(f"{esc.nombre:<42}{esc.descripcion}")
+        return 0
+    if not seleccion:
+        print(f"❌ Ningún escenario coincide con {args.filtro}")
+        return 2
+
+    ctx = modulo_escenarios.Contexto()
+    print(f"🏁 {len(seleccion)} escenarios · datos: "
+          + ', '.join(f"{k}={v:,}" for k, v in ctx.volumen.items()))
+    resultados = {'meta': runner.metadatos(ctx, args.repeticiones, args.calentamiento), 'escenarios': {}}
+    try:
+        for esc in seleccion:
+            print(f"   ⏱️  {esc.nombre}...", flush=True)
+            resultados['escenarios'][esc.nombre] = runner.medir(
+                esc, ctx, esc.repeticiones or args.repeticiones, args.calentamiento)
+    finally:
+        ctx.limpiar()
+
+    runner.imprimir_resultados(resultados)
+    ruta = runner.guardar(resultados, args.guardar)
+    print(f"\n💾 Resultados guardados en {ruta}")
+    fallidos = [n for n, r in resultados['escenarios'].items() if r['errores']]
+    if fallidos:
+        print(f"\n❌ {len(fallidos)} escenarios con errores: {', '.join(fallidos)}")
+
+    if args.comparar:
+        base = json.loads(args.comparar.read_text(encoding='utf-8'))
+        filas = runner.comparar(resultados, base, args.umbral)
+        runner.imprimir_comparacion(filas)
+        regresiones = [f for f in filas if f['regresion']]
+        if regresiones:
+            print(f"\n❌ {len(regresiones)} regresiones respecto a {args.comparar}")
+            return 1
+        if not fallidos:
+            print("\n✅ Sin regresiones")
+    return 1 if fallidos else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
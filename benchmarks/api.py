@@ -0,0 +1,234 @@
+"""Prueba de carga de la API HTTP (src/api): clientes concurrentes con conexiones
+keep-alive y una mezcla de disponibilidad, cotizaciones, reservas (con
+Idempotency-Key y reintentos) y consultas de reservas.
+
+Uso (con la API levantada contra una BD local con datos generados):
+    DB_POOL=true API_KEYS=clave uvicorn api.app:app --app-dir src --workers 4
+    python -m benchmarks.api --url http://127.0.0.1:8000 --api-key clave --clientes 32 --duracion 30
+
+Informa peticiones por segundo sostenidas (mediana y mínimo por segundo),
+percentiles de latencia por operación y códigos de respuesta. Las reservas
+creadas se borran al terminar.
+"""
+import argparse
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, List
+from urllib.parse import urlencode, urlsplit
+
+from benchmarks import runner
+from benchmarks.escenarios import Contexto, DIAS_HASTA_ZONA_BENCH
+from config.settings import settings
+
+MEZCLA = {
+    'disponibilidad': 60,
+    'cotizacion': 15,
+    'crear_reserva': 15,
+    'reintento_reserva': 5,
+    'ver_reserva': 5,
+}
+
+
+class Cliente:
+    """Un cliente HTTP con su propia conexión keep-alive"""
+
+    def __init__(self, url: str, api_key: str):
+        partes = urlsplit(url)
+        self.host, self.port = partes.hostname, partes.port or 80
+        self.cabeceras = {'X-API-Key': api_key, 'Content-Type': 'application/json'}
+        self.conn = None
+
+    def pedir(self, metodo: str, ruta: str, cuerpo: Dict = None, cabeceras: Dict = None):
+        for intento in range(2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            try:
+                self.conn.request(metodo, ruta, body=json.dumps(cuerpo) if cuerpo is not None else None,
+                                  headers=dict(self.cabeceras, **(cabeceras or {})))
+                respuesta = self.conn.getresponse()
+                datos = respuesta.read()
+                return respuesta.status, respuesta.getheader('Idempotent-Replay'), datos
+            except (http.client.HTTPException, OSError):
+                self.conn.close()
+                self.conn = None
+                if intento:
+                    raise
+
+
+class PruebaCarga:
+    def __init__(self, ctx: Contexto, args):
+        self.ctx = ctx
+        self.args = args
+        self.zona = ctx.hoy + timedelta(days=DIAS_HASTA_ZONA_BENCH)
+        self.latencias: Dict[str, List[float]] = defaultdict(list)
+        self.codigos: Dict[str, Counter] = defaultdict(Counter)
+        self.por_segundo: Counter = Counter()
+        self.repetidas = 0
+        self.claves: List[tuple] = []  # (clave, cuerpo) de reservas ya enviadas
+        self.reservas: List[int] = []
+        self._lock = threading.Lock()
+        self.detener = threading.Event()
+
+    # ------------------------------------------------------------ operaciones
+    def disponibilidad(self, cliente, rng):
+        # Pocas ventanas distintas, como las búsquedas reales de un canal: ejercita la caché
+        inicio = self.ctx.hoy + timedelta(days=rng.randint(0, self.args.ventanas - 1))
+        query = urlencode({'check_in': inicio.isoformat(),
+                           'check_out': (inicio + timedelta(days=rng.choice((1, 2, 3)))).isoformat()})
+        return cliente.pedir('GET', f"/disponibilidad?{query}")
+
+    def cotizacion(self, cliente, rng):
+        inicio = self.ctx.hoy + timedelta(days=rng.randint(0, 90))
+        return cliente.pedir('POST', '/cotizaciones', {
+            'habitacion_id': rng.choice(self.ctx.habitaciones)['id'],
+            'check_in': inicio.isoformat(),
+            'check_out': (inicio + timedelta(days=rng.randint(1, 5))).isoformat(),
+        })
+
+    def crear_reserva(self, cliente, rng):
+        habitacion = rng.choice(self.ctx.habitaciones)
+        inicio = self.zona + timedelta(days=rng.randint(0, self.args.ventana_dias))
+        cuerpo = {
+            'huesped_id': self.ctx.huesped_id,
+            'habitacion_id': habitacion['id'],
+            'fecha_check_in': inicio.isoformat(),
+            'fecha_check_out': (inicio + timedelta(days=rng.randint(1, 4))).isoformat(),
+            'numero_adultos': 1,
+            'notas': 'Prueba de carga API',
+        }
+        clave = str(uuid.UUID(int=rng.getrandbits(128)))
+        resultado = cliente.pedir('POST', '/reservas', cuerpo, {'Idempotency-Key': clave})
+        if resultado[0] == 201:
+            with self._lock:
+                self.claves.append((clave, cuerpo))
+                self.reservas.append(json.loads(resultado[2])['reserva_id'])
+        return resultado
+
+    def reintento_reserva(self, cliente, rng):
+        with self._lock:
+            previa = rng.choice(self.claves) if self.claves else None
+        if previa is None:
+            return None
+        return cliente.pedir('POST', '/reservas', previa[1], {'Idempotency-Key': previa[0]})
+
+    def ver_reserva(self, cliente, rng):
+        with self._lock:
+            reserva_id = rng.choice(self.reservas) if self.reservas else None
+        if reserva_id is None:
+            return None
+        return cliente.pedir('GET', f"/reservas/{reserva_id}")
+
+    # ------------------------------------------------------------ clientes
+    def cliente(self, numero: int) -> None:
+        rng = random.Random(self.args.semilla * 1000 + numero)
+        cliente = Cliente(self.args.url, self.args.api_key)
+        operaciones = list(MEZCLA)
+        pesos = [MEZCLA[o] for o in operaciones]
+        while not self.detener.is_set():
+            operacion = rng.choices(operaciones, pesos)[0]
+            t0 = time.perf_counter()
+            try:
+                resultado = getattr(self, operacion)(cliente, rng)
+            except (http.client.HTTPException, OSError):
+                resultado = ('conexion', None, b'')
+            if resultado is None:
+                continue
+            ms = (time.perf_counter() - t0) * 1000
+            with self._lock:
+                self.latencias[operacion].append(ms)
+                self.codigos[operacion][resultado[0]] += 1
+                self.por_segundo[int(time.monotonic())] += 1
+                if resultado[1]:
+                    self.repetidas += 1
+
+    def ejecutar(self) -> Dict:
+        hilos = [threading.Thread(target=self.cliente, args=(i,), daemon=True)
+                 for i in range(self.args.clientes)]
+        t0 = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        time.sleep(self.args.duracion)
+        self.detener.set()
+        for hilo in hilos:
+            hilo.join()
+        transcurrido = time.perf_counter() - t0
+
+        # Segundos completos: se descartan el primero y el último
+        segundos = sorted(self.por_segundo)[1:-1]
+        por_segundo = [self.por_segundo[s] for s in segundos] or [0]
+        total = sum(len(t) for t in self.latencias.values())
+        return {
+            'clientes': self.args.clientes,
+            'duracion_s': round(transcurrido, 1),
+            'peticiones': total,
+            'rps_medio': round(total / transcurrido, 1),
+            'rps_mediana': runner.percentil(por_segundo, 50),
+            'rps_minimo': min(por_segundo),
+            'reintentos_idempotentes': self.repetidas,
+            'operaciones': {
+                nombre: {
+                    'n': len(tiempos),
+                    'p50_ms': round(runner.percentil(tiempos, 50), 2),
+                    'p95_ms': round(runner.percentil(tiempos, 95), 2),
+                    'p99_ms': round(runner.percentil(tiempos, 99), 2),
+                    'codigos': {str(c): n for c, n in sorted(self.codigos[nombre].items(), key=str)},
+                }
+                for nombre, tiempos in sorted(self.latencias.items())
+            },
+        }
+
+
+def imprimir(resultado: Dict) -> None:
+    print(f"\n📈 {resultado['clientes']} clientes · {resultado['peticiones']:,} peticiones en "
+          f"{resultado['duracion_s']} s · {resultado['rps_medio']} req/s "
+          f"(mediana {resultado['rps_mediana']:.0f}/s, mínimo {resultado['rps_minimo']}/s) · "
+          f"{resultado['reintentos_idempotentes']} reintentos servidos sin re-ejecutar")
+    print(f"   {'Operación':<22}{'n':>8}{'p50':>10}{'p95':>10}{'p99':>10}   códigos")
+    for nombre, o in resultado['operaciones'].items():
+        codigos = ' '.join(f"{c}×{n}" for c, n in o['codigos'].items())
+        print(f"   {nombre:<22}{o['n']:>8}{o['p50_ms']:>8.1f}ms{o['p95_ms']:>8.1f}ms{o['p99_ms']:>8.1f}ms   {codigos}")
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.api', description="Prueba de carga de la API HTTP")
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--api-key', default=settings.API_KEYS.split(',')[0].strip())
+    parser.add_argument('--clientes', type=int, default=16, help="Clientes concurrentes")
+    parser.add_argument('--duracion', type=float, default=30, help="Segundos")
+    parser.add_argument('--ventanas', type=int, default=14,
+                        help="Fechas de entrada distintas en las búsquedas de disponibilidad")
+    parser.add_argument('--ventana-dias', type=int, default=60,
+                        help="Días en los que se reparten las reservas nuevas")
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--guardar', type=Path, help="Ruta del JSON con los resultados")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    ctx = Contexto()
+    prueba = PruebaCarga(ctx, args)
+    print(f"🚀 Carga contra {args.url} · {args.clientes} clientes · {args.duracion:.0f} s")
+    try:
+        resultado = prueba.ejecutar()
+    finally:
+        ctx.reservas_creadas.extend(prueba.reservas)
+        ctx.limpiar()
+    imprimir(resultado)
+    if args.guardar:
+        resultado['meta'] = runner.metadatos(ctx, 0, 0)
+        args.guardar.write_text(json.dumps(resultado, indent=2, ensure_ascii=False, default=str), encoding='utf-8')
+        print(f"\n💾 Resultados guardados en {args.guardar}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""Tiempo de arranque en frío: lo que cuesta importar la app hasta pintar el login
+y lo que añade cada vista la primera vez que se abre.
+
+Uso (desde la raíz del proyecto; no necesita la base de datos):
+    python -m benchmarks.arranque                      # mediana de 5 procesos nuevos
+    python -m benchmarks.arranque -n 10 --presupuesto-ms 500 --guardar arranque.json
+
+Cada medición es un proceso nuevo con ``python -X importtime``: se importa
+streamlit (fuera del presupuesto: es el coste fijo del servidor), se marca la
+salida y se ejecuta ``src/app.py`` con ``streamlit.testing`` hasta el login.
+Todo lo que se importa después de la marca es coste de la app. Sale con código 1
+si el login supera el presupuesto o si carga alguna biblioteca pesada (pandas,
+plotly, fpdf...), que solo deben importarse al abrir su página o generar un PDF.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks import ROOT
+
+# Milisegundos de importación permitidos hasta el login (sin contar streamlit)
+PRESUPUESTO_MS = 600.0
+# No deben cargarse para mostrar el login
+PESADAS = ('pandas', 'numpy', 'plotly', 'fpdf', 'matplotlib', 'reportlab', 'pyarrow')
+VISTAS = ('dashboard', 'recepcion', 'reportes', 'administracion')
+
+_MARCA = '@@arranque'
+_LINEA = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)')
+
+_LOGIN = f"""
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+sys.stderr.write('{_MARCA}\\n'); sys.stderr.flush()
+t0 = time.perf_counter()
+at = AppTest.from_file({str(ROOT / 'src' / 'app.py')!r}, default_timeout=120).run()
+print(json.dumps({{'ms': (time.perf_counter() - t0) * 1000,
+                  'errores': [str(e.value) for e in at.exception]}}))
+"""
+
+# Lo que ya importó app.py para el login no cuenta como coste de la vista
+_VISTA = """
+import sys
+import streamlit
+import config.settings, utils.auth, utils.logger, utils.tracing, utils.profiler, utils.permissions
+sys.stderr.write('{marca}\\n'); sys.stderr.flush()
+import views.{vista}
+"""
+
+
+def analizar_importtime(salida: str) -> Dict:
+    """Coste de lo importado tras la marca: total, por módulo raíz y bibliotecas pesadas"""
+    lineas = salida.splitlines()
+    if _MARCA not in lineas:
+        raise RuntimeError("El proceso terminó antes de la marca:\n" + salida[-2000:])
+    corte = lineas.index(_MARCA)
+    antes = [_LINEA.match(l) for l in lineas[:corte]]
+    despues = [m for m in (_LINEA.match(l) for l in lineas[corte + 1:]) if m]
+
+    # -X importtime escribe cada módulo después de sus dependencias: recorriendo
+    # al revés, el último visto en el nivel anterior es el que lo importó
+    raices, pesadas = {}, {}
+    camino: List[str] = []
+    for m in reversed(despues):
+        nivel, modulo = len(m.group(3)) // 2, m.group(4)
+        camino[nivel:] = [modulo]
+        if nivel == 0:
+            raices[modulo] = int(m.group(2)) / 1000
+        raiz = modulo.split('.')[0]
+        if raiz in PESADAS and raiz not in pesadas:
+            pesadas[raiz] = camino[0]
+    return {
+        'streamlit_ms': sum(int(m.group(2)) for m in antes if m and not m.group(3)) / 1000,
+        'importacion_ms': sum(raices.values()),
+        'modulos': dict(sorted(raices.items(), key=lambda kv: kv[1], reverse=True)),
+        'pesadas': pesadas,
+    }
+
+
+def _ejecutar(codigo: str) -> subprocess.CompletedProcess:
+    entorno = dict(os.environ, PYTHONPATH=os.pathsep.join([str(ROOT / 'src'), str(ROOT)]))
+    return subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo], cwd=ROOT, env=entorno,
+                          capture_output=True, text=True, timeout=300)
+
+
+def medir_login() -> Dict:
+    proceso = _ejecutar(_LOGIN)
+    resultado = analizar_importtime(proceso.stderr)
+    ultima = proceso.stdout.strip().splitlines()[-1:] or ['{}']
+    resultado.update(json.loads(ultima[0]))
+    return resultado
+
+
+def medir_vista(vista: str) -> Dict:
+    return analizar_importtime(_ejecutar(_VISTA.format(marca=_MARCA, vista=vista)).stderr)
+
+
+def medir(repeticiones: int) -> Dict:
+    # La primera ejecución compila los .pyc: no cuenta
+    medir_login()
+    logins = [medir_login() for _ in range(repeticiones)]
+    vistas = {v: [medir_vista(v) for _ in range(repeticiones)] for v in VISTAS}
+    return {
+        'repeticiones': repeticiones,
+        'login': {
+            'importacion_ms': round(statistics.median(l['importacion_ms'] for l in logins), 1),
+            'render_ms': round(statistics.median(l.get('ms', 0.0) for l in logins), 1),
+            'streamlit_ms': round(statistics.median(l['streamlit_ms'] for l in logins), 1),
+            'modulos': {m: round(ms, 1) for m, ms in list(logins[-1]['modulos'].items())[:10]},
+            'pesadas': logins[-1]['pesadas'],
+            'errores': logins[-1].get('errores', []),
+        },
+        'vistas': {
+            v: {'importacion_ms': round(statistics.median(r['importacion_ms'] for r in rs), 1),
+                'pesadas': sorted(rs[-1]['pesadas'])}
+            for v, rs in vistas.items()
+        },
+    }
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.arranque',
+                                     description="Tiempo de importación hasta el login y por vista")
+    parser.add_argument('-n', '--repeticiones', type=int, default=5, help="Procesos nuevos por medición")
+    parser.add_argument('--presupuesto-ms', type=float, default=PRESUPUESTO_MS,
+                        help="Importación máxima hasta el login, sin contar streamlit (ms)")
+    parser.add_argument('--guardar', type=Path, help="Guarda el resultado en JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    resultado = medir(args.repeticiones)
+    login = resultado['login']
+
+    print(f"🚀 Login: {login['importacion_ms']:,.1f} ms de importación "
+          f"(presupuesto {args.presupuesto_ms:,.0f}) · {login['render_ms']:,.1f} ms hasta pintar · "
+          f"streamlit {login['streamlit_ms']:,.1f} ms")
+    for modulo, ms in login['modulos'].items():
+        print(f"   {modulo:<40}{ms:>9.1f} ms")
+    for error in login['errores']:
+        print(f"   ⚠️ {error}")
+    print("\n📄 Primera apertura de cada vista:")
+    for vista, r in resultado['vistas'].items():
+        print(f"   {vista:<20}{r['importacion_ms']:>9.1f} ms   {', '.join(r['pesadas'])}")
+
+    if args.guardar:
+        args.guardar.write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding='utf-8')
+        print(f"\n💾 Guardado en {args.guardar}")
+
+    fallos = []
+    if login['importacion_ms'] > args.presupuesto_ms:
+        fallos.append(f"el login importa {login['importacion_ms']:,.1f} ms (> {args.presupuesto_ms:,.0f})")
+    for biblioteca, culpable in login['pesadas'].items():
+        fallos.append(f"el login carga {biblioteca} (importado desde {culpable})")
+    for fallo in fallos:
+        print(f"\n❌ {fallo}")
+    if not fallos:
+        print("\n✅ Arranque dentro del presupuesto")
+    return 1 if fallos else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,264 @@
+"""Simulador de carga de recepción: varios recepcionistas concurrentes (hilos)
+llamando a la capa de controladores con una mezcla realista de operaciones.
+
+Uso (desde la raíz del proyecto, contra una BD local con datos generados):
+    python -m benchmarks.carga --usuarios 10 --duracion 60
+    python -m benchmarks.carga --usuarios 1,5,10,20,40 --duracion 30 --guardar carga.json
+
+Informa por etapa: operaciones por segundo, percentiles de latencia por
+operación, tasa de errores y de conflictos (habitación ya ocupada, reserva ya
+procesada) y uso de conexiones (máximo simultáneo en la app y en el servidor).
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks import runner
+from benchmarks.escenarios import Contexto, DIAS_HASTA_ZONA_BENCH
+from config.database import db
+from controllers.factura_controller import FacturaController
+from controllers.huesped_controller import HuespedController
+from controllers.reserva_controller import ReservaController
+from models.reserva import Reserva
+
+# Peso relativo de cada operación en la mezcla de recepción
+MEZCLA = {
+    'buscar_disponibilidad': 40,
+    'buscar_huesped': 15,
+    'reservas_activas': 15,
+    'crear_reserva': 12,
+    'check_in': 8,
+    'check_out': 5,
+    'crear_factura': 5,
+}
+
+# Mensajes de los controladores que indican conflicto (no error del sistema)
+_CONFLICTOS = ('no está disponible', 'no está confirmada', 'ya fue realizado', 'No se encontró el registro')
+
+TERMINOS_BUSQUEDA = ['Pérez', 'María', 'González', 'Quispe', '7000', 'SX0', 'Smith', 'Lucía', 'gmail']
+
+
+class Simulacion:
+    """Estado compartido entre los recepcionistas de una etapa"""
+
+    def __init__(self, ctx: Contexto, semilla: int, ventana_dias: int):
+        self.ctx = ctx
+        self.semilla = semilla
+        self.ventana_dias = ventana_dias
+        self.zona = ctx.hoy + timedelta(days=DIAS_HASTA_ZONA_BENCH)
+        # Colas del flujo: reservada → alojada → con check-out (pendiente de factura)
+        self.por_llegar = deque()
+        self.alojadas = deque()
+        self.por_facturar = deque()
+        self.latencias: Dict[str, List[float]] = defaultdict(list)
+        self.resultados: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+        self.detener = threading.Event()
+
+    def registrar(self, operacion: str, ms: float, resultado: str) -> None:
+        with self._lock:
+            self.latencias[operacion].append(ms)
+            self.resultados[operacion][resultado] += 1
+
+    # ------------------------------------------------------------ operaciones
+    def buscar_disponibilidad(self, rng):
+        inicio = self.ctx.hoy + timedelta(days=rng.randint(0, 60))
+        ReservaController.buscar_disponibilidad(inicio, inicio + timedelta(days=rng.randint(1, 5)))
+
+    def buscar_huesped(self, rng):
+        HuespedController.buscar(rng.choice(TERMINOS_BUSQUEDA))
+
+    def reservas_activas(self, rng):
+        Reserva.get_activas()
+
+    def crear_reserva(self, rng):
+        habitacion = rng.choice(self.ctx.habitaciones)
+        check_in = self.zona + timedelta(days=rng.randint(0, self.ventana_dias))
+        datos = self.ctx._datos_reserva(habitacion, check_in, check_in + timedelta(days=rng.randint(1, 4)))
+        resultado = ReservaController.crear_reserva(datos, self.ctx.usuario_id)
+        if resultado.get('success'):
+            self.ctx.reservas_creadas.append(resultado['reserva_id'])
+            self.por_llegar.append((resultado['reserva_id'], habitacion['id']))
+        return resultado
+
+    def check_in(self, rng):
+        reserva = self._tomar(self.por_llegar)
+        if reserva is None:
+            return None
+        resultado = ReservaController.check_in(*reserva, self.ctx.usuario_id)
+        if resultado.get('success'):
+            self.alojadas.append(reserva)
+        return resultado
+
+    def check_out(self, rng):
+        reserva = self._tomar(self.alojadas)
+        if reserva is None:
+            return None
+        resultado = ReservaController.check_out(*reserva, self.ctx.usuario_id)
+        if resultado.get('success'):
+            self.por_facturar.append(reserva)
+        return resultado
+
+    def crear_factura(self, rng):
+        reserva = self._tomar(self.por_facturar)
+        if reserva is None:
+            return None
+        return FacturaController.crear_factura_desde_reserva(reserva[0])
+
+    @staticmethod
+    def _tomar(cola):
+        try:
+            return cola.popleft()
+        except IndexError:
+            return None
+
+    # ------------------------------------------------------------ recepcionista
+    def recepcionista(self, numero: int, pausa_ms: float) -> None:
+        rng = random.Random(self.semilla * 1000 + numero)
+        operaciones = list(MEZCLA)
+        pesos = [MEZCLA[o] for o in operaciones]
+        while not self.detener.is_set():
+            operacion = rng.choices(operaciones, pesos)[0]
+            t0 = time.perf_counter()
+            try:
+                resultado = getattr(self, operacion)(rng)
+            except Exception:
+                resultado = {'success': False, 'error': 'excepción'}
+            ms = (time.perf_counter() - t0) * 1000
+            if resultado is None:
+                estado = 'sin_trabajo'  # no había reservas en la cola del flujo
+            elif isinstance(resultado, dict) and resultado.get('success') is False:
+                error = str(resultado.get('error', ''))
+                estado = 'conflicto' if any(c in error for c in _CONFLICTOS) else 'error'
+            else:
+                estado = 'ok'
+            if estado != 'sin_trabajo':
+                self.registrar(operacion, ms, estado)
+            if pausa_ms:
+                self.detener.wait(rng.expovariate(1 / pausa_ms) / 1000)
+
+
+def _conexiones_servidor() -> int:
+    with db.get_cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) AS n FROM pg_stat_activity WHERE datname = current_database()")
+        return cursor.fetchone()['n']
+
+
+def ejecutar_etapa(ctx: Contexto, usuarios: int, duracion: float, pausa_ms: float,
+                   semilla: int, ventana_dias: int) -> Dict:
+    sim = Simulacion(ctx, semilla, ventana_dias)
+    db.stats.reiniciar()
+    max_servidor = 0
+
+    hilos = [threading.Thread(target=sim.recepcionista, args=(i, pausa_ms), daemon=True)
+             for i in range(usuarios)]
+    t0 = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    while time.perf_counter() - t0 < duracion:
+        time.sleep(min(1.0, duracion))
+        try:
+            max_servidor = max(max_servidor, _conexiones_servidor())
+        except Exception:
+            pass
+    sim.detener.set()
+    for hilo in hilos:
+        hilo.join()
+    transcurrido = time.perf_counter() - t0
+
+    operaciones = {}
+    total = errores = conflictos = 0
+    for operacion, tiempos in sim.latencias.items():
+        conteo = sim.resultados[operacion]
+        n = len(tiempos)
+        total += n
+        errores += conteo['error']
+        conflictos += conteo['conflicto']
+        operaciones[operacion] = {
+            'n': n,
+            'p50_ms': round(runner.percentil(tiempos, 50), 2),
+            'p95_ms': round(runner.percentil(tiempos, 95), 2),
+            'p99_ms': round(runner.percentil(tiempos, 99), 2),
+            'max_ms': round(max(tiempos), 2),
+            'errores': conteo['error'],
+            'conflictos': conteo['conflicto'],
+        }
+
+    conexiones = db.stats.resumen_conexiones()
+    return {
+        'usuarios': usuarios,
+        'duracion_s': round(transcurrido, 1),
+        'operaciones_total': total,
+        'throughput_ops_s': round(total / transcurrido, 2),
+        'tasa_error': round(errores / total, 4) if total else 0.0,
+        'tasa_conflicto': round(conflictos / total, 4) if total else 0.0,
+        'conexiones': {
+            'abiertas': conexiones['conexiones'],
+            'por_segundo': round(conexiones['conexiones'] / transcurrido, 1),
+            'max_simultaneas_app': conexiones['max_simultaneas'],
+            'max_servidor': max_servidor,
+            'espera_p95_ms': conexiones['espera_p95_ms'],
+        },
+        'operaciones': operaciones,
+    }
+
+
+def imprimir_etapa(etapa: Dict) -> None:
+    c = etapa['conexiones']
+    print(f"\n👥 {etapa['usuarios']} recepcionistas · {etapa['throughput_ops_s']} ops/s · "
+          f"errores {etapa['tasa_error']:.1%} · conflictos {etapa['tasa_conflicto']:.1%} · "
+          f"conexiones máx. {c['max_simultaneas_app']} (servidor {c['max_servidor']}), "
+          f"{c['por_segundo']}/s, espera p95 {c['espera_p95_ms']} ms")
+    print(f"   {'Operación':<24}{'n':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'errores':>9}{'conflictos':>12}")
+    for nombre, o in sorted(etapa['operaciones'].items()):
+        print(f"   {nombre:<24}{o['n']:>7}{o['p50_ms']:>8.1f}ms{o['p95_ms']:>8.1f}ms{o['p99_ms']:>8.1f}ms"
+              f"{o['errores']:>9}{o['conflictos']:>12}")
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.carga',
+                                     description="Simulador de carga de recepción")
+    parser.add_argument('--usuarios', default='10',
+                        help="Recepcionistas simultáneos; varias etapas separadas por coma (p. ej. 1,5,10,20)")
+    parser.add_argument('--duracion', type=float, default=30, help="Segundos por etapa")
+    parser.add_argument('--pausa-ms', type=float, default=200,
+                        help="Pausa media entre operaciones de un recepcionista (0 = sin pausa)")
+    parser.add_argument('--ventana-dias', type=int, default=30,
+                        help="Días en los que se reparten las reservas nuevas (menos días = más conflictos)")
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--guardar', type=Path, help="Ruta del JSON con los resultados")
+    args = parser.parse_args(argv)
+    args.usuarios = [int(u) for u in str(args.usuarios).split(',') if u.strip()]
+    return args
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    ctx = Contexto()
+    print(f"🛎️  Simulación de recepción · etapas {args.usuarios} · {args.duracion:.0f} s cada una · datos: "
+          + ', '.join(f"{k}={v:,}" for k, v in ctx.volumen.items()))
+    etapas = []
+    try:
+        for usuarios in args.usuarios:
+            etapa = ejecutar_etapa(ctx, usuarios, args.duracion, args.pausa_ms, args.semilla, args.ventana_dias)
+            imprimir_etapa(etapa)
+            etapas.append(etapa)
+    finally:
+        ctx.limpiar()
+
+    resultados = {'meta': runner.metadatos(ctx, 0, 0), 'mezcla': MEZCLA, 'etapas': etapas}
+    resultados['meta'].update(pausa_ms=args.pausa_ms, duracion_s=args.duracion)
+    if args.guardar:
+        args.guardar.write_text(json.dumps(resultados, indent=2, ensure_ascii=False, default=str), encoding='utf-8')
+        print(f"\n💾 Resultados guardados en {args.guardar}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
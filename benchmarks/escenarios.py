@@ -0,0 +1,352 @@
+"""Escenarios del banco de pruebas: disponibilidad, tarifas, reservas,
+facturación, recepción, reportes y PDF.
+
+Los escenarios que escriben (reservas, check-in/out, facturas) trabajan sobre
+fechas muy lejanas para no chocar con los datos generados, y todo lo que crean
+se borra al terminar (``Contexto.limpiar``).
+"""
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+from benchmarks.runner import escenario
+from config.database import db
+from controllers.factura_controller import FacturaController
+from controllers.importacion_controller import ImportacionController
+from controllers.reporte_controller import ReporteController
+from controllers.reserva_controller import ReservaController
+from models.habitacion import Habitacion
+from models.reserva import Reserva
+from utils import catalogo
+from utils.pdf_generator import PDFGenerator
+from utils.tarifas import motor
+
+# Las reservas del banco de pruebas empiezan aquí (fuera del horizonte de generate_data.py)
+DIAS_HASTA_ZONA_BENCH = 1500
+
+# Tamaño del lote de la importación masiva
+RESERVAS_LOTE = 10_000
+
+
+class Contexto:
+    """Datos compartidos por los escenarios y registro de lo creado para limpiarlo"""
+
+    def __init__(self):
+        self.hoy = date.today()
+        self.disponible = catalogo.actual().estado_id('disponible')
+        self.habitaciones = sorted((h for h in Habitacion.get_all() if h['estado_id'] == self.disponible),
+                                   key=lambda h: h['id'])
+        with db.get_cursor() as cursor:
+            cursor.execute("SELECT MIN(id) AS id FROM huespedes")
+            self.huesped_id = cursor.fetchone()['id']
+            cursor.execute("SELECT MIN(id) AS id FROM usuarios WHERE activo")
+            self.usuario_id = cursor.fetchone()['id']
+            cursor.execute("""
+                SELECT (SELECT COUNT(*) FROM habitaciones) AS habitaciones,
+                       (SELECT COUNT(*) FROM huespedes) AS huespedes,
+                       (SELECT COUNT(*) FROM reservas) AS reservas,
+                       (SELECT COUNT(*) FROM facturas) AS facturas
+            """)
+            self.volumen = dict(cursor.fetchone())
+            cursor.execute("""
+                SELECT f.id FROM facturas f
+                WHERE EXISTS (SELECT 1 FROM detalle_factura d WHERE d.factura_id = f.id)
+                ORDER BY f.id DESC LIMIT 1
+            """)
+            fila = cursor.fetchone()
+            self.factura_id = fila['id'] if fila else None
+        if not self.habitaciones or not self.huesped_id:
+            raise SystemExit("❌ No hay habitaciones disponibles o huéspedes: carga datos con scripts/generate_data.py")
+        self._slot = 0
+        self.reservas_creadas: List[int] = []
+        self._cache: Dict[str, object] = {}
+
+    def siguiente_slot(self):
+        """Habitación y fechas libres, distintas en cada llamada"""
+        habitacion = self.habitaciones[self._slot % len(self.habitaciones)]
+        inicio = self.hoy + timedelta(days=DIAS_HASTA_ZONA_BENCH + 3 * (self._slot // len(self.habitaciones)))
+        self._slot += 1
+        return habitacion, inicio, inicio + timedelta(days=2)
+
+    def nueva_reserva(self) -> Tuple[int, int]:
+        habitacion, check_in, check_out = self.siguiente_slot()
+        resultado = ReservaController.crear_reserva(self._datos_reserva(habitacion, check_in, check_out),
+                                                    self.usuario_id)
+        if not resultado.get('success'):
+            raise RuntimeError(resultado.get('error'))
+        self.reservas_creadas.append(resultado['reserva_id'])
+        return resultado['reserva_id'], habitacion['id']
+
+    def _datos_reserva(self, habitacion, check_in, check_out) -> Dict:
+        return {
+            'huesped_id': self.huesped_id,
+            'habitacion_id': habitacion['id'],
+            'fecha_check_in': check_in,
+            'fecha_check_out': check_out,
+            'numero_adultos': 1,
+            'numero_ninos': 0,
+            'tarifa_total': float(habitacion['tarifa_base']) * (check_out - check_in).days,
+            'notas': 'benchmark',
+        }
+
+    def liberar_habitacion(self, habitacion_id: int) -> None:
+        """Deja la habitación 'disponible' (el check-in anterior la marcó ocupada)"""
+        with db.get_cursor() as cursor:
+            cursor.execute("UPDATE habitaciones SET estado_id = %s WHERE id = %s", (self.disponible, habitacion_id))
+
+    def memo(self, clave: str, funcion):
+        """Datos de entrada calculados una sola vez (p. ej. el DataFrame de un PDF)"""
+        if clave not in self._cache:
+            self._cache[clave] = funcion()
+        return self._cache[clave]
+
+    def limpiar(self) -> None:
+        if not self.reservas_creadas:
+            return
+        ids = tuple(self.reservas_creadas)
+        with db.get_cursor() as cursor:
+            cursor.execute("""
+                UPDATE habitaciones SET estado_id = %s
+                WHERE id IN (SELECT habitacion_id FROM reservas WHERE id IN %s)
+            """, (self.disponible, ids))
+            cursor.execute("DELETE FROM facturas WHERE reserva_id IN %s", (ids,))
+            cursor.execute("DELETE FROM alojamientos WHERE reserva_id IN %s", (ids,))
+            cursor.execute("DELETE FROM historial_estados_reserva WHERE reserva_id IN %s", (ids,))
+            cursor.execute("DELETE FROM reservas WHERE id IN %s", (ids,))
+        self.reservas_creadas.clear()
+
+
+# ============================================================ DISPONIBILIDAD
+@escenario('disponibilidad.get_disponibles', 'disponibilidad')
+def _get_disponibles(ctx):
+    """Habitacion.get_disponibles: 3 noches dentro de 30 días"""
+    inicio = ctx.hoy + timedelta(days=30)
+    return Habitacion.get_disponibles(inicio, inicio + timedelta(days=3))
+
+
+@escenario('disponibilidad.get_disponibles_tipo', 'disponibilidad')
+def _get_disponibles_tipo(ctx):
+    """Habitacion.get_disponibles filtrando por tipo"""
+    inicio = ctx.hoy + timedelta(days=30)
+    return Habitacion.get_disponibles(inicio, inicio + timedelta(days=3), 2)
+
+
+@escenario('disponibilidad.buscar_disponibilidad', 'disponibilidad')
+def _buscar_disponibilidad(ctx):
+    """ReservaController.buscar_disponibilidad: 7 noches con cálculo de tarifas"""
+    inicio = ctx.hoy + timedelta(days=14)
+    return ReservaController.buscar_disponibilidad(inicio, inicio + timedelta(days=7))
+
+
+@escenario('tarifas.calcular_tarifa_30_noches', 'tarifas')
+def _calcular_tarifa(ctx):
+    """Tarifa media de una estancia larga con el motor de tarifas (utils/tarifas.py)"""
+    inicio = ctx.hoy + timedelta(days=60)
+    return motor.tarifas_estancia([None], [120.0], inicio, inicio + timedelta(days=30))['tarifa'][0]
+
+
+# ============================================================ RESERVAS
+def _preparar_crear(ctx):
+    habitacion, check_in, check_out = ctx.siguiente_slot()
+    return {'datos': ctx._datos_reserva(habitacion, check_in, check_out)}
+
+
+@escenario('reservas.crear_reserva', 'reservas', preparar=_preparar_crear)
+def _crear_reserva(ctx, datos):
+    """ReservaController.crear_reserva en una habitación libre"""
+    resultado = ReservaController.crear_reserva(datos, ctx.usuario_id)
+    if resultado.get('success'):
+        ctx.reservas_creadas.append(resultado['reserva_id'])
+    return resultado
+
+
+def _preparar_check_in(ctx):
+    reserva_id, habitacion_id = ctx.nueva_reserva()
+    ctx.liberar_habitacion(habitacion_id)
+    return {'reserva_id': reserva_id, 'habitacion_id': habitacion_id}
+
+
+@escenario('reservas.check_in', 'reservas', preparar=_preparar_check_in)
+def _check_in(ctx, reserva_id, habitacion_id):
+    """ReservaController.check_in de una reserva confirmada"""
+    return ReservaController.check_in(reserva_id, habitacion_id, ctx.usuario_id)
+
+
+def _preparar_check_out(ctx):
+    kwargs = _preparar_check_in(ctx)
+    ReservaController.check_in(kwargs['reserva_id'], kwargs['habitacion_id'], ctx.usuario_id)
+    return kwargs
+
+
+@escenario('reservas.check_out', 'reservas', preparar=_preparar_check_out)
+def _check_out(ctx, reserva_id, habitacion_id):
+    """ReservaController.check_out de un huésped alojado"""
+    return ReservaController.check_out(reserva_id, habitacion_id, ctx.usuario_id)
+
+
+def _preparar_importacion(ctx):
+    filas = ['huesped_id,habitacion_id,fecha_check_in,fecha_check_out,numero_adultos,tarifa_total,notas']
+    for i in range(RESERVAS_LOTE):
+        habitacion, check_in, check_out = ctx.siguiente_slot()
+        # La mitad sin tarifa: se calcula en SQL con las temporadas
+        tarifa = float(habitacion['tarifa_base']) * 2 if i % 2 else ''
+        filas.append(f"{ctx.huesped_id},{habitacion['id']},{check_in},{check_out},1,{tarifa},benchmark")
+    return {'contenido': '\n'.join(filas)}
+
+
+@escenario('reservas.importar_10k', 'reservas', preparar=_preparar_importacion, repeticiones=3)
+def _importar_reservas(ctx, contenido):
+    """ImportacionController.importar_reservas: lote CSV de 10.000 reservas"""
+    resultado = ImportacionController.importar_reservas(contenido, 'csv', ctx.usuario_id)
+    if resultado.get('success'):
+        ctx.reservas_creadas.extend(r['reserva_id'] for r in resultado['reservas'])
+        if resultado['errores']:
+            raise RuntimeError(f"{len(resultado['errores'])} filas rechazadas: {resultado['errores'][0]}")
+    return resultado
+
+
+# ============================================================ FACTURACIÓN
+def _preparar_factura(ctx):
+    reserva_id, _ = ctx.nueva_reserva()
+    return {'reserva_id': reserva_id}
+
+
+@escenario('facturas.crear_desde_reserva', 'facturas', preparar=_preparar_factura)
+def _crear_factura(ctx, reserva_id):
+    """FacturaController.crear_factura_desde_reserva con dos servicios adicionales"""
+    return FacturaController.crear_factura_desde_reserva(reserva_id, [
+        {'concepto': 'Desayuno buffet', 'cantidad': 2, 'precio_unitario': 15.0, 'tipo': 'restaurante'},
+        {'concepto': 'Lavandería', 'cantidad': 3, 'precio_unitario': 8.0, 'tipo': 'servicio'},
+    ])
+
+
+# ============================================================ RECEPCIÓN
+@escenario('recepcion.activas', 'recepcion')
+def _rec_activas(ctx):
+    return Reserva.get_activas()
+
+
+@escenario('recepcion.alojados_ahora', 'recepcion')
+def _rec_alojados(ctx):
+    return Reserva.get_alojados_ahora()
+
+
+@escenario('recepcion.kpis_hoy', 'recepcion')
+def _rec_kpis_hoy(ctx):
+    return ReporteController.get_kpis_hoy(completos=False)
+
+
+# ============================================================ REPORTES
+def _periodo(ctx, dias: int):
+    return ctx.hoy - timedelta(days=dias), ctx.hoy
+
+
+@escenario('reportes.ocupacion_30d', 'reportes')
+def _rep_ocupacion_30(ctx):
+    return ReporteController.get_ocupacion_periodo(*_periodo(ctx, 30))
+
+
+@escenario('reportes.ocupacion_365d', 'reportes', repeticiones=10)
+def _rep_ocupacion_365(ctx):
+    return ReporteController.get_ocupacion_periodo(*_periodo(ctx, 365))
+
+
+@escenario('reportes.ingresos_90d', 'reportes')
+def _rep_ingresos(ctx):
+    return ReporteController.get_ingresos_periodo(*_periodo(ctx, 90))
+
+
+@escenario('reportes.reservas_90d', 'reportes')
+def _rep_reservas(ctx):
+    return ReporteController.get_reservas_periodo(*_periodo(ctx, 90))
+
+
+@escenario('reportes.kpis_90d', 'reportes')
+def _rep_kpis(ctx):
+    return ReporteController.get_kpis_periodo(*_periodo(ctx, 90))
+
+
+@escenario('reportes.huespedes_365d', 'reportes')
+def _rep_huespedes(ctx):
+    return ReporteController.get_huespedes_periodo(*_periodo(ctx, 365))
+
+
+# ============================================================ PDF
+def _df(ctx, clave, funcion, dias, numericas=()):
+    """DataFrame de entrada con las mismas conversiones que hace la vista de reportes"""
+    def cargar():
+        df = pd.DataFrame(funcion(*_periodo(ctx, dias)))
+        for col in numericas:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+        return df
+    return ctx.memo(clave, cargar)
+
+
+@escenario('pdf.ocupacion', 'pdf')
+def _pdf_ocupacion(ctx):
+    df = _df(ctx, 'ocupacion', ReporteController.get_ocupacion_periodo, 30,
+             ['habitaciones_ocupadas', 'reservas_activas', 'huespedes'])
+    pdf = PDFGenerator()
+    pdf.create_occupancy_report(df, *_periodo(ctx, 30))
+    return pdf.output()
+
+
+@escenario('pdf.ingresos', 'pdf')
+def _pdf_ingresos(ctx):
+    df = _df(ctx, 'ingresos', ReporteController.get_ingresos_periodo, 90,
+             ['ingresos', 'efectivo', 'tarjeta', 'transferencia', 'total_facturas'])
+    pdf = PDFGenerator()
+    pdf.create_income_report(df, *_periodo(ctx, 90))
+    return pdf.output()
+
+
+@escenario('pdf.reservas', 'pdf')
+def _pdf_reservas(ctx):
+    df = _df(ctx, 'reservas', ReporteController.get_reservas_periodo, 90, ['tarifa_total'])
+    pdf = PDFGenerator()
+    pdf.create_reservations_report(df, *_periodo(ctx, 90))
+    return pdf.output()
+
+
+@escenario('pdf.kpis', 'pdf')
+def _pdf_kpis(ctx):
+    kpis = ctx.memo('kpis', lambda: ReporteController.get_kpis_periodo(*_periodo(ctx, 90)))
+    dias = 91
+    revpar = float(kpis['ingresos_totales']) / (kpis['total_habitaciones'] * dias)
+    pdf = PDFGenerator()
+    pdf.create_kpi_report(kpis, *_periodo(ctx, 90), dias, revpar)
+    return pdf.output()
+
+
+@escenario('pdf.huespedes', 'pdf')
+def _pdf_huespedes(ctx):
+    df = _df(ctx, 'huespedes', ReporteController.get_huespedes_periodo, 365,
+             ['total_reservas', 'total_consumido'])
+    pdf = PDFGenerator()
+    pdf.create_guests_report(df, *_periodo(ctx, 365), df.nlargest(10, 'total_consumido'))
+    return pdf.output()
+
+
+@escenario('pdf.factura', 'pdf')
+def _pdf_factura(ctx):
+    def cargar():
+        with db.get_cursor() as cursor:
+            cursor.execute("""
+                SELECT f.*, h.nombre AS huesped_nombre, h.apellido AS huesped_apellido,
+                       h.numero_documento AS huesped_documento, r.codigo_reserva
+                FROM facturas f
+                JOIN huespedes h ON f.huesped_id = h.id
+                LEFT JOIN reservas r ON f.reserva_id = r.id
+                WHERE f.id = %s
+            """, (ctx.factura_id,))
+            factura = dict(cursor.fetchone())
+            cursor.execute("SELECT * FROM detalle_factura WHERE factura_id = %s", (ctx.factura_id,))
+            return factura, [dict(d) for d in cursor.fetchall()]
+
+    if ctx.factura_id is None:
+        raise RuntimeError("No hay facturas con detalle")
+    factura, detalle = ctx.memo('factura', cargar)
+    pdf = PDFGenerator()
+    pdf.create_invoice_pdf(factura, detalle)
+    return pdf.output()
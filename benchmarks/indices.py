@@ -0,0 +1,528 @@
+"""Asesor de índices parciales y de cobertura, y medición de los índices de
+recepción (database/migrations/004_indices_recepcion.sql).
+
+Uso (desde la raíz del proyecto, contra una BD con datos de scripts/generate_data.py):
+    python -m benchmarks.indices                          # propuestas para las sentencias más caras
+    python -m benchmarks.indices --sql propuestas.sql     # y las guarda como CREATE INDEX
+    python -m benchmarks.indices --desde sentencias.json --sin-escenarios
+    python -m benchmarks.indices --comparar -n 50 --vacuum --guardar indices.json
+
+Las sentencias salen de ``pg_stat_statements`` (si la extensión está instalada;
+las que llevan ``$1`` necesitan PostgreSQL 16 para ``EXPLAIN (GENERIC_PLAN)``),
+del registro de consultas mientras se ejecutan los escenarios (``db.stats``) y
+de los JSON exportados desde Administración → Rendimiento. De cada plan se
+toman los nodos de lectura de tablas: las igualdades con literal e ``IS NULL``
+del filtro se proponen como predicado del índice parcial, el resto de columnas
+comparadas (y las de join) como claves y, si la lectura devuelve pocas
+columnas, esas van en ``INCLUDE`` para que baste un Index Only Scan. Se
+descartan las propuestas que ya cubre un índice existente y, con la extensión
+``hypopg``, se comprueba el coste estimado con el índice hipotético.
+
+``--comparar`` mide las consultas de recepción con los índices de 004 y sin
+ellos (``DROP INDEX`` dentro de una transacción que se deshace): bloquea las
+tablas mientras dura, así que úsese sobre una base de pruebas.
+"""
+import argparse
+import json
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks import planes, runner
+from config.database import db
+
+# Índices de la migración 004 y las consultas de recepción a las que sirven
+INDICES_RECEPCION = ('idx_reservas_confirmadas', 'idx_alojamientos_abiertos')
+
+# Máximo de columnas en INCLUDE: con más, el índice se acerca al tamaño de la tabla
+MAX_INCLUIDAS = 3
+# Máximo de columnas clave propuestas
+MAX_CLAVES = 3
+# Sentencias de pg_stat_statements que se analizan (por tiempo total)
+LIMITE_STAT_STATEMENTS = 50
+
+_NODOS_LECTURA = ('Seq Scan', 'Index Scan', 'Index Only Scan', 'Bitmap Heap Scan')
+_CONDICIONES_JOIN = ('Hash Cond', 'Merge Cond', 'Join Filter')
+
+# Referencia a columna tal como la imprime EXPLAIN VERBOSE: (r.estado)::text
+_REF = r"\(?(?:(\w+)\.)?(\w+)\)?(?:::(?:character varying|timestamp without time zone|\w+))?"
+_IGUAL_LITERAL = re.compile(_REF + r"\s*=\s*'([^']*)'")
+_IGUAL_LISTA = re.compile(_REF + r"\s*=\s*ANY\s*\('\{([^}]*)\}'")
+_ES_NULL = re.compile(_REF + r"\s+IS NULL")
+_COMPARACION = re.compile(_REF + r"\s*(=|>=|<=|>|<)\s*(?![\s'])")
+_SALIDA_SIMPLE = re.compile(r"^(\w+)\.(\w+)$")
+
+
+def consultas_recepcion() -> Dict[str, str]:
+    """Consultas calientes de recepción que cubren los índices de 004"""
+    from controllers.reporte_controller import _SQL_KPIS_HOY
+    from models.reserva import _SQL_ACTIVAS, _SQL_ALOJADOS_AHORA
+
+    return {
+        'Reserva.get_activas': _SQL_ACTIVAS,
+        'Reserva.get_alojados_ahora': _SQL_ALOJADOS_AHORA,
+        'KPI reservas_futuras': _SQL_KPIS_HOY['reservas_futuras'],
+    }
+
+
+# ============================================================ SENTENCIAS
+def _tiene_extension(cursor, nombre: str) -> bool:
+    cursor.execute("SELECT 1 FROM pg_extension WHERE extname = %s", (nombre,))
+    return cursor.fetchone() is not None
+
+
+def sentencias_stat_statements(limite: int = LIMITE_STAT_STATEMENTS) -> List[Dict]:
+    """Sentencias más caras de pg_stat_statements (vacío si no está instalada)"""
+    with db.get_cursor() as cursor:
+        if not _tiene_extension(cursor, 'pg_stat_statements'):
+            return []
+        cursor.execute("SELECT current_setting('server_version_num')::int AS version")
+        version = cursor.fetchone()['version']
+        generico = version >= 160000
+        # PostgreSQL 12 todavía llama total_time al tiempo de ejecución
+        tiempo = 'total_exec_time' if version >= 130000 else 'total_time'
+        cursor.execute(f"""
+            SELECT query, calls AS llamadas, {tiempo} AS total_ms
+            FROM pg_stat_statements
+            WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+            ORDER BY {tiempo} DESC
+            LIMIT %s
+        """, (limite * 2,))
+        filas = cursor.fetchall()
+    sentencias = []
+    for f in filas:
+        sql = f['query']
+        if not planes._explicable(sql):
+            continue
+        con_parametros = re.search(r'\$\d', sql) is not None
+        if con_parametros and not generico:
+            continue
+        sentencias.append({'huella': sql, 'sql': sql, 'params': None, 'generico': con_parametros,
+                           'llamadas': f['llamadas'], 'total_ms': float(f['total_ms'])})
+    return sentencias[:limite]
+
+
+def sentencias_registro(capturadas: List[Tuple[str, str, object]]) -> List[Dict]:
+    """Sentencias capturadas por db.stats, con el tiempo que acumularon"""
+    tiempos = {t['huella']: t for t in db.stats.top(limite=len(capturadas) or 1)}
+    sentencias = []
+    for huella, sql, params in capturadas:
+        t = tiempos.get(huella, {})
+        sentencias.append({'huella': huella, 'sql': sql, 'params': params, 'generico': False,
+                           'llamadas': t.get('llamadas', 1), 'total_ms': t.get('total_ms', 0.0)})
+    return sentencias
+
+
+def _explain(cursor, sentencia: Dict, analizar: bool = False) -> Dict:
+    if analizar:
+        opciones = 'ANALYZE, BUFFERS, FORMAT JSON'
+    else:
+        opciones = 'GENERIC_PLAN, FORMAT JSON, VERBOSE' if sentencia['generico'] else 'FORMAT JSON, VERBOSE'
+    sql = sentencia['sql']
+    if isinstance(sql, bytes):
+        sql = sql.decode()
+    cursor.execute(f'EXPLAIN ({opciones}) ' + sql, sentencia['params'])
+    return cursor.fetchone()[0][0]['Plan']
+
+
+# ============================================================ ANÁLISIS DEL PLAN
+class _Catalogo:
+    """Columnas, tabla padre (particiones) e índices existentes, con caché"""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self._columnas = {}
+        self._padres = {}
+        self._indices = {}
+
+    def padre(self, relacion: str) -> str:
+        if relacion not in self._padres:
+            self.cursor.execute("SELECT pg_partition_root(%s::regclass)::text", (relacion,))
+            raiz = self.cursor.fetchone()[0]
+            self._padres[relacion] = raiz or relacion
+        return self._padres[relacion]
+
+    def columnas(self, tabla: str) -> set:
+        if tabla not in self._columnas:
+            self.cursor.execute("""
+                SELECT attname FROM pg_attribute
+                WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+            """, (tabla,))
+            self._columnas[tabla] = {f[0] for f in self.cursor.fetchall()}
+        return self._columnas[tabla]
+
+    def indices(self, tabla: str) -> List[Dict]:
+        if tabla not in self._indices:
+            self.cursor.execute("""
+                SELECT i.indexrelid::regclass::text,
+                       ARRAY(SELECT a.attname
+                             FROM unnest(i.indkey::int2[]) WITH ORDINALITY AS k(attnum, n)
+                             JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+                             ORDER BY k.n),
+                       i.indnkeyatts,
+                       pg_get_expr(i.indpred, i.indrelid)
+                FROM pg_index i
+                WHERE i.indrelid = %s::regclass
+            """, (tabla,))
+            self._indices[tabla] = [
+                {'nombre': n, 'claves': list(cols[:nk]), 'columnas': set(cols), 'predicado': pred or ''}
+                for n, cols, nk, pred in self.cursor.fetchall()
+            ]
+        return self._indices[tabla]
+
+
+def _relacion(nodo: Dict) -> str:
+    esquema = nodo.get('Schema', 'public')
+    return nodo['Relation Name'] if esquema == 'public' else f"{esquema}.{nodo['Relation Name']}"
+
+
+def _refs(texto: str, patron, alias: str, columnas: set):
+    """Coincidencias del patrón que son columnas de esta lectura"""
+    for m in patron.finditer(texto or ''):
+        prefijo, columna = m.group(1), m.group(2)
+        if prefijo not in (None, alias) or columna not in columnas:
+            continue
+        yield m, columna
+
+
+def _propuesta_de_nodo(nodo: Dict, condiciones_join: List[str], catalogo: _Catalogo) -> Optional[Dict]:
+    """Índice que serviría a una lectura del plan, o None"""
+    tabla = catalogo.padre(_relacion(nodo))
+    alias = nodo.get('Alias', nodo['Relation Name'])
+    columnas = catalogo.columnas(tabla)
+    filtro = ' AND '.join(filter(None, (nodo.get('Filter'), nodo.get('Recheck Cond'), nodo.get('Index Cond'))))
+    if ' OR ' in filtro:
+        return None
+
+    predicado, en_predicado = [], set()
+    for m, col in _refs(filtro, _IGUAL_LITERAL, alias, columnas):
+        predicado.append(f"{col} = '{m.group(3)}'")
+        en_predicado.add(col)
+    for m, col in _refs(filtro, _IGUAL_LISTA, alias, columnas):
+        valores = ', '.join(f"'{v.strip()}'" for v in m.group(3).split(','))
+        predicado.append(f"{col} IN ({valores})")
+        en_predicado.add(col)
+    for _, col in _refs(filtro, _ES_NULL, alias, columnas):
+        predicado.append(f"{col} IS NULL")
+        en_predicado.add(col)
+
+    igualdades, rangos = [], []
+    for m, col in _refs(' AND '.join(condiciones_join + [filtro]), _COMPARACION, alias, columnas):
+        if col in en_predicado:
+            continue
+        destino = igualdades if m.group(3) == '=' else rangos
+        if col not in igualdades and col not in rangos:
+            destino.append(col)
+    claves = (igualdades + rangos)[:MAX_CLAVES]
+
+    salida = nodo.get('Output', [])
+    simples = [_SALIDA_SIMPLE.match(s) for s in salida]
+    incluir = []
+    if all(simples):
+        leidas = [m.group(2) for m in simples if m.group(1) == alias and m.group(2) in columnas]
+        incluir = [c for c in dict.fromkeys(leidas) if c not in claves and c not in en_predicado]
+        if len(incluir) > MAX_INCLUIDAS:
+            incluir = []
+    if not claves:
+        if not predicado:
+            return None
+        claves = [incluir.pop(0)] if incluir else ['id'] if 'id' in columnas else []
+        if not claves:
+            return None
+    return {'tabla': tabla, 'claves': claves, 'incluir': incluir, 'predicado': sorted(set(predicado))}
+
+
+def _recorrer(nodo: Dict, condiciones_join: List[str], catalogo: _Catalogo,
+              grandes: Dict[str, int], propuestas: List[Dict]) -> None:
+    tipo = nodo['Node Type']
+    if tipo in _NODOS_LECTURA and nodo.get('Relation Name'):
+        tabla = catalogo.padre(_relacion(nodo))
+        # Seq Scan sobre tablas pequeñas es lo correcto; una lectura por índice que
+        # aún filtra o va al heap puede mejorar con un índice parcial o de cobertura
+        if tipo != 'Seq Scan' or tabla in grandes:
+            if tipo != 'Index Only Scan' or nodo.get('Filter'):
+                propuesta = _propuesta_de_nodo(nodo, condiciones_join, catalogo)
+                if propuesta:
+                    propuestas.append(propuesta)
+    propias = [nodo[c] for c in _CONDICIONES_JOIN if nodo.get(c)]
+    for hijo in nodo.get('Plans', []):
+        _recorrer(hijo, condiciones_join + propias, catalogo, grandes, propuestas)
+
+
+def _cubierta(propuesta: Dict, catalogo: _Catalogo) -> Optional[str]:
+    """Nombre del índice existente que ya sirve a la propuesta"""
+    for indice in catalogo.indices(propuesta['tabla']):
+        n = len(propuesta['claves'])
+        if indice['claves'][:n] != propuesta['claves']:
+            continue
+        if not set(propuesta['incluir']) <= indice['columnas']:
+            continue
+        columnas_predicado = {p.split()[0] for p in propuesta['predicado']}
+        if all(re.search(rf'\b{c}\b', indice['predicado']) for c in columnas_predicado):
+            return indice['nombre']
+    return None
+
+
+def ddl(propuesta: Dict) -> str:
+    nombre = f"idx_{propuesta['tabla']}_{'_'.join(propuesta['claves'])}"
+    if propuesta['predicado']:
+        nombre += '_parcial'
+    sql = f"CREATE INDEX {nombre[:63]} ON {propuesta['tabla']} ({', '.join(propuesta['claves'])})"
+    if propuesta['incluir']:
+        sql += f" INCLUDE ({', '.join(propuesta['incluir'])})"
+    if propuesta['predicado']:
+        sql += ' WHERE ' + ' AND '.join(propuesta['predicado'])
+    return sql
+
+
+def proponer(sentencias: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+    """(propuestas ordenadas por tiempo acumulado de sus sentencias, errores de EXPLAIN)"""
+    grandes = planes.tablas_grandes()
+    agrupadas: Dict[str, Dict] = {}
+    errores = []
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        catalogo = _Catalogo(cursor)
+        try:
+            for s in sentencias:
+                try:
+                    plan = _explain(cursor, s)
+                except Exception as e:
+                    conn.rollback()
+                    errores.append({'huella': s['huella'], 'error': str(e).strip().splitlines()[0]})
+                    continue
+                encontradas = []
+                _recorrer(plan, [], catalogo, grandes, encontradas)
+                for p in encontradas:
+                    existente = _cubierta(p, catalogo)
+                    clave = ddl(p)
+                    actual = agrupadas.setdefault(clave, dict(p, ddl=clave, cubierta_por=existente,
+                                                              sentencias=[], peso_ms=0.0, llamadas=0))
+                    if s['huella'] not in actual['sentencias']:
+                        actual['sentencias'].append(s['huella'])
+                        actual['peso_ms'] += s['total_ms']
+                        actual['llamadas'] += s['llamadas']
+        finally:
+            cursor.close()
+            conn.rollback()
+    propuestas = sorted(agrupadas.values(), key=lambda p: p['peso_ms'], reverse=True)
+    return propuestas, errores
+
+
+def validar_hypopg(propuestas: List[Dict], sentencias: List[Dict]) -> bool:
+    """Coste estimado de cada sentencia con el índice hipotético (requiere hypopg)"""
+    por_huella = {s['huella']: s for s in sentencias}
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'hypopg'")
+            if cursor.fetchone() is None:
+                return False
+            for p in propuestas:
+                if p['cubierta_por']:
+                    continue
+                antes = sum(_explain(cursor, por_huella[h])['Total Cost'] for h in p['sentencias'])
+                cursor.execute("SELECT indexrelid FROM hypopg_create_index(%s)", (p['ddl'],))
+                despues = sum(_explain(cursor, por_huella[h])['Total Cost'] for h in p['sentencias'])
+                cursor.execute("SELECT hypopg_reset()")
+                p['coste'] = {'antes': antes, 'despues': despues}
+        finally:
+            cursor.close()
+            conn.rollback()
+    return True
+
+
+def indices_sin_uso() -> List[Dict]:
+    """Índices que no se han usado desde el último reinicio de estadísticas"""
+    with db.get_cursor() as cursor:
+        cursor.execute("""
+            SELECT s.relname AS tabla, s.indexrelname AS indice,
+                   pg_relation_size(s.indexrelid) AS bytes
+            FROM pg_stat_user_indexes s
+            JOIN pg_index i ON i.indexrelid = s.indexrelid
+            WHERE s.schemaname = 'public' AND s.idx_scan = 0
+              AND NOT i.indisunique AND NOT i.indisprimary
+            ORDER BY bytes DESC
+        """)
+        return cursor.fetchall()
+
+
+# ============================================================ ANTES / DESPUÉS
+def _nodos(nodo: Dict, lista: List[Dict]) -> None:
+    lista.append(nodo)
+    for hijo in nodo.get('Plans', []):
+        _nodos(hijo, lista)
+
+
+def _medir_consulta(cursor, sql: str, repeticiones: int) -> Dict:
+    plan = _explain(cursor, {'sql': sql, 'params': None, 'generico': False}, analizar=True)
+    nodos = []
+    _nodos(plan, nodos)
+    cursor.execute(sql)
+    cursor.fetchall()
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        cursor.execute(sql)
+        cursor.fetchall()
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    return {
+        'p50_ms': round(runner.percentil(tiempos, 50), 3),
+        'p95_ms': round(runner.percentil(tiempos, 95), 3),
+        'buffers': plan.get('Shared Hit Blocks', 0) + plan.get('Shared Read Blocks', 0),
+        'lecturas': [f"{n['Node Type']}[{n.get('Index Name') or n.get('Relation Name')}]"
+                     for n in nodos if n.get('Relation Name')],
+        'solo_indice': {n['Index Name']: n.get('Heap Fetches', 0)
+                        for n in nodos if n['Node Type'] == 'Index Only Scan'},
+    }
+
+
+def vacuum(tablas=('reservas', 'alojamientos')) -> None:
+    """VACUUM ANALYZE: sin el mapa de visibilidad al día, Index Only Scan vuelve al heap"""
+    with db.get_connection() as conn:
+        conn.autocommit = True
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"VACUUM (ANALYZE) {', '.join(tablas)}")
+            cursor.close()
+        finally:
+            conn.autocommit = False
+
+
+def comparar(repeticiones: int) -> Dict:
+    """Mide las consultas de recepción con y sin los índices de 004"""
+    consultas = consultas_recepcion()
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT relname FROM pg_class WHERE relname = ANY(%s)", (list(INDICES_RECEPCION),))
+            faltan = set(INDICES_RECEPCION) - {f[0] for f in cursor.fetchall()}
+            if faltan:
+                return {'success': False,
+                        'error': f"Faltan {', '.join(sorted(faltan))}: aplica 004_indices_recepcion.sql"}
+            con = {n: _medir_consulta(cursor, sql, repeticiones) for n, sql in consultas.items()}
+            for indice in INDICES_RECEPCION:
+                cursor.execute(f"DROP INDEX {indice}")
+            sin = {n: _medir_consulta(cursor, sql, repeticiones) for n, sql in consultas.items()}
+        finally:
+            cursor.close()
+            conn.rollback()
+    return {'success': True, 'repeticiones': repeticiones,
+            'consultas': {n: {'sin': sin[n], 'con': con[n]} for n in consultas}}
+
+
+# ============================================================ CLI
+def _imprimir_comparacion(resultado: Dict) -> int:
+    print(f"   {'Consulta':<30}{'p50 sin':>10}{'p50 con':>10}{'p95 sin':>10}{'p95 con':>10}"
+          f"{'buffers':>16}")
+    codigo = 0
+    for nombre, r in resultado['consultas'].items():
+        sin, con = r['sin'], r['con']
+        usa = [i for i in con['solo_indice'] if i in INDICES_RECEPCION]
+        marca = '✅' if usa else '❌'
+        codigo |= not usa
+        print(f"{marca} {nombre:<30}{sin['p50_ms']:>9.2f} {con['p50_ms']:>9.2f} "
+              f"{sin['p95_ms']:>9.2f} {con['p95_ms']:>9.2f} {sin['buffers']:>7} → {con['buffers']:<7}")
+        print(f"      con: {' · '.join(con['lecturas'])}")
+        print(f"      sin: {' · '.join(sin['lecturas'])}")
+        for indice, heap in con['solo_indice'].items():
+            if heap:
+                print(f"      ⚠️ {indice}: {heap} Heap Fetches (ejecuta con --vacuum)")
+    return codigo
+
+
+def _imprimir_propuestas(propuestas: List[Dict], todas: bool) -> None:
+    nuevas = [p for p in propuestas if not p['cubierta_por']]
+    print(f"\n💡 {len(nuevas)} índices propuestos ({len(propuestas) - len(nuevas)} ya cubiertos)")
+    for p in propuestas:
+        if p['cubierta_por'] and not todas:
+            continue
+        estado = f"ya cubierto por {p['cubierta_por']}" if p['cubierta_por'] else 'nuevo'
+        print(f"\n   {p['ddl']};")
+        print(f"      {estado} · {len(p['sentencias'])} sentencias · {p['llamadas']:,} llamadas · "
+              f"{p['peso_ms']:,.1f} ms acumulados")
+        if 'coste' in p:
+            print(f"      coste estimado (hypopg): {p['coste']['antes']:,.0f} → {p['coste']['despues']:,.0f}")
+        for huella in p['sentencias'][:3]:
+            print(f"      · {' '.join(huella.split())[:110]}")
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.indices',
+                                     description="Asesor de índices parciales y de cobertura")
+    parser.add_argument('--comparar', action='store_true',
+                        help="Mide las consultas de recepción con y sin los índices de 004")
+    parser.add_argument('-n', '--repeticiones', type=int, default=30, help="Repeticiones por consulta (--comparar)")
+    parser.add_argument('--vacuum', action='store_true', help="VACUUM ANALYZE de reservas y alojamientos antes")
+    parser.add_argument('--guardar', type=Path, help="Guarda el resultado en JSON")
+    parser.add_argument('--desde', type=Path, action='append', default=[],
+                        help="JSON de sentencias exportado desde Administración (repetible)")
+    parser.add_argument('--sin-escenarios', action='store_true', help="No ejecuta los escenarios del banco")
+    parser.add_argument('--limite', type=int, default=LIMITE_STAT_STATEMENTS,
+                        help="Sentencias de pg_stat_statements que se analizan")
+    parser.add_argument('--sql', type=Path, help="Escribe los CREATE INDEX propuestos en este archivo")
+    parser.add_argument('--todas', action='store_true', help="Muestra también las propuestas ya cubiertas")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    if args.vacuum:
+        vacuum()
+
+    if args.comparar:
+        resultado = comparar(args.repeticiones)
+        if not resultado['success']:
+            print(f"❌ {resultado['error']}")
+            return 1
+        codigo = _imprimir_comparacion(resultado)
+        if args.guardar:
+            resultado['fecha'] = datetime.now().isoformat(timespec='seconds')
+            resultado['commit'] = runner._git_commit()
+            args.guardar.write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding='utf-8')
+            print(f"💾 Guardado en {args.guardar}")
+        return codigo
+
+    sentencias = sentencias_stat_statements(args.limite)
+    print(f"🔎 pg_stat_statements: {len(sentencias)} sentencias")
+    if not args.sin_escenarios:
+        from benchmarks.escenarios import Contexto
+        ctx = Contexto()
+        try:
+            capturadas = sentencias_registro(planes.capturar(ctx))
+        finally:
+            ctx.limpiar()
+        print(f"🔎 escenarios: {len(capturadas)} sentencias")
+        sentencias += capturadas
+    for ruta in args.desde:
+        sentencias += [dict(huella=h, sql=s, params=p, generico=False, llamadas=1, total_ms=0.0)
+                       for h, s, p in planes.cargar_exportadas(ruta)]
+
+    propuestas, errores = proponer(sentencias)
+    if validar_hypopg(propuestas, sentencias):
+        print("🧪 Propuestas comprobadas con hypopg")
+    _imprimir_propuestas(propuestas, args.todas)
+    for e in errores:
+        print(f"\n⚠️  EXPLAIN falló: {e['error']}\n   {' '.join(e['huella'].split())[:110]}")
+
+    sin_uso = indices_sin_uso()
+    if sin_uso:
+        print(f"\n🗑️  {len(sin_uso)} índices sin uso desde el último reinicio de estadísticas:")
+        for i in sin_uso:
+            print(f"   {i['tabla']}.{i['indice']} ({i['bytes'] / 1024 / 1024:,.1f} MB)")
+
+    nuevas = [p for p in propuestas if not p['cubierta_por']]
+    if args.sql:
+        args.sql.write_text(''.join(f"{p['ddl']};\n" for p in nuevas), encoding='utf-8')
+        print(f"\n💾 {len(nuevas)} CREATE INDEX en {args.sql}")
+    if args.guardar:
+        args.guardar.write_text(json.dumps({'propuestas': propuestas, 'sin_uso': sin_uso}, indent=2,
+                                           ensure_ascii=False, default=str), encoding='utf-8')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""Acceso síncrono vs async con latencia de red inyectada.
+
+Carga la misma "página" (reservas activas, alojados, habitaciones, KPIs del
+período y KPIs del panel) por tres caminos:
+  - sync: psycopg2, una conexión nueva por llamada y consultas en serie;
+  - async_serie: pool async de psycopg 3, pero esperando cada consulta;
+  - async_paralelo: pool async y todas las consultas a la vez (``adb.reunir``).
+
+La latencia se inyecta con un proxy TCP local que retrasa cada paquete RTT/2 en
+cada sentido, así que también cuesta el establecimiento de conexiones.
+
+Uso (desde la raíz del proyecto, contra una BD local):
+    python -m benchmarks.latencia --rtt 0,50 -n 10
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict
+
+from benchmarks import runner
+from config.database import db
+from config.database_async import adb
+from config.settings import settings
+from controllers.reporte_controller import ReporteController
+from models.habitacion import Habitacion
+from models.reserva import Reserva
+
+
+class ProxyLatencia:
+    """Proxy TCP local que retrasa cada paquete RTT/2 en cada sentido"""
+
+    def __init__(self, host: str, port: int, rtt_ms: float):
+        self.destino = (host, port)
+        self.retardo = rtt_ms / 2000
+        self._loop = asyncio.new_event_loop()
+        self._servidor = None
+
+    def iniciar(self):
+        listo = threading.Event()
+
+        async def arrancar():
+            self._servidor = await asyncio.start_server(self._atender, '127.0.0.1', 0)
+            listo.set()
+
+        threading.Thread(target=self._loop.run_forever, name='proxy-latencia', daemon=True).start()
+        asyncio.run_coroutine_threadsafe(arrancar(), self._loop)
+        listo.wait(5)
+        return self._servidor.sockets[0].getsockname()[:2]
+
+    def detener(self) -> None:
+        async def parar():
+            self._servidor.close()
+        asyncio.run_coroutine_threadsafe(parar(), self._loop).result(5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    async def _atender(self, cliente_r, cliente_w):
+        try:
+            servidor_r, servidor_w = await asyncio.open_connection(*self.destino)
+        except OSError:
+            cliente_w.close()
+            return
+        await asyncio.gather(self._bombear(cliente_r, servidor_w), self._bombear(servidor_r, cliente_w),
+                             return_exceptions=True)
+
+    async def _bombear(self, origen, destino):
+        # Cada paquete sale RTT/2 después de llegar, sin serializar los retardos
+        cola = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+
+        async def escribir():
+            while True:
+                llegada, datos = await cola.get()
+                espera = llegada + self.retardo - loop.time()
+                if espera > 0:
+                    await asyncio.sleep(espera)
+                if not datos:
+                    destino.close()
+                    return
+                destino.write(datos)
+                await destino.drain()
+
+        escritor = asyncio.ensure_future(escribir())
+        try:
+            while True:
+                datos = await origen.read(65536)
+                await cola.put((loop.time(), datos))
+                if not datos:
+                    break
+        except (ConnectionError, OSError):
+            await cola.put((loop.time(), b''))
+        await escritor
+
+
+def _periodo():
+    fin = date.today()
+    return fin - timedelta(days=30), fin
+
+
+def pagina_sync() -> None:
+    inicio, fin = _periodo()
+    Reserva.get_activas()
+    Reserva.get_alojados_ahora()
+    Habitacion.get_all()
+    ReporteController.get_kpis_periodo(inicio, fin)
+    ReporteController.get_kpis_hoy(completos=True)
+
+
+async def _pagina_async_serie() -> None:
+    inicio, fin = _periodo()
+    await Reserva.get_activas_async()
+    await Reserva.get_alojados_ahora_async()
+    await Habitacion.get_all_async()
+    await ReporteController.get_kpis_periodo_async(inicio, fin)
+    for nombre in ReporteController.kpis_hoy(True):
+        await ReporteController.get_kpi_hoy_async(nombre)
+
+
+def pagina_async_serie() -> None:
+    adb.ejecutar(_pagina_async_serie())
+
+
+def pagina_async_paralelo() -> None:
+    inicio, fin = _periodo()
+    adb.reunir(
+        Reserva.get_activas_async(),
+        Reserva.get_alojados_ahora_async(),
+        Habitacion.get_all_async(),
+        ReporteController.get_kpis_periodo_async(inicio, fin),
+        ReporteController.get_kpis_hoy_async(completos=True),
+    )
+
+
+MODOS = {
+    'sync': pagina_sync,
+    'async_serie': pagina_async_serie,
+    'async_paralelo': pagina_async_paralelo,
+}
+
+
+def medir(funcion, repeticiones: int) -> Dict:
+    funcion()  # calentamiento: abre el pool async, cachés del servidor
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - t0) * 1000)
+    return {
+        'n': repeticiones,
+        'mediana_ms': round(statistics.median(tiempos), 1),
+        'p95_ms': round(runner.percentil(tiempos, 95), 1),
+        'max_ms': round(max(tiempos), 1),
+    }
+
+
+def ejecutar_rtt(rtt_ms: float, repeticiones: int) -> Dict:
+    original = dict(db.base_params)
+    proxy = None
+    if rtt_ms:
+        proxy = ProxyLatencia(original['host'], int(original['port']), rtt_ms)
+        host, port = proxy.iniciar()
+        db.base_params.update(host=host, port=port)
+    try:
+        adb.cerrar_sync()  # el pool se reabre con los parámetros actuales
+        return {modo: medir(funcion, repeticiones) for modo, funcion in MODOS.items()}
+    finally:
+        adb.cerrar_sync()
+        db.base_params.clear()
+        db.base_params.update(original)
+        if proxy:
+            proxy.detener()
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.latencia',
+                                     description="Acceso síncrono vs async con latencia inyectada")
+    parser.add_argument('--rtt', default='0,50', help="RTT inyectado en ms; varios separados por coma")
+    parser.add_argument('-n', '--repeticiones', type=int, default=10)
+    parser.add_argument('--pool', type=int, default=settings.DB_ASYNC_POOL_MAX,
+                        help="Tamaño máximo del pool async")
+    parser.add_argument('--guardar', type=Path, help="Ruta del JSON con los resultados")
+    args = parser.parse_args(argv)
+    args.rtt = [float(r) for r in args.rtt.split(',') if r.strip()]
+    return args
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    settings.DB_ASYNC = False  # el modo sync no debe pasar por el puente async
+    adb.max_size = args.pool
+    resultados = {}
+    print(f"🌐 Página de {len(ReporteController.kpis_hoy(True)) + 4} consultas · "
+          f"pool async {adb.min_size}-{adb.max_size}")
+    print(f"\n{'RTT':>7}  {'modo':<16}{'mediana':>11}{'p95':>11}{'máx':>11}")
+    for rtt in args.rtt:
+        resultados[f"{rtt:g}ms"] = filas = ejecutar_rtt(rtt, args.repeticiones)
+        base = filas['sync']['mediana_ms']
+        for modo, r in filas.items():
+            mejora = f"  x{base / r['mediana_ms']:.1f}" if modo != 'sync' and r['mediana_ms'] else ''
+            print(f"{rtt:>5g}ms  {modo:<16}{r['mediana_ms']:>9.1f}ms{r['p95_ms']:>9.1f}ms"
+                  f"{r['max_ms']:>9.1f}ms{mejora}")
+    if args.guardar:
+        args.guardar.write_text(json.dumps(resultados, indent=2), encoding='utf-8')
+        print(f"\n💾 Resultados guardados en {args.guardar}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
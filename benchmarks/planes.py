@@ -0,0 +1,247 @@
+"""Regresiones de planes de ejecución: captura las sentencias SQL que ejecuta el
+proyecto, las pasa por ``EXPLAIN (FORMAT JSON)`` y compara forma del plan y
+coste estimado contra una instantánea guardada.
+
+Uso (desde la raíz del proyecto, contra una BD con datos de scripts/generate_data.py):
+    python -m benchmarks.planes --actualizar          # genera/acepta benchmarks/planes.json
+    python -m benchmarks.planes                       # sale con código 1 si hay regresiones
+
+La instantánea no viene en el repositorio (los costes dependen del volumen de
+datos): la primera ejecución contra una BD ha de ser con ``--actualizar``.
+    python -m benchmarks.planes --desde sentencias.json   # sentencias exportadas desde Administración
+
+Las sentencias se capturan interceptando los cursores de ``DatabaseConnection``
+(``db.stats``) mientras se ejecutan una vez todos los escenarios del banco de
+pruebas y las lecturas de los modelos. Las consultas que solo lanzan las vistas
+se cubren exportándolas desde la pestaña "⚡ Rendimiento" tras navegar la app.
+
+Falla cuando una sentencia empieza a hacer Seq Scan sobre una tabla grande o
+cuando su coste estimado crece más de la tolerancia.
+"""
+import argparse
+import json
+import sys
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from benchmarks import ROOT, runner
+from config.database import db
+
+SNAPSHOT = ROOT / 'benchmarks' / 'planes.json'
+
+# Tablas con al menos estas filas estimadas (pg_class.reltuples) cuentan como grandes
+TABLA_GRANDE_FILAS = 10_000
+# Crecimiento relativo del coste total estimado que cuenta como regresión
+TOLERANCIA_COSTE = 0.5
+# Por debajo de este coste no se compara: planes triviales con ruido de estadísticas
+COSTE_MINIMO = 50.0
+
+_EXPLICABLES = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE')
+# Consultas del propio arnés o de catálogo, no del proyecto
+_IGNORAR = ('PG_STAT_ACTIVITY', 'PG_CLASS', 'PG_STAT_STATEMENTS')
+
+
+def _lecturas_modelos(ctx) -> None:
+    """Lecturas de modelos y controladores que no cubren los escenarios"""
+    from controllers.huesped_controller import HuespedController
+    from models.factura import Factura
+    from models.habitacion import Habitacion
+    from models.huesped import Huesped
+    from models.reserva import Reserva
+    from models.usuario import Usuario
+    from utils import cache
+
+    # Recepción: las consultas a las que apuntan los índices parciales de 004. Sin
+    # caché, para que lleguen a la BD aunque un escenario ya las haya resuelto
+    cache.purgar()
+    Reserva.get_activas()
+    Reserva.get_alojados_ahora()
+    Reserva.get_historial()
+    Reserva.get_by_fechas(ctx.hoy - timedelta(days=30), ctx.hoy)
+    Habitacion.get_all()
+    Habitacion.get_by_id(ctx.habitaciones[0]['id'])
+    Huesped.get_by_id(ctx.huesped_id)
+    HuespedController.buscar('Pérez')
+    Usuario.get_all()
+    Usuario.get_by_id(ctx.usuario_id)
+    Factura.get_por_rango_fechas(ctx.hoy - timedelta(days=30), ctx.hoy)
+    if ctx.factura_id:
+        Factura.get_by_id(ctx.factura_id)
+
+
+def _explicable(huella: str) -> bool:
+    mayus = huella.upper()
+    return mayus.startswith(_EXPLICABLES) and not any(t in mayus for t in _IGNORAR)
+
+
+def capturar(ctx) -> List[Tuple[str, str, object]]:
+    """Ejecuta la carga una vez y devuelve (huella, sql, params) por sentencia distinta"""
+    db.stats.habilitado = True
+    db.stats.guardar_params = True
+    db.stats.reiniciar()
+    for esc in runner.escenarios():
+        runner.medir(esc, ctx, 1, 0)
+    _lecturas_modelos(ctx)
+    return [m for m in db.stats.muestras() if _explicable(m[0])]
+
+
+def cargar_exportadas(ruta: Path) -> List[Tuple[str, str, object]]:
+    """Sentencias exportadas desde Administración → Rendimiento"""
+    filas = [f for f in json.loads(ruta.read_text(encoding='utf-8')) if _explicable(f['huella'])]
+    # Sin DB_CAPTURE_PARAMS la exportación no trae parámetros: esas sentencias no se pueden explicar
+    sin_params = [f for f in filas if f['params'] is None and '%s' in f['sql']]
+    if sin_params:
+        print(f"⚠️  {ruta}: {len(sin_params)} sentencias sin parámetros (exporta con DB_CAPTURE_PARAMS=true)")
+    # JSON no distingue tuplas de listas: ``IN %s`` necesita tupla
+    return [(f['huella'], f['sql'], _como_tupla(f['params'])) for f in filas if f not in sin_params]
+
+
+def _como_tupla(params):
+    if isinstance(params, list):
+        return tuple(tuple(p) if isinstance(p, list) else p for p in params)
+    return params
+
+
+def tablas_grandes() -> Dict[str, int]:
+    with db.get_cursor() as cursor:
+        cursor.execute("""
+            SELECT c.relname, c.reltuples::bigint AS filas
+            FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE c.relkind IN ('r', 'p') AND n.nspname = 'public' AND c.reltuples >= %s
+        """, (TABLA_GRANDE_FILAS,))
+        return {f['relname']: f['filas'] for f in cursor.fetchall()}
+
+
+def _recorrer(nodo: Dict, forma: List[str], seq_scans: List[str]) -> None:
+    tipo = nodo['Node Type']
+    relacion = nodo.get('Relation Name')
+    etiqueta = tipo
+    if nodo.get('Index Name'):
+        etiqueta += f"[{nodo['Index Name']}]"
+    elif relacion:
+        etiqueta += f"[{relacion}]"
+    forma.append(etiqueta)
+    if tipo == 'Seq Scan' and relacion:
+        seq_scans.append(relacion)
+    for hijo in nodo.get('Plans', []):
+        _recorrer(hijo, forma, seq_scans)
+
+
+def explicar(sql: str, params) -> Dict:
+    """Plan estimado (sin ANALYZE: las escrituras no se ejecutan) resumido"""
+    with db.get_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0][0]['Plan']
+        finally:
+            cursor.close()
+            conn.rollback()
+    forma, seq_scans = [], []
+    _recorrer(plan, forma, seq_scans)
+    return {
+        'coste': plan['Total Cost'],
+        'filas': plan['Plan Rows'],
+        'forma': forma,
+        'seq_scans': sorted(set(seq_scans)),
+    }
+
+
+def analizar(sentencias: List[Tuple[str, str, object]]) -> Dict[str, Dict]:
+    planes = {}
+    for huella, sql, params in sentencias:
+        try:
+            planes[huella] = explicar(sql, params)
+        except Exception as e:
+            planes[huella] = {'error': str(e).strip().splitlines()[0]}
+    return planes
+
+
+def comparar(planes: Dict[str, Dict], base: Dict[str, Dict], grandes: Dict[str, int],
+             tolerancia: float) -> List[Dict]:
+    """Problemas por sentencia; 'regresion' marca los que hacen fallar la ejecución"""
+    problemas = []
+    for huella, plan in sorted(planes.items()):
+        if 'error' in plan:
+            problemas.append({'huella': huella, 'motivo': f"EXPLAIN falló: {plan['error']}", 'regresion': False})
+            continue
+        anterior = base.get(huella, {})
+        permitidos = set(anterior.get('seq_scans', []))
+        for tabla in plan['seq_scans']:
+            if tabla in grandes and tabla not in permitidos:
+                problemas.append({'huella': huella, 'regresion': True,
+                                  'motivo': f"Seq Scan sobre {tabla} (~{grandes[tabla]:,} filas)"})
+        if 'coste' not in anterior:
+            continue
+        if plan['coste'] >= COSTE_MINIMO and plan['coste'] > anterior['coste'] * (1 + tolerancia):
+            problemas.append({'huella': huella, 'regresion': True,
+                              'motivo': f"coste {anterior['coste']:.0f} → {plan['coste']:.0f}"})
+        elif plan['forma'] != anterior.get('forma'):
+            problemas.append({'huella': huella, 'regresion': False,
+                              'motivo': "cambió la forma del plan: " + ' > '.join(plan['forma'][:6])})
+    return problemas
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.planes',
+                                     description="Regresiones de planes de ejecución")
+    parser.add_argument('--snapshot', type=Path, default=SNAPSHOT, help="Instantánea de planes de referencia")
+    parser.add_argument('--actualizar', action='store_true',
+                        help="Guarda los planes actuales como referencia (acepta los Seq Scan actuales)")
+    parser.add_argument('--desde', type=Path, action='append', default=[],
+                        help="JSON de sentencias exportado desde Administración (repetible)")
+    parser.add_argument('--solo-exportadas', action='store_true',
+                        help="No ejecuta los escenarios; usa solo las sentencias de --desde")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_COSTE,
+                        help="Crecimiento relativo del coste que cuenta como regresión (0.5 = 50%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    if not args.actualizar and not args.snapshot.exists():
+        # Sin referencia todo Seq Scan sobre una tabla grande contaría como regresión
+        print(f"❌ No existe la instantánea {args.snapshot}: genérala primero con --actualizar "
+              f"(en la rama de referencia y contra la misma BD)")
+        return 2
+    sentencias = []
+    if not args.solo_exportadas:
+        from benchmarks.escenarios import Contexto
+        ctx = Contexto()
+        try:
+            sentencias = capturar(ctx)
+        finally:
+            ctx.limpiar()
+    for ruta in args.desde:
+        sentencias += cargar_exportadas(ruta)
+
+    planes = analizar(sentencias)
+    grandes = tablas_grandes()
+    print(f"🔎 {len(planes)} sentencias · tablas grandes: "
+          + (', '.join(f"{t} (~{n:,})" for t, n in sorted(grandes.items())) or 'ninguna'))
+
+    base = json.loads(args.snapshot.read_text(encoding='utf-8')) if args.snapshot.exists() else {}
+    if args.actualizar:
+        base.update({h: p for h, p in planes.items() if 'error' not in p})
+        args.snapshot.write_text(json.dumps(base, indent=2, ensure_ascii=False, sort_keys=True), encoding='utf-8')
+        print(f"💾 Instantánea actualizada en {args.snapshot}")
+        return 0
+
+    problemas = comparar(planes, base, grandes, args.tolerancia)
+    for p in problemas:
+        marca = '❌' if p['regresion'] else '⚠️ '
+        print(f"\n{marca} {p['motivo']}\n   {p['huella'][:160]}")
+    nuevas = [h for h in planes if h not in base]
+    if nuevas:
+        print(f"\nℹ️  {len(nuevas)} sentencias sin referencia (guárdalas con --actualizar)")
+    regresiones = [p for p in problemas if p['regresion']]
+    if regresiones:
+        print(f"\n❌ {len(regresiones)} regresiones de plan")
+        return 1
+    print("\n✅ Sin regresiones de plan")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
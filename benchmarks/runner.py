@@ -0,0 +1,219 @@
+"""Motor del banco de pruebas: registro de escenarios, medición, resultados JSON
+y comparación contra una ejecución anterior con umbrales de regresión."""
+import json
+import platform
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from benchmarks import ROOT
+
+RESULTADOS_DIR = ROOT / 'benchmarks' / 'resultados'
+
+# Una diferencia menor que esto (ms) nunca cuenta como regresión: es ruido
+UMBRAL_ABSOLUTO_MS = 0.5
+
+
+@dataclass
+class Escenario:
+    nombre: str
+    grupo: str
+    ejecutar: Callable
+    # preparar(ctx) -> kwargs para una iteración; su tiempo no se mide
+    preparar: Optional[Callable] = None
+    repeticiones: Optional[int] = None
+    umbral: Optional[float] = None
+    descripcion: str = ''
+
+
+_ESCENARIOS: Dict[str, Escenario] = {}
+
+
+def escenario(nombre: str, grupo: str, preparar: Callable = None,
+              repeticiones: int = None, umbral: float = None):
+    """Registra una función como escenario del banco de pruebas"""
+    def decorador(funcion):
+        _ESCENARIOS[nombre] = Escenario(nombre, grupo, funcion, preparar, repeticiones, umbral,
+                                        (funcion.__doc__ or '').strip())
+        return funcion
+    return decorador
+
+
+def escenarios(filtro: List[str] = None) -> List[Escenario]:
+    """Escenarios registrados cuyo nombre o grupo empieza por alguno de los filtros"""
+    todos = list(_ESCENARIOS.values())
+    if not filtro:
+        return todos
+    return [e for e in todos if any(e.nombre.startswith(f) or e.grupo == f for f in filtro)]
+
+
+def percentil(valores: List[float], p: float) -> float:
+    ordenados = sorted(valores)
+    k = (len(ordenados) - 1) * p / 100
+    i = int(k)
+    if i + 1 >= len(ordenados):
+        return ordenados[-1]
+    return ordenados[i] + (ordenados[i + 1] - ordenados[i]) * (k - i)
+
+
+class _ContadorConsultas:
+    """Cuenta las consultas ejecutadas durante la parte medida de cada iteración"""
+
+    def __init__(self, stats):
+        self.stats = stats
+        self.activo = False
+        self.total = 0
+
+    def __call__(self, huella, duracion_ms):
+        if self.activo:
+            self.total += 1
+
+    def __enter__(self):
+        self.stats.agregar_oyente(self)
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.quitar_oyente(self)
+        return False
+
+
+def medir(esc: Escenario, ctx, repeticiones: int, calentamiento: int) -> Dict:
+    """Mide ``repeticiones`` iteraciones tras ``calentamiento``. Las iteraciones que
+    fallan (excepción o ``{'success': False}``) se cuentan en ``errores`` y no
+    entran en los tiempos: un fallo rápido no debe pasar por una mejora."""
+    from config.database import db
+
+    if repeticiones < 1:
+        raise ValueError(f"{esc.nombre}: hacen falta al menos 1 repetición (recibido {repeticiones})")
+    tiempos = []
+    errores = 0
+    consultas = 0
+    primer_error = None
+    with _ContadorConsultas(db.stats) as contador:
+        for i in range(calentamiento + repeticiones):
+            kwargs = esc.preparar(ctx) if esc.preparar else {}
+            contador.total = 0
+            contador.activo = i >= calentamiento
+            t0 = time.perf_counter()
+            try:
+                resultado = esc.ejecutar(ctx, **kwargs)
+                fallo = None
+                # Los controladores informan errores con {'success': False}
+                if isinstance(resultado, dict) and resultado.get('success') is False:
+                    fallo = resultado.get('error') or "{'success': False}"
+            except Exception as e:
+                fallo = f"{type(e).__name__}: {e}"
+            duracion = (time.perf_counter() - t0) * 1000
+            contador.activo = False
+            if fallo:
+                errores += 1
+                primer_error = primer_error or str(fallo)
+            elif i >= calentamiento:
+                tiempos.append(duracion)
+                consultas += contador.total
+
+    medida = {'grupo': esc.grupo, 'n': len(tiempos), 'errores': errores}
+    if primer_error:
+        medida['primer_error'] = primer_error
+    if not tiempos:
+        # Ninguna iteración correcta: sin estadísticas
+        return dict(medida, **{c: None for c in ('min_ms', 'media_ms', 'mediana_ms', 'p95_ms',
+                                                  'max_ms', 'desv_ms', 'consultas')})
+    return dict(
+        medida,
+        min_ms=round(min(tiempos), 3),
+        media_ms=round(statistics.fmean(tiempos), 3),
+        mediana_ms=round(statistics.median(tiempos), 3),
+        p95_ms=round(percentil(tiempos, 95), 3),
+        max_ms=round(max(tiempos), 3),
+        desv_ms=round(statistics.pstdev(tiempos), 3),
+        consultas=round(consultas / len(tiempos), 1),
+    )
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def metadatos(ctx, repeticiones: int, calentamiento: int) -> Dict:
+    from config.settings import settings
+    return {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'maquina': platform.node(),
+        'bd': f"{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}",
+        'datos': ctx.volumen,
+        'repeticiones': repeticiones,
+        'calentamiento': calentamiento,
+    }
+
+
+def guardar(resultados: Dict, ruta: Path = None) -> Path:
+    if ruta is None:
+        RESULTADOS_DIR.mkdir(parents=True, exist_ok=True)
+        ruta = RESULTADOS_DIR / f"bench_{datetime.now():%Y%m%d_%H%M%S}.json"
+    ruta.write_text(json.dumps(resultados, indent=2, ensure_ascii=False, default=str), encoding='utf-8')
+    return ruta
+
+
+def comparar(actual: Dict, base: Dict, umbral: float) -> List[Dict]:
+    """Compara medianas escenario por escenario; marca regresión si empeora más del
+    umbral o si el escenario tuvo errores en esta ejecución"""
+    filas = []
+    for nombre, res in actual['escenarios'].items():
+        anterior = base.get('escenarios', {}).get(nombre)
+        if not anterior:
+            continue
+        limite = _ESCENARIOS[nombre].umbral if nombre in _ESCENARIOS and _ESCENARIOS[nombre].umbral else umbral
+        fila = {
+            'escenario': nombre,
+            'base_ms': anterior['mediana_ms'],
+            'actual_ms': res['mediana_ms'],
+            'cambio': None,
+            'umbral': limite,
+            'errores': res['errores'],
+            'regresion': res['errores'] > 0,
+        }
+        if res['mediana_ms'] is not None and anterior['mediana_ms'] is not None:
+            delta_ms = res['mediana_ms'] - anterior['mediana_ms']
+            ratio = res['mediana_ms'] / anterior['mediana_ms'] if anterior['mediana_ms'] else 1.0
+            fila['cambio'] = ratio - 1
+            fila['regresion'] = fila['regresion'] or (ratio - 1 > limite and delta_ms > UMBRAL_ABSOLUTO_MS)
+        filas.append(fila)
+    return filas
+
+
+def _ms(valor: Optional[float]) -> str:
+    return f"{valor:>9.2f}ms" if valor is not None else f"{'—':>11}"
+
+
+def imprimir_resultados(resultados: Dict) -> None:
+    print(f"\n{'Escenario':<42}{'n':>5}{'mediana':>11}{'p95':>11}{'máx':>11}{'consultas':>11}{'errores':>9}")
+    print('-' * 100)
+    for nombre, r in resultados['escenarios'].items():
+        consultas = r['consultas'] if r['consultas'] is not None else '—'
+        print(f"{nombre:<42}{r['n']:>5}{_ms(r['mediana_ms'])}{_ms(r['p95_ms'])}"
+              f"{_ms(r['max_ms'])}{consultas:>11}{r['errores']:>9}")
+        if r.get('primer_error'):
+            print(f"   ❌ {r['primer_error']}")
+
+
+def imprimir_comparacion(filas: List[Dict]) -> None:
+    print(f"\n{'Escenario':<42}{'base':>11}{'actual':>11}{'cambio':>10}{'umbral':>9}")
+    print('-' * 85)
+    for f in filas:
+        marca = ''
+        if f['regresion']:
+            marca = f"  ❌ {f['errores']} ERRORES" if f['errores'] else '  ❌ REGRESIÓN'
+        cambio = f"{f['cambio']:>+9.1%}" if f['cambio'] is not None else f"{'—':>9}"
+        print(f"{f['escenario']:<42}{_ms(f['base_ms'])}{_ms(f['actual_ms'])}"
+              f"{cambio}{f['umbral']:>9.0%}{marca}")
@@ -0,0 +1,108 @@
+"""Tablero de habitaciones: cuánto tarda un cambio en llegar al mapa en memoria
+y cuántas relecturas cuesta un check-in de grupo.
+
+Cada ronda pasa N habitaciones a 'limpieza' en una sola transacción (como un
+check-in/out de grupo) y mide, desde el commit, cuánto tarda ``utils.tablero``
+en reflejarlas todas y en cuántos lotes las releyó; después las devuelve a su
+estado. Sin los avisos de la migración 006 el tablero cae a sondeo y la
+latencia pasa a ser del orden de TABLERO_POLL_SECONDS.
+
+Uso (desde la raíz del proyecto, contra una BD local; deja los estados como estaban):
+    python -m benchmarks.tablero --habitaciones 40 --rondas 5
+"""
+import argparse
+import sys
+import time
+from typing import Dict, List
+
+from benchmarks import runner
+from config.database import db
+from config.settings import settings
+from utils import catalogo
+from utils.tablero import tablero
+
+
+def _esperar(ids: List[int], estado_id: int, limite_s: float) -> float:
+    """Segundos hasta que todas las casillas tienen el estado; inf si no llegan"""
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < limite_s:
+        _, casillas = tablero.instantanea()
+        if all(casillas.get(i) and casillas[i].estado_id == estado_id for i in ids):
+            return time.perf_counter() - t0
+        time.sleep(0.005)
+    return float('inf')
+
+
+def _cambiar(ids: List[int], estados: Dict[int, int]) -> None:
+    with db.get_cursor() as cursor:
+        for habitacion_id in ids:
+            cursor.execute("UPDATE habitaciones SET estado_id = %s WHERE id = %s",
+                           (estados[habitacion_id], habitacion_id))
+
+
+def medir(habitaciones: int, rondas: int, limite_s: float) -> Dict:
+    tablero.instantanea()
+    espera = time.perf_counter()
+    while tablero.modo is None and time.perf_counter() - espera < 10:
+        time.sleep(0.05)
+
+    limpieza = catalogo.actual().estado_id('limpieza')
+    _, casillas = tablero.instantanea()
+    elegidas = [c for c in sorted(casillas.values(), key=lambda c: c.id)
+                if c.activa and c.estado_id != limpieza][:habitaciones]
+    if not elegidas:
+        raise SystemExit("❌ No hay habitaciones activas: carga datos con scripts/generate_data.py")
+    ids = [c.id for c in elegidas]
+    originales = {c.id: c.estado_id for c in elegidas}
+
+    latencias, lotes = [], []
+    try:
+        for _ in range(rondas):
+            lotes_antes = tablero.lotes
+            _cambiar(ids, {i: limpieza for i in ids})
+            latencias.append(_esperar(ids, limpieza, limite_s))
+            lotes.append(tablero.lotes - lotes_antes)
+            _cambiar(ids, originales)
+            for habitacion_id in ids:
+                _esperar([habitacion_id], originales[habitacion_id], limite_s)
+    finally:
+        _cambiar(ids, originales)
+
+    medidas = [l for l in latencias if l != float('inf')]
+    return {
+        'modo': tablero.modo,
+        'habitaciones': len(ids),
+        'rondas': rondas,
+        'perdidas': len(latencias) - len(medidas),
+        'p50_ms': round(runner.percentil(medidas, 50) * 1000, 1) if medidas else None,
+        'max_ms': round(max(medidas) * 1000, 1) if medidas else None,
+        'lotes_por_ronda': lotes,
+        'ventana_ms': settings.TABLERO_COALESCE_MS,
+    }
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.tablero',
+                                     description="Latencia y agrupación de avisos del tablero de habitaciones")
+    parser.add_argument('--habitaciones', type=int, default=40, help="Habitaciones que cambian a la vez")
+    parser.add_argument('--rondas', type=int, default=5)
+    parser.add_argument('--limite', type=float, default=30.0, help="Segundos máximos de espera por ronda")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    r = medir(args.habitaciones, args.rondas, args.limite)
+    print(f"🗺️ Tablero en modo {r['modo']}: {r['habitaciones']} habitaciones por ronda, "
+          f"ventana de agrupación {r['ventana_ms']} ms")
+    if r['p50_ms'] is not None:
+        print(f"   commit → tablero: p50 {r['p50_ms']:,.1f} ms · máx {r['max_ms']:,.1f} ms")
+    print(f"   relecturas por ronda: {r['lotes_por_ronda']}")
+    if r['perdidas']:
+        print(f"\n❌ {r['perdidas']} rondas no llegaron al tablero en {args.limite:.0f} s")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
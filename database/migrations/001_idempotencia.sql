@@ -0,0 +1,17 @@
+-- =====================================================
+-- 001 · Claves de idempotencia
+-- Respuesta registrada de las operaciones que no deben repetirse
+-- (crear reserva, check-in, crear factura) por clave del cliente.
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS claves_idempotencia (
+    operacion VARCHAR(50) NOT NULL,
+    clave VARCHAR(100) NOT NULL,
+    huella_solicitud CHAR(64) NOT NULL,
+    respuesta JSONB,                    -- NULL mientras la operación está en curso
+    creado_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    expira_en TIMESTAMP NOT NULL,
+    PRIMARY KEY (operacion, clave)
+);
+
+CREATE INDEX IF NOT EXISTS idx_claves_idempotencia_expira ON claves_idempotencia(expira_en);
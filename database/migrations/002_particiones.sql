@@ -0,0 +1,115 @@
+-- =====================================================
+-- 002 · Soporte para particionar por mes
+-- reservas (fecha_check_in), facturas y detalle_factura (fecha_emision),
+-- logs_actividad (created_at). La conversión de cada tabla la hace
+-- scripts/particionar.py; esta migración solo deja preparado el esquema y
+-- no cambia nada en una base sin particionar.
+-- =====================================================
+
+-- detalle_factura se particiona por la fecha de su factura
+ALTER TABLE detalle_factura ADD COLUMN IF NOT EXISTS fecha_emision TIMESTAMP;
+
+UPDATE detalle_factura d
+SET fecha_emision = COALESCE(f.fecha_emision, CURRENT_TIMESTAMP)
+FROM facturas f
+WHERE f.id = d.factura_id AND d.fecha_emision IS NULL;
+
+UPDATE detalle_factura SET fecha_emision = CURRENT_TIMESTAMP WHERE fecha_emision IS NULL;
+
+CREATE OR REPLACE FUNCTION asignar_fecha_detalle_factura()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.fecha_emision IS NULL THEN
+        SELECT fecha_emision INTO NEW.fecha_emision FROM facturas WHERE id = NEW.factura_id;
+        NEW.fecha_emision := COALESCE(NEW.fecha_emision, CURRENT_TIMESTAMP);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_fecha_detalle_factura ON detalle_factura;
+CREATE TRIGGER trigger_fecha_detalle_factura
+    BEFORE INSERT ON detalle_factura
+    FOR EACH ROW
+    EXECUTE PROCEDURE asignar_fecha_detalle_factura();
+
+-- Una estancia no supera un año: las consultas de solapamiento acotan así
+-- fecha_check_in por abajo y pueden descartar particiones antiguas
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'reservas_estancia_maxima') THEN
+        ALTER TABLE reservas ADD CONSTRAINT reservas_estancia_maxima
+            CHECK (fecha_check_out - fecha_check_in <= 365) NOT VALID;
+    END IF;
+END $$;
+
+-- Al mover una fila de partición (cambio de fecha de check-in) se disparan los
+-- BEFORE INSERT de la partición destino: el código existente se conserva
+CREATE OR REPLACE FUNCTION generar_codigo_reserva()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.codigo_reserva IS NULL THEN
+        NEW.codigo_reserva := 'RES' || LPAD(nextval('reservas_codigo_seq')::TEXT, 6, '0');
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Unicidad global de una columna en una tabla particionada (los UNIQUE de una
+-- tabla particionada tienen que incluir la clave de partición).
+-- Argumentos: tabla padre, columna.
+CREATE OR REPLACE FUNCTION verificar_unicidad_global()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_valor TEXT;
+    v_existe BOOLEAN;
+BEGIN
+    EXECUTE format('SELECT ($1).%I::text', TG_ARGV[1]) INTO v_valor USING NEW;
+    IF v_valor IS NULL THEN
+        RETURN NEW;
+    END IF;
+    -- Serializa las inserciones concurrentes del mismo valor hasta el commit
+    PERFORM pg_advisory_xact_lock(hashtext(TG_ARGV[0] || ':' || v_valor));
+    EXECUTE format('SELECT EXISTS (SELECT 1 FROM %I WHERE %I = $1 AND id <> $2)', TG_ARGV[0], TG_ARGV[1])
+        INTO v_existe USING v_valor, NEW.id;
+    IF v_existe THEN
+        RAISE EXCEPTION 'Valor duplicado en %.%: %', TG_ARGV[0], TG_ARGV[1], v_valor
+            USING ERRCODE = 'unique_violation';
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Crea la partición mensual de p_mes si la tabla está particionada y aún no
+-- existe. Las filas de ese mes que hubieran caído en la partición por defecto
+-- se mueven antes de engancharla. Devuelve TRUE si la creó.
+CREATE OR REPLACE FUNCTION crear_particion_mensual(p_tabla TEXT, p_mes DATE)
+RETURNS BOOLEAN AS $$
+DECLARE
+    v_clave TEXT;
+    v_desde DATE := date_trunc('month', p_mes)::date;
+    v_hasta DATE := (date_trunc('month', p_mes) + INTERVAL '1 month')::date;
+    v_particion TEXT := p_tabla || '_p' || to_char(p_mes, 'YYYYMM');
+    v_defecto TEXT := p_tabla || '_default';
+BEGIN
+    SELECT a.attname INTO v_clave
+    FROM pg_partitioned_table pt
+    JOIN pg_attribute a ON a.attrelid = pt.partrelid AND a.attnum = pt.partattrs[0]
+    WHERE pt.partrelid = to_regclass(p_tabla);
+
+    IF v_clave IS NULL OR to_regclass(v_particion) IS NOT NULL THEN
+        RETURN FALSE;
+    END IF;
+
+    EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', v_particion, p_tabla);
+    IF to_regclass(v_defecto) IS NOT NULL THEN
+        EXECUTE format(
+            'WITH movidas AS (DELETE FROM %I WHERE %I >= %L AND %I < %L RETURNING *) '
+            'INSERT INTO %I SELECT * FROM movidas',
+            v_defecto, v_clave, v_desde, v_clave, v_hasta, v_particion);
+    END IF;
+    EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                   p_tabla, v_particion, v_desde, v_hasta);
+    RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,49 @@
+-- =====================================================
+-- 003 · Archivo en frío
+-- Estancias cerradas y facturas antiguas que scripts/archivar.py saca de
+-- las tablas operativas. Mismas columnas que el original más la ejecución
+-- que las archivó; los reportes las unen solo si el período lo necesita.
+-- =====================================================
+
+CREATE SCHEMA IF NOT EXISTS archivo;
+
+CREATE TABLE IF NOT EXISTS archivo.ejecuciones (
+    id SERIAL PRIMARY KEY,
+    fecha_corte DATE NOT NULL,          -- se archivó lo anterior a esta fecha
+    iniciada_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    terminada_en TIMESTAMP,
+    filas JSONB,                        -- filas movidas por tabla
+    exportada_en TIMESTAMP,
+    usuario_id INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS archivo.reservas (LIKE public.reservas);
+CREATE TABLE IF NOT EXISTS archivo.historial_estados_reserva (LIKE public.historial_estados_reserva);
+CREATE TABLE IF NOT EXISTS archivo.alojamientos (LIKE public.alojamientos);
+CREATE TABLE IF NOT EXISTS archivo.consumos_servicios (LIKE public.consumos_servicios);
+CREATE TABLE IF NOT EXISTS archivo.facturas (LIKE public.facturas);
+CREATE TABLE IF NOT EXISTS archivo.detalle_factura (LIKE public.detalle_factura);
+
+ALTER TABLE archivo.reservas ADD COLUMN IF NOT EXISTS ejecucion_id INTEGER;
+ALTER TABLE archivo.historial_estados_reserva ADD COLUMN IF NOT EXISTS ejecucion_id INTEGER;
+ALTER TABLE archivo.alojamientos ADD COLUMN IF NOT EXISTS ejecucion_id INTEGER;
+ALTER TABLE archivo.consumos_servicios ADD COLUMN IF NOT EXISTS ejecucion_id INTEGER;
+ALTER TABLE archivo.facturas ADD COLUMN IF NOT EXISTS ejecucion_id INTEGER;
+ALTER TABLE archivo.detalle_factura ADD COLUMN IF NOT EXISTS ejecucion_id INTEGER;
+
+CREATE UNIQUE INDEX IF NOT EXISTS archivo_reservas_id ON archivo.reservas(id);
+CREATE INDEX IF NOT EXISTS archivo_reservas_fechas ON archivo.reservas(fecha_check_in, fecha_check_out);
+CREATE INDEX IF NOT EXISTS archivo_reservas_fecha_reserva ON archivo.reservas(fecha_reserva);
+CREATE INDEX IF NOT EXISTS archivo_historial_reserva ON archivo.historial_estados_reserva(reserva_id);
+CREATE INDEX IF NOT EXISTS archivo_alojamientos_reserva ON archivo.alojamientos(reserva_id);
+CREATE INDEX IF NOT EXISTS archivo_consumos_alojamiento ON archivo.consumos_servicios(alojamiento_id);
+CREATE UNIQUE INDEX IF NOT EXISTS archivo_facturas_id ON archivo.facturas(id);
+CREATE INDEX IF NOT EXISTS archivo_facturas_fecha ON archivo.facturas(fecha_emision);
+CREATE INDEX IF NOT EXISTS archivo_detalle_factura ON archivo.detalle_factura(factura_id);
+
+CREATE INDEX IF NOT EXISTS archivo_reservas_ejecucion ON archivo.reservas(ejecucion_id);
+CREATE INDEX IF NOT EXISTS archivo_facturas_ejecucion ON archivo.facturas(ejecucion_id);
+CREATE INDEX IF NOT EXISTS archivo_historial_ejecucion ON archivo.historial_estados_reserva(ejecucion_id);
+CREATE INDEX IF NOT EXISTS archivo_alojamientos_ejecucion ON archivo.alojamientos(ejecucion_id);
+CREATE INDEX IF NOT EXISTS archivo_consumos_ejecucion ON archivo.consumos_servicios(ejecucion_id);
+CREATE INDEX IF NOT EXISTS archivo_detalle_ejecucion ON archivo.detalle_factura(ejecucion_id);
@@ -0,0 +1,18 @@
+-- =====================================================
+-- 004 · Índices parciales para las consultas de recepción
+-- Medidos con: python -m benchmarks.indices --comparar
+-- =====================================================
+
+-- Reservas confirmadas: Reserva.get_activas (rango por fecha_check_in ya
+-- ordenado, fecha_check_out se filtra dentro del índice) y el KPI
+-- reservas_futuras (COUNT con Index Only Scan). Solo indexa las confirmadas,
+-- una fracción pequeña de la tabla.
+CREATE INDEX IF NOT EXISTS idx_reservas_confirmadas
+    ON reservas (fecha_check_in, fecha_check_out)
+    WHERE estado = 'confirmada';
+
+-- Alojamientos abiertos (huéspedes en casa): Reserva.get_alojados_ahora
+-- resuelve el join y las columnas que lee de alojamientos sin ir a la tabla.
+CREATE INDEX IF NOT EXISTS idx_alojamientos_abiertos
+    ON alojamientos (reserva_id) INCLUDE (id, fecha_check_in)
+    WHERE fecha_check_out IS NULL;
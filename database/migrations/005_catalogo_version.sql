@@ -0,0 +1,42 @@
+-- =====================================================
+-- 005 · Versión de los catálogos
+-- utils/catalogo.py carga en memoria los catálogos pequeños (tipos y estados
+-- de habitación, características, servicios, temporadas) y, cada
+-- CATALOG_CHECK_SECONDS, compara su versión con esta fila: cualquier escritura
+-- en esas tablas (desde la app, la API o psql) la incrementa y todos los
+-- procesos recargan. También se avisa por NOTIFY en el canal 'catalogo'.
+-- =====================================================
+
+CREATE TABLE IF NOT EXISTS catalogo_version (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),   -- una sola fila
+    version BIGINT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO catalogo_version (id) VALUES (TRUE) ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION catalogo_cambiado() RETURNS TRIGGER AS $$
+DECLARE
+    nueva BIGINT;
+BEGIN
+    UPDATE catalogo_version
+    SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    RETURNING version INTO nueva;
+    PERFORM pg_notify('catalogo', nueva::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    tabla TEXT;
+BEGIN
+    FOREACH tabla IN ARRAY ARRAY['tipos_habitacion', 'estados_habitacion',
+                                 'caracteristicas_habitacion', 'servicios', 'temporadas']
+    LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', 'catalogo_version_' || tabla, tabla);
+        EXECUTE format('CREATE TRIGGER %I AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I '
+                       'FOR EACH STATEMENT EXECUTE PROCEDURE catalogo_cambiado()',
+                       'catalogo_version_' || tabla, tabla);
+    END LOOP;
+END $$;
@@ -0,0 +1,40 @@
+-- =====================================================
+-- 006 · Avisos de cambios para el tablero de habitaciones
+-- utils/tablero.py escucha el canal 'habitaciones' (LISTEN) y, por cada
+-- aviso, vuelve a leer solo las habitaciones indicadas. El aviso lleva el id
+-- de la habitación; PostgreSQL descarta los repetidos dentro de una misma
+-- transacción, así que un check-in de grupo avisa una vez por habitación.
+-- =====================================================
+
+CREATE OR REPLACE FUNCTION avisar_cambio_habitacion() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'habitaciones' THEN
+        IF TG_OP = 'DELETE' THEN
+            PERFORM pg_notify('habitaciones', OLD.id::text);
+        ELSE
+            PERFORM pg_notify('habitaciones', NEW.id::text);
+        END IF;
+    ELSE
+        -- alojamientos: la habitación asignada (la anterior también, si cambió)
+        IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.habitacion_asignada_id IS NOT NULL THEN
+            PERFORM pg_notify('habitaciones', OLD.habitacion_asignada_id::text);
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.habitacion_asignada_id IS NOT NULL THEN
+            PERFORM pg_notify('habitaciones', NEW.habitacion_asignada_id::text);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tablero_habitaciones ON habitaciones;
+CREATE TRIGGER tablero_habitaciones
+    AFTER INSERT OR DELETE OR UPDATE OF numero, piso, tipo_habitacion_id, estado_id, activa
+    ON habitaciones
+    FOR EACH ROW EXECUTE PROCEDURE avisar_cambio_habitacion();
+
+DROP TRIGGER IF EXISTS tablero_alojamientos ON alojamientos;
+CREATE TRIGGER tablero_alojamientos
+    AFTER INSERT OR DELETE OR UPDATE OF habitacion_asignada_id, fecha_check_out
+    ON alojamientos
+    FOR EACH ROW EXECUTE PROCEDURE avisar_cambio_habitacion();
@@ -0,0 +1,12 @@
+-- =====================================================
+-- 007 · Tarifas especiales en el catálogo
+-- utils/tarifas.py compone la tarifa de cada noche con tarifas_temporada,
+-- que pasa a formar parte del catálogo en memoria (utils/catalogo.py): como
+-- el resto de tablas de la migración 005, cualquier escritura sube la versión
+-- del catálogo y los procesos recargan. Requiere 005_catalogo_version.sql.
+-- =====================================================
+
+DROP TRIGGER IF EXISTS catalogo_version_tarifas_temporada ON tarifas_temporada;
+CREATE TRIGGER catalogo_version_tarifas_temporada
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON tarifas_temporada
+    FOR EACH STATEMENT EXECUTE PROCEDURE catalogo_cambiado();
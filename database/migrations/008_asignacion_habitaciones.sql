@@ -0,0 +1,19 @@
+-- =====================================================
+-- 008 · Reservas con habitación fija
+-- utils/asignacion.py reparte las reservas futuras entre las habitaciones de
+-- su tipo para no dejar huecos de una o dos noches. Las marcadas aquí (el
+-- huésped pidió esa habitación, una conexión entre habitaciones, etc.)
+-- conservan la suya y cuentan como ocupación fija.
+-- =====================================================
+
+ALTER TABLE reservas ADD COLUMN IF NOT EXISTS habitacion_fija BOOLEAN NOT NULL DEFAULT FALSE;
+
+-- Los reportes unen reservas con archivo.reservas por nombre de columna
+-- (utils/archivo.py): el archivo necesita la columna aunque aún no se haya
+-- vuelto a archivar nada
+DO $$
+BEGIN
+    IF to_regclass('archivo.reservas') IS NOT NULL THEN
+        ALTER TABLE archivo.reservas ADD COLUMN IF NOT EXISTS habitacion_fija BOOLEAN NOT NULL DEFAULT FALSE;
+    END IF;
+END $$;
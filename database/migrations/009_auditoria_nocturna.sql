@@ -0,0 +1,79 @@
+-- =====================================================
+-- 009 · Auditoría nocturna
+-- scripts/auditoria_nocturna.py cierra cada día de operación: marca los
+-- no-shows, carga la noche de cada estancia en curso, corrige el estado de
+-- las habitaciones y consolida los hechos del día. Cada paso es idempotente:
+-- volver a ejecutar la auditoría de un día no duplica nada.
+-- Sin claves foráneas hacia reservas/alojamientos: con 002 reservas pasa a
+-- estar particionada y 003 mueve estancias al archivo.
+-- Un no-show libera la habitación: verificar_disponibilidad deja de contarlo,
+-- igual que ya hacen la cartera de tarifas, el calendario y la previsión.
+-- =====================================================
+
+-- Una fila por estancia y noche (la factura sigue saliendo de reservas.tarifa_total)
+CREATE TABLE IF NOT EXISTS cargos_noche (
+    id SERIAL PRIMARY KEY,
+    reserva_id INTEGER NOT NULL,
+    alojamiento_id INTEGER NOT NULL,
+    habitacion_id INTEGER NOT NULL,
+    fecha DATE NOT NULL,
+    importe DECIMAL(10,2) NOT NULL,
+    auditoria_id INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (reserva_id, fecha)
+);
+CREATE INDEX IF NOT EXISTS idx_cargos_noche_fecha ON cargos_noche(fecha);
+
+-- Hechos consolidados por día de operación
+CREATE TABLE IF NOT EXISTS hechos_diarios (
+    fecha DATE PRIMARY KEY,
+    habitaciones_activas INTEGER NOT NULL,
+    habitaciones_ocupadas INTEGER NOT NULL,
+    ocupacion_pct DECIMAL(5,2),
+    llegadas INTEGER NOT NULL,
+    salidas INTEGER NOT NULL,
+    no_shows INTEGER NOT NULL,
+    cancelaciones INTEGER NOT NULL,
+    ingresos_alojamiento DECIMAL(12,2) NOT NULL,
+    ingresos_servicios DECIMAL(12,2) NOT NULL,
+    adr DECIMAL(10,2),
+    revpar DECIMAL(10,2),
+    auditoria_id INTEGER,
+    actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS auditorias_nocturnas (
+    id SERIAL PRIMARY KEY,
+    fecha DATE NOT NULL,                -- día de operación que se cierra
+    iniciada_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    terminada_en TIMESTAMP,
+    pasos JSONB,                        -- filas y milisegundos por paso
+    usuario_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_auditorias_nocturnas_fecha ON auditorias_nocturnas(fecha);
+
+-- Mismo criterio que schema.sql, sin contar los no-shows (el huésped no llegó:
+-- las noches que quedaban vuelven a estar a la venta)
+CREATE OR REPLACE FUNCTION verificar_disponibilidad(
+    p_habitacion_id INTEGER,
+    p_check_in DATE,
+    p_check_out DATE,
+    p_reserva_id_excluir INTEGER DEFAULT NULL
+) RETURNS BOOLEAN AS $$
+DECLARE
+    conflictos INTEGER;
+BEGIN
+    SELECT COUNT(*) INTO conflictos
+    FROM reservas r
+    WHERE r.habitacion_id = p_habitacion_id
+        AND r.estado NOT IN ('cancelada', 'completada', 'no_show')
+        AND (p_reserva_id_excluir IS NULL OR r.id != p_reserva_id_excluir)
+        AND (
+            (p_check_in BETWEEN r.fecha_check_in AND r.fecha_check_out - INTERVAL '1 day')
+            OR (p_check_out - INTERVAL '1 day' BETWEEN r.fecha_check_in AND r.fecha_check_out - INTERVAL '1 day')
+            OR (r.fecha_check_in BETWEEN p_check_in AND p_check_out - INTERVAL '1 day')
+        );
+    
+    RETURN conflictos = 0;
+END;
+$$ LANGUAGE plpgsql;
@@ -18,7 +18,8 @@ SELECT
 FROM reservas r
 WHERE r.estado IN ('confirmada', 'completada')
     AND r.fecha_check_in <= CURRENT_DATE
-    AND r.fecha_check_out > CURRENT_DATE;
+    AND r.fecha_check_out > CURRENT_DATE
+    AND r.fecha_check_in > CURRENT_DATE - 365;  -- estancia máxima: descarta particiones antiguas
 
 
 
@@ -51,17 +52,20 @@ WITH ocupacion_actual AS (
     WHERE estado IN ('confirmada', 'completada')
         AND fecha_check_in <= CURRENT_DATE
         AND fecha_check_out > CURRENT_DATE
+        AND fecha_check_in > CURRENT_DATE - 365
 ),
 ingresos_mes AS (
     SELECT COALESCE(SUM(total), 0) as ingresos_mes_actual
     FROM facturas
     WHERE estado = 'pagada'
-        AND DATE_TRUNC('month', fecha_emision) = DATE_TRUNC('month', CURRENT_DATE)
+        AND fecha_emision >= DATE_TRUNC('month', CURRENT_DATE)::date
+        AND fecha_emision < (DATE_TRUNC('month', CURRENT_DATE) + INTERVAL '1 month')::date
 ),
 estancia_promedio AS (
     SELECT COALESCE(AVG(fecha_check_out - fecha_check_in), 0) as promedio_dias
     FROM reservas
     WHERE fecha_check_out >= CURRENT_DATE - INTERVAL '30 days'
+        AND fecha_check_in >= CURRENT_DATE - 395
         AND estado = 'completada'
 )
 SELECT 
@@ -78,11 +82,11 @@ SELECT
 
     (SELECT COUNT(*) 
      FROM reservas 
-     WHERE fecha_reserva::date = CURRENT_DATE) as reservas_hoy,
+     WHERE fecha_reserva >= CURRENT_DATE AND fecha_reserva < CURRENT_DATE + 1) as reservas_hoy,
 
     (SELECT COUNT(*) 
      FROM huespedes 
-     WHERE created_at::date = CURRENT_DATE) as nuevos_huespedes_hoy,
+     WHERE created_at >= CURRENT_DATE AND created_at < CURRENT_DATE + 1) as nuevos_huespedes_hoy,
 
     (SELECT ingresos_mes_actual FROM ingresos_mes) as ingresos_mes_actual,
 
@@ -0,0 +1,87 @@
+"""Archivo en frío: mueve estancias cerradas y facturas antiguas a las tablas del
+esquema archivo y las exporta a Parquet/Feather.
+
+Requiere database/migrations/003_archivo.sql. Uso (desde la raíz del proyecto):
+    python scripts/archivar.py ejecutar --solo-contar        # cuánto se movería
+    python scripts/archivar.py ejecutar --meses 24 --usuario 1
+    python scripts/archivar.py exportar --formato parquet     # ejecuciones aún no exportadas
+    python scripts/archivar.py estado
+"""
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'src'))
+
+
+def ejecutar(args) -> int:
+    from utils import archivo
+
+    resultado = archivo.archivar(args.meses, args.lote, solo_contar=args.solo_contar, usuario_id=args.usuario)
+    if not resultado['success']:
+        print(f"❌ {resultado['error']}")
+        return 1
+    filas = ', '.join(f"{tabla} {n:,}" for tabla, n in resultado['filas'].items() if n)
+    if resultado.get('solo_contar'):
+        print(f"🔎 Anterior a {resultado['corte']}: {filas or 'nada que archivar'}")
+        return 0
+    print(f"✅ Ejecución {resultado['ejecucion_id']} (corte {resultado['corte']}): {filas or 'nada que archivar'} "
+          f"en {resultado['lotes']} lotes, {resultado['duracion_s']} s")
+    return 0
+
+
+def exportar(args) -> int:
+    from utils import archivo
+
+    resultado = archivo.exportar(args.directorio, args.formato, args.ejecucion)
+    if not resultado['success']:
+        print(f"❌ {resultado['error']}")
+        return 1
+    if not resultado['archivos']:
+        print("Nada pendiente de exportar")
+    for a in resultado['archivos']:
+        print(f"💾 {a['archivo']} ({a['filas']:,} filas)")
+    return 0
+
+
+def estado(args) -> int:
+    from utils import archivo
+
+    for e in archivo.ejecuciones():
+        filas = sum((e['filas'] or {}).values())
+        situacion = 'exportada' if e['exportada_en'] else ('terminada' if e['terminada_en'] else 'incompleta')
+        print(f"#{e['id']} corte {e['fecha_corte']} · {e['iniciada_en']:%Y-%m-%d %H:%M} · {filas:,} filas · {situacion}")
+    return 0
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Archivo en frío de estancias y facturas antiguas")
+    sub = parser.add_subparsers(dest='accion', required=True)
+
+    p = sub.add_parser('ejecutar', help="Mueve al archivo lo cerrado antes del corte")
+    p.add_argument('--meses', type=int, help="Antigüedad mínima (ARCHIVE_AFTER_MONTHS)")
+    p.add_argument('--lote', type=int, help="Reservas por transacción (ARCHIVE_BATCH_SIZE)")
+    p.add_argument('--solo-contar', action='store_true', help="Solo informa, no mueve nada")
+    p.add_argument('--usuario', type=int, help="Usuario al que se atribuye en logs_actividad")
+    p.set_defaults(funcion=ejecutar)
+
+    p = sub.add_parser('exportar', help="Vuelca las ejecuciones a archivos columnares comprimidos")
+    p.add_argument('--directorio', type=Path, help="Por defecto ARCHIVE_EXPORT_DIR")
+    p.add_argument('--formato', choices=['parquet', 'feather'], help="Por defecto ARCHIVE_EXPORT_FORMAT")
+    p.add_argument('--ejecucion', type=int, help="Solo esta ejecución (aunque ya se exportara)")
+    p.set_defaults(funcion=exportar)
+
+    p = sub.add_parser('estado', help="Últimas ejecuciones")
+    p.set_defaults(funcion=estado)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    return args.funcion(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""Auditoría nocturna: marca no-shows, carga las noches de las estancias en curso,
+corrige el estado de las habitaciones y consolida los hechos del día.
+
+Requiere database/migrations/009_auditoria_nocturna.sql. Uso (desde la raíz del proyecto):
+    python scripts/auditoria_nocturna.py ejecutar                    # cierra el día de hoy
+    python scripts/auditoria_nocturna.py ejecutar --fecha 2025-06-01 --usuario 1
+    python scripts/auditoria_nocturna.py ejecutar --pasos hechos_diarios
+    python scripts/auditoria_nocturna.py estado
+"""
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'src'))
+
+
+def ejecutar(args) -> int:
+    from utils import auditoria
+
+    resultado = auditoria.auditar(args.fecha, args.usuario, args.pasos)
+    for paso, filas in resultado['pasos'].items():
+        detalle = ', '.join(f"{clave} {n:,}" for clave, n in filas.items() if clave != 'ms')
+        print(f"  {paso}: {detalle} ({filas['ms']} ms)")
+    if not resultado['success']:
+        print(f"❌ {resultado['error']}")
+        return 1
+    print(f"✅ Auditoría {resultado['auditoria_id']} del {resultado['fecha']} en {resultado['duracion_s']} s")
+    return 0
+
+
+def estado(args) -> int:
+    from utils import auditoria
+
+    for a in auditoria.auditorias(args.limite):
+        situacion = 'terminada' if a['terminada_en'] else 'incompleta'
+        hechos = (f" · ocupación {a['ocupacion_pct']}% · ADR {a['adr']} · RevPAR {a['revpar']}"
+                  if a['ocupacion_pct'] is not None else '')
+        print(f"#{a['id']} día {a['fecha']} · {a['iniciada_en']:%Y-%m-%d %H:%M} · {situacion}{hechos}")
+    return 0
+
+
+def _parse_args(argv=None):
+    from utils.auditoria import PASOS
+
+    parser = argparse.ArgumentParser(description="Auditoría nocturna del día de operación")
+    sub = parser.add_subparsers(dest='accion', required=True)
+
+    p = sub.add_parser('ejecutar', help="Cierra un día; se puede repetir sin duplicar nada")
+    p.add_argument('--fecha', type=date.fromisoformat, help="Día de operación (AAAA-MM-DD, por defecto hoy)")
+    p.add_argument('--pasos', nargs='+', choices=list(PASOS), help="Solo estos pasos (por defecto todos)")
+    p.add_argument('--usuario', type=int, help="Usuario al que se atribuye en logs_actividad")
+    p.set_defaults(funcion=ejecutar)
+
+    p = sub.add_parser('estado', help="Últimas auditorías")
+    p.add_argument('--limite', type=int, default=20)
+    p.set_defaults(funcion=estado)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    return args.funcion(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,489 @@
+"""Generador de datos sintéticos para pruebas de rendimiento.
+
+Llena el esquema con un hotel grande (habitaciones, años de historia, huéspedes,
+reservas con estacionalidad y cancelaciones, alojamientos, consumos, facturas
+con detalle y logs de actividad) y lo carga con COPY. Con la misma semilla y la
+misma fecha base el resultado es idéntico, así que las pruebas de rendimiento
+entre ramas son comparables.
+
+Uso (desde la raíz del proyecto, con seeds.sql ya cargado):
+    python scripts/generate_data.py --escala 1 --semilla 42
+    python scripts/generate_data.py --escala 5 --fecha-base 2025-06-01 --truncar
+    python scripts/generate_data.py --escala 0.1 --csv datos_sinteticos   # sin BD
+"""
+import argparse
+import csv
+import json
+import random
+import sys
+import tempfile
+import time
+import unicodedata
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'src'))
+
+# Valores a escala 1 (se multiplican por --escala salvo que se indiquen explícitamente)
+BASE_HABITACIONES = 200
+BASE_HUESPEDES = 20000
+
+# Demanda relativa y factor de precio por mes (temporadas de seeds.sql)
+ESTACIONALIDAD = {
+    1: (0.80, 0.85), 2: (0.70, 0.85), 3: (0.75, 0.85), 4: (0.90, 1.00),
+    5: (0.95, 1.00), 6: (1.20, 1.35), 7: (1.30, 1.35), 8: (1.30, 1.35),
+    9: (1.05, 1.00), 10: (0.95, 1.00), 11: (0.90, 1.00), 12: (1.15, 1.50),
+}
+
+# Catálogo de seeds.sql (se usa en modo --csv, sin conexión)
+TIPOS_SEED = {1: (1, 85.0), 2: (2, 125.0), 3: (4, 250.0), 4: (5, 350.0), 5: (6, 500.0)}
+SERVICIOS_SEED = {1: ('Desayuno buffet', 15.0, 'restaurante'), 2: ('Almuerzo', 25.0, 'restaurante'),
+                  3: ('Cena', 35.0, 'restaurante'), 4: ('Lavandería', 8.0, 'lavandería'),
+                  5: ('Spa - Masaje', 60.0, 'spa'), 6: ('Minibar - Agua', 3.0, 'minibar'),
+                  7: ('Minibar - Refresco', 4.0, 'minibar'), 8: ('Minibar - Cerveza', 5.0, 'minibar'),
+                  9: ('Gimnasio', 10.0, 'spa'), 10: ('Parking', 12.0, 'servicio')}
+USUARIOS_SEED = [1, 2, 3]
+
+MEZCLA_TIPOS = {1: 0.20, 2: 0.45, 3: 0.15, 4: 0.15, 5: 0.05}
+
+NOMBRES = ['Juan', 'María', 'Carlos', 'Ana', 'Roberto', 'Laura', 'Diego', 'Sofía', 'Luis', 'Lucía',
+           'Jorge', 'Valeria', 'Pedro', 'Camila', 'Miguel', 'Daniela', 'José', 'Gabriela', 'Andrés',
+           'Paula', 'John', 'Emily', 'Pierre', 'Claire', 'Hans', 'Anna', 'Marco', 'Giulia', 'Kenji', 'Yuki']
+APELLIDOS = ['Pérez', 'González', 'Rodríguez', 'Martínez', 'Sánchez', 'Fernández', 'López', 'Díaz',
+             'Torres', 'Ramírez', 'Flores', 'Vargas', 'Castillo', 'Rojas', 'Mendoza', 'Quispe',
+             'Huamán', 'Chávez', 'Smith', 'Johnson', 'Dubois', 'Müller', 'Rossi', 'Tanaka', 'Silva']
+PAISES = [('Peruana', 'Perú', ['Lima', 'Cusco', 'Arequipa', 'Trujillo', 'Piura'], 0.55),
+          ('Estadounidense', 'Estados Unidos', ['New York', 'Miami', 'Chicago'], 0.12),
+          ('Argentina', 'Argentina', ['Buenos Aires', 'Córdoba'], 0.07),
+          ('Chilena', 'Chile', ['Santiago', 'Valparaíso'], 0.07),
+          ('Española', 'España', ['Madrid', 'Barcelona'], 0.06),
+          ('Francesa', 'Francia', ['París', 'Lyon'], 0.05),
+          ('Alemana', 'Alemania', ['Berlín', 'Múnich'], 0.04),
+          ('Japonesa', 'Japón', ['Tokio', 'Osaka'], 0.04)]
+MOTIVOS_CANCELACION = ['Cambio de planes', 'Emergencia familiar', 'Cambio de destino',
+                       'Vuelo cancelado', 'Motivos de trabajo', 'Encontró otra tarifa']
+METODOS_PAGO = ['tarjeta', 'efectivo', 'transferencia']
+
+# Tablas en orden de carga (respeta las claves foráneas)
+TABLAS = {
+    'habitaciones': ['id', 'numero', 'piso', 'tipo_habitacion_id', 'estado_id', 'tarifa_base',
+                     'tiene_vista', 'tiene_balcon', 'metros_cuadrados', 'activa'],
+    'huespedes': ['id', 'tipo_documento', 'numero_documento', 'nombre', 'apellido', 'fecha_nacimiento',
+                  'nacionalidad', 'email', 'telefono', 'ciudad', 'pais', 'es_vip', 'created_at'],
+    'reservas': ['id', 'huesped_id', 'fecha_reserva', 'fecha_check_in', 'fecha_check_out',
+                 'numero_adultos', 'numero_ninos', 'estado', 'habitacion_id', 'tarifa_total',
+                 'deposito_requerido', 'deposito_pagado', 'fecha_cancelacion', 'motivo_cancelacion',
+                 'created_by', 'created_at'],
+    'historial_estados_reserva': ['reserva_id', 'estado_anterior', 'estado_nuevo', 'fecha_cambio',
+                                  'usuario_id', 'motivo'],
+    'alojamientos': ['id', 'reserva_id', 'habitacion_asignada_id', 'fecha_check_in', 'fecha_check_out',
+                     'llave_entregada', 'llave_devuelta', 'usuario_check_in', 'usuario_check_out',
+                     'created_at'],
+    'consumos_servicios': ['alojamiento_id', 'servicio_id', 'cantidad', 'precio_unitario',
+                           'fecha_consumo', 'notas'],
+    'facturas': ['id', 'numero_factura', 'huesped_id', 'reserva_id', 'fecha_emision', 'fecha_pago',
+                 'subtotal', 'impuestos', 'total', 'metodo_pago', 'estado'],
+    'detalle_factura': ['factura_id', 'concepto', 'cantidad', 'precio_unitario', 'importe', 'tipo'],
+    'logs_actividad': ['usuario_id', 'accion', 'entidad', 'entidad_id', 'detalles', 'ip_address',
+                       'created_at'],
+}
+
+# Tablas que vacía --truncar (los catálogos de seeds.sql se conservan)
+TABLAS_TRUNCAR = ['logs_actividad', 'detalle_factura', 'facturas', 'consumos_servicios',
+                  'alojamientos', 'historial_estados_reserva', 'reservas', 'huespedes',
+                  'habitacion_caracteristicas', 'habitaciones']
+
+
+def _ascii(texto: str) -> str:
+    return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode().lower()
+
+
+class Tabla:
+    """Acumula las filas de una tabla en un CSV temporal (memoria acotada)"""
+
+    def __init__(self, nombre: str, columnas: list):
+        self.nombre = nombre
+        self.columnas = columnas
+        self.archivo = tempfile.TemporaryFile('w+', encoding='utf-8', newline='')
+        self.writer = csv.writer(self.archivo)
+        self.filas = 0
+
+    def agregar(self, *valores) -> None:
+        self.writer.writerow(['' if v is None else v for v in valores])
+        self.filas += 1
+
+
+class GeneradorDatos:
+    def __init__(self, args, catalogo: dict):
+        self.rng = random.Random(args.semilla)
+        self.args = args
+        self.fecha_base = args.fecha_base
+        self.inicio = self.fecha_base - timedelta(days=int(args.anios * 365))
+        self.fin = self.fecha_base + timedelta(days=args.dias_futuro)
+        self.tipos = catalogo['tipos']
+        self.servicios = catalogo['servicios']
+        self.usuarios = catalogo['usuarios']
+        self.ids = dict(catalogo['max_ids'])
+        self.piso_inicial = catalogo['max_piso'] + 1
+        self.tablas = {nombre: Tabla(nombre, columnas) for nombre, columnas in TABLAS.items()}
+        self.habitaciones = []
+        self.num_huespedes = 0
+        self.primer_huesped = 0
+
+    def _siguiente_id(self, tabla: str) -> int:
+        self.ids[tabla] += 1
+        return self.ids[tabla]
+
+    def _ts(self, dia: date, hora_min: int, hora_max: int) -> datetime:
+        segundos = self.rng.randrange(hora_min * 3600, hora_max * 3600)
+        return datetime.combine(dia, datetime.min.time()) + timedelta(seconds=segundos)
+
+    def _log(self, usuario_id, accion, entidad, entidad_id, detalles, momento) -> None:
+        self.tablas['logs_actividad'].agregar(
+            usuario_id, accion, entidad, entidad_id,
+            json.dumps(detalles, ensure_ascii=False), f"192.168.1.{self.rng.randrange(2, 250)}", momento
+        )
+
+    # ------------------------------------------------------------------ catálogos
+    def generar_habitaciones(self) -> None:
+        tipos = list(MEZCLA_TIPOS)
+        pesos = [MEZCLA_TIPOS[t] for t in tipos]
+        por_piso = self.args.habitaciones_por_piso
+        for i in range(self.args.habitaciones):
+            piso = self.piso_inicial + i // por_piso
+            tipo_id = self.rng.choices(tipos, pesos)[0]
+            capacidad, tarifa = self.tipos[tipo_id]
+            tarifa_base = round(tarifa * self.rng.uniform(0.92, 1.10), 0)
+            hab_id = self._siguiente_id('habitaciones')
+            self.tablas['habitaciones'].agregar(
+                hab_id, f"{piso}{i % por_piso + 1:02d}", piso, tipo_id, 1, tarifa_base,
+                self.rng.random() < 0.35, self.rng.random() < 0.20,
+                round(18 + capacidad * 12 * self.rng.uniform(0.9, 1.2), 1), True
+            )
+            self.habitaciones.append((hab_id, tipo_id, capacidad, tarifa_base))
+
+    def generar_huespedes(self) -> None:
+        nacionalidades = [p for p in PAISES]
+        pesos = [p[3] for p in PAISES]
+        self.primer_huesped = self.ids['huespedes'] + 1
+        for _ in range(self.args.huespedes):
+            hid = self._siguiente_id('huespedes')
+            nombre = self.rng.choice(NOMBRES)
+            apellido = self.rng.choice(APELLIDOS)
+            nacionalidad, pais, ciudades, _ = self.rng.choices(nacionalidades, pesos)[0]
+            if pais == 'Perú':
+                tipo_doc, documento = 'DNI', str(70_000_000 + hid)
+            else:
+                tipo_doc, documento = 'Pasaporte', f"SX{hid:09d}"
+            nacimiento = date(1940, 1, 1) + timedelta(days=self.rng.randrange(0, 365 * 65))
+            alta = self._ts(self.inicio - timedelta(days=self.rng.randrange(0, 365)), 0, 24)
+            self.tablas['huespedes'].agregar(
+                hid, tipo_doc, documento, nombre, apellido, nacimiento, nacionalidad,
+                f"{_ascii(nombre)}.{_ascii(apellido)}.{hid}@correo-sintetico.pe",
+                f"9{self.rng.randrange(10_000_000, 99_999_999)}", self.rng.choice(ciudades), pais,
+                self.rng.random() < 0.05, alta
+            )
+        self.num_huespedes = self.args.huespedes
+
+    def _huesped_aleatorio(self) -> int:
+        # Distribución sesgada: una minoría de huéspedes repite estancias
+        return self.primer_huesped + int(self.num_huespedes * self.rng.random() ** 1.6)
+
+    # ------------------------------------------------------------------ reservas
+    def _probabilidad_llegada(self, dia: date) -> float:
+        """Probabilidad de que empiece una estancia en un día libre para la ocupación deseada"""
+        demanda = ESTACIONALIDAD[dia.month][0]
+        ocupacion = min(self.args.ocupacion * demanda, 0.97)
+        if dia > self.fecha_base:
+            # Ritmo de reservas: el futuro lejano todavía está poco vendido
+            avance = (dia - self.fecha_base).days / max(self.args.dias_futuro, 1)
+            ocupacion *= max(0.08, 1 - avance) ** 1.5
+        estancia = self.args.estancia_media
+        return ocupacion / (estancia * (1 - ocupacion) + ocupacion)
+
+    def _noches(self) -> int:
+        return min(21, 1 + int(self.rng.expovariate(1 / max(self.args.estancia_media - 1, 0.1))))
+
+    def _tarifa(self, tarifa_base: float, check_in: date, noches: int) -> float:
+        return round(sum(
+            tarifa_base * ESTACIONALIDAD[(check_in + timedelta(days=n)).month][1] for n in range(noches)
+        ), 2)
+
+    def generar_reservas(self) -> None:
+        for habitacion in self.habitaciones:
+            dia = self.inicio
+            while dia < self.fin:
+                if self.rng.random() >= self._probabilidad_llegada(dia):
+                    dia += timedelta(days=1)
+                    continue
+                noches = self._noches()
+                check_out = dia + timedelta(days=noches)
+                if self.rng.random() < self.args.cancelaciones:
+                    # La cancelación no bloquea la habitación: se genera otra llegada ese día
+                    self._reserva(habitacion, dia, check_out, 'cancelada')
+                    continue
+                if dia < self.fecha_base and self.rng.random() < self.args.no_shows:
+                    self._reserva(habitacion, dia, check_out, 'no_show')
+                    dia += timedelta(days=1)
+                    continue
+                self._reserva(habitacion, dia, check_out, None)
+                dia = check_out
+
+    def _reserva(self, habitacion, check_in: date, check_out: date, estado) -> None:
+        hab_id, _, capacidad, tarifa_base = habitacion
+        rng = self.rng
+        res_id = self._siguiente_id('reservas')
+        huesped_id = self._huesped_aleatorio()
+        noches = (check_out - check_in).days
+        antelacion = min(int(rng.expovariate(1 / 30)), 365)
+        fecha_reserva = self._ts(check_in - timedelta(days=antelacion), 7, 23)
+        adultos = rng.randint(1, max(1, min(capacidad, 2)))
+        ninos = rng.randint(0, max(0, capacidad - adultos)) if capacidad > 2 else 0
+        tarifa_total = self._tarifa(tarifa_base, check_in, noches)
+        usuario = rng.choice(self.usuarios)
+
+        if estado is None:
+            if check_out <= self.fecha_base:
+                estado = 'completada'
+            elif check_in < self.fecha_base or (check_in == self.fecha_base and rng.random() < 0.5):
+                estado = 'completada'  # en casa: check-in hecho, check-out pendiente
+            else:
+                estado = 'confirmada'
+
+        fecha_cancelacion = motivo = None
+        if estado == 'cancelada':
+            ventana = max(int((datetime.combine(check_in, datetime.min.time()) - fecha_reserva).total_seconds()), 3600)
+            fecha_cancelacion = fecha_reserva + timedelta(seconds=rng.randrange(0, ventana))
+            motivo = rng.choice(MOTIVOS_CANCELACION)
+
+        self.tablas['reservas'].agregar(
+            res_id, huesped_id, fecha_reserva, check_in, check_out, adultos, ninos, estado, hab_id,
+            tarifa_total, round(tarifa_total * 0.3, 2), rng.random() < 0.6, fecha_cancelacion, motivo,
+            usuario, fecha_reserva
+        )
+        self._log(usuario, 'CREAR_RESERVA', 'reserva', res_id,
+                  {'habitacion_id': hab_id, 'noches': noches}, fecha_reserva)
+
+        if estado == 'cancelada':
+            self.tablas['historial_estados_reserva'].agregar(
+                res_id, 'confirmada', 'cancelada', fecha_cancelacion, usuario, motivo)
+            self._log(usuario, 'CANCELAR_RESERVA', 'reserva', res_id, {'motivo': motivo}, fecha_cancelacion)
+        elif estado == 'completada':
+            self._alojamiento(res_id, huesped_id, hab_id, check_in, check_out, tarifa_total, noches)
+
+    def _alojamiento(self, res_id, huesped_id, hab_id, check_in, check_out, tarifa_total, noches) -> None:
+        rng = self.rng
+        aloj_id = self._siguiente_id('alojamientos')
+        usuario_in = rng.choice(self.usuarios)
+        entrada = self._ts(check_in, 13, 20)
+        en_casa = check_out > self.fecha_base
+        salida = None if en_casa else self._ts(check_out, 8, 12)
+        usuario_out = None if en_casa else rng.choice(self.usuarios)
+        self.tablas['alojamientos'].agregar(
+            aloj_id, res_id, hab_id, entrada, salida, True, not en_casa, usuario_in, usuario_out, entrada)
+        self.tablas['historial_estados_reserva'].agregar(
+            res_id, 'confirmada', 'completada', entrada, usuario_in, 'Check-in realizado')
+        self._log(usuario_in, 'CHECK_IN', 'reserva', res_id, {'habitacion_id': hab_id}, entrada)
+
+        # Consumos durante la estancia (agrupados luego por servicio en la factura)
+        consumos = {}
+        dias_transcurridos = noches if not en_casa else max((self.fecha_base - check_in).days, 1)
+        for _ in range(int(rng.expovariate(1 / max(self.args.consumos_noche * dias_transcurridos, 0.01)))):
+            servicio_id = rng.choice(list(self.servicios))
+            _, precio, _ = self.servicios[servicio_id]
+            cantidad = rng.randint(1, 3)
+            momento = self._ts(check_in + timedelta(days=rng.randrange(0, dias_transcurridos)), 7, 23)
+            self.tablas['consumos_servicios'].agregar(aloj_id, servicio_id, cantidad, precio, momento, None)
+            consumos[servicio_id] = consumos.get(servicio_id, 0) + cantidad
+
+        if not en_casa:
+            self.tablas['historial_estados_reserva'].agregar(
+                res_id, 'completada', 'completada', salida, usuario_out, 'Check-out realizado')
+            self._log(usuario_out, 'CHECK_OUT', 'reserva', res_id, {'habitacion_id': hab_id}, salida)
+            self._factura(res_id, huesped_id, check_out, salida, tarifa_total, noches, consumos, usuario_out)
+
+    def _factura(self, res_id, huesped_id, check_out, salida, tarifa_total, noches, consumos, usuario) -> None:
+        rng = self.rng
+        fac_id = self._siguiente_id('facturas')
+        detalle = self.tablas['detalle_factura']
+        detalle.agregar(fac_id, f"Alojamiento - {noches} noche{'s' if noches != 1 else ''}", 1, tarifa_total, tarifa_total, 'alojamiento')
+        subtotal = tarifa_total
+        for servicio_id, cantidad in sorted(consumos.items()):
+            nombre, precio, categoria = self.servicios[servicio_id]
+            importe = round(precio * cantidad, 2)
+            detalle.agregar(fac_id, nombre, cantidad, precio, importe, categoria)
+            subtotal += importe
+        subtotal = round(subtotal, 2)
+        impuestos = round(subtotal * 0.10, 2)
+
+        reciente = (self.fecha_base - check_out).days < 15
+        sorteo = rng.random()
+        estado = 'pendiente' if reciente and sorteo < 0.35 else ('cancelada' if sorteo > 0.985 else 'pagada')
+        fecha_pago = salida + timedelta(minutes=rng.randrange(5, 240)) if estado == 'pagada' else None
+        self.tablas['facturas'].agregar(
+            fac_id, f"FAC{fac_id:08d}", huesped_id, res_id, salida, fecha_pago,
+            subtotal, impuestos, round(subtotal + impuestos, 2),
+            rng.choice(METODOS_PAGO) if estado == 'pagada' else None, estado
+        )
+        self._log(usuario, 'CREAR_FACTURA', 'factura', fac_id, {'reserva_id': res_id, 'total': subtotal}, salida)
+
+    def generar(self) -> dict:
+        self.generar_habitaciones()
+        self.generar_huespedes()
+        self.generar_reservas()
+        return {nombre: tabla.filas for nombre, tabla in self.tablas.items()}
+
+
+# ---------------------------------------------------------------------- carga
+def leer_catalogo(conn) -> dict:
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT id, capacidad_maxima FROM tipos_habitacion ORDER BY id")
+        capacidades = dict(cursor.fetchall())
+        cursor.execute("SELECT id, nombre, precio_base, categoria FROM servicios WHERE activo ORDER BY id")
+        servicios = {sid: (nombre, float(precio), categoria) for sid, nombre, precio, categoria in cursor.fetchall()}
+        cursor.execute("SELECT id FROM usuarios WHERE activo ORDER BY id")
+        usuarios = [fila[0] for fila in cursor.fetchall()]
+        max_ids = {}
+        for tabla in ('habitaciones', 'huespedes', 'reservas', 'alojamientos', 'facturas'):
+            cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {tabla}")
+            max_ids[tabla] = cursor.fetchone()[0]
+        cursor.execute("SELECT COALESCE(MAX(piso), 0) FROM habitaciones")
+        max_piso = cursor.fetchone()[0]
+
+    faltan = [t for t in MEZCLA_TIPOS if t not in capacidades]
+    if faltan or not servicios or not usuarios:
+        raise SystemExit("❌ Faltan catálogos: ejecuta primero database/schema.sql y database/seeds.sql")
+    # Tarifa de referencia por tipo: la de seeds.sql
+    tipos = {tid: (capacidades[tid], TIPOS_SEED[tid][1]) for tid in MEZCLA_TIPOS}
+    return {'tipos': tipos, 'servicios': servicios, 'usuarios': usuarios,
+            'max_ids': max_ids, 'max_piso': max_piso}
+
+
+def catalogo_seed() -> dict:
+    return {'tipos': TIPOS_SEED, 'servicios': SERVICIOS_SEED, 'usuarios': USUARIOS_SEED,
+            'max_ids': dict.fromkeys(('habitaciones', 'huespedes', 'reservas', 'alojamientos', 'facturas'), 0),
+            'max_piso': 0}
+
+
+def truncar(conn) -> None:
+    with conn.cursor() as cursor:
+        cursor.execute(f"TRUNCATE {', '.join(TABLAS_TRUNCAR)} RESTART IDENTITY CASCADE")
+    conn.commit()
+
+
+def cargar(conn, generador: GeneradorDatos) -> None:
+    """Carga todas las tablas con COPY en una sola transacción"""
+    with conn.cursor() as cursor:
+        for tabla in generador.tablas.values():
+            if not tabla.filas:
+                continue
+            t0 = time.perf_counter()
+            tabla.archivo.seek(0)
+            cursor.copy_expert(
+                f"COPY {tabla.nombre} ({', '.join(tabla.columnas)}) FROM STDIN WITH (FORMAT csv)",
+                tabla.archivo
+            )
+            print(f"   {tabla.nombre:<28} {tabla.filas:>10,} filas  {time.perf_counter() - t0:6.2f} s")
+
+        # Las tablas con id explícito necesitan ajustar su secuencia
+        for tabla in generador.tablas:
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence('{tabla}', 'id'), "
+                f"GREATEST((SELECT COALESCE(MAX(id), 0) FROM {tabla}), 1))"
+            )
+    conn.commit()
+
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        for tabla in generador.tablas:
+            cursor.execute(f"ANALYZE {tabla}")
+    conn.autocommit = False
+
+
+def exportar_csv(generador: GeneradorDatos, directorio: Path) -> None:
+    directorio.mkdir(parents=True, exist_ok=True)
+    for tabla in generador.tablas.values():
+        tabla.archivo.seek(0)
+        with open(directorio / f"{tabla.nombre}.csv", 'w', encoding='utf-8', newline='') as f:
+            csv.writer(f).writerow(tabla.columnas)
+            for bloque in iter(lambda: tabla.archivo.read(1 << 20), ''):
+                f.write(bloque)
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Genera datos sintéticos de un hotel grande")
+    parser.add_argument('--escala', type=float, default=1.0,
+                        help=f"Factor de escala (1 = {BASE_HABITACIONES} habitaciones, {BASE_HUESPEDES} huéspedes)")
+    parser.add_argument('--semilla', type=int, default=42, help="Semilla del generador (determinista)")
+    parser.add_argument('--fecha-base', type=date.fromisoformat, default=date.today(),
+                        help="Fecha que se considera 'hoy' (AAAA-MM-DD). Fíjala para comparar entre ramas")
+    parser.add_argument('--habitaciones', type=int, help="Número de habitaciones (anula --escala)")
+    parser.add_argument('--habitaciones-por-piso', type=int, default=20)
+    parser.add_argument('--huespedes', type=int, help="Número de huéspedes (anula --escala)")
+    parser.add_argument('--anios', type=float, default=2.0, help="Años de historia antes de la fecha base")
+    parser.add_argument('--dias-futuro', type=int, default=180, help="Días de reservas futuras")
+    parser.add_argument('--ocupacion', type=float, default=0.70, help="Ocupación media objetivo (0-1)")
+    parser.add_argument('--estancia-media', type=float, default=3.0, help="Noches promedio por estancia")
+    parser.add_argument('--cancelaciones', type=float, default=0.12, help="Tasa de cancelación (0-1)")
+    parser.add_argument('--no-shows', type=float, default=0.02, help="Tasa de no-show (0-1)")
+    parser.add_argument('--consumos-noche', type=float, default=0.8, help="Consumos promedio por noche")
+    parser.add_argument('--truncar', action='store_true',
+                        help="Vacía habitaciones, huéspedes y datos transaccionales antes de cargar")
+    parser.add_argument('--csv', type=Path, help="Escribe CSV en este directorio en lugar de cargar en la BD")
+    args = parser.parse_args(argv)
+    args.habitaciones = args.habitaciones or max(1, round(BASE_HABITACIONES * args.escala))
+    args.huespedes = args.huespedes or max(1, round(BASE_HUESPEDES * args.escala))
+    return args
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    print(f"🏨 Generando hotel sintético: {args.habitaciones} habitaciones, {args.huespedes} huéspedes, "
+          f"{args.anios} años + {args.dias_futuro} días (semilla {args.semilla}, base {args.fecha_base})")
+
+    if args.csv:
+        generador = _generar(args, catalogo_seed())
+        try:
+            exportar_csv(generador, args.csv)
+            print(f"📁 CSV escritos en {args.csv}")
+        finally:
+            _cerrar(generador)
+        return
+
+    from config.database import db
+    with db.get_connection() as conn:
+        generador = None
+        try:
+            if args.truncar:
+                truncar(conn)
+            generador = _generar(args, leer_catalogo(conn))
+            t0 = time.perf_counter()
+            print("📥 Cargando con COPY...")
+            cargar(conn, generador)
+            print(f"✅ Carga completa en {time.perf_counter() - t0:.1f} s")
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            if generador is not None:
+                _cerrar(generador)
+
+
+def _generar(args, catalogo: dict) -> GeneradorDatos:
+    t0 = time.perf_counter()
+    generador = GeneradorDatos(args, catalogo)
+    conteos = generador.generar()
+    print(f"✅ Generado en {time.perf_counter() - t0:.1f} s: "
+          + ', '.join(f"{n}={c:,}" for n, c in conteos.items()))
+    return generador
+
+
+def _cerrar(generador: GeneradorDatos) -> None:
+    for tabla in generador.tablas.values():
+        tabla.archivo.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Importación masiva desde la línea de comandos (lotes de reservas, huéspedes de otro PMS).
+
+Uso (desde la raíz del proyecto):
+    python scripts/importar.py reservas lote.csv --usuario 1
+    python scripts/importar.py reservas lote.json --solo-validar --errores errores.csv
+    python scripts/importar.py huespedes pms_anterior.csv --informe fusion.csv
+"""
+import argparse
+import csv
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'src'))
+
+
+def _guardar_errores(errores, ruta: Path) -> None:
+    with open(ruta, 'w', encoding='utf-8', newline='') as f:
+        escritor = csv.DictWriter(f, fieldnames=['fila', 'error'])
+        escritor.writeheader()
+        escritor.writerows(errores)
+    print(f"📄 Informe de errores en {ruta}")
+
+
+def importar_reservas(args) -> int:
+    from controllers.importacion_controller import ImportacionController
+
+    formato = 'json' if args.archivo.suffix.lower() == '.json' else 'csv'
+    with open(args.archivo, encoding='utf-8-sig', newline='') as f:
+        resultado = ImportacionController.importar_reservas(
+            f, formato, args.usuario, solo_validar=args.solo_validar, todo_o_nada=args.todo_o_nada)
+    if not resultado['success']:
+        print(f"❌ {resultado['error']}")
+        return 1
+
+    tiempos = ', '.join(f"{k} {v:.2f} s" for k, v in resultado['tiempos'].items())
+    print(f"✅ {resultado['total']:,} filas · {resultado['validas']:,} válidas · "
+          f"{resultado['importadas']:,} importadas · {len(resultado['errores']):,} con errores ({tiempos})")
+    for error in resultado['errores'][:20]:
+        print(f"   fila {error['fila']}: {error['error']}")
+    if len(resultado['errores']) > 20:
+        print(f"   ... y {len(resultado['errores']) - 20:,} más")
+    if args.errores and resultado['errores']:
+        _guardar_errores(resultado['errores'], args.errores)
+    if args.salida and resultado['reservas']:
+        args.salida.write_text(json.dumps(resultado['reservas'], indent=2), encoding='utf-8')
+        print(f"💾 Reservas creadas en {args.salida}")
+    return 0 if not resultado['errores'] else 2
+
+
+def importar_huespedes(args) -> int:
+    from controllers.importacion_controller import ImportacionController
+
+    def progreso(etapa, filas):
+        print(f"\r   {etapa}: {filas:,}".ljust(50), end='', flush=True)
+
+    resultado = ImportacionController.importar_huespedes(
+        str(args.archivo), args.usuario, comparar_existentes=not args.sin_existentes,
+        solo_analizar=args.solo_analizar, progreso=progreso, tamano_bloque=args.bloque)
+    print()
+    if not resultado['success']:
+        print(f"❌ {resultado['error']}")
+        return 1
+
+    tiempos = ', '.join(f"{k} {v:.1f} s" for k, v in resultado['tiempos'].items())
+    print(f"✅ {resultado['total']:,} filas · {resultado['insertados']:,} nuevos · "
+          f"{resultado['actualizados']:,} completados · {resultado['fusionadas']:,} fusionadas · "
+          f"{resultado['posibles_duplicados']:,} posibles duplicados · {resultado['errores']:,} errores")
+    print(f"   {tiempos}")
+    if args.informe and resultado['informe']:
+        with open(args.informe, 'w', encoding='utf-8', newline='') as f:
+            escritor = csv.DictWriter(f, fieldnames=['fila', 'accion', 'huesped_id', 'detalle'])
+            escritor.writeheader()
+            escritor.writerows(resultado['informe'])
+        print(f"📄 Informe de fusión en {args.informe}")
+    return 0
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Importación masiva de datos")
+    sub = parser.add_subparsers(dest='tipo', required=True)
+
+    reservas = sub.add_parser('reservas', help="Lote de reservas (CSV o JSON)")
+    reservas.add_argument('archivo', type=Path)
+    reservas.add_argument('--usuario', type=int, default=1, help="Usuario al que se atribuyen las reservas")
+    reservas.add_argument('--solo-validar', action='store_true', help="Valida sin importar nada")
+    reservas.add_argument('--todo-o-nada', action='store_true',
+                          help="No importa nada si alguna fila tiene errores")
+    reservas.add_argument('--errores', type=Path, help="CSV con el informe de errores por fila")
+    reservas.add_argument('--salida', type=Path, help="JSON con fila -> reserva creada")
+    reservas.set_defaults(funcion=importar_reservas)
+
+    huespedes = sub.add_parser('huespedes', help="Huéspedes de otro PMS (CSV), con deduplicación")
+    huespedes.add_argument('archivo', type=Path)
+    huespedes.add_argument('--usuario', type=int, default=1)
+    huespedes.add_argument('--solo-analizar', action='store_true', help="Informa sin importar nada")
+    huespedes.add_argument('--sin-existentes', action='store_true',
+                           help="No busca duplicados entre los huéspedes ya registrados")
+    huespedes.add_argument('--bloque', type=int, default=50_000, help="Filas por bloque (memoria acotada)")
+    huespedes.add_argument('--informe', type=Path, help="CSV con las fusiones, dudosos y errores")
+    huespedes.set_defaults(funcion=importar_huespedes)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    return args.funcion(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -28,5 +28,11 @@ psql -h %DB_HOST% -p %DB_PORT% -U %DB_USER% -d %DB_NAME% -f database\seeds.sql
 psql -h %DB_HOST% -p %DB_PORT% -U %DB_USER% -d %DB_NAME% -f database\indexes.sql
 psql -h %DB_HOST% -p %DB_PORT% -U %DB_USER% -d %DB_NAME% -f database\views.sql
 
+REM Migraciones posteriores al esquema base (idempotentes), en orden de número
+for /f "delims=" %%F in ('dir /b /on database\migrations\*.sql 2^>nul') do (
+    echo Aplicando migracion %%F...
+    psql -h %DB_HOST% -p %DB_PORT% -U %DB_USER% -d %DB_NAME% -f database\migrations\%%F
+)
+
 echo.
 echo === Base de datos inicializada ===
@@ -38,4 +38,14 @@ foreach ($script in $scripts) {
     }
 }
 
+# Migraciones posteriores al esquema base (idempotentes), en orden de número
+Get-ChildItem (Join-Path $DbDir "migrations") -Filter "*.sql" -ErrorAction SilentlyContinue | Sort-Object Name | ForEach-Object {
+    Write-Host "Aplicando migración $($_.Name)..." -ForegroundColor Green
+    psql -h $DB_HOST -p $DB_PORT -U $DB_USER -d $DB_NAME -f $_.FullName 2>&1
+    if ($LASTEXITCODE -ne 0) {
+        Write-Host "Error aplicando $($_.Name)" -ForegroundColor Red
+        exit 1
+    }
+}
+
 Write-Host "`n=== Base de datos inicializada correctamente ===" -ForegroundColor Green
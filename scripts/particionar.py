@@ -0,0 +1,140 @@
+"""Particionado mensual de reservas, facturas, detalle_factura y logs_actividad.
+
+Requiere database/migrations/002_particiones.sql. Uso (desde la raíz del proyecto):
+    python scripts/particionar.py migrar                      # las cuatro tablas
+    python scripts/particionar.py migrar reservas --borrar-original
+    python scripts/particionar.py crear-futuras --meses 6     # p. ej. desde cron cada noche
+    python scripts/particionar.py desenganchar logs_actividad --retencion 12 --exportar archivo/
+    python scripts/particionar.py verificar                   # poda de las consultas de la app
+    python scripts/particionar.py estado
+"""
+import argparse
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'src'))
+
+
+def migrar(args) -> int:
+    from utils import particiones
+
+    codigo = 0
+    for tabla in args.tablas or list(particiones.TABLAS):
+        print(f"⏳ Particionando {tabla}...")
+        resultado = particiones.migrar(tabla, args.meses_futuros, args.borrar_original)
+        if not resultado['success']:
+            print(f"❌ {tabla}: {resultado['error']}")
+            codigo = 1
+            continue
+        if resultado.get('ya_particionada'):
+            print(f"   {tabla} ya estaba particionada")
+            continue
+        print(f"✅ {tabla}: {resultado['filas']:,} filas en {resultado['particiones']} particiones "
+              f"({resultado['desde']:%Y-%m} a {resultado['hasta']:%Y-%m}) + default")
+        if resultado['claves_foraneas_eliminadas']:
+            print(f"   Claves foráneas eliminadas: {', '.join(resultado['claves_foraneas_eliminadas'])}")
+        if resultado['original']:
+            print(f"   La tabla original queda como {resultado['original']} (borrar cuando se haya comprobado)")
+    return codigo
+
+
+def crear_futuras(args) -> int:
+    from utils import particiones
+
+    creadas = particiones.crear_futuras(args.meses)
+    if not creadas:
+        print("Ninguna tabla está particionada")
+        return 0
+    for tabla, n in creadas.items():
+        print(f"✅ {tabla}: {n} particiones nuevas")
+    return 0
+
+
+def desenganchar(args) -> int:
+    from utils import particiones
+
+    if args.exportar:
+        args.exportar.mkdir(parents=True, exist_ok=True)
+    resultado = particiones.desenganchar(args.tabla, args.retencion, args.exportar)
+    if not resultado['success']:
+        print(f"❌ {resultado['error']}")
+        return 1
+    print(f"✅ {len(resultado['desenganchadas'])} particiones de {args.tabla} anteriores a "
+          f"{resultado['limite']:%Y-%m} desenganchadas")
+    for nombre in resultado['desenganchadas']:
+        print(f"   {nombre}")
+    for nombre in resultado['omitidas']:
+        print(f"   ⚠️ {nombre} se conserva: tiene reservas confirmadas")
+    return 0
+
+
+def verificar(args) -> int:
+    from utils import particiones
+
+    codigo = 0
+    print(f"   {'Consulta':<48}{'Tabla':<12}{'Exploradas':>12}")
+    for r in particiones.verificar_poda():
+        if 'error' in r:
+            print(f"   {r['consulta']:<48}{r['tabla']:<12}   {r['error']}")
+            continue
+        marca = '✅' if r['poda'] else '❌'
+        print(f"{marca} {r['consulta']:<48}{r['tabla']:<12}{r['exploradas']:>5} de {r['particiones']}")
+        codigo |= not r['poda']
+    return codigo
+
+
+def estado(args) -> int:
+    from config.database import db
+    from utils import particiones
+
+    with db.get_cursor() as cursor:
+        for tabla in particiones.TABLAS:
+            if not particiones.esta_particionada(cursor, tabla):
+                print(f"{tabla}: sin particionar")
+                continue
+            lista = particiones.particiones(cursor, tabla)
+            meses = [p['mes'] for p in lista if p['mes']]
+            filas = sum(max(p['filas_estimadas'], 0) for p in lista)
+            rango = f"{min(meses):%Y-%m} a {max(meses):%Y-%m}" if meses else "solo default"
+            print(f"{tabla}: {len(lista)} particiones ({rango}), ~{filas:,} filas")
+    return 0
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Particionado mensual de las tablas históricas")
+    sub = parser.add_subparsers(dest='accion', required=True)
+
+    p = sub.add_parser('migrar', help="Convierte tablas existentes en particionadas")
+    p.add_argument('tablas', nargs='*', help="Por defecto, todas")
+    p.add_argument('--meses-futuros', type=int, help="Meses por delante (PARTITION_MONTHS_AHEAD)")
+    p.add_argument('--borrar-original', action='store_true',
+                   help="Borra <tabla>_sin_particionar al terminar")
+    p.set_defaults(funcion=migrar)
+
+    p = sub.add_parser('crear-futuras', help="Crea las particiones de los próximos meses")
+    p.add_argument('--meses', type=int, help="Meses por delante (PARTITION_MONTHS_AHEAD)")
+    p.set_defaults(funcion=crear_futuras)
+
+    p = sub.add_parser('desenganchar', help="Archiva las particiones anteriores a la retención")
+    p.add_argument('tabla')
+    p.add_argument('--retencion', type=int, help="Meses que se conservan (PARTITION_RETENTION_MONTHS)")
+    p.add_argument('--exportar', type=Path, help="Directorio para <particion>.csv.gz (y se borra la partición)")
+    p.set_defaults(funcion=desenganchar)
+
+    p = sub.add_parser('verificar', help="Comprueba con EXPLAIN que las consultas descartan particiones")
+    p.set_defaults(funcion=verificar)
+
+    p = sub.add_parser('estado', help="Particiones de cada tabla")
+    p.set_defaults(funcion=estado)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    return args.funcion(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1 @@
+"""API HTTP para integraciones (ver api/app.py)"""
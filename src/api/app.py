@@ -0,0 +1,334 @@
+"""API HTTP (ASGI) para integraciones: OTAs y channel managers.
+
+Expone disponibilidad, calendario de ocupación, cotizaciones, reservas,
+cancelación, check-in/out y facturas sobre los controladores existentes.
+Arranque (desde la raíz):
+    DB_POOL=true uvicorn api.app:app --app-dir src --workers 4
+
+Autenticación con la cabecera ``X-API-Key`` (API_KEYS). Los POST que crean
+algo aceptan ``Idempotency-Key``: repetir la petición con la misma clave
+devuelve la respuesta original sin volver a ejecutarla, aunque la atienda
+otro worker (registro en ``claves_idempotencia``).
+"""
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Tuple
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from api import esquemas
+from config.database import db
+from config.settings import settings
+from controllers.calendario_controller import CalendarioController, DIAS_MAXIMOS
+from controllers.factura_controller import FacturaController
+from controllers.reserva_controller import ReservaController
+from models.factura import Factura
+from models.reserva import Reserva
+from utils import calendario as calendario_ocupacion, idempotencia
+from utils.logger import logger
+
+
+def _serializar(valor):
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    raise TypeError(f"No serializable: {type(valor).__name__}")
+
+
+class RespuestaJSON(JSONResponse):
+    """JSONResponse que admite fechas y Decimal (lo que devuelve psycopg2)"""
+
+    def render(self, content) -> bytes:
+        return json.dumps(content, ensure_ascii=False, separators=(',', ':'),
+                          default=_serializar).encode('utf-8')
+
+
+def _error(status: int, mensaje, **extra) -> RespuestaJSON:
+    return RespuestaJSON({'success': False, 'error': mensaje, **extra}, status_code=status)
+
+
+def _desde_controlador(resultado: Dict, status_ok: int = 200) -> Tuple[int, Dict]:
+    """Traduce el {'success': ...} de los controladores a un código HTTP"""
+    if resultado.get('success'):
+        return status_ok, resultado
+    error = str(resultado.get('error', '')).lower()
+    if 'no encontrad' in error or 'no se encontró' in error:
+        return 404, resultado
+    if error.startswith('error'):
+        return 500, resultado
+    return 409, resultado
+
+
+# ============================================================ CACHÉ DISPONIBILIDAD
+class CacheDisponibilidad:
+    """Respuestas de disponibilidad con TTL corto; cualquier escritura la invalida.
+
+    Las peticiones concurrentes con la misma clave comparten una sola consulta.
+    """
+
+    def __init__(self, ttl: float, max_entradas: int = 2000):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._entradas: Dict[tuple, Tuple[float, int, list]] = {}
+        self._en_curso: Dict[tuple, asyncio.Future] = {}
+        self._generacion = 0
+        self.aciertos = 0
+        self.fallos = 0
+
+    def invalidar(self) -> None:
+        self._generacion += 1
+        self._entradas.clear()
+
+    async def obtener(self, clave: tuple, cargar):
+        ahora = time.monotonic()
+        entrada = self._entradas.get(clave)
+        if entrada and entrada[0] > ahora and entrada[1] == self._generacion:
+            self.aciertos += 1
+            return entrada[2]
+        self.fallos += 1
+        if clave in self._en_curso:
+            return await asyncio.shield(self._en_curso[clave])
+
+        generacion = self._generacion
+        futuro = asyncio.get_running_loop().create_future()
+        self._en_curso[clave] = futuro
+        try:
+            valor = await cargar()
+            futuro.set_result(valor)
+        except Exception as e:
+            futuro.set_exception(e)
+            futuro.exception()  # evita el aviso si nadie más la esperaba
+            raise
+        finally:
+            del self._en_curso[clave]
+        if generacion == self._generacion:
+            if len(self._entradas) >= self.max_entradas:
+                self._entradas.pop(next(iter(self._entradas)))
+            self._entradas[clave] = (ahora + self.ttl, generacion, valor)
+        return valor
+
+
+# ============================================================ IDEMPOTENCIA
+async def _idempotente(request: Request, operacion: str, cuerpo: Dict, ejecutar) -> RespuestaJSON:
+    """Ejecuta la operación a lo sumo una vez por Idempotency-Key.
+
+    ``ejecutar`` es síncrona y devuelve (status, respuesta): registro y
+    controlador corren en un solo salto al threadpool. El registro es el de
+    ``utils.idempotencia`` (en BD), así que una repetición que llega a otro
+    worker también recibe la respuesta original.
+    """
+    clave = request.headers.get('idempotency-key')
+    if clave and len(clave) > 100:
+        return _error(400, 'Idempotency-Key demasiado larga (máximo 100 caracteres)')
+    try:
+        (status, respuesta), repetida = await run_in_threadpool(
+            idempotencia.registro.ejecutar, clave, f"api:{operacion}",
+            cuerpo, lambda: list(ejecutar()), lambda r: r[0] < 500)  # los errores del servidor no se fijan
+    except idempotencia.ClaveReutilizada:
+        return _error(422, 'Idempotency-Key ya usada con otro cuerpo')
+    except idempotencia.OperacionEnCurso:
+        return _error(409, 'Hay una petición con la misma Idempotency-Key en curso')
+    # Todas las operaciones idempotentes cambian la disponibilidad; la caché vive en el loop
+    if not repetida and status < 300:
+        cache_disponibilidad.invalidar()
+    return _responder(status, respuesta, repetida)
+
+
+cache_disponibilidad = CacheDisponibilidad(settings.API_CACHE_TTL)
+
+
+# ============================================================ UTILIDADES
+async def _cuerpo(request: Request, esquema: Dict):
+    """Cuerpo JSON validado; devuelve (datos, None) o (None, respuesta de error)"""
+    try:
+        datos = await request.json() if await request.body() else {}
+    except ValueError:
+        return None, _error(400, 'Cuerpo JSON inválido')
+    errores = esquemas.validar(esquema, datos)
+    if errores:
+        return None, _error(422, 'Datos inválidos', detalles=errores)
+    return datos, None
+
+
+def _fecha(valor: str) -> date:
+    return date.fromisoformat(valor)
+
+
+def _responder(status: int, respuesta: Dict, repetida: bool = False) -> RespuestaJSON:
+    headers = {'Idempotent-Replay': 'true'} if repetida else None
+    return RespuestaJSON(respuesta, status_code=status, headers=headers)
+
+
+# ============================================================ ENDPOINTS
+async def salud(request: Request):
+    conexiones = db.stats.resumen_conexiones() if db.stats.habilitado else {}
+    return RespuestaJSON({
+        'success': True,
+        'cache_disponibilidad': {'aciertos': cache_disponibilidad.aciertos,
+                                 'fallos': cache_disponibilidad.fallos},
+        'conexiones': conexiones,
+    })
+
+
+async def disponibilidad(request: Request):
+    params = dict(request.query_params)
+    for campo in ('tipo', 'capacidad'):
+        if params.get(campo, '').isdigit():
+            params[campo] = int(params[campo])
+    errores = esquemas.validar(esquemas.DISPONIBILIDAD, params)
+    if errores:
+        return _error(422, 'Parámetros inválidos', detalles=errores)
+    check_in, check_out = _fecha(params['check_in']), _fecha(params['check_out'])
+    if check_in >= check_out:
+        return _error(422, 'La fecha de check-out debe ser posterior al check-in')
+
+    clave = (check_in, check_out, params.get('tipo'), params.get('capacidad'))
+    habitaciones = await cache_disponibilidad.obtener(clave, lambda: run_in_threadpool(
+        ReservaController.buscar_disponibilidad, check_in, check_out, params.get('tipo'), params.get('capacidad')))
+    return RespuestaJSON({'success': True, 'habitaciones': habitaciones})
+
+
+async def calendario(request: Request):
+    """Matriz habitaciones × días: ``estado`` con los códigos de ``estados`` y ``reserva``
+    con la posición en ``reservas`` (-1 = libre)"""
+    params = dict(request.query_params)
+    if params.get('tipo', '').isdigit():
+        params['tipo'] = int(params['tipo'])
+    errores = esquemas.validar(esquemas.CALENDARIO, params)
+    if errores:
+        return _error(422, 'Parámetros inválidos', detalles=errores)
+    desde, hasta = _fecha(params['desde']), _fecha(params['hasta'])
+    if not 0 < (hasta - desde).days <= DIAS_MAXIMOS:
+        return _error(422, f'El rango debe tener entre 1 y {DIAS_MAXIMOS} días')
+    grid = await run_in_threadpool(CalendarioController.grid, desde, hasta, params.get('tipo'))
+    if grid is None:
+        return _error(500, 'Error calculando el calendario')
+    return RespuestaJSON({'success': True, 'estados': list(calendario_ocupacion.ESTADOS),
+                          **calendario_ocupacion.a_listas(grid)})
+
+
+async def cotizacion(request: Request):
+    datos, error = await _cuerpo(request, esquemas.COTIZACION)
+    if error:
+        return error
+    resultado = await run_in_threadpool(ReservaController.cotizar, datos['habitacion_id'],
+                                        _fecha(datos['check_in']), _fecha(datos['check_out']))
+    return _responder(*_desde_controlador(resultado))
+
+
+async def crear_reserva(request: Request):
+    datos, error = await _cuerpo(request, esquemas.RESERVA)
+    if error:
+        return error
+
+    def ejecutar():
+        reserva = dict(datos, fecha_check_in=_fecha(datos['fecha_check_in']),
+                       fecha_check_out=_fecha(datos['fecha_check_out']))
+        if 'tarifa_total' not in reserva:
+            cotizacion = ReservaController.cotizar(reserva['habitacion_id'], reserva['fecha_check_in'],
+                                                   reserva['fecha_check_out'])
+            if not cotizacion.get('success'):
+                return _desde_controlador(cotizacion)
+            reserva['tarifa_total'] = cotizacion['total']
+        return _desde_controlador(ReservaController.crear_reserva(reserva, settings.API_USUARIO_ID), 201)
+
+    return await _idempotente(request, 'reserva', datos, ejecutar)
+
+
+async def ver_reserva(request: Request):
+    reserva = await run_in_threadpool(Reserva.get_by_id, request.path_params['reserva_id'])
+    if not reserva:
+        return _error(404, 'Reserva no encontrada')
+    return RespuestaJSON({'success': True, 'reserva': reserva})
+
+
+def _accion_reserva(esquema: Dict, operacion: str, llamar):
+    """POST sobre una reserva existente (cancelar, check-in, check-out)"""
+    async def endpoint(request: Request):
+        datos, error = await _cuerpo(request, esquema)
+        if error:
+            return error
+        reserva_id = request.path_params['reserva_id']
+
+        def ejecutar():
+            reserva = Reserva.get_by_id(reserva_id)
+            if not reserva:
+                return 404, {'success': False, 'error': 'Reserva no encontrada'}
+            return _desde_controlador(llamar(reserva, datos))
+
+        return await _idempotente(request, f"{operacion}:{reserva_id}", datos, ejecutar)
+    return endpoint
+
+
+cancelar = _accion_reserva(esquemas.CANCELACION, 'cancelar', lambda r, d: ReservaController.cancelar_reserva(
+    r['id'], d['motivo'], settings.API_USUARIO_ID, d.get('aplicar_reembolso', False)))
+check_in = _accion_reserva(esquemas.CHECK_IN, 'check_in',
+                           lambda r, d: ReservaController.check_in(r['id'], r['habitacion_id'],
+                                                                   settings.API_USUARIO_ID))
+check_out = _accion_reserva(esquemas.CHECK_OUT, 'check_out', lambda r, d: ReservaController.check_out(
+    r['id'], r['habitacion_id'], settings.API_USUARIO_ID, d.get('observaciones')))
+
+
+async def facturas_reserva(request: Request):
+    facturas = await run_in_threadpool(FacturaController.get_by_reserva, request.path_params['reserva_id'])
+    return RespuestaJSON({'success': True, 'facturas': facturas})
+
+
+async def ver_factura(request: Request):
+    factura_id = request.path_params['factura_id']
+    factura = await run_in_threadpool(Factura.get_by_id, factura_id)
+    if not factura:
+        return _error(404, 'Factura no encontrada')
+    detalle = await run_in_threadpool(Factura.get_detalle, factura_id)
+    return RespuestaJSON({'success': True, 'factura': dict(factura, detalle=detalle)})
+
+
+# ============================================================ APLICACIÓN
+class ClaveAPI:
+    """Middleware ASGI: exige X-API-Key salvo en /salud"""
+
+    def __init__(self, app):
+        self.app = app
+        self.claves = {c.strip() for c in settings.API_KEYS.split(',') if c.strip()}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] != '/salud':
+            clave = dict(scope['headers']).get(b'x-api-key', b'').decode()
+            if not self.claves or clave not in self.claves:
+                respuesta = _error(401, 'X-API-Key ausente o inválida')
+                return await respuesta(scope, receive, send)
+        return await self.app(scope, receive, send)
+
+
+@asynccontextmanager
+async def _ciclo_vida(app):
+    logger.info(f"API iniciada (pool de BD: {'sí' if settings.DB_POOL else 'no'})")
+    yield
+    db.cerrar_pool()
+    logger.info("API detenida")
+
+
+rutas = [
+    Route('/salud', salud),
+    Route('/disponibilidad', disponibilidad),
+    Route('/calendario', calendario),
+    Route('/cotizaciones', cotizacion, methods=['POST']),
+    Route('/reservas', crear_reserva, methods=['POST']),
+    Route('/reservas/{reserva_id:int}', ver_reserva),
+    Route('/reservas/{reserva_id:int}/cancelacion', cancelar, methods=['POST']),
+    Route('/reservas/{reserva_id:int}/check-in', check_in, methods=['POST']),
+    Route('/reservas/{reserva_id:int}/check-out', check_out, methods=['POST']),
+    Route('/reservas/{reserva_id:int}/facturas', facturas_reserva),
+    Route('/facturas/{factura_id:int}', ver_factura),
+]
+
+app = ClaveAPI(Starlette(routes=rutas, lifespan=_ciclo_vida))
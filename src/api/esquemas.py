@@ -0,0 +1,91 @@
+"""Esquemas JSON de los cuerpos y parámetros que acepta la API"""
+from typing import Dict, List
+
+from jsonschema import Draft7Validator, FormatChecker
+
+_FECHA = {'type': 'string', 'format': 'date'}
+_ID = {'type': 'integer', 'minimum': 1}
+
+DISPONIBILIDAD = {
+    'type': 'object',
+    'properties': {
+        'check_in': _FECHA,
+        'check_out': _FECHA,
+        'tipo': _ID,
+        'capacidad': {'type': 'integer', 'minimum': 1, 'maximum': 20},
+    },
+    'required': ['check_in', 'check_out'],
+    'additionalProperties': False,
+}
+
+CALENDARIO = {
+    'type': 'object',
+    'properties': {
+        'desde': _FECHA,
+        'hasta': _FECHA,
+        'tipo': _ID,
+    },
+    'required': ['desde', 'hasta'],
+    'additionalProperties': False,
+}
+
+COTIZACION = {
+    'type': 'object',
+    'properties': {
+        'habitacion_id': _ID,
+        'check_in': _FECHA,
+        'check_out': _FECHA,
+    },
+    'required': ['habitacion_id', 'check_in', 'check_out'],
+    'additionalProperties': False,
+}
+
+RESERVA = {
+    'type': 'object',
+    'properties': {
+        'huesped_id': _ID,
+        'habitacion_id': _ID,
+        'fecha_check_in': _FECHA,
+        'fecha_check_out': _FECHA,
+        'numero_adultos': {'type': 'integer', 'minimum': 1, 'maximum': 20},
+        'numero_ninos': {'type': 'integer', 'minimum': 0, 'maximum': 20},
+        'tarifa_total': {'type': 'number', 'minimum': 0},
+        'notas': {'type': 'string', 'maxLength': 1000},
+    },
+    'required': ['huesped_id', 'habitacion_id', 'fecha_check_in', 'fecha_check_out'],
+    'additionalProperties': False,
+}
+
+CANCELACION = {
+    'type': 'object',
+    'properties': {
+        'motivo': {'type': 'string', 'minLength': 1, 'maxLength': 500},
+        'aplicar_reembolso': {'type': 'boolean'},
+    },
+    'required': ['motivo'],
+    'additionalProperties': False,
+}
+
+CHECK_IN = {'type': 'object', 'additionalProperties': False}
+
+CHECK_OUT = {
+    'type': 'object',
+    'properties': {
+        'observaciones': {'type': 'string', 'maxLength': 1000},
+    },
+    'additionalProperties': False,
+}
+
+_VALIDADORES: Dict[int, Draft7Validator] = {}
+
+
+def validar(esquema: Dict, datos) -> List[str]:
+    """Errores de validación legibles (lista vacía si los datos son válidos)"""
+    validador = _VALIDADORES.get(id(esquema))
+    if validador is None:
+        validador = _VALIDADORES[id(esquema)] = Draft7Validator(esquema, format_checker=FormatChecker())
+    errores = []
+    for error in sorted(validador.iter_errors(datos), key=lambda e: list(e.path)):
+        campo = '.'.join(str(p) for p in error.path)
+        errores.append(f"{campo}: {error.message}" if campo else error.message)
+    return errores
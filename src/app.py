@@ -3,16 +3,16 @@ import os
 os.environ.setdefault('PGCLIENTENCODING', 'LATIN1')
 
 import streamlit as st
-import pandas as pd
 from datetime import datetime
-import plotly.express as px
-import plotly.graph_objects as go
 
 from config.settings import settings
 from utils.auth import Auth
 from utils.logger import logger
+from utils.tracing import tracer
+from utils.profiler import perfilador
 from utils.permissions import PermissionChecker, Permission, RoleManager  # 👈 NUEVO
-from views import recepcion, administracion, dashboard, reportes
+# Las vistas (y pandas, plotly, fpdf) se importan al abrir su página por primera vez
+import views
 
 # =============================================================================
 # 🏨 IDENTIDAD DEL HOTEL
@@ -364,21 +364,21 @@ with st.sidebar:
         perm_checker = st.session_state.permission_checker
         
         if perm_checker.can(Permission.DASHBOARD_VIEW):
-            menu_options["📊 Dashboard"] = dashboard
+            menu_options["📊 Dashboard"] = "dashboard"
         
         if perm_checker.can(Permission.BOOKING_CREATE) or perm_checker.can(Permission.BOOKING_VIEW_OWN):
-            menu_options["🛎️ Recepción"] = recepcion
+            menu_options["🛎️ Recepción"] = "recepcion"
         
         if perm_checker.can(Permission.REPORT_VIEW_BASIC):
-            menu_options["📈 Reportes"] = reportes
+            menu_options["📈 Reportes"] = "reportes"
         
         if perm_checker.can(Permission.CONFIG_VIEW):
-            menu_options["⚙️ Administración"] = administracion
+            menu_options["⚙️ Administración"] = "administracion"
 
         # Si no hay opciones (no debería pasar), mostrar mensaje
         if not menu_options:
             st.warning("No tienes acceso a ningún módulo")
-            menu_options = {"📊 Dashboard": dashboard}  # fallback
+            menu_options = {"📊 Dashboard": "dashboard"}  # fallback
 
         selected = st.radio(
             "Navegación", 
@@ -490,33 +490,43 @@ else:
     """, unsafe_allow_html=True)
 
     # 👇 NUEVO: Verificar permisos antes de cargar cada vista
-    try:
-        if selected == "📊 Dashboard":
-            if st.session_state.permission_checker.can(Permission.DASHBOARD_VIEW):
-                dashboard.show()
-            else:
-                st.error("⛔ No tienes permisos para ver el Dashboard")
+    # Trazas por solicitud: el administrador puede activarlas sólo para su sesión
+    # (la casilla solo las enciende; desmarcada manda la configuración global)
+    # Perfilador de renderizado: opt-in por sesión desde Administración
+    pagina = {"📊 Dashboard": "dashboard", "🛎️ Recepción": "recepcion",
+              "📈 Reportes": "reportes", "⚙️ Administración": "administracion"}.get(selected, "otra")
+    with tracer.solicitud(True if st.session_state.get('trazas_solicitud_activa') else None), \
+            tracer.span('vista', modulo=titulo, rol=st.session_state.role), \
+            perfilador.pagina(pagina, st.session_state.role,
+                              activo=True if st.session_state.get('perfil_informe') else st.session_state.get('perfil_render_activo'),
+                              informe=st.session_state.pop('perfil_informe', False)):
+        try:
+            if selected == "📊 Dashboard":
+                if st.session_state.permission_checker.can(Permission.DASHBOARD_VIEW):
+                    views.dashboard.show()
+                else:
+                    st.error("⛔ No tienes permisos para ver el Dashboard")
                 
-        elif selected == "🛎️ Recepción":
-            if st.session_state.permission_checker.can_any([Permission.BOOKING_CREATE, Permission.BOOKING_VIEW_OWN]):
-                recepcion.show()
-            else:
-                st.error("⛔ No tienes permisos para acceder a Recepción")
+            elif selected == "🛎️ Recepción":
+                if st.session_state.permission_checker.can_any([Permission.BOOKING_CREATE, Permission.BOOKING_VIEW_OWN]):
+                    views.recepcion.show()
+                else:
+                    st.error("⛔ No tienes permisos para acceder a Recepción")
                 
-        elif selected == "📈 Reportes":
-            if st.session_state.permission_checker.can(Permission.REPORT_VIEW_BASIC):
-                reportes.show()
-            else:
-                st.error("⛔ No tienes permisos para ver Reportes")
+            elif selected == "📈 Reportes":
+                if st.session_state.permission_checker.can(Permission.REPORT_VIEW_BASIC):
+                    views.reportes.show()
+                else:
+                    st.error("⛔ No tienes permisos para ver Reportes")
                 
-        elif selected == "⚙️ Administración":
-            if st.session_state.permission_checker.can(Permission.CONFIG_VIEW):
-                administracion.show()
-            else:
-                st.error("⛔ No tienes permisos para acceder a Administración")
-    except Exception as e:
-        st.error(f"Error al cargar la vista: {str(e)}")
-        logger.error(f"Error en navegación: {str(e)}")
+            elif selected == "⚙️ Administración":
+                if st.session_state.permission_checker.can(Permission.CONFIG_VIEW):
+                    views.administracion.show()
+                else:
+                    st.error("⛔ No tienes permisos para acceder a Administración")
+        except Exception as e:
+            st.error(f"Error al cargar la vista: {str(e)}")
+            logger.error(f"Error en navegación: {str(e)}")
 
 # =============================================================================
 # 🦶 FOOTER
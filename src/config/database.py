@@ -5,6 +5,8 @@ from psycopg2.extras import RealDictCursor
 from contextlib import contextmanager
 import logging
 import sys
+import threading
+import time
 from pathlib import Path
 
 # Agregar el directorio raíz al path para importaciones absolutas
@@ -13,6 +15,7 @@ sys.path.append(str(root_dir))
 
 # Ahora podemos importar desde src.config
 from src.config.settings import settings
+from src.config.instrumentation import QueryStats, CursorInstrumentado
 
 logger = logging.getLogger(__name__)
 
@@ -46,6 +49,23 @@ class DatabaseConnection:
         self.base_params['keepalives_interval'] = 10
         self.base_params['keepalives_count'] = 5
 
+        # Métricas por consulta (huella, latencias, llamador, consultas lentas)
+        self.stats = QueryStats(
+            habilitado=settings.DB_INSTRUMENTATION,
+            umbral_lento_ms=settings.SLOW_QUERY_MS,
+            auto_explain=settings.SLOW_QUERY_EXPLAIN,
+            archivo_lentas=settings.LOGS_DIR / 'slow_queries.log',
+            guardar_params=settings.DB_CAPTURE_PARAMS,
+        )
+        # Tiempo de espera de la última conexión abierta en cada hilo
+        self._local = threading.local()
+
+        # Pool opcional (DB_POOL): para procesos de larga vida como la API
+        self._pool_habilitado = settings.DB_POOL
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._pool_libres = threading.BoundedSemaphore(max(settings.DB_POOL_MAX, 1))
+
     def _get_connection_params(self, for_auth=False):
         """Obtiene parámetros de conexión"""
         params = self.base_params.copy()
@@ -78,11 +98,17 @@ class DatabaseConnection:
     def get_connection(self):
         """Conexión normal para operaciones generales"""
         conn = None
+        registrada = False
         params = self._get_connection_params(for_auth=False)
         
         try:
             logger.debug(f"Conectando a BD: {params['host']}/{params['database']}")
-            conn = psycopg2.connect(**params)
+            t0 = time.perf_counter()
+            conn = self._tomar_del_pool() if self._pool_habilitado else psycopg2.connect(**params)
+            self._local.espera_ms = (time.perf_counter() - t0) * 1000
+            if self.stats.habilitado:
+                self.stats.registrar_conexion(self._local.espera_ms)
+                registrada = True
             yield conn
         except psycopg2.OperationalError as e:
             logger.error(f"Error operacional de BD: {e}")
@@ -93,7 +119,47 @@ class DatabaseConnection:
             raise
         finally:
             if conn:
-                conn.close()
+                if self._pool_habilitado:
+                    self._devolver_al_pool(conn)
+                else:
+                    conn.close()
+            if registrada:
+                self.stats.liberar_conexion()
+
+    # ------------------------------------------------------------ pool (DB_POOL)
+    def _tomar_del_pool(self):
+        """Conexión del pool; espera (en vez de fallar) si están todas en uso"""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    from psycopg2.pool import ThreadedConnectionPool
+                    self._pool = ThreadedConnectionPool(settings.DB_POOL_MIN, settings.DB_POOL_MAX,
+                                                        **self._get_connection_params())
+                    logger.info(f"🔌 Pool de conexiones abierto ({settings.DB_POOL_MIN}-{settings.DB_POOL_MAX})")
+        if not self._pool_libres.acquire(timeout=settings.DB_POOL_TIMEOUT):
+            raise psycopg2.OperationalError("timeout esperando una conexión libre del pool")
+        try:
+            return self._pool.getconn()
+        except Exception:
+            self._pool_libres.release()
+            raise
+
+    def _devolver_al_pool(self, conn):
+        try:
+            # get_cursor ya hizo commit/rollback; esto cubre usos directos de get_connection
+            if not conn.closed and conn.status != psycopg2.extensions.STATUS_READY:
+                conn.rollback()
+            self._pool.putconn(conn, close=bool(conn.closed))
+        except Exception as e:
+            logger.warning(f"Conexión descartada del pool: {e}")
+            self._pool.putconn(conn, close=True)
+        finally:
+            self._pool_libres.release()
+
+    def cerrar_pool(self):
+        if self._pool is not None:
+            self._pool.closeall()
+            self._pool = None
     
     @contextmanager
     def get_cursor(self, cursor_factory=RealDictCursor):
@@ -101,7 +167,10 @@ class DatabaseConnection:
         with self.get_connection() as conn:
             cursor = conn.cursor(cursor_factory=cursor_factory)
             try:
-                yield cursor
+                if self.stats.habilitado:
+                    yield CursorInstrumentado(cursor, self.stats, self._local.espera_ms)
+                else:
+                    yield cursor
                 conn.commit()
             except Exception:
                 conn.rollback()
@@ -0,0 +1,120 @@
+# src/config/database_async.py
+"""Acceso asíncrono a la BD con psycopg 3 y su propio pool de conexiones.
+
+``adb.get_cursor()`` es el equivalente async de ``db.get_cursor()``: cursor con
+filas como diccionario, commit al salir y rollback si hay excepción. Desde
+código síncrono (Streamlit) se usa el puente ``adb.ejecutar(coro)`` o
+``adb.reunir(coro1, coro2, ...)``, que corre las corrutinas en un bucle de
+eventos propio en segundo plano, donde vive el pool.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+root_dir = Path(__file__).resolve().parent.parent.parent
+sys.path.append(str(root_dir))
+
+from src.config.settings import settings
+from src.config.instrumentation import CursorAsyncInstrumentado
+# Misma instancia que importan los modelos: comparte parámetros y métricas (db.stats)
+from config.database import db
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDatabaseConnection:
+    def __init__(self, min_size: int = 1, max_size: int = 10):
+        self.min_size = min_size
+        self.max_size = max_size
+        self._pool = None
+        self._apertura = None
+        self._loop = None
+        self._hilo = None
+        self._lock = threading.Lock()
+
+    def _conninfo(self) -> dict:
+        """Mismos parámetros que la conexión síncrona (host, SSL, timeouts...)"""
+        params = db._get_connection_params()
+        params['dbname'] = params.pop('database')
+        return params
+
+    async def _abrir_pool(self):
+        # Dependencia opcional: solo se necesita con DB_ASYNC o en el banco de pruebas
+        from psycopg_pool import AsyncConnectionPool
+
+        pool = AsyncConnectionPool(kwargs=self._conninfo(), min_size=self.min_size,
+                                   max_size=self.max_size, open=False)
+        await pool.open()
+        logger.info(f"🔌 Pool async abierto ({self.min_size}-{self.max_size} conexiones)")
+        self._pool = pool
+        return pool
+
+    async def _get_pool(self):
+        # Una sola apertura aunque varias corrutinas pidan cursor a la vez
+        if self._apertura is None:
+            self._apertura = asyncio.ensure_future(self._abrir_pool())
+        try:
+            return await self._apertura
+        except Exception:
+            self._apertura = None
+            raise
+
+    @asynccontextmanager
+    async def get_cursor(self):
+        """Cursor async con filas como diccionario"""
+        from psycopg.rows import dict_row
+
+        pool = await self._get_pool()
+        t0 = time.perf_counter()
+        async with pool.connection() as conn:
+            espera_ms = (time.perf_counter() - t0) * 1000
+            if db.stats.habilitado:
+                db.stats.registrar_conexion(espera_ms)
+            try:
+                # pool.connection() hace commit al salir sin excepción y rollback si la hay
+                async with conn.cursor(row_factory=dict_row) as cursor:
+                    if db.stats.habilitado:
+                        yield CursorAsyncInstrumentado(cursor, db.stats, espera_ms)
+                    else:
+                        yield cursor
+            finally:
+                if db.stats.habilitado:
+                    db.stats.liberar_conexion()
+
+    async def cerrar(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+            self._apertura = None
+
+    # ------------------------------------------------------------ puente síncrono
+    def _bucle(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._hilo = threading.Thread(target=self._loop.run_forever,
+                                              name='adb-bucle', daemon=True)
+                self._hilo.start()
+            return self._loop
+
+    def ejecutar(self, coro, timeout: float = None):
+        """Ejecuta una corrutina desde código síncrono y devuelve su resultado"""
+        return asyncio.run_coroutine_threadsafe(coro, self._bucle()).result(timeout)
+
+    def reunir(self, *coros, timeout: float = None) -> list:
+        """Ejecuta varias corrutinas en paralelo y devuelve sus resultados en orden"""
+        async def _reunir():
+            return await asyncio.gather(*coros)
+        return self.ejecutar(_reunir(), timeout)
+
+    def cerrar_sync(self) -> None:
+        if self._loop is not None:
+            self.ejecutar(self.cerrar())
+
+
+# Instancia global
+adb = AsyncDatabaseConnection(settings.DB_ASYNC_POOL_MIN, settings.DB_ASYNC_POOL_MAX)
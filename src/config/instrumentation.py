@@ -0,0 +1,323 @@
+# src/config/instrumentation.py
+"""Instrumentación de consultas SQL: huella normalizada, histograma de
+latencias por huella, llamador y registro de consultas lentas."""
+import bisect
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from functools import lru_cache
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Límites de los buckets del histograma (ms): escala exponencial 0.05 ms → ~90 s
+_BUCKETS_MS = []
+_limite = 0.05
+while _limite < 90_000:
+    _BUCKETS_MS.append(round(_limite, 4))
+    _limite *= 1.25
+_BUCKETS_MS.append(float('inf'))
+
+_RE_COMENTARIOS = re.compile(r'--[^\n]*|/\*.*?\*/', re.S)
+_RE_CADENAS = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMEROS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_RE_PLACEHOLDERS = re.compile(r'%\(\w+\)s|%s')
+_RE_LISTAS = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_RE_ESPACIOS = re.compile(r'\s+')
+
+# Módulos que no cuentan como "llamador" de una consulta
+_MODULOS_INFRA = ('config/database.py', 'config/instrumentation.py', 'contextlib.py',
+                  'psycopg2', 'threading.py')
+
+
+@lru_cache(maxsize=2048)
+def normalizar_query(sql) -> str:
+    """Devuelve la huella de una consulta: sin literales, parámetros ni espacios extra"""
+    if isinstance(sql, bytes):
+        sql = sql.decode('utf-8', 'replace')
+    sql = str(sql)
+    sql = _RE_COMENTARIOS.sub(' ', sql)
+    sql = _RE_CADENAS.sub('?', sql)
+    sql = _RE_PLACEHOLDERS.sub('?', sql)
+    sql = _RE_NUMEROS.sub('?', sql)
+    sql = _RE_LISTAS.sub('(...)', sql)
+    return _RE_ESPACIOS.sub(' ', sql).strip()
+
+
+def obtener_llamador() -> str:
+    """Identifica la función de la aplicación (vista/controlador/modelo) que lanzó la consulta"""
+    frame = sys._getframe(2)
+    primero = None
+    while frame is not None:
+        ruta = frame.f_code.co_filename.replace('\\', '/')
+        if not any(m in ruta for m in _MODULOS_INFRA):
+            nombre = f"{Path(ruta).parent.name}.{Path(ruta).stem}.{frame.f_code.co_name}"
+            if primero is None:
+                primero = nombre
+            if '/views/' in ruta or '/controllers/' in ruta:
+                return nombre if nombre == primero else f"{nombre} → {primero}"
+        frame = frame.f_back
+    return primero or 'desconocido'
+
+
+class Histograma:
+    """Histograma de latencias con buckets exponenciales (memoria constante)"""
+
+    __slots__ = ('buckets', 'total', 'suma_ms', 'max_ms')
+
+    def __init__(self):
+        self.buckets = [0] * len(_BUCKETS_MS)
+        self.total = 0
+        self.suma_ms = 0.0
+        self.max_ms = 0.0
+
+    def registrar(self, ms: float) -> None:
+        self.buckets[bisect.bisect_left(_BUCKETS_MS, ms)] += 1
+        self.total += 1
+        self.suma_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentil(self, p: float) -> float:
+        """Percentil aproximado (límite superior del bucket que lo contiene)"""
+        if not self.total:
+            return 0.0
+        objetivo = p / 100 * self.total
+        acumulado = 0
+        for i, n in enumerate(self.buckets):
+            acumulado += n
+            if acumulado >= objetivo:
+                return min(_BUCKETS_MS[i], self.max_ms)
+        return self.max_ms
+
+
+class EstadisticaQuery:
+    __slots__ = ('huella', 'histograma', 'filas', 'espera_ms', 'llamadores', 'ultimo_sql', 'ultimos_params')
+
+    def __init__(self, huella: str):
+        self.huella = huella
+        self.histograma = Histograma()
+        self.filas = 0
+        self.espera_ms = 0.0
+        self.llamadores = Counter()
+        self.ultimo_sql = None
+        self.ultimos_params = None
+
+    def to_dict(self) -> dict:
+        h = self.histograma
+        return {
+            'huella': self.huella,
+            'llamadas': h.total,
+            'total_ms': round(h.suma_ms, 2),
+            'media_ms': round(h.suma_ms / h.total, 3) if h.total else 0.0,
+            'p50_ms': round(h.percentil(50), 3),
+            'p95_ms': round(h.percentil(95), 3),
+            'p99_ms': round(h.percentil(99), 3),
+            'max_ms': round(h.max_ms, 3),
+            'filas_promedio': round(self.filas / h.total, 1) if h.total else 0.0,
+            'espera_conexion_ms': round(self.espera_ms, 2),
+            'llamador': self.llamadores.most_common(1)[0][0] if self.llamadores else '',
+        }
+
+
+class QueryStats:
+    """Agrega las métricas de todas las consultas ejecutadas por el proceso"""
+
+    def __init__(self, habilitado: bool = True, umbral_lento_ms: float = 250.0,
+                 auto_explain: bool = False, archivo_lentas=None, max_lentas: int = 200,
+                 guardar_params: bool = False):
+        self.habilitado = habilitado
+        # Los parámetros pueden llevar datos personales o secretos: solo se
+        # guardan si se pide (captura de planes, DB_CAPTURE_PARAMS)
+        self.guardar_params = guardar_params
+        self.umbral_lento_ms = umbral_lento_ms
+        self.auto_explain = auto_explain
+        self._por_huella = {}
+        self._conexiones = Histograma()
+        self._abiertas = 0
+        self._max_abiertas = 0
+        self._lentas = deque(maxlen=max_lentas)
+        self._lock = threading.Lock()
+        self._oyentes = []
+        self._log_lentas = self._crear_log_lentas(archivo_lentas)
+
+    @staticmethod
+    def _crear_log_lentas(archivo):
+        log = logging.getLogger('slow_queries')
+        if archivo and not log.handlers:
+            handler = logging.FileHandler(archivo, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+            log.addHandler(handler)
+        return log
+
+    def registrar_conexion(self, espera_ms: float) -> None:
+        with self._lock:
+            self._conexiones.registrar(espera_ms)
+            self._abiertas += 1
+            self._max_abiertas = max(self._max_abiertas, self._abiertas)
+
+    def liberar_conexion(self) -> None:
+        with self._lock:
+            self._abiertas -= 1
+
+    def registrar(self, sql, params, duracion_ms: float, filas: int,
+                  espera_ms: float = 0.0, cursor=None) -> None:
+        if not isinstance(sql, (str, bytes)) and hasattr(sql, 'as_string') and cursor is not None:
+            sql = sql.as_string(cursor)  # psycopg2.sql.Composed
+        huella = normalizar_query(sql)
+        llamador = obtener_llamador()
+        with self._lock:
+            stat = self._por_huella.get(huella)
+            if stat is None:
+                stat = self._por_huella[huella] = EstadisticaQuery(huella)
+            stat.histograma.registrar(duracion_ms)
+            stat.filas += max(filas, 0)
+            stat.espera_ms += espera_ms
+            stat.llamadores[llamador] += 1
+            stat.ultimo_sql = sql
+            stat.ultimos_params = params if self.guardar_params else None
+
+        for oyente in self._oyentes:
+            oyente(huella, duracion_ms)
+
+        if duracion_ms >= self.umbral_lento_ms:
+            self._registrar_lenta(huella, sql, params, duracion_ms, filas, llamador, cursor)
+
+    def _registrar_lenta(self, huella, sql, params, duracion_ms, filas, llamador, cursor):
+        plan = None
+        if self.auto_explain and cursor is not None and huella.upper().startswith(('SELECT', 'WITH')):
+            plan = self._explain(cursor, sql, params)
+        entrada = {
+            'fecha': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'duracion_ms': round(duracion_ms, 2),
+            'filas': filas,
+            'llamador': llamador,
+            'huella': huella,
+            'plan': plan,
+        }
+        with self._lock:
+            self._lentas.append(entrada)
+        self._log_lentas.warning(
+            f"{duracion_ms:.1f} ms | {filas} filas | {llamador} | {huella}"
+            + (f"\n{plan}" if plan else "")
+        )
+
+    @staticmethod
+    def _explain(cursor, sql, params):
+        try:
+            explain = cursor.connection.cursor()
+            try:
+                explain.execute('EXPLAIN ' + (sql.decode() if isinstance(sql, bytes) else sql), params)
+                return '\n'.join(fila[0] for fila in explain.fetchall())
+            finally:
+                explain.close()
+        except Exception as e:
+            logger.debug(f"No se pudo obtener EXPLAIN: {e}")
+            return None
+
+    def agregar_oyente(self, oyente) -> None:
+        """Registra una función (huella, duracion_ms) llamada tras cada consulta"""
+        self._oyentes.append(oyente)
+
+    def quitar_oyente(self, oyente) -> None:
+        if oyente in self._oyentes:
+            self._oyentes.remove(oyente)
+
+    def top(self, limite: int = 20, orden: str = 'total_ms') -> list:
+        with self._lock:
+            filas = [s.to_dict() for s in self._por_huella.values()]
+        return sorted(filas, key=lambda f: f[orden], reverse=True)[:limite]
+
+    def muestras(self) -> list:
+        """Última sentencia por huella, con sus parámetros solo si ``guardar_params``"""
+        with self._lock:
+            return [(s.huella, s.ultimo_sql, s.ultimos_params) for s in self._por_huella.values()]
+
+    def exportar_muestras(self) -> str:
+        """Muestras en JSON para ``python -m benchmarks.planes --desde``"""
+        return json.dumps([
+            {'huella': huella, 'sql': sql.decode() if isinstance(sql, bytes) else sql, 'params': params}
+            for huella, sql, params in self.muestras()
+        ], indent=2, ensure_ascii=False, default=str)
+
+    def lentas(self) -> list:
+        with self._lock:
+            return list(self._lentas)
+
+    def resumen_conexiones(self) -> dict:
+        with self._lock:
+            h = self._conexiones
+            return {
+                'conexiones': h.total,
+                'espera_media_ms': round(h.suma_ms / h.total, 2) if h.total else 0.0,
+                'espera_p95_ms': round(h.percentil(95), 2),
+                'espera_max_ms': round(h.max_ms, 2),
+                'abiertas': self._abiertas,
+                'max_simultaneas': self._max_abiertas,
+            }
+
+    def reiniciar(self) -> None:
+        with self._lock:
+            self._por_huella.clear()
+            self._conexiones = Histograma()
+            self._max_abiertas = self._abiertas
+            self._lentas.clear()
+
+
+class CursorInstrumentado:
+    """Envuelve un cursor de psycopg2 midiendo cada sentencia ejecutada"""
+
+    def __init__(self, cursor, stats: QueryStats, espera_ms: float = 0.0):
+        self._cursor = cursor
+        self._stats = stats
+        self._espera_ms = espera_ms
+
+    def _medir(self, metodo, sql, params, muestra):
+        t0 = time.perf_counter()
+        try:
+            return metodo(sql, params)
+        finally:
+            duracion_ms = (time.perf_counter() - t0) * 1000
+            espera, self._espera_ms = self._espera_ms, 0.0
+            self._stats.registrar(sql, muestra, duracion_ms, self._cursor.rowcount,
+                                  espera, self._cursor)
+
+    def execute(self, sql, params=None):
+        return self._medir(self._cursor.execute, sql, params, params)
+
+    def executemany(self, sql, params_seq):
+        # Del lote solo se registra la primera fila (basta para EXPLAIN)
+        muestra = params_seq[0] if isinstance(params_seq, (list, tuple)) and params_seq else None
+        return self._medir(self._cursor.executemany, sql, params_seq, muestra)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+
+class CursorAsyncInstrumentado:
+    """Equivalente de CursorInstrumentado para los cursores async de psycopg 3"""
+
+    def __init__(self, cursor, stats: QueryStats, espera_ms: float = 0.0):
+        self._cursor = cursor
+        self._stats = stats
+        self._espera_ms = espera_ms
+
+    async def execute(self, sql, params=None):
+        t0 = time.perf_counter()
+        try:
+            return await self._cursor.execute(sql, params)
+        finally:
+            duracion_ms = (time.perf_counter() - t0) * 1000
+            espera, self._espera_ms = self._espera_ms, 0.0
+            # Sin cursor: el EXPLAIN automático de consultas lentas es síncrono
+            self._stats.registrar(sql, params, duracion_ms, self._cursor.rowcount, espera)
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
@@ -57,6 +57,13 @@ def _get_port():
     except ValueError:
         return 5432
 
+def _get_int(var_name, default=0):
+    """Convierte variable de entorno a entero"""
+    try:
+        return int(os.getenv(var_name, str(default)))
+    except ValueError:
+        return default
+
 def _get_bool(var_name, default=False):
     """Convierte variable de entorno a booleano"""
     value = os.getenv(var_name, '').lower()
@@ -106,6 +113,94 @@ class Settings:
         # Crear directorios si no existen
         self.LOGS_DIR.mkdir(exist_ok=True)
         self.REPORTS_DIR.mkdir(exist_ok=True)
+
+        # ===== INSTRUMENTACIÓN DE CONSULTAS =====
+        self.DB_INSTRUMENTATION = _get_bool('DB_INSTRUMENTATION', True)
+        self.SLOW_QUERY_MS = _get_int('SLOW_QUERY_MS', 250)
+        self.SLOW_QUERY_EXPLAIN = _get_bool('SLOW_QUERY_EXPLAIN', False)
+        # Guarda los últimos parámetros de cada consulta para exportar sentencias (pueden contener datos sensibles)
+        self.DB_CAPTURE_PARAMS = _get_bool('DB_CAPTURE_PARAMS', False)
+
+        # ===== POOL DE CONEXIONES (psycopg2) =====
+        # Desactivado por defecto: Streamlit abre una conexión por operación
+        self.DB_POOL = _get_bool('DB_POOL', False)
+        self.DB_POOL_MIN = _get_int('DB_POOL_MIN', 1)
+        self.DB_POOL_MAX = _get_int('DB_POOL_MAX', 20)
+        self.DB_POOL_TIMEOUT = _get_int('DB_POOL_TIMEOUT', 10)
+
+        # ===== ACCESO ASÍNCRONO (psycopg 3) =====
+        # Desactivado por defecto: las consultas independientes de una página se lanzan en paralelo
+        self.DB_ASYNC = _get_bool('DB_ASYNC', False)
+        self.DB_ASYNC_POOL_MIN = _get_int('DB_ASYNC_POOL_MIN', 1)
+        self.DB_ASYNC_POOL_MAX = _get_int('DB_ASYNC_POOL_MAX', 10)
+
+        # ===== IDEMPOTENCIA (reservas, check-in, facturas) =====
+        self.IDEMPOTENCY_TTL = _get_int('IDEMPOTENCY_TTL', 86400)  # segundos que se recuerda una respuesta
+        self.IDEMPOTENCY_PURGE_SECONDS = _get_int('IDEMPOTENCY_PURGE_SECONDS', 600)
+
+        # ===== PARTICIONES (scripts/particionar.py) =====
+        self.PARTITION_MONTHS_AHEAD = _get_int('PARTITION_MONTHS_AHEAD', 3)  # meses futuros ya creados
+        self.PARTITION_RETENTION_MONTHS = _get_int('PARTITION_RETENTION_MONTHS', 36)  # antes se desenganchan
+        self.PARTITION_ARCHIVE_SCHEMA = os.getenv('PARTITION_ARCHIVE_SCHEMA', 'archivo')
+
+        # ===== ARCHIVO EN FRÍO (scripts/archivar.py) =====
+        self.ARCHIVE_AFTER_MONTHS = _get_int('ARCHIVE_AFTER_MONTHS', 24)  # estancias cerradas antes de esto
+        self.ARCHIVE_BATCH_SIZE = _get_int('ARCHIVE_BATCH_SIZE', 5000)  # reservas por transacción
+        self.ARCHIVE_EXPORT_DIR = Path(os.getenv('ARCHIVE_EXPORT_DIR', str(self.BASE_DIR / 'archivo')))
+        self.ARCHIVE_EXPORT_FORMAT = os.getenv('ARCHIVE_EXPORT_FORMAT', 'parquet')  # parquet, feather
+
+        # ===== CACHÉ DE DATOS (utils/cache.py, utils/catalogo.py) =====
+        self.CACHE_ENABLED = _get_bool('CACHE_ENABLED', True)
+        self.CATALOG_CHECK_SECONDS = _get_int('CATALOG_CHECK_SECONDS', 30)  # cada cuánto se mira la versión del catálogo
+        self.CACHE_TTL_SLOW = _get_int('CACHE_TTL_SLOW', 300)  # habitaciones, usuarios, agregados
+        self.CACHE_TTL_LIVE = _get_int('CACHE_TTL_LIVE', 15)  # reservas del día, alojados, KPIs
+        self.CACHE_MAX_ENTRIES = _get_int('CACHE_MAX_ENTRIES', 256)  # por función cacheada
+
+        # ===== TABLERO DE HABITACIONES (utils/tablero.py) =====
+        self.TABLERO_REFRESH_SECONDS = _get_int('TABLERO_REFRESH_SECONDS', 2)  # refresco del fragmento en pantalla
+        self.TABLERO_COALESCE_MS = _get_int('TABLERO_COALESCE_MS', 300)  # ventana para agrupar avisos
+        self.TABLERO_POLL_SECONDS = _get_int('TABLERO_POLL_SECONDS', 10)  # relectura completa sin LISTEN
+        self.TABLERO_RESYNC_SECONDS = _get_int('TABLERO_RESYNC_SECONDS', 300)  # relectura completa de seguridad
+
+        # ===== CARTERA DE RESERVAS (utils/cartera.py) =====
+        self.INVENTORY_HORIZON_DAYS = _get_int('INVENTORY_HORIZON_DAYS', 365)  # noches hacia delante en memoria
+        self.INVENTORY_REFRESH_SECONDS = _get_int('INVENTORY_REFRESH_SECONDS', 60)  # cada cuánto se leen reservas cambiadas
+
+        # ===== PRONÓSTICO DE OCUPACIÓN (utils/pronostico.py) =====
+        self.FORECAST_HISTORY_DAYS = _get_int('FORECAST_HISTORY_DAYS', 365)  # noches pasadas para las curvas de pickup
+
+        # ===== TARIFAS DINÁMICAS (utils/tarifas.py) =====
+        self.PRICING_DEMAND_ENABLED = _get_bool('PRICING_DEMAND_ENABLED', True)
+        # ocupación reservada del tipo esa noche : multiplicador (por debajo del primer tramo, 1.0)
+        self.PRICING_DEMAND_TIERS = os.getenv('PRICING_DEMAND_TIERS', '0.60:1.05,0.75:1.10,0.85:1.20,0.95:1.30')
+        # noches mínimas : descuento sobre el total (vacío = sin descuentos), p. ej. 7:0.05,14:0.10
+        self.PRICING_LOS_DISCOUNTS = os.getenv('PRICING_LOS_DISCOUNTS', '')
+
+        # ===== ASIGNACIÓN DE HABITACIONES (utils/asignacion.py) =====
+        self.ASSIGNMENT_HORIZON_DAYS = _get_int('ASSIGNMENT_HORIZON_DAYS', 180)  # llegadas que se pueden mover
+        self.ASSIGNMENT_FREEZE_DAYS = _get_int('ASSIGNMENT_FREEZE_DAYS', 1)  # las llegadas antes de hoy + N no se mueven
+        self.ASSIGNMENT_SHORT_GAP_NIGHTS = _get_int('ASSIGNMENT_SHORT_GAP_NIGHTS', 2)  # huecos de hasta N noches = invendibles
+        self.ASSIGNMENT_TIME_LIMIT_SECONDS = _get_int('ASSIGNMENT_TIME_LIMIT_SECONDS', 10)
+
+        # ===== BÚSQUEDA PARA GRUPOS (utils/grupos.py) =====
+        self.GROUP_SEARCH_BUDGET_MS = _get_int('GROUP_SEARCH_BUDGET_MS', 500)  # tiempo máximo para generar opciones
+
+        # ===== API HTTP (src/api) =====
+        self.API_KEYS = os.getenv('API_KEYS', '')  # separadas por coma; vacía = API cerrada
+        self.API_USUARIO_ID = _get_int('API_USUARIO_ID', 1)  # usuario al que se atribuyen las operaciones
+        self.API_CACHE_TTL = _get_int('API_CACHE_TTL', 10)  # segundos
+
+        # ===== PERFILADOR DE RENDERIZADO =====
+        # Desactivado por defecto: se puede activar por sesión desde Administración
+        self.RENDER_PROFILING = _get_bool('RENDER_PROFILING', False)
+        self.RENDER_PROFILE_HISTORY = _get_int('RENDER_PROFILE_HISTORY', 50)
+
+        # ===== TRAZAS (TRACING) =====
+        # Desactivadas por defecto: se pueden activar globalmente o por solicitud
+        self.TRACING_ENABLED = _get_bool('TRACING_ENABLED', False)
+        self.TRACING_EXPORTER = os.getenv('TRACING_EXPORTER', 'memoria')  # memoria, json, ambos
+        self.TRACING_BUFFER_SIZE = _get_int('TRACING_BUFFER_SIZE', 500)
+        self.TRACING_FILE = self.LOGS_DIR / os.getenv('TRACING_FILE', 'traces.jsonl')
     
     def _load_from_streamlit_safe(self):
         """Intenta cargar configuración desde Streamlit secrets sin causar error"""
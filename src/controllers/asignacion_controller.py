@@ -0,0 +1,114 @@
+"""Controlador de asignación de habitaciones: propuesta y aplicación de movimientos"""
+import json
+from typing import Any, Dict, List
+from config.database import db
+from models.reserva import ESTANCIA_MAXIMA_DIAS
+from utils import asignacion, cache, catalogo
+from utils.logger import logger
+
+# Parámetros: ids, habitación actual y habitación nueva de cada movimiento
+_SQL_MOVER = """
+    UPDATE reservas r
+    SET habitacion_id = m.hasta, updated_at = CURRENT_TIMESTAMP
+    FROM unnest(%s::int[], %s::int[], %s::int[]) AS m(id, desde, hasta)
+    WHERE r.id = m.id
+      AND r.habitacion_id = m.desde
+      AND r.fecha_check_in >= CURRENT_DATE
+      AND r.estado = 'confirmada'
+      AND NOT r.habitacion_fija
+      AND NOT EXISTS (SELECT 1 FROM alojamientos a WHERE a.reserva_id = r.id)
+    RETURNING r.id
+"""
+
+# Parámetros: habitaciones de destino
+_SQL_SOLAPES = f"""
+    SELECT a.codigo_reserva, b.codigo_reserva AS otra, a.habitacion_id
+    FROM reservas a
+    JOIN reservas b ON b.habitacion_id = a.habitacion_id AND b.id > a.id
+     AND b.fecha_check_in < a.fecha_check_out AND a.fecha_check_in < b.fecha_check_out
+    WHERE a.habitacion_id = ANY(%s)
+      AND a.estado IN ('confirmada', 'completada') AND b.estado IN ('confirmada', 'completada')
+      AND a.fecha_check_out > CURRENT_DATE AND b.fecha_check_out > CURRENT_DATE
+      AND a.fecha_check_in > CURRENT_DATE - {ESTANCIA_MAXIMA_DIAS}
+      AND b.fecha_check_in > CURRENT_DATE - {ESTANCIA_MAXIMA_DIAS}
+    LIMIT 1
+"""
+
+
+class AsignacionController:
+
+    @staticmethod
+    def proponer() -> Dict[str, Any]:
+        """Propuesta de reasignación por tipo de habitación (no cambia nada)"""
+        try:
+            propuesta = asignacion.proponer()
+            cat = catalogo.actual()
+            for tipo in propuesta['tipos']:
+                tipo['tipo'] = cat.nombre_tipo(tipo['tipo_habitacion_id'], str(tipo['tipo_habitacion_id']))
+            for movimiento in propuesta['movimientos']:
+                movimiento['tipo'] = cat.nombre_tipo(movimiento['tipo_habitacion_id'])
+            return {'success': True, **propuesta}
+        except Exception as e:
+            logger.error(f"Error proponiendo asignación de habitaciones: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+    @staticmethod
+    def aplicar(movimientos: List[Dict], usuario_id: int) -> Dict[str, Any]:
+        """Aplica los movimientos de una propuesta en una sola transacción.
+
+        Si alguna reserva cambió desde la propuesta (otra habitación, cancelada,
+        fijada, con check-in) o queda algún solape, no se aplica ninguno.
+        """
+        if not movimientos:
+            return {'success': False, 'error': 'No hay movimientos que aplicar'}
+        try:
+            ids = [m['reserva_id'] for m in movimientos]
+            destinos = sorted({m['hasta_habitacion_id'] for m in movimientos})
+            with cache.invalidando('reservas'), db.get_cursor() as cursor:
+                cursor.execute(_SQL_MOVER, (ids, [m['desde_habitacion_id'] for m in movimientos],
+                                            [m['hasta_habitacion_id'] for m in movimientos]))
+                movidas = {f['id'] for f in cursor.fetchall()}
+                if len(movidas) != len(ids):
+                    raise ValueError(f"{len(ids) - len(movidas)} reservas cambiaron desde la propuesta; "
+                                     f"vuelve a calcularla")
+                cursor.execute(_SQL_SOLAPES, (destinos,))
+                solape = cursor.fetchone()
+                if solape:
+                    raise ValueError(f"Las reservas {solape['codigo_reserva']} y {solape['otra']} quedarían "
+                                     f"en la misma habitación; vuelve a calcular la propuesta")
+                cursor.execute("""
+                    INSERT INTO logs_actividad (usuario_id, accion, entidad, detalles)
+                    VALUES (%s, 'REASIGNAR_HABITACIONES', 'reserva', %s)
+                """, (usuario_id, json.dumps([{'reserva_id': m['reserva_id'], 'desde': m['desde_habitacion_id'],
+                                               'hasta': m['hasta_habitacion_id']} for m in movimientos])))
+            logger.info(f"Asignación aplicada: {len(ids)} reservas movidas por usuario {usuario_id}")
+            return {'success': True, 'movidas': len(ids)}
+        except ValueError as e:
+            logger.warning(f"Asignación no aplicada: {str(e)}")
+            return {'success': False, 'error': str(e)}
+        except Exception as e:
+            logger.error(f"Error aplicando asignación de habitaciones: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+    @staticmethod
+    def fijar_habitacion(codigo_reserva: str, fija: bool, usuario_id: int) -> Dict[str, Any]:
+        """Marca (o desmarca) una reserva para que el optimizador no la cambie de habitación"""
+        try:
+            with cache.invalidando('reservas'), db.get_cursor() as cursor:
+                cursor.execute("""
+                    UPDATE reservas SET habitacion_fija = %s, updated_at = CURRENT_TIMESTAMP
+                    WHERE codigo_reserva = %s
+                    RETURNING id
+                """, (fija, codigo_reserva.strip().upper()))
+                fila = cursor.fetchone()
+                if not fila:
+                    return {'success': False, 'error': 'Reserva no encontrada'}
+                cursor.execute("""
+                    INSERT INTO logs_actividad (usuario_id, accion, entidad, entidad_id, detalles)
+                    VALUES (%s, 'FIJAR_HABITACION', 'reserva', %s, %s)
+                """, (usuario_id, fila['id'], json.dumps({'habitacion_fija': fija})))
+            logger.info(f"Reserva {codigo_reserva}: habitación {'fija' if fija else 'libre'} por usuario {usuario_id}")
+            return {'success': True}
+        except Exception as e:
+            logger.error(f"Error fijando habitación de reserva: {str(e)}")
+            return {'success': False, 'error': str(e)}
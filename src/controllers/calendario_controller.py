@@ -0,0 +1,39 @@
+"""Controlador del calendario de ocupación (habitaciones × días)"""
+from datetime import date
+from typing import Dict, Optional
+from models.habitacion import Habitacion
+from utils.logger import logger
+from utils.tracing import tracer
+
+DIAS_MAXIMOS = 366
+
+
+class CalendarioController:
+
+    @staticmethod
+    def grid(fecha_inicio: date, fecha_fin: date, tipo: Optional[int] = None) -> Optional[Dict]:
+        """Matriz de estados y reservas de las habitaciones activas para [fecha_inicio, fecha_fin).
+
+        ``estado`` (int8) y ``reserva`` (int32, posición en ``reservas`` o -1) son
+        habitaciones × días, en el orden de ``habitaciones`` (piso, número).
+        """
+        dias = (fecha_fin - fecha_inicio).days
+        if not 0 < dias <= DIAS_MAXIMOS:
+            logger.error(f"Calendario: rango inválido {fecha_inicio} - {fecha_fin}")
+            return None
+        with tracer.span('calendario.grid', desde=str(fecha_inicio), dias=dias, tipo=tipo) as span:
+            try:
+                # NumPy solo se carga al abrir el calendario
+                from utils import calendario
+                habitaciones = [{'id': h['id'], 'numero': h['numero'], 'piso': h['piso'],
+                                 'tipo_habitacion_id': h['tipo_habitacion_id'], 'tipo': h.get('tipo_nombre')}
+                                for h in Habitacion.get_all()
+                                if tipo is None or h['tipo_habitacion_id'] == tipo]
+                grid = calendario.matriz(fecha_inicio, dias, habitaciones)
+                span.set('habitaciones', len(habitaciones))
+                span.set('reservas', len(grid['reservas']))
+                return grid
+            except Exception as e:
+                span.set('error', str(e))
+                logger.error(f"Error en calendario de ocupación: {str(e)}")
+                return None
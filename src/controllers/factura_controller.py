@@ -3,12 +3,15 @@ from typing import Dict, Any, Optional, List
 from datetime import datetime
 from config.database import db
 from models.factura import Factura
+from utils import cache
+from utils.idempotencia import idempotente
 from utils.logger import logger
 
 
 class FacturaController:
 
     @staticmethod
+    @idempotente('crear_factura_desde_reserva')
     def crear_factura_desde_reserva(reserva_id: int, servicios_adicionales: List[Dict] = None) -> Dict[str, Any]:
         """Crea una factura automáticamente desde una reserva, calculando noches y totales"""
         try:
@@ -82,11 +85,12 @@ class FacturaController:
             return {'success': False, 'error': str(e)}
 
     @staticmethod
+    @idempotente('crear_factura')
     def crear_factura(datos: Dict[str, Any]) -> Dict[str, Any]:
         """Crea una nueva factura"""
         try:
             numero = Factura.generar_numero()
-            with db.get_cursor() as cursor:
+            with cache.invalidando('facturas', 'detalle_factura'), db.get_cursor() as cursor:
                 cursor.execute("""
                     INSERT INTO facturas 
                     (numero_factura, huesped_id, reserva_id, subtotal, impuestos, total, metodo_pago, estado, notas)
@@ -139,7 +143,7 @@ class FacturaController:
     def marcar_pagada(factura_id: int, metodo_pago: str = None) -> bool:
         """Marca una factura como pagada"""
         try:
-            with db.get_cursor() as cursor:
+            with cache.invalidando('facturas'), db.get_cursor() as cursor:
                 cursor.execute("""
                     UPDATE facturas 
                     SET estado = 'pagada', fecha_pago = CURRENT_TIMESTAMP, metodo_pago = COALESCE(%s, metodo_pago)
@@ -0,0 +1,747 @@
+# src/controllers/importacion_controller.py
+"""Importación masiva de reservas (lotes de grupos y de OTAs) y de huéspedes
+(migración desde otro PMS, con deduplicación).
+
+Las reservas se validan fila a fila solo en lo que no necesita la BD (tipos y
+fechas); el resto (huésped, habitación, capacidad, disponibilidad contra las
+reservas existentes y contra el propio lote) se valida en conjunto sobre una
+tabla temporal cargada con COPY, y las filas válidas se insertan con un único
+INSERT ... SELECT, todo en la misma transacción.
+
+Los huéspedes se leen por bloques, se normalizan y se cargan con COPY; los
+duplicados (dentro del archivo y contra los huéspedes existentes) se buscan
+con claves de bloqueo y se puntúan con ``utils.deduplicacion``.
+"""
+import csv
+import io
+import json
+import time
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple, Union
+
+import pandas as pd
+
+from config.database import db
+from models.reserva import ESTANCIA_MAXIMA_DIAS
+from utils import cache, deduplicacion
+from utils.logger import logger
+
+# Columnas aceptadas en el CSV/JSON de reservas. El huésped se identifica por
+# huesped_id o numero_documento y la habitación por habitacion_id o numero_habitacion.
+COLUMNAS_RESERVAS = (
+    'huesped_id', 'numero_documento', 'habitacion_id', 'numero_habitacion',
+    'fecha_check_in', 'fecha_check_out', 'numero_adultos', 'numero_ninos',
+    'tarifa_total', 'notas',
+)
+
+# Huéspedes: filas por bloque (lectura, COPY y puntuación de pares) y tamaño máximo
+# de un bloque de candidatos (un email genérico compartido por miles no sirve para emparejar)
+BLOQUE_HUESPEDES = 50_000
+_MAX_BLOQUE_CANDIDATOS = 50
+_MAX_POSIBLES_INFORME = 10_000
+
+# Límites de las columnas INTEGER y DECIMAL(10,2): un valor mayor haría fallar el COPY entero
+_MAX_ENTERO = 2 ** 31 - 1
+_MAX_TARIFA = Decimal('100000000')
+
+
+def _leer_filas(contenido: Union[bytes, str, Iterable], formato: str) -> Iterator[Dict[str, Any]]:
+    """Registros de un CSV (con cabecera) o de un JSON (lista de objetos)"""
+    if isinstance(contenido, bytes):
+        contenido = contenido.decode('utf-8-sig')
+    if formato == 'json':
+        datos = json.loads(contenido if isinstance(contenido, str) else contenido.read())
+        if isinstance(datos, dict):
+            datos = datos.get('reservas', [])
+        if not isinstance(datos, list):
+            raise ValueError('El JSON debe ser una lista de reservas')
+        for registro in datos:
+            yield registro if isinstance(registro, dict) else {}
+    else:
+        lineas = io.StringIO(contenido) if isinstance(contenido, str) else contenido
+        lector = csv.DictReader(lineas)
+        lector.fieldnames = [(c or '').strip().lower() for c in (lector.fieldnames or [])]
+        yield from lector
+
+
+def _texto(valor) -> str:
+    return '' if valor is None else str(valor).strip()
+
+
+def _entero(registro: Dict, campo: str, defecto=None):
+    valor = _texto(registro.get(campo))
+    if not valor:
+        return defecto
+    try:
+        numero = int(valor)
+    except ValueError:
+        raise ValueError(f"{campo} no es un número entero: {valor}")
+    if not 0 <= numero <= _MAX_ENTERO:
+        raise ValueError(f"{campo} fuera de rango: {valor}")
+    return numero
+
+
+def _fecha(registro: Dict, campo: str) -> date:
+    valor = _texto(registro.get(campo))
+    if not valor:
+        raise ValueError(f"Falta {campo}")
+    try:
+        return date.fromisoformat(valor[:10])
+    except ValueError:
+        raise ValueError(f"{campo} no es una fecha AAAA-MM-DD: {valor}")
+
+
+def _preparar_reserva(registro: Dict) -> Tuple:
+    """Fila para COPY (en el orden de COLUMNAS_RESERVAS) o ValueError"""
+    huesped_id = _entero(registro, 'huesped_id')
+    documento = _texto(registro.get('numero_documento'))
+    if huesped_id is None and not documento:
+        raise ValueError('Falta huesped_id o numero_documento')
+    habitacion_id = _entero(registro, 'habitacion_id')
+    numero = _texto(registro.get('numero_habitacion'))
+    if habitacion_id is None and not numero:
+        raise ValueError('Falta habitacion_id o numero_habitacion')
+    check_in = _fecha(registro, 'fecha_check_in')
+    check_out = _fecha(registro, 'fecha_check_out')
+    if check_in >= check_out:
+        raise ValueError('La fecha de check-out debe ser posterior al check-in')
+    if (check_out - check_in).days > ESTANCIA_MAXIMA_DIAS:
+        raise ValueError(f'La estancia no puede superar {ESTANCIA_MAXIMA_DIAS} noches')
+    adultos = _entero(registro, 'numero_adultos', 1)
+    ninos = _entero(registro, 'numero_ninos', 0)
+    if adultos < 1 or ninos < 0:
+        raise ValueError('Número de adultos o niños inválido')
+    tarifa = None
+    if _texto(registro.get('tarifa_total')):
+        try:
+            tarifa = Decimal(_texto(registro.get('tarifa_total')))
+        except InvalidOperation:
+            raise ValueError(f"tarifa_total no es un importe: {registro.get('tarifa_total')}")
+        if not 0 <= tarifa < _MAX_TARIFA:
+            raise ValueError('tarifa_total fuera de rango')
+    return (huesped_id, documento or None, habitacion_id, numero or None, check_in, check_out,
+            adultos, ninos, tarifa, _texto(registro.get('notas')) or None)
+
+
+class ImportacionController:
+
+    @staticmethod
+    def importar_reservas(contenido: Union[bytes, str, Iterable], formato: str, usuario_id: int,
+                          solo_validar: bool = False, todo_o_nada: bool = False) -> Dict[str, Any]:
+        """
+        Importa un lote de reservas en una sola transacción.
+
+        Devuelve los conteos, las reservas creadas y un informe de errores por
+        fila (la fila 1 es el primer registro, sin contar la cabecera). Con
+        ``todo_o_nada`` un solo error cancela el lote completo.
+        """
+        tiempos = {}
+        t0 = time.perf_counter()
+        errores: List[Dict[str, Any]] = []
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        total = 0
+        try:
+            for fila, registro in enumerate(_leer_filas(contenido, formato), start=1):
+                total = fila
+                try:
+                    valores = _preparar_reserva(registro)
+                except ValueError as e:
+                    errores.append({'fila': fila, 'error': str(e)})
+                    continue
+                escritor.writerow((fila,) + tuple('' if v is None else v for v in valores))
+        except (ValueError, csv.Error) as e:
+            return {'success': False, 'error': f'Archivo inválido: {str(e)}'}
+        if not total:
+            return {'success': False, 'error': 'El archivo no contiene reservas'}
+        tiempos['lectura'] = time.perf_counter() - t0
+
+        try:
+            with cache.invalidando('reservas'), db.get_cursor() as cursor:
+                if not solo_validar:
+                    # Nadie puede crear o mover reservas entre la validación y el INSERT
+                    cursor.execute("LOCK TABLE reservas IN SHARE ROW EXCLUSIVE MODE")
+                t = time.perf_counter()
+                ImportacionController._cargar_staging(cursor, buffer)
+                tiempos['copy'] = time.perf_counter() - t
+
+                t = time.perf_counter()
+                ImportacionController._validar_staging(cursor)
+                cursor.execute("SELECT fila, error FROM _importacion_reservas WHERE error IS NOT NULL")
+                errores.extend({'fila': e['fila'], 'error': e['error']} for e in cursor.fetchall())
+                errores.sort(key=lambda e: e['fila'])
+                cursor.execute("SELECT COUNT(*) AS n FROM _importacion_reservas WHERE error IS NULL")
+                validas = cursor.fetchone()['n']
+                tiempos['validacion'] = time.perf_counter() - t
+
+                reservas = []
+                aplicar = not solo_validar and validas and not (todo_o_nada and errores)
+                if aplicar:
+                    t = time.perf_counter()
+                    reservas = ImportacionController._insertar_staging(cursor, usuario_id)
+                    cursor.execute("""
+                        INSERT INTO logs_actividad (usuario_id, accion, entidad, detalles)
+                        VALUES (%s, 'IMPORTAR_RESERVAS', 'reserva', %s)
+                    """, (usuario_id, json.dumps({'total': total, 'importadas': len(reservas),
+                                                  'errores': len(errores)})))
+                    tiempos['insercion'] = time.perf_counter() - t
+
+            tiempos['total'] = time.perf_counter() - t0
+            if aplicar:
+                logger.info(f"Importación de reservas: {len(reservas)}/{total} filas importadas, "
+                            f"{len(errores)} con errores, en {tiempos['total']:.2f} s (usuario {usuario_id})")
+            return {
+                'success': True,
+                'total': total,
+                'validas': validas,
+                'importadas': len(reservas),
+                'errores': errores,
+                'reservas': reservas,
+                'tiempos': {k: round(v, 3) for k, v in tiempos.items()},
+            }
+        except Exception as e:
+            logger.error(f"Error importando reservas: {str(e)}")
+            return {'success': False, 'error': f'Error al importar las reservas: {str(e)}'}
+
+    @staticmethod
+    def _cargar_staging(cursor, buffer: io.StringIO) -> None:
+        cursor.execute("""
+            CREATE TEMP TABLE _importacion_reservas (
+                fila INTEGER PRIMARY KEY,
+                huesped_id INTEGER,
+                numero_documento TEXT,
+                habitacion_id INTEGER,
+                numero_habitacion TEXT,
+                fecha_check_in DATE NOT NULL,
+                fecha_check_out DATE NOT NULL,
+                numero_adultos INTEGER NOT NULL,
+                numero_ninos INTEGER NOT NULL,
+                tarifa_total DECIMAL(10,2),
+                notas TEXT,
+                reserva_id INTEGER,
+                error TEXT
+            ) ON COMMIT DROP
+        """)
+        buffer.seek(0)
+        cursor.copy_expert(
+            f"COPY _importacion_reservas (fila, {', '.join(COLUMNAS_RESERVAS)}) "
+            "FROM STDIN WITH (FORMAT csv, NULL '')",
+            buffer
+        )
+
+    @staticmethod
+    def _validar_staging(cursor) -> None:
+        """Marca ``error`` en las filas no válidas, por orden de gravedad"""
+        # Resolver huésped y habitación por sus claves naturales
+        cursor.execute("""
+            UPDATE _importacion_reservas s SET huesped_id = h.id
+            FROM huespedes h
+            WHERE s.huesped_id IS NULL AND h.numero_documento = s.numero_documento
+        """)
+        cursor.execute("""
+            UPDATE _importacion_reservas s SET habitacion_id = h.id
+            FROM habitaciones h
+            WHERE s.habitacion_id IS NULL AND h.numero = s.numero_habitacion
+        """)
+        cursor.execute("""
+            UPDATE _importacion_reservas s SET error = 'Huésped no encontrado'
+            WHERE NOT EXISTS (SELECT 1 FROM huespedes h WHERE h.id = s.huesped_id)
+        """)
+        cursor.execute("""
+            UPDATE _importacion_reservas s SET error = 'Habitación no encontrada o inactiva'
+            WHERE error IS NULL
+              AND NOT EXISTS (SELECT 1 FROM habitaciones h WHERE h.id = s.habitacion_id AND h.activa)
+        """)
+        cursor.execute("""
+            UPDATE _importacion_reservas SET error = 'La fecha de check-in no puede ser en el pasado'
+            WHERE error IS NULL AND fecha_check_in < CURRENT_DATE
+        """)
+        cursor.execute("""
+            UPDATE _importacion_reservas s
+            SET error = 'La habitación solo tiene capacidad para ' || th.capacidad_maxima || ' personas'
+            FROM habitaciones h
+            JOIN tipos_habitacion th ON h.tipo_habitacion_id = th.id
+            WHERE s.error IS NULL AND h.id = s.habitacion_id
+              AND s.numero_adultos + s.numero_ninos > th.capacidad_maxima
+        """)
+        cursor.execute("CREATE INDEX ON _importacion_reservas (habitacion_id, fecha_check_in)")
+        cursor.execute("ANALYZE _importacion_reservas")
+
+        # Disponibilidad contra las reservas existentes (mismo criterio que verificar_disponibilidad)
+        cursor.execute("""
+            UPDATE _importacion_reservas s
+            SET error = 'La habitación no está disponible: se solapa con la reserva ' || c.codigo
+            FROM (
+                SELECT s2.fila, MIN(r.codigo_reserva) AS codigo
+                FROM _importacion_reservas s2
+                JOIN reservas r ON r.habitacion_id = s2.habitacion_id
+                 AND r.estado NOT IN ('cancelada', 'completada', 'no_show')
+                 AND r.fecha_check_in < s2.fecha_check_out
+                 AND s2.fecha_check_in < r.fecha_check_out
+                WHERE s2.error IS NULL
+                GROUP BY s2.fila
+            ) c
+            WHERE s.fila = c.fila
+        """)
+
+        # Solapes dentro del lote: gana la fila anterior. Solo se descarta una fila
+        # por culpa de otra que se conserva, así una cadena A-B-C descarta B pero
+        # conserva C. Una sola consulta recorre cada habitación por orden de fila
+        # arrastrando los rangos ya conservados, sin límite de eslabones.
+        cursor.execute("""
+            CREATE TEMP TABLE _importacion_orden ON COMMIT DROP AS
+            SELECT fila, habitacion_id, daterange(fecha_check_in, fecha_check_out) AS rango,
+                   ROW_NUMBER() OVER (PARTITION BY habitacion_id ORDER BY fila) AS n
+            FROM _importacion_reservas
+            WHERE error IS NULL
+        """)
+        cursor.execute("CREATE INDEX ON _importacion_orden (habitacion_id, n)")
+        cursor.execute("ANALYZE _importacion_orden")
+        cursor.execute("""
+            WITH RECURSIVE recorrido AS (
+                SELECT o.habitacion_id, o.n, o.fila, NULL::integer AS choca,
+                       ARRAY[o.rango] AS rangos, ARRAY[o.fila] AS filas
+                FROM _importacion_orden o
+                WHERE o.n = 1
+                UNION ALL
+                SELECT o.habitacion_id, o.n, o.fila, x.choca,
+                       CASE WHEN x.choca IS NULL THEN r.rangos || o.rango ELSE r.rangos END,
+                       CASE WHEN x.choca IS NULL THEN r.filas || o.fila ELSE r.filas END
+                FROM recorrido r
+                JOIN _importacion_orden o ON o.habitacion_id = r.habitacion_id AND o.n = r.n + 1
+                LEFT JOIN LATERAL (
+                    SELECT k.fila AS choca
+                    FROM unnest(r.rangos, r.filas) AS k(rango, fila)
+                    WHERE k.rango && o.rango
+                    ORDER BY k.fila
+                    LIMIT 1
+                ) x ON true
+            )
+            UPDATE _importacion_reservas s
+            SET error = 'Se solapa con la fila ' || r.choca || ' del mismo lote'
+            FROM recorrido r
+            WHERE s.fila = r.fila AND r.choca IS NOT NULL
+        """)
+
+        # Tarifa por defecto: tarifa base con el factor de temporada de cada noche. No aplica
+        # tarifas especiales, demanda ni descuentos de utils/tarifas.py: se importa lo ya pactado
+        cursor.execute("""
+            UPDATE _importacion_reservas s SET tarifa_total = t.total
+            FROM (
+                SELECT s2.fila,
+                       ROUND(ROUND(SUM(h.tarifa_base * COALESCE(
+                           (SELECT MAX(te.factor_multipliador) FROM temporadas te
+                            WHERE n.noche BETWEEN te.fecha_inicio AND te.fecha_fin), 1)
+                       ) / COUNT(*), 2) * COUNT(*), 2) AS total
+                FROM _importacion_reservas s2
+                JOIN habitaciones h ON h.id = s2.habitacion_id
+                CROSS JOIN LATERAL generate_series(s2.fecha_check_in, s2.fecha_check_out - 1,
+                                                   INTERVAL '1 day') AS n(noche)
+                WHERE s2.error IS NULL AND s2.tarifa_total IS NULL
+                GROUP BY s2.fila
+            ) t
+            WHERE s.fila = t.fila
+        """)
+
+    @staticmethod
+    def _insertar_staging(cursor, usuario_id: int) -> List[Dict[str, Any]]:
+        # Los ids se reservan antes para poder devolver fila -> reserva
+        cursor.execute("""
+            UPDATE _importacion_reservas
+            SET reserva_id = nextval(pg_get_serial_sequence('reservas', 'id'))
+            WHERE error IS NULL
+        """)
+        cursor.execute("""
+            INSERT INTO reservas
+            (id, huesped_id, fecha_check_in, fecha_check_out, numero_adultos,
+             numero_ninos, estado, habitacion_id, tarifa_total, notas, created_by)
+            SELECT reserva_id, huesped_id, fecha_check_in, fecha_check_out, numero_adultos,
+                   numero_ninos, 'confirmada', habitacion_id, tarifa_total, notas, %s
+            FROM _importacion_reservas
+            WHERE error IS NULL
+            ORDER BY fila
+        """, (usuario_id,))
+        cursor.execute("""
+            SELECT s.fila, r.id AS reserva_id, r.codigo_reserva
+            FROM _importacion_reservas s
+            JOIN reservas r ON r.id = s.reserva_id
+            ORDER BY s.fila
+        """)
+        return [dict(r) for r in cursor.fetchall()]
+
+    # ============================================================ HUÉSPEDES
+    @staticmethod
+    def importar_huespedes(origen, usuario_id: int, comparar_existentes: bool = True,
+                           solo_analizar: bool = False, progreso: Callable = None,
+                           tamano_bloque: int = BLOQUE_HUESPEDES) -> Dict[str, Any]:
+        """
+        Importa huéspedes desde un CSV (ruta, bytes o archivo) fusionando duplicados.
+
+        Los duplicados seguros (puntuación >= UMBRAL_DUPLICADO) se fusionan: con
+        un huésped existente se completan sus campos vacíos y entre filas del
+        archivo se crea un solo huésped. Los dudosos solo se informan.
+        ``progreso(etapa, filas)`` se llama tras cada bloque.
+        """
+        avisar = progreso or (lambda etapa, filas: None)
+        tiempos = {}
+        t0 = time.perf_counter()
+        informe: List[Dict[str, Any]] = []
+        if isinstance(origen, bytes):
+            origen = io.BytesIO(origen)
+        try:
+            with cache.invalidando('huespedes'), db.get_cursor() as cursor:
+                ImportacionController._crear_staging_huespedes(cursor)
+
+                # 1. Lectura por bloques, normalización y COPY
+                total = 0
+                lector = pd.read_csv(origen, dtype=str, keep_default_na=False, chunksize=tamano_bloque,
+                                     encoding='utf-8-sig', skipinitialspace=True)
+                for bloque in lector:
+                    bloque.columns = [c.strip().lower() for c in bloque.columns]
+                    bloque.insert(0, 'fila', range(total + 1, total + len(bloque) + 1))
+                    total += len(bloque)
+                    bloque = deduplicacion.normalizar(bloque)
+                    incompletas = bloque[['numero_documento', 'nombre', 'apellido']].isna().any(axis=1)
+                    informe.extend({'fila': int(f), 'accion': 'error', 'huesped_id': None,
+                                    'detalle': 'Faltan numero_documento, nombre o apellido'}
+                                   for f in bloque.loc[incompletas, 'fila'])
+                    bloque = bloque.loc[~incompletas].assign(nodo=lambda b: b['fila'], huesped_id=None)
+                    ImportacionController._copiar_huespedes(cursor, bloque)
+                    avisar('lectura', total)
+                if not total:
+                    return {'success': False, 'error': 'El archivo no contiene huéspedes'}
+                tiempos['lectura'] = time.perf_counter() - t0
+
+                # 2. Huéspedes existentes que comparten alguna clave con el archivo
+                t = time.perf_counter()
+                existentes = 0
+                if comparar_existentes:
+                    existentes = ImportacionController._cargar_existentes(cursor, tamano_bloque, avisar)
+                tiempos['existentes'] = time.perf_counter() - t
+
+                # 3. Pares candidatos por bloqueo y puntuación vectorizada
+                t = time.perf_counter()
+                for columna in ('k_documento', 'k_email', 'k_telefono', 'k_nombre'):
+                    cursor.execute(f"CREATE INDEX ON _importacion_huespedes ({columna})")
+                cursor.execute("ANALYZE _importacion_huespedes")
+                agrupador, posibles, total_posibles = ImportacionController._emparejar(
+                    cursor, tamano_bloque, avisar)
+                tiempos['emparejado'] = time.perf_counter() - t
+
+                # 4. Grupos: el canónico es el huésped existente más antiguo o la primera fila
+                t = time.perf_counter()
+                canonicos = ImportacionController._guardar_grupos(cursor, agrupador)
+                cursor.execute("""
+                    SELECT COUNT(*) FILTER (WHERE fila IS NOT NULL) AS filas_validas
+                    FROM _importacion_huespedes
+                """)
+                validas = cursor.fetchone()['filas_validas']
+
+                insertados = actualizados = 0
+                if not solo_analizar:
+                    insertados, actualizados = ImportacionController._fusionar_huespedes(cursor)
+                    cursor.execute("""
+                        INSERT INTO logs_actividad (usuario_id, accion, entidad, detalles)
+                        VALUES (%s, 'IMPORTAR_HUESPEDES', 'huesped', %s)
+                    """, (usuario_id, json.dumps({'total': total, 'insertados': insertados,
+                                                  'actualizados': actualizados})))
+                informe.extend(ImportacionController._informe_grupos(cursor, agrupador, canonicos,
+                                                                     solo_analizar))
+                tiempos['fusion'] = time.perf_counter() - t
+
+            informe.extend(posibles)
+            informe.sort(key=lambda r: (r['fila'], r['accion']))
+            fusionadas = sum(1 for r in informe if r['accion'] == 'fusionada')
+            tiempos['total'] = time.perf_counter() - t0
+            if not solo_analizar:
+                logger.info(f"Importación de huéspedes: {total} filas, {insertados} nuevos, "
+                            f"{actualizados} existentes completados, {fusionadas} filas fusionadas, "
+                            f"en {tiempos['total']:.1f} s (usuario {usuario_id})")
+            return {
+                'success': True,
+                'total': total,
+                'validas': validas,
+                'existentes_comparados': existentes,
+                'insertados': insertados,
+                'actualizados': actualizados,
+                'fusionadas': fusionadas,
+                'posibles_duplicados': total_posibles,
+                'errores': sum(1 for r in informe if r['accion'] == 'error'),
+                'informe': informe,
+                'tiempos': {k: round(v, 3) for k, v in tiempos.items()},
+            }
+        except Exception as e:
+            logger.error(f"Error importando huéspedes: {str(e)}")
+            return {'success': False, 'error': f'Error al importar los huéspedes: {str(e)}'}
+
+    @staticmethod
+    def _crear_staging_huespedes(cursor) -> None:
+        # nodo = fila del archivo (> 0) o -id de un huésped existente (< 0)
+        cursor.execute(f"""
+            CREATE TEMP TABLE _importacion_huespedes (
+                nodo BIGINT PRIMARY KEY,
+                fila INTEGER,
+                huesped_id INTEGER,
+                {', '.join(f'{c} TEXT' for c in deduplicacion.CAMPOS_HUESPED if c != 'fecha_nacimiento')},
+                fecha_nacimiento DATE,
+                k_documento TEXT,
+                k_email TEXT,
+                k_telefono TEXT,
+                k_nombre TEXT,
+                m1 BIGINT,
+                m2 BIGINT
+            ) ON COMMIT DROP
+        """)
+        cursor.execute("""
+            CREATE TEMP TABLE _grupos_huespedes (
+                nodo BIGINT PRIMARY KEY,
+                canonico BIGINT NOT NULL
+            ) ON COMMIT DROP
+        """)
+
+    @staticmethod
+    def _copiar_huespedes(cursor, bloque) -> None:
+        columnas = ['nodo', 'fila', 'huesped_id', *deduplicacion.CAMPOS_HUESPED, *deduplicacion.CLAVES]
+        buffer = io.StringIO()
+        bloque[columnas].to_csv(buffer, header=False, index=False)
+        buffer.seek(0)
+        cursor.copy_expert(
+            f"COPY _importacion_huespedes ({', '.join(columnas)}) FROM STDIN WITH (FORMAT csv, NULL '')",
+            buffer
+        )
+
+    @staticmethod
+    def _cargar_existentes(cursor, tamano_bloque: int, avisar: Callable) -> int:
+        """Normaliza y carga los huéspedes de la BD candidatos a coincidir con el archivo.
+
+        El filtro en SQL es aproximado (las claves exactas se calculan en Python
+        con la misma normalización que el archivo) y solo sirve para no traer
+        la tabla entera.
+        """
+        cursor.execute("""
+            CREATE TEMP TABLE _claves_archivo ON COMMIT DROP AS
+            SELECT DISTINCT k_documento, k_email, k_telefono, fecha_nacimiento,
+                   left(regexp_replace(translate(lower(apellido), 'áéíóúüñ', 'aeiouun'), '\\s', '', 'g'), 4)
+                       AS apellido4
+            FROM _importacion_huespedes
+        """)
+        cursor.execute("""
+            CREATE TEMP TABLE _candidatos_existentes ON COMMIT DROP AS
+            SELECT h.id FROM huespedes h
+            WHERE regexp_replace(upper(h.numero_documento), '[^0-9A-Z]', '', 'g')
+                      IN (SELECT k_documento FROM _claves_archivo)
+               OR lower(h.email) IN (SELECT k_email FROM _claves_archivo)
+               OR right(regexp_replace(h.telefono, '\\D', '', 'g'), 9)
+                      IN (SELECT k_telefono FROM _claves_archivo)
+               OR (h.fecha_nacimiento, left(regexp_replace(translate(lower(h.apellido), 'áéíóúüñ', 'aeiouun'),
+                                                           '\\s', '', 'g'), 4))
+                      IN (SELECT fecha_nacimiento, apellido4 FROM _claves_archivo)
+        """)
+
+        columnas = ['id', *deduplicacion.CAMPOS_HUESPED]
+        servidor = cursor.connection.cursor(name='huespedes_existentes')
+        servidor.itersize = tamano_bloque
+        servidor.execute(f"""
+            SELECT {', '.join(f'h.{c}' for c in columnas)}
+            FROM huespedes h JOIN _candidatos_existentes c ON c.id = h.id
+        """)
+        cargados = 0
+        try:
+            while True:
+                filas = servidor.fetchmany(tamano_bloque)
+                if not filas:
+                    break
+                bloque = pd.DataFrame(filas, columns=columnas).astype({'fecha_nacimiento': str})
+                bloque['fecha_nacimiento'] = bloque['fecha_nacimiento'].replace('None', '')
+                bloque = deduplicacion.normalizar(bloque)
+                bloque['nodo'] = -bloque['id']
+                bloque['fila'] = None
+                bloque['huesped_id'] = bloque['id']
+                ImportacionController._copiar_huespedes(cursor, bloque)
+                cargados += len(bloque)
+                avisar('huéspedes existentes', cargados)
+        finally:
+            servidor.close()
+        return cargados
+
+    @staticmethod
+    def _emparejar(cursor, tamano_bloque: int, avisar: Callable):
+        """Puntúa los pares que comparten una clave de bloqueo; devuelve los grupos y los dudosos"""
+        cursor.execute("""
+            CREATE TEMP TABLE _pares_huespedes ON COMMIT DROP AS
+            WITH bloques AS (
+                SELECT nodo, 'd' AS tipo, k_documento AS clave FROM _importacion_huespedes WHERE k_documento IS NOT NULL
+                UNION ALL
+                SELECT nodo, 'e', k_email FROM _importacion_huespedes WHERE k_email IS NOT NULL
+                UNION ALL
+                SELECT nodo, 't', k_telefono FROM _importacion_huespedes WHERE k_telefono IS NOT NULL
+                UNION ALL
+                SELECT nodo, 'n', k_nombre FROM _importacion_huespedes WHERE k_nombre IS NOT NULL
+            ),
+            utiles AS (
+                SELECT tipo, clave FROM bloques
+                GROUP BY tipo, clave
+                HAVING COUNT(*) > 1 AND (tipo = 'd' OR COUNT(*) <= %s)
+            )
+            SELECT DISTINCT a.nodo AS a, b.nodo AS b
+            FROM bloques a
+            JOIN utiles u ON u.tipo = a.tipo AND u.clave = a.clave
+            JOIN bloques b ON b.tipo = a.tipo AND b.clave = a.clave AND b.nodo > a.nodo
+            WHERE b.nodo > 0  -- dos huéspedes existentes no se fusionan entre sí
+        """, (_MAX_BLOQUE_CANDIDATOS,))
+
+        columnas = ['a', 'b', 'm1_a', 'm2_a', 'm1_b', 'm2_b', 'mismo_documento', 'mismo_email',
+                    'mismo_telefono', 'misma_fecha', 'fecha_distinta']
+        servidor = cursor.connection.cursor(name='pares_huespedes')
+        servidor.itersize = tamano_bloque
+        servidor.execute("""
+            SELECT p.a, p.b, x.m1, x.m2, y.m1, y.m2,
+                   COALESCE(x.k_documento = y.k_documento, false),
+                   COALESCE(x.k_email = y.k_email, false),
+                   COALESCE(x.k_telefono = y.k_telefono, false),
+                   COALESCE(x.fecha_nacimiento = y.fecha_nacimiento, false),
+                   COALESCE(x.fecha_nacimiento <> y.fecha_nacimiento, false)
+            FROM _pares_huespedes p
+            JOIN _importacion_huespedes x ON x.nodo = p.a
+            JOIN _importacion_huespedes y ON y.nodo = p.b
+        """)
+        agrupador = deduplicacion.Agrupador()
+        dudosos = []
+        revisados = 0
+        try:
+            while True:
+                filas = servidor.fetchmany(tamano_bloque)
+                if not filas:
+                    break
+                pares = pd.DataFrame(filas, columns=columnas)
+                puntuacion = deduplicacion.puntuar(pares)
+                seguros = puntuacion >= deduplicacion.UMBRAL_DUPLICADO
+                agrupador.unir_pares(pares['a'][seguros], pares['b'][seguros], puntuacion[seguros])
+                dudosos_bloque = ~seguros & (puntuacion >= deduplicacion.UMBRAL_POSIBLE)
+                dudosos.extend(zip(pares['a'][dudosos_bloque].tolist(), pares['b'][dudosos_bloque].tolist(),
+                                   puntuacion[dudosos_bloque].tolist()))
+                revisados += len(pares)
+                avisar('pares candidatos', revisados)
+        finally:
+            servidor.close()
+
+        # Un par dudoso cuyos miembros acabaron en el mismo grupo ya está resuelto
+        posibles = [(a, b, p) for a, b, p in dudosos if agrupador.raiz(a) != agrupador.raiz(b)]
+        informe = [{
+            'fila': b,
+            'accion': 'posible duplicado',
+            'huesped_id': -a if a < 0 else None,
+            'detalle': (f"de huésped existente {-a}" if a < 0 else f"de la fila {a}") + f" ({p:.2f})",
+        } for a, b, p in posibles[:_MAX_POSIBLES_INFORME]]
+        return agrupador, informe, len(posibles)
+
+    @staticmethod
+    def _guardar_grupos(cursor, agrupador) -> Dict[int, int]:
+        """Escribe nodo -> canónico en _grupos_huespedes; devuelve el mapa"""
+        canonicos = {}
+        for grupo in agrupador.grupos():
+            existentes = [n for n in grupo if n < 0]
+            # Huésped existente de menor id (nodo más cercano a 0) o primera fila del archivo
+            canonico = max(existentes) if existentes else min(grupo)
+            canonicos.update((n, canonico) for n in grupo)
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(canonicos.items())
+        buffer.seek(0)
+        cursor.copy_expert("COPY _grupos_huespedes (nodo, canonico) FROM STDIN WITH (FORMAT csv)", buffer)
+        return canonicos
+
+    @staticmethod
+    def _fusionar_huespedes(cursor) -> Tuple[int, int]:
+        """Inserta los huéspedes nuevos y completa los existentes; devuelve (insertados, actualizados)"""
+        # Un registro por grupo: cada campo toma el primer valor no vacío, empezando por el canónico
+        primeros = ',\n'.join(
+            f"(array_agg(s.{c} ORDER BY s.nodo <> COALESCE(g.canonico, s.nodo), s.fila) "
+            f"FILTER (WHERE s.{c} IS NOT NULL))[1] AS {c}"
+            for c in deduplicacion.CAMPOS_HUESPED
+        )
+        cursor.execute(f"""
+            CREATE TEMP TABLE _huespedes_fusionados ON COMMIT DROP AS
+            SELECT COALESCE(g.canonico, s.nodo) AS canonico, {primeros}
+            FROM _importacion_huespedes s
+            LEFT JOIN _grupos_huespedes g ON g.nodo = s.nodo
+            WHERE s.fila IS NOT NULL
+            GROUP BY COALESCE(g.canonico, s.nodo)
+        """)
+        # email es UNIQUE: no se asigna uno que ya tenga otro huésped o que se repita en el lote
+        cursor.execute("""
+            UPDATE _huespedes_fusionados f SET email = NULL
+            WHERE EXISTS (SELECT 1 FROM huespedes h WHERE h.email = f.email AND h.id <> -f.canonico)
+        """)
+        cursor.execute("""
+            UPDATE _huespedes_fusionados f SET email = NULL
+            FROM (
+                SELECT canonico, ROW_NUMBER() OVER (PARTITION BY email ORDER BY canonico) AS n
+                FROM _huespedes_fusionados WHERE email IS NOT NULL
+            ) r
+            WHERE r.canonico = f.canonico AND r.n > 1
+        """)
+
+        completar = ', '.join(f"{c} = COALESCE(NULLIF(h.{c}, ''), f.{c})"
+                              for c in ('email', 'telefono', 'nacionalidad', 'ciudad', 'pais',
+                                        'direccion', 'codigo_postal', 'preferencias'))
+        cursor.execute(f"""
+            UPDATE huespedes h
+            SET {completar},
+                fecha_nacimiento = COALESCE(h.fecha_nacimiento, f.fecha_nacimiento),
+                updated_at = CURRENT_TIMESTAMP
+            FROM _huespedes_fusionados f
+            WHERE f.canonico < 0 AND h.id = -f.canonico
+        """)
+        actualizados = cursor.rowcount
+
+        columnas = ', '.join(deduplicacion.CAMPOS_HUESPED)
+        al_coincidir = ', '.join(f"{c} = COALESCE(NULLIF(huespedes.{c}, ''), EXCLUDED.{c})"
+                                 for c in ('email', 'telefono', 'nacionalidad', 'ciudad', 'pais',
+                                           'direccion', 'codigo_postal', 'preferencias'))
+        cursor.execute(f"""
+            WITH escritos AS (
+                INSERT INTO huespedes ({columnas})
+                SELECT {columnas} FROM _huespedes_fusionados
+                WHERE canonico > 0
+                ORDER BY canonico
+                ON CONFLICT (numero_documento) DO UPDATE
+                SET {al_coincidir},
+                    fecha_nacimiento = COALESCE(huespedes.fecha_nacimiento, EXCLUDED.fecha_nacimiento),
+                    updated_at = CURRENT_TIMESTAMP
+                RETURNING (xmax = 0) AS nuevo
+            )
+            SELECT COUNT(*) FILTER (WHERE nuevo) AS insertados,
+                   COUNT(*) FILTER (WHERE NOT nuevo) AS actualizados
+            FROM escritos
+        """)
+        conteo = cursor.fetchone()
+        return conteo['insertados'], actualizados + conteo['actualizados']
+
+    @staticmethod
+    def _informe_grupos(cursor, agrupador, canonicos: Dict[int, int], solo_analizar: bool) -> List[Dict]:
+        """Una línea por fila del archivo fusionada con otra fila o con un huésped existente"""
+        if not canonicos:
+            return []
+        ids = {}
+        nuevos = sorted({c for c in canonicos.values() if c > 0})
+        if nuevos and not solo_analizar:
+            cursor.execute("""
+                SELECT f.canonico, h.id
+                FROM _huespedes_fusionados f
+                JOIN huespedes h ON h.numero_documento = f.numero_documento
+                WHERE f.canonico = ANY(%s)
+            """, (nuevos,))
+            ids = {r['canonico']: r['id'] for r in cursor.fetchall()}
+        informe = []
+        for nodo, canonico in canonicos.items():
+            if nodo < 0 or nodo == canonico:
+                continue
+            informe.append({
+                'fila': nodo,
+                'accion': 'fusionada',
+                'huesped_id': -canonico if canonico < 0 else ids.get(canonico),
+                'detalle': (f"con huésped existente {-canonico}" if canonico < 0 else f"con la fila {canonico}")
+                           + f" ({agrupador.puntuacion.get(nodo, 1.0):.2f})",
+            })
+        return informe
@@ -1,9 +1,182 @@
 """Controlador de reportes - agrupa consultas para reportes"""
+import asyncio
 from typing import List, Dict, Optional
 from datetime import date
 from config.database import db
+from config.database_async import adb
+from config.settings import settings
+from models.reserva import ESTANCIA_MAXIMA_DIAS
+from utils import archivo, cache, catalogo
 from utils.logger import logger
 
+# Los filtros por fecha van como rangos sobre la columna (nunca DATE(col) = ...)
+# para que usen los índices y, con las tablas particionadas, descarten meses.
+# {reservas} / {facturas} se sustituyen por archivo.origen(): la tabla o, si el
+# período empieza antes del corte del archivo, su unión con lo archivado.
+
+_SQL_KPIS_PERIODO = """
+    WITH stats AS (
+        SELECT 
+            COUNT(DISTINCT r.id) as total_reservas,
+            COALESCE(SUM(r.tarifa_total), 0) as ingresos_totales,
+            COALESCE(AVG(r.fecha_check_out - r.fecha_check_in), 0) as estancia_promedio,
+            COUNT(DISTINCT r.huesped_id) as huespedes_unicos,
+            SUM(CASE WHEN r.estado = 'cancelada' THEN 1 ELSE 0 END) as cancelaciones
+        FROM {reservas} r
+        WHERE r.fecha_reserva >= %s AND r.fecha_reserva < %s::date + 1
+    ),
+    habitaciones_stats AS (
+        SELECT COUNT(*) as total_habitaciones, AVG(tarifa_base) as tarifa_promedio
+        FROM habitaciones WHERE activa = true
+    )
+    SELECT s.*, h.total_habitaciones, h.tarifa_promedio,
+        CASE WHEN s.total_reservas > 0 
+        THEN (s.cancelaciones::DECIMAL / s.total_reservas * 100) ELSE 0 END as tasa_cancelacion
+    FROM stats s, habitaciones_stats h
+"""
+
+# Indicadores del panel principal (dashboard); cada consulta devuelve una fila.
+# Los ids de estado (%(disponible)s...) salen del catálogo en memoria.
+_SQL_KPIS_HOY = {
+    'ocupacion': f"""
+        SELECT
+            COUNT(DISTINCT CASE
+                WHEN r.fecha_check_in <= CURRENT_DATE
+                AND r.fecha_check_out > CURRENT_DATE
+                THEN r.habitacion_id
+            END) as ocupadas_hoy,
+            COUNT(h.id) as total_habitaciones
+        FROM habitaciones h
+        LEFT JOIN reservas r ON h.id = r.habitacion_id
+            AND r.estado IN ('confirmada', 'completada')
+            AND r.fecha_check_in <= CURRENT_DATE
+            AND r.fecha_check_out > CURRENT_DATE
+            AND r.fecha_check_in > CURRENT_DATE - {ESTANCIA_MAXIMA_DIAS}
+        WHERE h.activa = true
+    """,
+    'reservas_futuras': """
+        SELECT COUNT(*) as total FROM reservas
+        WHERE estado = 'confirmada' AND fecha_check_in > CURRENT_DATE
+    """,
+    'ingresos_hoy': """
+        SELECT COALESCE(SUM(total), 0) as ingresos_hoy
+        FROM facturas
+        WHERE fecha_emision >= CURRENT_DATE AND fecha_emision < CURRENT_DATE + 1
+        AND estado = 'pagada'
+    """,
+    'checkins_hoy': """
+        SELECT COUNT(*) as total FROM alojamientos
+        WHERE fecha_check_in >= CURRENT_DATE AND fecha_check_in < CURRENT_DATE + 1
+    """,
+    'checkouts_hoy': """
+        SELECT COUNT(*) as total FROM alojamientos
+        WHERE fecha_check_out >= CURRENT_DATE AND fecha_check_out < CURRENT_DATE + 1
+    """,
+    'estancia_promedio': f"""
+        SELECT COALESCE(AVG(fecha_check_out - fecha_check_in), 0) as estancia_promedio
+        FROM reservas
+        WHERE fecha_check_out >= CURRENT_DATE - INTERVAL '30 days'
+        AND fecha_check_in >= CURRENT_DATE - {30 + ESTANCIA_MAXIMA_DIAS}
+        AND estado = 'completada'
+    """,
+    'revpar': """
+        WITH stats AS (
+            SELECT
+                (SELECT COUNT(*) FROM habitaciones WHERE activa = true) as total_hab,
+                COALESCE(SUM(total), 0) as ingresos,
+                EXTRACT(DAY FROM DATE_TRUNC('month', CURRENT_DATE + INTERVAL '1 month')
+                    - DATE_TRUNC('month', CURRENT_DATE)) as dias_mes
+            FROM facturas
+            WHERE estado = 'pagada'
+            AND fecha_emision >= DATE_TRUNC('month', CURRENT_DATE)::date
+            AND fecha_emision < (DATE_TRUNC('month', CURRENT_DATE) + INTERVAL '1 month')::date
+        )
+        SELECT ingresos / NULLIF(total_hab * dias_mes, 0) as revpar FROM stats
+    """,
+    'ingresos_mes': """
+        SELECT COALESCE(SUM(total), 0) as ingresos_mes FROM facturas
+        WHERE estado = 'pagada'
+        AND fecha_emision >= DATE_TRUNC('month', CURRENT_DATE)::date
+        AND fecha_emision < (DATE_TRUNC('month', CURRENT_DATE) + INTERVAL '1 month')::date
+    """,
+    'habitaciones_libres': """
+        SELECT COUNT(*) as total FROM habitaciones
+        WHERE estado_id = %(disponible)s
+        AND activa = true
+    """,
+    'en_mantenimiento': """
+        SELECT COUNT(*) as total FROM habitaciones
+        WHERE estado_id = %(mantenimiento)s
+    """,
+}
+
+
+# Parámetros: inicio, fin, fin, inicio. Las reservas que solapan el período
+# empiezan antes de su fin y, como mucho, ESTANCIA_MAXIMA_DIAS antes de su inicio.
+_SQL_OCUPACION_PERIODO = f"""
+    WITH fechas AS (
+        SELECT generate_series(%s::date, %s::date, '1 day'::interval)::date as fecha
+    )
+    SELECT 
+        f.fecha,
+        COUNT(DISTINCT CASE 
+            WHEN r.fecha_check_in <= f.fecha 
+            AND r.fecha_check_out > f.fecha
+            AND r.estado IN ('confirmada', 'completada')
+            THEN r.habitacion_id 
+        END) as habitaciones_ocupadas,
+        COUNT(DISTINCT r.id) as reservas_activas,
+        COALESCE(SUM(CASE 
+            WHEN r.fecha_check_in <= f.fecha 
+            AND r.fecha_check_out > f.fecha
+            AND r.estado IN ('confirmada', 'completada')
+            THEN 1 
+        END), 0) as huespedes
+    FROM fechas f
+    LEFT JOIN {{reservas}} r ON 
+        r.fecha_check_in <= f.fecha 
+        AND r.fecha_check_out > f.fecha
+        AND r.fecha_check_in <= %s
+        AND r.fecha_check_in > %s::date - {ESTANCIA_MAXIMA_DIAS}
+    GROUP BY f.fecha
+    ORDER BY f.fecha
+"""
+
+_SQL_INGRESOS_PERIODO = """
+    SELECT 
+        fecha_emision::date as fecha,
+        COUNT(DISTINCT id) as total_facturas,
+        SUM(total) as ingresos,
+        SUM(CASE WHEN metodo_pago = 'efectivo' THEN total ELSE 0 END) as efectivo,
+        SUM(CASE WHEN metodo_pago = 'tarjeta' THEN total ELSE 0 END) as tarjeta,
+        SUM(CASE WHEN metodo_pago = 'transferencia' THEN total ELSE 0 END) as transferencia
+    FROM {facturas} f
+    WHERE fecha_emision >= %s AND fecha_emision < %s::date + 1
+    AND estado = 'pagada'
+    GROUP BY fecha_emision::date
+    ORDER BY fecha
+"""
+
+# Reservas que ocupan alguna noche en [desde, hasta): cuándo entraron en cartera
+# y, si salieron (cancelación o no-show), cuándo. Parámetros: desde, hasta, desde.
+_SQL_RESERVAS_PRONOSTICO = f"""
+    SELECT
+        r.id,
+        r.fecha_reserva::date AS reservada,
+        CASE r.estado
+            WHEN 'cancelada' THEN COALESCE(r.fecha_cancelacion::date, r.fecha_reserva::date)
+            WHEN 'no_show' THEN r.fecha_check_in
+        END AS baja,
+        r.fecha_check_in, r.fecha_check_out, h.tipo_habitacion_id
+    FROM {{reservas}} r
+    JOIN habitaciones h ON h.id = r.habitacion_id
+    WHERE r.fecha_check_in > %s::date - {ESTANCIA_MAXIMA_DIAS}
+      AND r.fecha_check_in < %s
+      AND r.fecha_check_out > %s
+"""
+
+_pronosticador = None
+
 
 class ReporteController:
 
@@ -12,32 +185,8 @@ class ReporteController:
         """Obtiene datos de ocupación diaria para un período"""
         try:
             with db.get_cursor() as cursor:
-                cursor.execute("""
-                    WITH fechas AS (
-                        SELECT generate_series(%s::date, %s::date, '1 day'::interval)::date as fecha
-                    )
-                    SELECT 
-                        f.fecha,
-                        COUNT(DISTINCT CASE 
-                            WHEN r.fecha_check_in <= f.fecha 
-                            AND r.fecha_check_out > f.fecha
-                            AND r.estado IN ('confirmada', 'completada')
-                            THEN r.habitacion_id 
-                        END) as habitaciones_ocupadas,
-                        COUNT(DISTINCT r.id) as reservas_activas,
-                        COALESCE(SUM(CASE 
-                            WHEN r.fecha_check_in <= f.fecha 
-                            AND r.fecha_check_out > f.fecha
-                            AND r.estado IN ('confirmada', 'completada')
-                            THEN 1 
-                        END), 0) as huespedes
-                    FROM fechas f
-                    LEFT JOIN reservas r ON 
-                        r.fecha_check_in <= f.fecha 
-                        AND r.fecha_check_out > f.fecha
-                    GROUP BY f.fecha
-                    ORDER BY f.fecha
-                """, (fecha_inicio, fecha_fin))
+                sql = _SQL_OCUPACION_PERIODO.format(reservas=archivo.origen('reservas', fecha_inicio))
+                cursor.execute(sql, (fecha_inicio, fecha_fin, fecha_fin, fecha_inicio))
                 return cursor.fetchall()
         except Exception as e:
             logger.error(f"Error en reporte ocupación: {str(e)}")
@@ -48,51 +197,166 @@ class ReporteController:
         """Obtiene ingresos por día para un período"""
         try:
             with db.get_cursor() as cursor:
-                cursor.execute("""
-                    SELECT 
-                        DATE(fecha_emision) as fecha,
-                        COUNT(DISTINCT id) as total_facturas,
-                        SUM(total) as ingresos,
-                        SUM(CASE WHEN metodo_pago = 'efectivo' THEN total ELSE 0 END) as efectivo,
-                        SUM(CASE WHEN metodo_pago = 'tarjeta' THEN total ELSE 0 END) as tarjeta,
-                        SUM(CASE WHEN metodo_pago = 'transferencia' THEN total ELSE 0 END) as transferencia
-                    FROM facturas
-                    WHERE DATE(fecha_emision) BETWEEN %s AND %s
-                    AND estado = 'pagada'
-                    GROUP BY DATE(fecha_emision)
-                    ORDER BY fecha
-                """, (fecha_inicio, fecha_fin))
+                sql = _SQL_INGRESOS_PERIODO.format(facturas=archivo.origen('facturas', fecha_inicio))
+                cursor.execute(sql, (fecha_inicio, fecha_fin))
                 return cursor.fetchall()
         except Exception as e:
             logger.error(f"Error en reporte ingresos: {str(e)}")
             return []
 
+    @staticmethod
+    def incluye_archivo(fecha_inicio: date) -> bool:
+        """Si el período empieza antes del corte del archivo (los reportes unen lo archivado)"""
+        return archivo.necesita_archivo(fecha_inicio)
+
     @staticmethod
     def get_kpis_periodo(fecha_inicio: date, fecha_fin: date) -> Optional[Dict]:
         """Obtiene KPIs para un período"""
         try:
+            sql = _SQL_KPIS_PERIODO.format(reservas=archivo.origen('reservas', fecha_inicio))
             with db.get_cursor() as cursor:
-                cursor.execute("""
-                    WITH stats AS (
-                        SELECT 
-                            COUNT(DISTINCT r.id) as total_reservas,
-                            COALESCE(SUM(r.tarifa_total), 0) as ingresos_totales,
-                            AVG(r.fecha_check_out - r.fecha_check_in) as estancia_promedio,
-                            COUNT(DISTINCT r.huesped_id) as huespedes_unicos,
-                            SUM(CASE WHEN r.estado = 'cancelada' THEN 1 ELSE 0 END) as cancelaciones
-                        FROM reservas r
-                        WHERE r.fecha_reserva::date BETWEEN %s AND %s
-                    ),
-                    habitaciones_stats AS (
-                        SELECT COUNT(*) as total_habitaciones, AVG(tarifa_base) as tarifa_promedio
-                        FROM habitaciones WHERE activa = true
-                    )
-                    SELECT s.*, h.total_habitaciones, h.tarifa_promedio,
-                        CASE WHEN s.total_reservas > 0 
-                        THEN (s.cancelaciones::DECIMAL / s.total_reservas * 100) ELSE 0 END as tasa_cancelacion
-                    FROM stats s, habitaciones_stats h
-                """, (fecha_inicio, fecha_fin))
+                cursor.execute(sql, (fecha_inicio, fecha_fin))
                 return cursor.fetchone()
         except Exception as e:
             logger.error(f"Error en KPIs: {str(e)}")
             return None
+
+    @staticmethod
+    async def get_kpis_periodo_async(fecha_inicio: date, fecha_fin: date) -> Optional[Dict]:
+        """Versión async de get_kpis_periodo"""
+        try:
+            sql = _SQL_KPIS_PERIODO.format(reservas=archivo.origen('reservas', fecha_inicio))
+            async with adb.get_cursor() as cursor:
+                await cursor.execute(sql, (fecha_inicio, fecha_fin))
+                return await cursor.fetchone()
+        except Exception as e:
+            logger.error(f"Error en KPIs: {str(e)}")
+            return None
+
+    @staticmethod
+    @cache.cacheado(cache.VIVO, 'reservas', 'alojamientos', 'facturas', 'habitaciones')
+    def get_kpis_hoy(completos: bool = True) -> Dict[str, Dict]:
+        """KPIs del panel principal: una fila por indicador.
+
+        Con DB_ASYNC las consultas se lanzan en paralelo por el pool async;
+        si no, se ejecutan en serie sobre una sola conexión.
+        """
+        nombres = ReporteController.kpis_hoy(completos)
+        if settings.DB_ASYNC:
+            try:
+                return adb.ejecutar(ReporteController.get_kpis_hoy_async(completos))
+            except Exception as e:
+                logger.error(f"Error en KPIs async, se usa la conexión síncrona: {str(e)}")
+        kpis = {}
+        parametros = ReporteController._parametros_kpis()
+        with db.get_cursor() as cursor:
+            for nombre in nombres:
+                cursor.execute(_SQL_KPIS_HOY[nombre], parametros)
+                kpis[nombre] = cursor.fetchone()
+        return kpis
+
+    @staticmethod
+    async def get_kpis_hoy_async(completos: bool = True) -> Dict[str, Dict]:
+        """Versión async de get_kpis_hoy: todas las consultas a la vez"""
+        nombres = ReporteController.kpis_hoy(completos)
+        filas = await asyncio.gather(*(ReporteController.get_kpi_hoy_async(n) for n in nombres))
+        return dict(zip(nombres, filas))
+
+    @staticmethod
+    async def get_kpi_hoy_async(nombre: str) -> Optional[Dict]:
+        async with adb.get_cursor() as cursor:
+            await cursor.execute(_SQL_KPIS_HOY[nombre], ReporteController._parametros_kpis())
+            return await cursor.fetchone()
+
+    @staticmethod
+    def _parametros_kpis() -> Dict[str, int]:
+        cat = catalogo.actual()
+        return {'disponible': cat.estado_id('disponible'), 'mantenimiento': cat.estado_id('mantenimiento')}
+
+    @staticmethod
+    def kpis_hoy(completos: bool) -> List[str]:
+        """Indicadores que ve cada perfil (completos = DASHBOARD_VIEW_KPI_ALL)"""
+        if completos:
+            return ['ocupacion', 'reservas_futuras', 'ingresos_hoy', 'checkins_hoy',
+                    'estancia_promedio', 'revpar', 'ingresos_mes']
+        return ['ocupacion', 'reservas_futuras', 'checkins_hoy', 'checkouts_hoy',
+                'habitaciones_libres', 'en_mantenimiento']
+
+    @staticmethod
+    def get_reservas_periodo(fecha_inicio: date, fecha_fin: date) -> List[Dict]:
+        """Obtiene las reservas realizadas en un período con huésped y habitación"""
+        try:
+            reservas = archivo.origen('reservas', fecha_inicio)
+            with db.get_cursor() as cursor:
+                cursor.execute(f"""
+                    SELECT
+                        r.codigo_reserva,
+                        r.fecha_reserva::date as fecha_reserva,
+                        r.fecha_check_in, r.fecha_check_out,
+                        r.tarifa_total, r.estado,
+                        h.nombre || ' ' || h.apellido as huesped,
+                        hab.numero as habitacion,
+                        hab.tipo_habitacion_id
+                    FROM {reservas} r
+                    JOIN huespedes h ON r.huesped_id = h.id
+                    LEFT JOIN habitaciones hab ON r.habitacion_id = hab.id
+                    WHERE r.fecha_reserva >= %s AND r.fecha_reserva < %s::date + 1
+                    ORDER BY r.fecha_reserva DESC
+                """, (fecha_inicio, fecha_fin))
+                filas = cursor.fetchall()
+            cat = catalogo.actual()
+            for fila in filas:
+                fila['tipo_habitacion'] = cat.nombre_tipo(fila.pop('tipo_habitacion_id'))
+            return filas
+        except Exception as e:
+            logger.error(f"Error en reporte reservas: {str(e)}")
+            return []
+
+    @staticmethod
+    def get_huespedes_periodo(fecha_inicio: date, fecha_fin: date) -> List[Dict]:
+        """Obtiene los huéspedes registrados en un período con sus reservas y consumo"""
+        try:
+            reservas = archivo.origen('reservas', fecha_inicio)
+            with db.get_cursor() as cursor:
+                cursor.execute(f"""
+                    SELECT
+                        h.id, h.nombre, h.apellido, h.numero_documento,
+                        h.email, h.nacionalidad, h.es_vip,
+                        h.created_at::date as fecha_registro,
+                        COUNT(r.id) as total_reservas,
+                        COALESCE(SUM(CASE WHEN r.estado != 'cancelada' THEN r.tarifa_total ELSE 0 END), 0) as total_consumido
+                    FROM huespedes h
+                    LEFT JOIN {reservas} r ON h.id = r.huesped_id
+                        AND r.fecha_reserva >= %s AND r.fecha_reserva < %s::date + 1
+                    WHERE h.created_at >= %s AND h.created_at < %s::date + 1
+                    GROUP BY h.id, h.nombre, h.apellido, h.numero_documento,
+                             h.email, h.nacionalidad, h.es_vip, h.created_at
+                    ORDER BY total_reservas DESC, total_consumido DESC
+                """, (fecha_inicio, fecha_fin, fecha_inicio, fecha_fin))
+                return cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Error en reporte huéspedes: {str(e)}")
+            return []
+
+    @staticmethod
+    def get_reservas_pronostico(desde: date, hasta: date) -> List[Dict]:
+        """Reservas con noches en [desde, hasta), con fechas de alta y baja en cartera"""
+        sql = _SQL_RESERVAS_PRONOSTICO.format(reservas=archivo.origen('reservas', desde))
+        with db.get_cursor() as cursor:
+            cursor.execute(sql, (desde, hasta, desde))
+            return cursor.fetchall()
+
+    @staticmethod
+    def get_pronostico_ocupacion(horizonte: int = 90) -> Optional[Dict]:
+        """Pronóstico por noche y tipo de habitación, curva de reservas y ritmo frente al año anterior"""
+        global _pronosticador
+        try:
+            # NumPy/pandas solo se cargan al pedir el pronóstico
+            from utils.pronostico import Pronosticador
+            if _pronosticador is None:
+                _pronosticador = Pronosticador(ReporteController.get_reservas_pronostico)
+            nombres = {t.id: t.nombre for t in catalogo.actual().tipos}
+            return _pronosticador.resultado(horizonte, nombres)
+        except Exception as e:
+            logger.error(f"Error en pronóstico de ocupación: {str(e)}")
+            return None
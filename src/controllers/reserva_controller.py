@@ -1,15 +1,20 @@
 # src/controllers/reserva_controller.py
 from typing import List, Dict, Any, Optional
-from datetime import date, datetime, timedelta
-from models.reserva import Reserva
+from datetime import date, datetime
+from models.reserva import Reserva, ESTANCIA_MAXIMA_DIAS
 from models.habitacion import Habitacion
 from models.huesped import Huesped
 from config.database import db
+from config.settings import settings
+from utils import cache, catalogo, grupos
+from utils.idempotencia import idempotente
 from utils.logger import logger
+from utils.tracing import tracer
 
 class ReservaController:
     
     @staticmethod
+    @idempotente('crear_reserva')
     def crear_reserva(datos_reserva: Dict[str, Any], usuario_id: int) -> Dict[str, Any]:
         """
         Crea una nueva reserva con validaciones
@@ -30,6 +35,12 @@ class ReservaController:
                     'success': False,
                     'error': 'La fecha de check-in no puede ser en el pasado'
                 }
+
+            if (check_out - check_in).days > ESTANCIA_MAXIMA_DIAS:
+                return {
+                    'success': False,
+                    'error': f'La estancia no puede superar {ESTANCIA_MAXIMA_DIAS} noches'
+                }
             
             # Validar capacidad
             habitacion = Habitacion.get_by_id(datos_reserva.get('habitacion_id'))
@@ -86,120 +97,124 @@ class ReservaController:
         """
         Busca habitaciones disponibles según criterios
         """
-        print("\n" + "🔥"*60)
-        print("🔥 CONTROLLER: buscar_disponibilidad() - INICIO")
-        print(f"🔥 check_in: {check_in} ({type(check_in)})")
-        print(f"🔥 check_out: {check_out} ({type(check_out)})")
-        print(f"🔥 tipo_habitacion: {tipo_habitacion} ({type(tipo_habitacion)})")
-        print(f"🔥 capacidad: {capacidad} ({type(capacidad)})")
-        print("🔥"*60)
-        
-        try:
-            # PASO 1: Llamar al modelo
-            print("\n📞 CONTROLLER: Llamando a Habitacion.get_disponibles()...")
-            habitaciones = Habitacion.get_disponibles(check_in, check_out, tipo_habitacion)
-            
-            print(f"📞 CONTROLLER: get_disponibles devolvió {len(habitaciones)} habitaciones")
-            
-            # Mostrar las habitaciones recibidas del modelo
-            if habitaciones:
-                print("📋 Habitaciones recibidas del modelo:")
-                for h in habitaciones:
-                    print(f"   - ID: {h.get('id')} | N°: {h.get('numero')} | Tipo: {h.get('tipo_nombre')} | Capacidad: {h.get('capacidad_maxima')}")
-            else:
-                print("⚠️ El modelo NO devolvió ninguna habitación")
-            
-            # PASO 2: Filtrar por capacidad si se especifica
-            if capacidad and habitaciones:
-                original_count = len(habitaciones)
-                print(f"\n🔧 CONTROLLER: Filtrando por capacidad mínima {capacidad} personas...")
-                
-                habitaciones = [
-                    h for h in habitaciones 
-                    if h.get('capacidad_maxima', 0) >= capacidad
-                ]
-                
-                print(f"🔧 CONTROLLER: {original_count} → {len(habitaciones)} habitaciones después del filtro")
-                
-                if len(habitaciones) < original_count:
-                    print("   Habitaciones filtradas por capacidad:")
-                    for h in habitaciones:
-                        print(f"   - Hab {h.get('numero')} (Capacidad: {h.get('capacidad_maxima')})")
-            
-            # PASO 3: Calcular tarifas según temporada
-            if habitaciones:
-                print(f"\n💰 CONTROLLER: Calculando tarifas para {len(habitaciones)} habitaciones...")
-                for habitacion in habitaciones:
-                    # Convertir tarifa_base a float ANTES de pasarla a la función
-                    tarifa_base = habitacion['tarifa_base']
-                    if hasattr(tarifa_base, 'item'):
-                        tarifa_base = float(tarifa_base)
-                    elif not isinstance(tarifa_base, (int, float)):
-                        tarifa_base = float(tarifa_base)
-                    
-                    tarifa = ReservaController._calcular_tarifa(
-                        tarifa_base,
-                        check_in,
-                        check_out
-                    )
-                    habitacion['tarifa_calculada'] = tarifa
-                    habitacion['total_estancia'] = tarifa * (check_out - check_in).days
-                    print(f"   - Hab {habitacion['numero']}: tarifa_base={habitacion['tarifa_base']}, calculada={tarifa:.2f}")
-            
-            print(f"\n✅ CONTROLLER: Devolviendo {len(habitaciones)} habitaciones a la vista")
-            print("🔥"*60 + "\n")
-            
-            return habitaciones
-            
-        except Exception as e:
-            print(f"\n❌ ERROR en CONTROLLER: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            print("🔥"*60 + "\n")
-            logger.error(f"Error en búsqueda de disponibilidad: {str(e)}")
-            return []
+        with tracer.span('reserva.buscar_disponibilidad', check_in=str(check_in),
+                         check_out=str(check_out), tipo_habitacion=tipo_habitacion,
+                         capacidad=capacidad) as span:
+            try:
+                # PASO 1: Llamar al modelo
+                habitaciones = Habitacion.get_disponibles(check_in, check_out, tipo_habitacion)
+                span.set('disponibles_modelo', len(habitaciones))
+                
+                # PASO 2: Filtrar por capacidad si se especifica
+                if capacidad and habitaciones:
+                    habitaciones = [
+                        h for h in habitaciones 
+                        if h.get('capacidad_maxima', 0) >= capacidad
+                    ]
+                    span.set('tras_filtro_capacidad', len(habitaciones))
+                
+                # PASO 3: Tarifas de la estancia (temporada, tarifas especiales, demanda) en una pasada
+                if habitaciones:
+                    with tracer.span('reserva.calcular_tarifas', habitaciones=len(habitaciones)):
+                        from utils.tarifas import motor
+                        tarifas = motor.tarifas_estancia(
+                            [h['tipo_habitacion_id'] for h in habitaciones],
+                            [h['tarifa_base'] for h in habitaciones],
+                            check_in,
+                            check_out
+                        )
+                        for i, habitacion in enumerate(habitaciones):
+                            habitacion['tarifa_calculada'] = float(tarifas['tarifa'][i])
+                            habitacion['total_estancia'] = float(tarifas['total'][i])
+                            habitacion['descuento_estancia'] = float(tarifas['descuento'][i])
+                
+                span.set('resultados', len(habitaciones))
+                return habitaciones
+                
+            except Exception as e:
+                span.set('error', str(e))
+                logger.error(f"Error en búsqueda de disponibilidad: {str(e)}")
+                return []
     
     @staticmethod
-    def _calcular_tarifa(tarifa_base: float, check_in: date, check_out: date) -> float:
+    def buscar_grupo(check_in: date, check_out: date, tipos: Optional[Dict[int, int]] = None,
+                     habitaciones: int = 0, personas: int = 0, opciones: int = 5) -> Dict[str, Any]:
         """
-        Calcula la tarifa aplicando factores de temporada
-        - Ahora maneja correctamente tipos Decimal convirtiendo a float
+        Opciones de N habitaciones para un grupo (bodas, tours): cantidades mínimas
+        por tipo, total de habitaciones y capacidad total, prefiriendo el mismo piso
+        y habitaciones contiguas (ver utils/grupos.py)
         """
-        from models.temporada import Temporada
-        
-        # Asegurar que tarifa_base sea float (por si acaso)
-        try:
-            tarifa_base = float(tarifa_base)
-        except (TypeError, ValueError):
-            tarifa_base = 0.0
-            
-        dias = (check_out - check_in).days
-        if dias == 0:
-            return 0.0
-            
-        tarifa_total = 0.0
-        
-        for i in range(dias):
-            fecha_actual = check_in + timedelta(days=i)
-            factor = Temporada.get_factor_for_date(fecha_actual)
-            
-            # Convertir factor a float si es necesario
+        tipos = {t: n for t, n in (tipos or {}).items() if n}
+        with tracer.span('reserva.buscar_grupo', check_in=str(check_in), check_out=str(check_out),
+                         habitaciones=habitaciones, personas=personas, tipos=str(tipos)) as span:
             try:
-                factor = float(factor)
-            except (TypeError, ValueError):
-                factor = 1.0
-                
-            tarifa_total += tarifa_base * factor
-        
-        return round(tarifa_total / dias, 2)  # Tarifa promedio por día
+                if check_in >= check_out:
+                    return {'success': False, 'error': 'La fecha de check-out debe ser posterior al check-in'}
+                error = grupos.requisito_valido(tipos, habitaciones, personas)
+                if error:
+                    return {'success': False, 'error': error}
+
+                # Una sola lectura de disponibilidad y una pasada del motor de tarifas para todas
+                disponibles = Habitacion.get_disponibles(check_in, check_out)
+                if disponibles:
+                    from utils.tarifas import motor
+                    tarifas = motor.tarifas_estancia([h['tipo_habitacion_id'] for h in disponibles],
+                                                     [h['tarifa_base'] for h in disponibles], check_in, check_out)
+                    for i, habitacion in enumerate(disponibles):
+                        habitacion['tarifa_calculada'] = float(tarifas['tarifa'][i])
+                        habitacion['total_estancia'] = float(tarifas['total'][i])
+                        habitacion['capacidad_maxima'] = habitacion.get('capacidad_maxima') or 0
+
+                resultado = grupos.buscar(disponibles, Habitacion.get_all(), tipos, habitaciones, personas,
+                                          opciones, settings.GROUP_SEARCH_BUDGET_MS)
+                span.set('disponibles', resultado['disponibles'])
+                span.set('opciones', len(resultado['opciones']))
+                if not resultado['opciones']:
+                    return {'success': False, 'error': 'No hay habitaciones libres suficientes para el grupo '
+                                                       'en esas fechas', **resultado}
+                return {'success': True, **resultado}
+            except Exception as e:
+                span.set('error', str(e))
+                logger.error(f"Error en búsqueda para grupo: {str(e)}")
+                return {'success': False, 'error': str(e)}
+
+    @staticmethod
+    def cotizar(habitacion_id: int, check_in: date, check_out: date) -> Dict[str, Any]:
+        """
+        Cotiza una estancia: tarifa por noche (temporada, tarifas especiales, demanda) y total
+        """
+        try:
+            if check_in >= check_out:
+                return {'success': False, 'error': 'La fecha de check-out debe ser posterior al check-in'}
+            habitacion = Habitacion.get_by_id(habitacion_id)
+            if not habitacion:
+                return {'success': False, 'error': 'Habitación no encontrada'}
+            from utils.tarifas import motor
+            noches = (check_out - check_in).days
+            tarifas = motor.tarifas_estancia([habitacion['tipo_habitacion_id']], [habitacion['tarifa_base']],
+                                             check_in, check_out)
+            return {
+                'success': True,
+                'habitacion_id': habitacion_id,
+                'habitacion_numero': habitacion['numero'],
+                'noches': noches,
+                'tarifa_noche': float(tarifas['tarifa'][0]),
+                'descuento_estancia': float(tarifas['descuento'][0]),
+                'total': float(tarifas['total'][0]),
+            }
+        except Exception as e:
+            logger.error(f"Error cotizando estancia: {str(e)}")
+            return {'success': False, 'error': str(e)}
     
+    # Un reintento de otro recepcionista recibe el check-in ya registrado
     @staticmethod
+    @idempotente('check_in', sin_huella=('usuario_id',))
     def check_in(reserva_id: int, habitacion_id: int, usuario_id: int) -> Dict[str, Any]:
         """
         Procesa el check-in de una reserva
         """
         try:
-            with db.get_cursor() as cursor:
+            with cache.invalidando('reservas', 'alojamientos', 'habitaciones'), db.get_cursor() as cursor:
                 # Verificar que la reserva existe y está confirmada
                 cursor.execute("""
                     SELECT r.*, h.estado_id 
@@ -217,7 +232,8 @@ class ReservaController:
                     return {'success': False, 'error': 'La reserva no está confirmada'}
                 
                 # Verificar que la habitación está disponible
-                if reserva['estado_id'] != 1:  # 1 = disponible
+                cat = catalogo.actual()
+                if reserva['estado_id'] != cat.estado_id('disponible'):
                     return {'success': False, 'error': 'La habitación no está disponible'}
                 
                 # Crear registro de alojamiento
@@ -241,9 +257,9 @@ class ReservaController:
                 # Actualizar estado de la habitación
                 cursor.execute("""
                     UPDATE habitaciones 
-                    SET estado_id = 2  -- ocupada
+                    SET estado_id = %s
                     WHERE id = %s
-                """, (habitacion_id,))
+                """, (cat.estado_id('ocupada'), habitacion_id))
                 
                 # Registrar en historial
                 cursor.execute("""
@@ -270,7 +286,7 @@ class ReservaController:
         Procesa el check-out de una reserva
         """
         try:
-            with db.get_cursor() as cursor:
+            with cache.invalidando('reservas', 'alojamientos', 'habitaciones'), db.get_cursor() as cursor:
                 # Verificar que existe el alojamiento
                 cursor.execute("""
                     SELECT a.*, r.estado as estado_reserva
@@ -301,9 +317,9 @@ class ReservaController:
                 # Actualizar estado de la habitación a disponible
                 cursor.execute("""
                     UPDATE habitaciones 
-                    SET estado_id = 1  -- disponible
+                    SET estado_id = %s
                     WHERE id = %s
-                """, (habitacion_id,))
+                """, (catalogo.actual().estado_id('disponible'), habitacion_id))
                 
                 # Registrar en historial
                 cursor.execute("""
@@ -330,7 +346,7 @@ class ReservaController:
         Cancela una reserva existente
         """
         try:
-            with db.get_cursor() as cursor:
+            with cache.invalidando('reservas', 'alojamientos', 'habitaciones'), db.get_cursor() as cursor:
                 # Verificar que la reserva existe
                 cursor.execute("""
                     SELECT r.*, h.estado_id, h.numero as habitacion_numero
@@ -0,0 +1,103 @@
+"""Controlador de tarifas: calendario del motor de tarifas y tarifas especiales por temporada"""
+import json
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+from config.database import db
+from models.habitacion import Habitacion
+from utils import catalogo
+from utils.logger import logger
+
+
+class TarifaController:
+
+    @staticmethod
+    def get_calendario(dias: int = 90) -> Optional[Dict]:
+        """Tarifa, factor de temporada, tarifa especial, ocupación y demanda por tipo y noche.
+
+        La tarifa de referencia de cada tipo es la media de ``tarifa_base`` de sus
+        habitaciones activas.
+        """
+        try:
+            # NumPy solo se carga al abrir el calendario o cotizar
+            from utils.tarifas import motor
+            bases = defaultdict(list)
+            for habitacion in Habitacion.get_all():
+                bases[habitacion['tipo_habitacion_id']].append(float(habitacion['tarifa_base']))
+            calendario = motor.calendario(dias, {t: sum(v) / len(v) for t, v in bases.items()})
+            cat = catalogo.actual()
+            calendario['nombres'] = [cat.nombre_tipo(t, str(t)) for t in calendario['tipos']]
+            calendario['bases'] = [round(sum(bases[t]) / len(bases[t]), 2) if bases[t] else None
+                                   for t in calendario['tipos']]
+            return calendario
+        except Exception as e:
+            logger.error(f"Error en calendario de tarifas: {str(e)}")
+            return None
+
+    @staticmethod
+    def get_tarifas_especiales() -> List[Dict]:
+        """Tarifas de ``tarifas_temporada`` con el nombre del tipo y de la temporada"""
+        cat = catalogo.actual()
+        temporadas = {t.id: t for t in cat.temporadas}
+        filas = []
+        for tarifa in cat.tarifas_especiales:
+            temporada = temporadas.get(tarifa.temporada_id)
+            filas.append({
+                'tipo_habitacion_id': tarifa.tipo_habitacion_id,
+                'temporada_id': tarifa.temporada_id,
+                'tipo': cat.nombre_tipo(tarifa.tipo_habitacion_id),
+                'temporada': temporada.nombre if temporada else None,
+                'fecha_inicio': temporada.fecha_inicio if temporada else None,
+                'fecha_fin': temporada.fecha_fin if temporada else None,
+                'tarifa_especial': float(tarifa.tarifa_especial),
+            })
+        return sorted(filas, key=lambda f: (f['fecha_inicio'] or f['temporada_id'], f['tipo'] or ''))
+
+    @staticmethod
+    def guardar_tarifa_especial(tipo_habitacion_id: int, temporada_id: int, tarifa: float,
+                                usuario_id: int) -> Dict[str, Any]:
+        """Crea o cambia la tarifa especial de un tipo de habitación en una temporada"""
+        try:
+            if tarifa <= 0:
+                return {'success': False, 'error': 'La tarifa especial debe ser mayor que 0'}
+            with db.get_cursor() as cursor:
+                cursor.execute("""
+                    INSERT INTO tarifas_temporada (tipo_habitacion_id, temporada_id, tarifa_especial)
+                    VALUES (%s, %s, %s)
+                    ON CONFLICT (tipo_habitacion_id, temporada_id)
+                    DO UPDATE SET tarifa_especial = EXCLUDED.tarifa_especial
+                """, (tipo_habitacion_id, temporada_id, tarifa))
+                cursor.execute("""
+                    INSERT INTO logs_actividad (usuario_id, accion, entidad, detalles)
+                    VALUES (%s, 'TARIFA_ESPECIAL', 'tarifas_temporada', %s)
+                """, (usuario_id, json.dumps({'tipo_habitacion_id': tipo_habitacion_id,
+                                              'temporada_id': temporada_id, 'tarifa': tarifa})))
+            # El trigger de la migración 007 sube la versión; aquí se recarga sin esperar
+            catalogo.invalidar()
+            logger.info(f"Tarifa especial tipo {tipo_habitacion_id} / temporada {temporada_id}: "
+                        f"S/ {tarifa:,.2f} por usuario {usuario_id}")
+            return {'success': True}
+        except Exception as e:
+            logger.error(f"Error guardando tarifa especial: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+    @staticmethod
+    def eliminar_tarifa_especial(tipo_habitacion_id: int, temporada_id: int, usuario_id: int) -> Dict[str, Any]:
+        """Quita la tarifa especial: el tipo vuelve a tarifa base × factor de temporada"""
+        try:
+            with db.get_cursor() as cursor:
+                cursor.execute("""
+                    DELETE FROM tarifas_temporada WHERE tipo_habitacion_id = %s AND temporada_id = %s
+                """, (tipo_habitacion_id, temporada_id))
+                if cursor.rowcount == 0:
+                    return {'success': False, 'error': 'La tarifa especial no existe'}
+                cursor.execute("""
+                    INSERT INTO logs_actividad (usuario_id, accion, entidad, detalles)
+                    VALUES (%s, 'ELIMINAR_TARIFA_ESPECIAL', 'tarifas_temporada', %s)
+                """, (usuario_id, json.dumps({'tipo_habitacion_id': tipo_habitacion_id,
+                                              'temporada_id': temporada_id})))
+            catalogo.invalidar()
+            logger.info(f"Tarifa especial eliminada: tipo {tipo_habitacion_id} / temporada {temporada_id}")
+            return {'success': True}
+        except Exception as e:
+            logger.error(f"Error eliminando tarifa especial: {str(e)}")
+            return {'success': False, 'error': str(e)}
@@ -5,6 +5,7 @@ from .reserva import Reserva
 from .factura import Factura
 from .usuario import Usuario
 from .temporada import Temporada
+from .servicio import Servicio
 
 __all__ = [
     'Habitacion',
@@ -12,5 +13,6 @@ __all__ = [
     'Reserva',
     'Factura',
     'Usuario',
-    'Temporada'
+    'Temporada',
+    'Servicio'
 ]
@@ -4,6 +4,15 @@ from typing import Optional, List
 from datetime import date, datetime
 from config.database import db
 
+# Rango semiabierto sobre fecha_emision: usa el índice y descarta particiones
+_SQL_POR_RANGO_FECHAS = """
+    SELECT f.*, h.nombre || ' ' || h.apellido as huesped_nombre
+    FROM facturas f
+    LEFT JOIN huespedes h ON f.huesped_id = h.id
+    WHERE f.fecha_emision >= %s AND f.fecha_emision < %s::date + 1
+    ORDER BY f.fecha_emision DESC
+"""
+
 
 @dataclass
 class Factura:
@@ -42,15 +51,18 @@ class Factura:
             return cursor.fetchall()
 
     @classmethod
-    def get_por_rango_fechas(cls, fecha_inicio: date, fecha_fin: date) -> List[dict]:
+    def get_detalle(cls, factura_id: int) -> List[dict]:
         with db.get_cursor() as cursor:
             cursor.execute("""
-                SELECT f.*, h.nombre || ' ' || h.apellido as huesped_nombre
-                FROM facturas f
-                LEFT JOIN huespedes h ON f.huesped_id = h.id
-                WHERE DATE(f.fecha_emision) BETWEEN %s AND %s
-                ORDER BY f.fecha_emision DESC
-            """, (fecha_inicio, fecha_fin))
+                SELECT concepto, cantidad, precio_unitario, importe, tipo
+                FROM detalle_factura WHERE factura_id = %s
+            """, (factura_id,))
+            return cursor.fetchall()
+
+    @classmethod
+    def get_por_rango_fechas(cls, fecha_inicio: date, fecha_fin: date) -> List[dict]:
+        with db.get_cursor() as cursor:
+            cursor.execute(_SQL_POR_RANGO_FECHAS, (fecha_inicio, fecha_fin))
             return cursor.fetchall()
 
     @classmethod
@@ -2,6 +2,10 @@ from dataclasses import dataclass
 from typing import Optional, List
 from datetime import date
 from config.database import db
+from config.database_async import adb
+from utils import cache, catalogo
+from utils.logger import logger
+from utils.tracing import tracer
 
 @dataclass
 class Habitacion:
@@ -17,100 +21,100 @@ class Habitacion:
     notas: Optional[str] = None
     activa: bool = True
     
+    # Las filas traen tipo_nombre, capacidad_maxima, estado_nombre y estado_color
+    # del catálogo en memoria (utils/catalogo.py), sin unir las tablas de catálogo.
+    # Al cambiar el catálogo se invalidan estas cachés.
     @classmethod
+    @cache.cacheado(cache.LENTO, 'habitaciones', 'tipos_habitacion', 'estados_habitacion')
     def get_by_id(cls, habitacion_id: int):
         with db.get_cursor() as cursor:
-            cursor.execute("""
-                SELECT h.*, th.nombre as tipo_nombre, eh.nombre as estado_nombre,
-                       th.capacidad_maxima
-                FROM habitaciones h
-                JOIN tipos_habitacion th ON h.tipo_habitacion_id = th.id
-                JOIN estados_habitacion eh ON h.estado_id = eh.id
-                WHERE h.id = %s
-            """, (habitacion_id,))
+            cursor.execute("SELECT * FROM habitaciones WHERE id = %s", (habitacion_id,))
             result = cursor.fetchone()
-            return dict(result) if result else None
+            return catalogo.actual().completar_habitacion(dict(result)) if result else None
     
+    @staticmethod
+    def _query_get_all(activas_only: bool) -> str:
+        query = "SELECT * FROM habitaciones"
+        if activas_only:
+            query += " WHERE activa = true"
+        return query + " ORDER BY piso, numero"
+
     @classmethod
+    @cache.cacheado(cache.LENTO, 'habitaciones', 'tipos_habitacion', 'estados_habitacion')
     def get_all(cls, activas_only: bool = True):
         with db.get_cursor() as cursor:
-            query = """
-                SELECT h.*, th.nombre as tipo_nombre, th.capacidad_maxima,
-                       eh.nombre as estado_nombre, eh.color_hex as estado_color
-                FROM habitaciones h
-                JOIN tipos_habitacion th ON h.tipo_habitacion_id = th.id
-                JOIN estados_habitacion eh ON h.estado_id = eh.id
-            """
-            if activas_only:
-                query += " WHERE h.activa = true"
-            query += " ORDER BY h.piso, h.numero"
-            
-            cursor.execute(query)
-            return cursor.fetchall()
+            cursor.execute(cls._query_get_all(activas_only))
+            filas = cursor.fetchall()
+        cat = catalogo.actual()
+        return [cat.completar_habitacion(fila) for fila in filas]
+
+    @classmethod
+    async def get_all_async(cls, activas_only: bool = True):
+        """Versión async de get_all (ver config.database_async)"""
+        async with adb.get_cursor() as cursor:
+            await cursor.execute(cls._query_get_all(activas_only))
+            filas = await cursor.fetchall()
+        cat = catalogo.actual()
+        return [cat.completar_habitacion(dict(fila)) for fila in filas]
     
+    @staticmethod
+    def get_tipos() -> List[dict]:
+        """Tipos de habitación ordenados por capacidad"""
+        return catalogo.Catalogo.como_dicts(catalogo.actual().tipos)
+
+    @staticmethod
+    def get_estados() -> List[dict]:
+        return catalogo.Catalogo.como_dicts(catalogo.actual().estados)
+
+    @staticmethod
+    def get_caracteristicas() -> List[dict]:
+        return catalogo.Catalogo.como_dicts(catalogo.actual().caracteristicas)
+
     @classmethod
     def get_disponibles(cls, check_in: date, check_out: date, tipo_id: Optional[int] = None):
         """
         Retorna habitaciones disponibles para las fechas indicadas
         Usa la función verificar_disponibilidad() de PostgreSQL para mayor precisión
         """
-        print("\n" + "="*50)
-        print(f"🔍 MODELO HABITACION: get_disponibles()")
-        print(f"📅 check_in: {check_in}")
-        print(f"📅 check_out: {check_out}")
-        print(f"🏷️ tipo_id: {tipo_id}")
-        print("="*50)
-        
-        try:
-            with db.get_cursor() as cursor:
-                query = """
-                    SELECT h.*, th.nombre as tipo_nombre, th.capacidad_maxima
-                    FROM habitaciones h
-                    JOIN tipos_habitacion th ON h.tipo_habitacion_id = th.id
-                    WHERE h.activa = true 
-                      AND h.estado_id = (SELECT id FROM estados_habitacion WHERE nombre = 'disponible')
-                      AND verificar_disponibilidad(h.id, %s, %s, NULL) = true
-                """
-                params = [check_in, check_out]
-                
-                if tipo_id:
-                    query += " AND h.tipo_habitacion_id = %s"
-                    params.append(tipo_id)
-                
-                query += " ORDER BY h.piso, h.numero"
-                
-                # Mostrar la query con parámetros (para depuración)
-                try:
-                    from psycopg2 import sql
-                    print(f"📝 Query ejecutada: {cursor.mogrify(query, params).decode()}")
-                except:
-                    print(f"📝 Query: {query}")
-                    print(f"📦 Params: {params}")
-                
-                cursor.execute(query, params)
-                resultados = cursor.fetchall()
-                
-                print(f"✅ Resultados encontrados: {len(resultados)} habitaciones")
-                
-                # Mostrar cada habitación encontrada
-                if resultados:
-                    for r in resultados:
-                        print(f"   - Hab {r['numero']} | {r['tipo_nombre']} | Piso {r['piso']} | €{r['tarifa_base']}")
-                else:
-                    print("   ⚠️ No se encontraron habitaciones")
-                
-                print("="*50 + "\n")
-                return resultados
-                
-        except Exception as e:
-            print(f"❌ ERROR en get_disponibles: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            print("="*50 + "\n")
-            return []
+        with tracer.span('habitacion.get_disponibles', check_in=str(check_in),
+                         check_out=str(check_out), tipo_id=tipo_id) as span:
+            try:
+                cat = catalogo.actual()
+                with db.get_cursor() as cursor:
+                    query = """
+                        SELECT h.*
+                        FROM habitaciones h
+                        WHERE h.activa = true 
+                          AND h.estado_id = %s
+                          AND verificar_disponibilidad(h.id, %s, %s, NULL) = true
+                    """
+                    params = [cat.estado_id('disponible'), check_in, check_out]
+                    
+                    if tipo_id:
+                        query += " AND h.tipo_habitacion_id = %s"
+                        params.append(tipo_id)
+                    
+                    query += " ORDER BY h.piso, h.numero"
+                    
+                    # La query con parámetros sólo se construye si la solicitud se está trazando
+                    if span.recording:
+                        span.set('sql', cursor.mogrify(query, params).decode())
+                    
+                    cursor.execute(query, params)
+                    resultados = [cat.completar_habitacion(fila) for fila in cursor.fetchall()]
+                    
+                    span.set('resultados', len(resultados))
+                    if span.recording:
+                        span.set('habitaciones', [r['numero'] for r in resultados])
+                    return resultados
+                    
+            except Exception as e:
+                logger.error(f"Error en get_disponibles: {str(e)}")
+                span.set('error', str(e))
+                return []
     
     def save(self):
-        with db.get_cursor() as cursor:
+        with cache.invalidando('habitaciones'), db.get_cursor() as cursor:
             if self.id:
                 cursor.execute("""
                     UPDATE habitaciones 
@@ -140,7 +144,7 @@ class Habitacion:
             return result['id'] if result else None
     
     def update_estado(self, nuevo_estado_id: int):
-        with db.get_cursor() as cursor:
+        with cache.invalidando('habitaciones'), db.get_cursor() as cursor:
             cursor.execute("""
                 UPDATE habitaciones 
                 SET estado_id = %s, updated_at = CURRENT_TIMESTAMP
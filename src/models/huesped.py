@@ -2,6 +2,7 @@ from dataclasses import dataclass
 from typing import Optional
 from datetime import date
 from config.database import db
+from utils import cache
 
 @dataclass
 class Huesped:
@@ -50,7 +51,7 @@ class Huesped:
             return cursor.fetchall()
     
     def save(self):
-        with db.get_cursor() as cursor:
+        with cache.invalidando('huespedes'), db.get_cursor() as cursor:
             if self.id:
                 cursor.execute("""
                     UPDATE huespedes
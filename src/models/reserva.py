@@ -3,6 +3,58 @@ from dataclasses import dataclass
 from typing import Optional, List
 from datetime import date, datetime
 from config.database import db
+from config.database_async import adb
+from utils import cache
+
+# Noches máximas de una reserva (restricción reservas_estancia_maxima, migración 002).
+# Acota fecha_check_in por abajo en las consultas de solapamiento, de modo que
+# con la tabla particionada no se exploran los meses antiguos.
+ESTANCIA_MAXIMA_DIAS = 365
+
+# Compartidas por las versiones síncrona y async de los métodos
+_SQL_ACTIVAS = f"""
+    SELECT r.*, 
+           h.nombre as huesped_nombre, 
+           h.apellido as huesped_apellido,
+           hab.numero as habitacion_numero
+    FROM reservas r
+    JOIN huespedes h ON r.huesped_id = h.id
+    LEFT JOIN habitaciones hab ON r.habitacion_id = hab.id
+    WHERE r.estado = 'confirmada'
+      AND r.fecha_check_out >= CURRENT_DATE
+      AND r.fecha_check_in >= CURRENT_DATE - {ESTANCIA_MAXIMA_DIAS}
+    ORDER BY r.fecha_check_in
+"""
+
+_SQL_ALOJADOS_AHORA = f"""
+    SELECT r.*, 
+           h.nombre as huesped_nombre, 
+           h.apellido as huesped_apellido,
+           hab.numero as habitacion_numero,
+           a.fecha_check_in,
+           a.id as alojamiento_id
+    FROM reservas r
+    JOIN huespedes h ON r.huesped_id = h.id
+    JOIN habitaciones hab ON r.habitacion_id = hab.id
+    JOIN alojamientos a ON r.id = a.reserva_id
+    WHERE r.estado = 'completada'
+      AND a.fecha_check_out IS NULL
+      AND r.fecha_check_in >= CURRENT_DATE - {ESTANCIA_MAXIMA_DIAS}
+    ORDER BY a.fecha_check_in
+"""
+
+_SQL_POR_FECHAS = """
+    SELECT r.*, h.nombre as huesped_nombre, h.apellido as huesped_apellido,
+           hab.numero as habitacion_numero
+    FROM reservas r
+    JOIN huespedes h ON r.huesped_id = h.id
+    LEFT JOIN habitaciones hab ON r.habitacion_id = hab.id
+    WHERE r.fecha_check_in >= %s 
+      AND r.fecha_check_in <= %s
+      AND r.estado NOT IN ('cancelada')
+    ORDER BY r.fecha_check_in
+"""
+
 
 @dataclass
 class Reserva:
@@ -58,63 +110,44 @@ class Reserva:
     def get_by_fechas(cls, fecha_inicio: date, fecha_fin: date):
         """Obtiene reservas en un rango de fechas"""
         with db.get_cursor() as cursor:
-            cursor.execute("""
-                SELECT r.*, h.nombre as huesped_nombre, h.apellido as huesped_apellido,
-                       hab.numero as habitacion_numero
-                FROM reservas r
-                JOIN huespedes h ON r.huesped_id = h.id
-                LEFT JOIN habitaciones hab ON r.habitacion_id = hab.id
-                WHERE r.fecha_check_in >= %s 
-                  AND r.fecha_check_in <= %s
-                  AND r.estado NOT IN ('cancelada')
-                ORDER BY r.fecha_check_in
-            """, (fecha_inicio, fecha_fin))
+            cursor.execute(_SQL_POR_FECHAS, (fecha_inicio, fecha_fin))
             return cursor.fetchall()
     
     @classmethod
+    @cache.cacheado(cache.VIVO, 'reservas', 'huespedes', 'habitaciones')
     def get_activas(cls):
         """
         Retorna reservas activas para recepción.
         Son las que están CONFIRMADAS y cuyo check-in es hoy o futuro.
         """
         with db.get_cursor() as cursor:
-            cursor.execute("""
-                SELECT r.*, 
-                       h.nombre as huesped_nombre, 
-                       h.apellido as huesped_apellido,
-                       hab.numero as habitacion_numero
-                FROM reservas r
-                JOIN huespedes h ON r.huesped_id = h.id
-                LEFT JOIN habitaciones hab ON r.habitacion_id = hab.id
-                WHERE r.estado = 'confirmada'
-                  AND r.fecha_check_out >= CURRENT_DATE
-                ORDER BY r.fecha_check_in
-            """)
+            cursor.execute(_SQL_ACTIVAS)
             return cursor.fetchall()
+
+    @classmethod
+    async def get_activas_async(cls):
+        """Versión async de get_activas (ver config.database_async)"""
+        async with adb.get_cursor() as cursor:
+            await cursor.execute(_SQL_ACTIVAS)
+            return await cursor.fetchall()
     
     @classmethod
+    @cache.cacheado(cache.VIVO, 'reservas', 'alojamientos', 'huespedes', 'habitaciones')
     def get_alojados_ahora(cls):
         """
         Retorna huéspedes actualmente en el hotel.
         Son los que tienen estado COMPLETADA y un alojamiento activo.
         """
         with db.get_cursor() as cursor:
-            cursor.execute("""
-                SELECT r.*, 
-                       h.nombre as huesped_nombre, 
-                       h.apellido as huesped_apellido,
-                       hab.numero as habitacion_numero,
-                       a.fecha_check_in,
-                       a.id as alojamiento_id
-                FROM reservas r
-                JOIN huespedes h ON r.huesped_id = h.id
-                JOIN habitaciones hab ON r.habitacion_id = hab.id
-                JOIN alojamientos a ON r.id = a.reserva_id
-                WHERE r.estado = 'completada'
-                  AND a.fecha_check_out IS NULL
-                ORDER BY a.fecha_check_in
-            """)
+            cursor.execute(_SQL_ALOJADOS_AHORA)
             return cursor.fetchall()
+
+    @classmethod
+    async def get_alojados_ahora_async(cls):
+        """Versión async de get_alojados_ahora"""
+        async with adb.get_cursor() as cursor:
+            await cursor.execute(_SQL_ALOJADOS_AHORA)
+            return await cursor.fetchall()
     
     @classmethod
     def get_historial(cls, limite: int = 50):
@@ -157,7 +190,7 @@ class Reserva:
     
     def save(self, usuario_id: int = None):
         """Guarda o actualiza una reserva"""
-        with db.get_cursor() as cursor:
+        with cache.invalidando('reservas'), db.get_cursor() as cursor:
             if self.id:  # Update
                 cursor.execute("""
                     UPDATE reservas 
@@ -192,7 +225,7 @@ class Reserva:
         """Cancela una reserva"""
         if not self.id:
             return False
-        with db.get_cursor() as cursor:
+        with cache.invalidando('reservas'), db.get_cursor() as cursor:
             # Guardar estado anterior
             cursor.execute("""
                 SELECT estado FROM reservas WHERE id = %s
@@ -0,0 +1,12 @@
+"""Catálogo de servicios adicionales (restaurante, lavandería, spa...)"""
+from typing import List
+from utils import catalogo
+
+
+class Servicio:
+    """Modelo para el catálogo de servicios"""
+
+    @staticmethod
+    def get_activos() -> List[dict]:
+        """Servicios activos, del catálogo en memoria (utils/catalogo.py)"""
+        return catalogo.Catalogo.como_dicts(catalogo.actual().servicios)
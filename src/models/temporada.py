@@ -1,24 +1,20 @@
-from typing import Optional
+from typing import List
 from datetime import date
-from config.database import db
+from utils import catalogo
 
 
 class Temporada:
     """Modelo para tarifas por temporada"""
 
+    @staticmethod
+    def get_all() -> List[dict]:
+        """Todas las temporadas, del catálogo en memoria (utils/catalogo.py)"""
+        return catalogo.Catalogo.como_dicts(catalogo.actual().temporadas)
+
     @staticmethod
     def get_factor_for_date(fecha: date) -> float:
         """
         Obtiene el factor multiplicador de tarifa para una fecha dada.
         Retorna 1.0 si no hay temporada definida.
         """
-        with db.get_cursor() as cursor:
-            cursor.execute("""
-                SELECT factor_multipliador 
-                FROM temporadas 
-                WHERE %s BETWEEN fecha_inicio AND fecha_fin
-                ORDER BY factor_multipliador DESC
-                LIMIT 1
-            """, (fecha,))
-            result = cursor.fetchone()
-            return float(result['factor_multipliador']) if result else 1.0
+        return catalogo.actual().factor_temporada(fecha)
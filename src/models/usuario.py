@@ -2,6 +2,7 @@
 from dataclasses import dataclass
 from typing import Optional, List
 from config.database import db
+from utils import cache
 
 
 @dataclass
@@ -32,6 +33,7 @@ class Usuario:
             return cursor.fetchone()
 
     @classmethod
+    @cache.cacheado(cache.LENTO, 'usuarios')
     def get_all(cls, solo_activos: bool = True) -> List[dict]:
         with db.get_cursor() as cursor:
             query = "SELECT id, username, nombre_completo, email, rol, activo, ultimo_acceso FROM usuarios"
@@ -0,0 +1,347 @@
+"""Archivo en frío de estancias cerradas y facturas antiguas.
+
+``archivar`` mueve por lotes, de las tablas operativas a las del esquema
+``archivo`` (migración 003), las reservas canceladas o ya cerradas cuya salida
+es anterior al corte, junto con su historial, alojamiento, consumos, facturas y
+detalle. Así los índices que usa recepción solo cubren lo vivo.
+
+``exportar`` vuelca cada ejecución a archivos columnares comprimidos (Parquet o
+Feather, con pyarrow) y ``origen`` permite a los reportes unir lo vivo con lo
+archivado solo cuando el período pedido empieza antes del corte.
+"""
+import json
+import time
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config.database import db
+from config.settings import settings
+from utils.logger import logger
+
+ESQUEMA = 'archivo'
+
+# En orden de borrado: primero las tablas que apuntan a las siguientes
+TABLAS = ('detalle_factura', 'facturas', 'consumos_servicios', 'alojamientos',
+          'historial_estados_reserva', 'reservas')
+
+# Tabla -> (tabla temporal con los ids a mover, columna que los referencia, filtro que poda particiones)
+_MOVIMIENTOS = {
+    'detalle_factura': ('_archivar_facturas', 'factura_id', 'fecha_emision < %(corte)s'),
+    'facturas': ('_archivar_facturas', 'id', 'fecha_emision < %(corte)s'),
+    'consumos_servicios': ('_archivar_alojamientos', 'alojamiento_id', None),
+    'alojamientos': ('_archivar_alojamientos', 'id', None),
+    'historial_estados_reserva': ('_archivar_reservas', 'reserva_id', None),
+    'reservas': ('_archivar_reservas', 'id', 'fecha_check_in < %(corte)s'),
+}
+
+_HORIZONTE_SEGUNDOS = 60
+_horizonte = {'fecha': None, 'leido': float('-inf')}
+_columnas: Dict[str, List[str]] = {}
+
+
+def _restar_meses(fecha: date, meses: int) -> date:
+    indice = fecha.year * 12 + fecha.month - 1 - meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+# ------------------------------------------------------------ lectura transparente
+def horizonte() -> Optional[date]:
+    """Fecha de corte más reciente: antes de ella puede haber datos archivados.
+
+    Cada proceso la guarda ``_HORIZONTE_SEGUNDOS``; por eso ``archivar`` espera
+    ese plazo tras registrar la ejecución y antes de mover el primer lote.
+    """
+    if time.monotonic() - _horizonte['leido'] < _HORIZONTE_SEGUNDOS:
+        return _horizonte['fecha']
+    try:
+        with db.get_cursor() as cursor:
+            cursor.execute(f"SELECT MAX(fecha_corte) AS corte FROM {ESQUEMA}.ejecuciones")
+            _horizonte['fecha'] = cursor.fetchone()['corte']
+    except Exception:
+        # Sin la migración 003 no hay nada archivado
+        _horizonte['fecha'] = None
+    _horizonte['leido'] = time.monotonic()
+    return _horizonte['fecha']
+
+
+def necesita_archivo(desde: date) -> bool:
+    corte = horizonte()
+    return corte is not None and desde < corte
+
+
+def columnas(tabla: str) -> List[str]:
+    """Columnas de la tabla operativa (las del archivo son las mismas más ejecucion_id)"""
+    if tabla not in _columnas:
+        with db.get_cursor() as cursor:
+            cursor.execute("""
+                SELECT attname FROM pg_attribute
+                WHERE attrelid = to_regclass(%s) AND attnum > 0 AND NOT attisdropped
+                ORDER BY attnum
+            """, (f"public.{tabla}",))
+            _columnas[tabla] = [f['attname'] for f in cursor.fetchall()]
+    return _columnas[tabla]
+
+
+def origen(tabla: str, desde: date) -> str:
+    """``tabla`` o, si el período empieza antes del corte, su unión con el archivo.
+
+    Se usa en el FROM (``FROM {origen} r``). Los filtros de la consulta se
+    empujan a las dos ramas, así que siguen usando índices y particiones.
+    """
+    if tabla not in TABLAS or not necesita_archivo(desde):
+        return tabla
+    lista = ', '.join(columnas(tabla))
+    return f"(SELECT {lista} FROM public.{tabla} UNION ALL SELECT {lista} FROM {ESQUEMA}.{tabla})"
+
+
+# ------------------------------------------------------------ archivado
+def _sincronizar_columnas(cursor) -> None:
+    """Añade al archivo las columnas que las tablas operativas ganaron después de la migración"""
+    for tabla in TABLAS:
+        cursor.execute("""
+            SELECT a.attname, format_type(a.atttypid, a.atttypmod) AS tipo
+            FROM pg_attribute a
+            WHERE a.attrelid = to_regclass(%s) AND a.attnum > 0 AND NOT a.attisdropped
+              AND NOT EXISTS (SELECT 1 FROM pg_attribute b
+                              WHERE b.attrelid = to_regclass(%s) AND b.attname = a.attname
+                                AND NOT b.attisdropped)
+        """, (f"public.{tabla}", f"{ESQUEMA}.{tabla}"))
+        for faltante in cursor.fetchall():
+            cursor.execute(f'ALTER TABLE {ESQUEMA}.{tabla} ADD COLUMN "{faltante["attname"]}" {faltante["tipo"]}')
+    _columnas.clear()
+
+
+def _seleccionar_lote(cursor, corte: date, lote: int) -> int:
+    """Tablas temporales con los ids del lote; devuelve reservas + facturas sueltas"""
+    parametros = {'corte': corte, 'lote': lote}
+    cursor.execute("""
+        CREATE TEMP TABLE _archivar_reservas ON COMMIT DROP AS
+        SELECT r.id FROM reservas r
+        WHERE r.fecha_check_in < %(corte)s AND r.fecha_check_out < %(corte)s
+          AND r.estado IN ('completada', 'cancelada', 'no_show')
+          -- completada con el alojamiento abierto: el huésped sigue en el hotel
+          AND NOT EXISTS (SELECT 1 FROM alojamientos a
+                          WHERE a.reserva_id = r.id AND a.fecha_check_out IS NULL)
+          AND NOT EXISTS (SELECT 1 FROM facturas f
+                          WHERE f.reserva_id = r.id
+                            AND (f.estado = 'pendiente' OR f.fecha_emision >= %(corte)s))
+        ORDER BY r.id
+        LIMIT %(lote)s
+    """, parametros)
+    reservas = cursor.rowcount
+    cursor.execute("""
+        CREATE TEMP TABLE _archivar_facturas ON COMMIT DROP AS
+        SELECT f.id FROM facturas f JOIN _archivar_reservas a ON a.id = f.reserva_id
+        UNION
+        (SELECT f.id FROM facturas f
+         WHERE f.reserva_id IS NULL AND f.fecha_emision < %(corte)s AND f.estado <> 'pendiente'
+         ORDER BY f.id
+         LIMIT %(lote)s)
+    """, parametros)
+    cursor.execute("""
+        SELECT COUNT(*) AS n FROM _archivar_facturas af
+        JOIN facturas f ON f.id = af.id WHERE f.reserva_id IS NULL
+    """)
+    sueltas = cursor.fetchone()['n']
+    cursor.execute("""
+        CREATE TEMP TABLE _archivar_alojamientos ON COMMIT DROP AS
+        SELECT a.id FROM alojamientos a JOIN _archivar_reservas r ON r.id = a.reserva_id
+    """)
+    return reservas + sueltas
+
+
+def _mover_lote(cursor, corte: date, ejecucion_id: int) -> Dict[str, int]:
+    movidas = {}
+    for tabla in TABLAS:
+        temporal, columna, poda = _MOVIMIENTOS[tabla]
+        lista = ', '.join(columnas(tabla))
+        cursor.execute(f"""
+            WITH movidas AS (
+                DELETE FROM {tabla} t USING {temporal} x
+                WHERE t.{columna} = x.id {f'AND t.{poda}' if poda else ''}
+                RETURNING t.*
+            )
+            INSERT INTO {ESQUEMA}.{tabla} ({lista}, ejecucion_id)
+            SELECT {lista}, %(ejecucion)s FROM movidas
+        """, {'corte': corte, 'ejecucion': ejecucion_id})
+        movidas[tabla] = cursor.rowcount
+    return movidas
+
+
+def archivar(meses: Optional[int] = None, lote: Optional[int] = None,
+             solo_contar: bool = False, usuario_id: Optional[int] = None) -> Dict:
+    """Mueve al archivo lo cerrado antes de hace ``meses`` meses (por lotes, una transacción cada uno)"""
+    meses = settings.ARCHIVE_AFTER_MONTHS if meses is None else meses
+    lote = lote or settings.ARCHIVE_BATCH_SIZE
+    corte = _restar_meses(date.today(), meses)
+    totales = dict.fromkeys(TABLAS, 0)
+    inicio = time.perf_counter()
+    try:
+        if solo_contar:
+            with db.get_cursor() as cursor:
+                _seleccionar_lote(cursor, corte, 2 ** 31 - 1)
+                for tabla in ('reservas', 'facturas', 'alojamientos'):
+                    cursor.execute(f"SELECT COUNT(*) AS n FROM _archivar_{tabla}")
+                    totales[tabla] = cursor.fetchone()['n']
+            return {'success': True, 'corte': corte, 'filas': totales, 'solo_contar': True}
+
+        with db.get_cursor() as cursor:
+            _sincronizar_columnas(cursor)
+            # Los otros procesos guardan el horizonte hasta _HORIZONTE_SEGUNDOS: hay
+            # que esperar lo que falte desde que se anunció un corte que cubra este
+            cursor.execute(f"""
+                SELECT GREATEST(0, %s - COALESCE(EXTRACT(EPOCH FROM CURRENT_TIMESTAMP - MIN(iniciada_en)), 0))
+                       AS espera
+                FROM {ESQUEMA}.ejecuciones WHERE fecha_corte >= %s
+            """, (_HORIZONTE_SEGUNDOS, corte))
+            espera = float(cursor.fetchone()['espera'])
+            hay_filas = _seleccionar_lote(cursor, corte, 1) > 0
+            # La ejecución se registra antes de mover nada: el horizonte de los
+            # reportes ya cubre el corte aunque el proceso se interrumpa a mitad
+            cursor.execute(f"""
+                INSERT INTO {ESQUEMA}.ejecuciones (fecha_corte, usuario_id) VALUES (%s, %s) RETURNING id
+            """, (corte, usuario_id))
+            ejecucion_id = cursor.fetchone()['id']
+        _horizonte['leido'] = float('-inf')
+        if hay_filas and espera > 0:
+            # Mover antes dejaría a un reporte de otro proceso sin las filas ya archivadas
+            logger.info(f"Archivo {ejecucion_id}: esperando {espera:.0f} s a que caduque el horizonte en caché")
+            time.sleep(espera)
+
+        lotes = 0
+        while True:
+            with db.get_cursor() as cursor:
+                if not _seleccionar_lote(cursor, corte, lote):
+                    break
+                for tabla, n in _mover_lote(cursor, corte, ejecucion_id).items():
+                    totales[tabla] += n
+            lotes += 1
+
+        duracion = time.perf_counter() - inicio
+        with db.get_cursor() as cursor:
+            cursor.execute(f"""
+                UPDATE {ESQUEMA}.ejecuciones SET terminada_en = CURRENT_TIMESTAMP, filas = %s WHERE id = %s
+            """, (json.dumps(totales), ejecucion_id))
+            if usuario_id:
+                cursor.execute("""
+                    INSERT INTO logs_actividad (usuario_id, accion, entidad, entidad_id, detalles)
+                    VALUES (%s, 'ARCHIVAR', 'archivo', %s, %s)
+                """, (usuario_id, ejecucion_id, json.dumps({'corte': str(corte), 'filas': totales})))
+        logger.info(f"Archivo {ejecucion_id}: corte {corte}, {totales} en {lotes} lotes ({duracion:.1f} s)")
+        return {'success': True, 'ejecucion_id': ejecucion_id, 'corte': corte, 'filas': totales,
+                'lotes': lotes, 'duracion_s': round(duracion, 2)}
+    except Exception as e:
+        logger.error(f"Error archivando: {str(e)}")
+        return {'success': False, 'error': str(e), 'filas': totales}
+
+
+# ------------------------------------------------------------ exportación
+def _tipo_arrow(pa, tipo: str):
+    """Tipo de pyarrow para un tipo de PostgreSQL (format_type)"""
+    if tipo in ('integer', 'smallint', 'bigint'):
+        return pa.int64()
+    if tipo.startswith('numeric'):
+        precision, _, escala = tipo[8:-1].partition(',')
+        return pa.decimal128(int(precision), int(escala or 0)) if precision else pa.float64()
+    if tipo == 'date':
+        return pa.date32()
+    if tipo.startswith('timestamp'):
+        return pa.timestamp('us', tz='UTC' if 'with time zone' in tipo else None)
+    if tipo == 'boolean':
+        return pa.bool_()
+    if tipo in ('double precision', 'real'):
+        return pa.float64()
+    return pa.string()
+
+
+def exportar(directorio: Optional[Path] = None, formato: Optional[str] = None,
+             ejecucion_id: Optional[int] = None, filas_por_bloque: int = 50_000) -> Dict:
+    """Vuelca cada ejecución aún no exportada (o la indicada) a
+    ``<directorio>/<tabla>/ejecucion_<id>.<formato>`` con compresión zstd.
+
+    Lee con un cursor del servidor, por bloques: la memoria no depende del
+    tamaño del archivo.
+    """
+    # Dependencia opcional: solo se necesita para exportar
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    directorio = Path(directorio or settings.ARCHIVE_EXPORT_DIR)
+    formato = (formato or settings.ARCHIVE_EXPORT_FORMAT).lower()
+    if formato not in ('parquet', 'feather'):
+        return {'success': False, 'error': f"Formato no soportado: {formato}"}
+    extension = 'parquet' if formato == 'parquet' else 'arrow'
+    archivos = []
+    try:
+        with db.get_cursor() as cursor:
+            if ejecucion_id:
+                cursor.execute(f"SELECT id FROM {ESQUEMA}.ejecuciones WHERE id = %s", (ejecucion_id,))
+            else:
+                cursor.execute(f"""
+                    SELECT id FROM {ESQUEMA}.ejecuciones
+                    WHERE exportada_en IS NULL AND terminada_en IS NOT NULL ORDER BY id
+                """)
+            ejecuciones = [f['id'] for f in cursor.fetchall()]
+
+        for ejecucion in ejecuciones:
+            for tabla in TABLAS:
+                with db.get_cursor() as cursor:
+                    cursor.execute("""
+                        SELECT attname, format_type(atttypid, atttypmod) AS tipo FROM pg_attribute
+                        WHERE attrelid = to_regclass(%s) AND attnum > 0 AND NOT attisdropped
+                        ORDER BY attnum
+                    """, (f"{ESQUEMA}.{tabla}",))
+                    definicion = cursor.fetchall()
+                    esquema = pa.schema([(c['attname'], _tipo_arrow(pa, c['tipo'])) for c in definicion])
+                    json_cols = {c['attname'] for c in definicion if c['tipo'] in ('json', 'jsonb')}
+
+                    ruta = directorio / tabla / f"ejecucion_{ejecucion}.{extension}"
+                    ruta.parent.mkdir(parents=True, exist_ok=True)
+                    if formato == 'parquet':
+                        escritor = pq.ParquetWriter(ruta, esquema, compression='zstd')
+                    else:
+                        escritor = pa.ipc.new_file(
+                            str(ruta), esquema, options=pa.ipc.IpcWriteOptions(compression='zstd'))
+
+                    lector = cursor.connection.cursor(name=f"exportar_{tabla}")
+                    lector.itersize = filas_por_bloque
+                    lector.execute(f"SELECT * FROM {ESQUEMA}.{tabla} WHERE ejecucion_id = %s", (ejecucion,))
+                    filas = 0
+                    try:
+                        while True:
+                            bloque = lector.fetchmany(filas_por_bloque)
+                            if not bloque:
+                                break
+                            arrays = []
+                            for i, campo in enumerate(esquema):
+                                valores = [fila[i] for fila in bloque]
+                                if campo.name in json_cols:
+                                    valores = [None if v is None else json.dumps(v, default=str)
+                                               for v in valores]
+                                arrays.append(pa.array(valores, type=campo.type))
+                            escritor.write_batch(pa.RecordBatch.from_arrays(arrays, schema=esquema))
+                            filas += len(bloque)
+                    finally:
+                        lector.close()
+                        escritor.close()
+                    archivos.append({'ejecucion_id': ejecucion, 'tabla': tabla, 'archivo': str(ruta),
+                                     'filas': filas})
+
+            with db.get_cursor() as cursor:
+                cursor.execute(f"UPDATE {ESQUEMA}.ejecuciones SET exportada_en = CURRENT_TIMESTAMP WHERE id = %s",
+                               (ejecucion,))
+        logger.info(f"Archivo exportado ({formato}): {len(ejecuciones)} ejecuciones en {directorio}")
+        return {'success': True, 'formato': formato, 'directorio': str(directorio), 'archivos': archivos}
+    except Exception as e:
+        logger.error(f"Error exportando el archivo: {str(e)}")
+        return {'success': False, 'error': str(e), 'archivos': archivos}
+
+
+def ejecuciones(limite: int = 20) -> List[Dict]:
+    with db.get_cursor() as cursor:
+        cursor.execute(f"""
+            SELECT id, fecha_corte, iniciada_en, terminada_en, filas, exportada_en
+            FROM {ESQUEMA}.ejecuciones ORDER BY id DESC LIMIT %s
+        """, (limite,))
+        return cursor.fetchall()
@@ -0,0 +1,223 @@
+"""Asignación de habitaciones: reparte las reservas futuras dentro de su tipo
+para no dejar huecos invendibles.
+
+Cada habitación es una línea de tiempo con intervalos ``[entrada, salida)``.
+Lo que no se puede mover (alojados, reservas con ``habitacion_fija``, llegadas
+de los próximos ``ASSIGNMENT_FREEZE_DAYS`` días, habitaciones inactivas) es
+ocupación fija; el resto se vuelve a colocar con una heurística de coloreo de
+intervalos por orden de llegada (best fit): cada reserva va a la habitación
+libre que deja el hueco más corto a su izquierda, evitando dejar huecos de
+1..``ASSIGNMENT_SHORT_GAP_NIGHTS`` noches y, a igualdad, la habitación que ya
+tenía. Así las estancias se encadenan en pocas habitaciones y las demás
+quedan libres en tramos largos.
+
+Por tipo de habitación la propuesta solo se acepta si mejora la actual:
+menos noches en huecos cortos o, con las mismas, un tramo libre continuo más
+largo. Coste O(reservas × habitaciones del tipo × log reservas), acotado
+además por ``ASSIGNMENT_TIME_LIMIT_SECONDS``: los tipos que no terminen a
+tiempo se quedan como están.
+"""
+import time
+from bisect import bisect_right
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from config.database import db
+from config.settings import settings
+from models.reserva import ESTANCIA_MAXIMA_DIAS
+from utils.logger import logger
+
+# Parámetros: hoy, hoy
+_SQL_ESTANCIAS = f"""
+    SELECT r.id, r.codigo_reserva, r.fecha_check_in, r.fecha_check_out, r.estado,
+           r.habitacion_id, r.habitacion_fija, h.tipo_habitacion_id, h.activa,
+           a.id AS alojamiento_id,
+           hu.nombre AS huesped_nombre, hu.apellido AS huesped_apellido
+    FROM reservas r
+    JOIN habitaciones h ON h.id = r.habitacion_id
+    LEFT JOIN alojamientos a ON a.reserva_id = r.id
+    LEFT JOIN huespedes hu ON hu.id = r.huesped_id
+    WHERE r.fecha_check_in > %s::date - {ESTANCIA_MAXIMA_DIAS}
+      AND r.fecha_check_out > %s
+      AND (r.estado = 'confirmada' OR (r.estado = 'completada' AND a.fecha_check_out IS NULL))
+"""
+
+_SQL_HABITACIONES = """
+    SELECT id, numero, tipo_habitacion_id FROM habitaciones WHERE activa = true ORDER BY numero
+"""
+
+
+@dataclass
+class Estancia:
+    id: int
+    habitacion_id: int
+    entrada: int      # date.toordinal()
+    salida: int
+
+
+class LineaTiempo:
+    """Intervalos ordenados y sin solapes de una habitación"""
+
+    def __init__(self, intervalos: Sequence[Tuple[int, int]] = ()):
+        self.inicios: List[int] = []
+        self.fines: List[int] = []
+        # Lo fijo puede venir solapado (sobreventa): se une en un bloque
+        for entrada, salida in sorted(intervalos):
+            if self.fines and entrada < self.fines[-1]:
+                self.fines[-1] = max(self.fines[-1], salida)
+            else:
+                self.inicios.append(entrada)
+                self.fines.append(salida)
+
+    def huecos(self, entrada: int, salida: int) -> Optional[Tuple[Optional[int], Optional[int]]]:
+        """Noches libres a la izquierda y a la derecha si cabe; None si se solapa (sin vecino: None)"""
+        i = bisect_right(self.inicios, entrada)
+        if i > 0 and self.fines[i - 1] > entrada:
+            return None
+        if i < len(self.inicios) and self.inicios[i] < salida:
+            return None
+        return (entrada - self.fines[i - 1] if i > 0 else None,
+                self.inicios[i] - salida if i < len(self.inicios) else None)
+
+    def ocupar(self, entrada: int, salida: int) -> None:
+        i = bisect_right(self.inicios, entrada)
+        self.inicios.insert(i, entrada)
+        self.fines.insert(i, salida)
+
+
+def metricas(lineas: Dict[int, LineaTiempo], desde: int, hasta: int, corto: int) -> Dict[str, int]:
+    """Huecos cortos entre estancias y mayor tramo libre continuo dentro de [desde, hasta)"""
+    huecos_cortos = noches_cortas = mayor_libre = 0
+    for linea in lineas.values():
+        libre_desde = desde
+        previo = None
+        for entrada, salida in zip(linea.inicios, linea.fines):
+            if salida <= desde or entrada >= hasta:
+                continue
+            if previo is not None and 0 < entrada - previo <= corto:
+                huecos_cortos += 1
+                noches_cortas += entrada - previo
+            mayor_libre = max(mayor_libre, min(entrada, hasta) - libre_desde)
+            libre_desde = previo = max(salida, libre_desde)
+        mayor_libre = max(mayor_libre, hasta - libre_desde)
+    return {'huecos_cortos': huecos_cortos, 'noches_en_huecos_cortos': noches_cortas, 'mayor_libre': mayor_libre}
+
+
+def _clave(m: Dict[str, int]) -> Tuple[int, int]:
+    return m['noches_en_huecos_cortos'], -m['mayor_libre']
+
+
+def repartir(habitaciones: Sequence[int], fijas: Dict[int, List[Tuple[int, int]]],
+             movibles: Sequence[Estancia], corto: int, limite: float) -> Optional[Dict[int, LineaTiempo]]:
+    """Coloca las reservas movibles (``Estancia.habitacion_id`` pasa a ser la elegida).
+
+    Devuelve las líneas de tiempo resultantes o None si alguna no cabe o se
+    supera ``limite`` (``time.monotonic()``).
+    """
+    lineas = {h: LineaTiempo(fijas.get(h, ())) for h in habitaciones}
+    sin_vecino = float('inf')
+    for n, estancia in enumerate(sorted(movibles, key=lambda e: (e.entrada, e.entrada - e.salida, e.id))):
+        if n % 64 == 0 and time.monotonic() > limite:
+            return None
+        mejor, elegida = None, None
+        for h, linea in lineas.items():
+            huecos = linea.huecos(estancia.entrada, estancia.salida)
+            if huecos is None:
+                continue
+            izquierda, derecha = huecos
+            clave = (sum(1 for g in huecos if g is not None and 0 < g <= corto),
+                     sin_vecino if izquierda is None else izquierda,
+                     sin_vecino if derecha is None else derecha,
+                     h != estancia.habitacion_id)
+            if mejor is None or clave < mejor:
+                mejor, elegida = clave, h
+        if elegida is None:
+            return None
+        lineas[elegida].ocupar(estancia.entrada, estancia.salida)
+        estancia.habitacion_id = elegida
+    return lineas
+
+
+def proponer(hoy: Optional[date] = None) -> Dict:
+    """Lee las estancias y devuelve, por tipo, métricas antes/después y los movimientos propuestos"""
+    hoy = hoy or date.today()
+    inicio = time.perf_counter()
+    limite = time.monotonic() + settings.ASSIGNMENT_TIME_LIMIT_SECONDS
+    desde, hasta = hoy.toordinal(), hoy.toordinal() + settings.ASSIGNMENT_HORIZON_DAYS
+    congelado = desde + settings.ASSIGNMENT_FREEZE_DAYS
+    corto = settings.ASSIGNMENT_SHORT_GAP_NIGHTS
+
+    with db.get_cursor() as cursor:
+        cursor.execute(_SQL_HABITACIONES)
+        habitaciones = cursor.fetchall()
+        cursor.execute(_SQL_ESTANCIAS, (hoy, hoy))
+        filas = cursor.fetchall()
+
+    por_tipo: Dict[int, List[int]] = defaultdict(list)
+    numero = {}
+    for h in habitaciones:
+        por_tipo[h['tipo_habitacion_id']].append(h['id'])
+        numero[h['id']] = h['numero']
+    tipo_de = {h['id']: h['tipo_habitacion_id'] for h in habitaciones}
+
+    fijas: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+    movibles: Dict[int, List[Estancia]] = defaultdict(list)
+    datos = {}
+    for f in filas:
+        entrada, salida = f['fecha_check_in'].toordinal(), f['fecha_check_out'].toordinal()
+        if (f['estado'] == 'confirmada' and not f['habitacion_fija'] and f['alojamiento_id'] is None
+                and f['activa'] and congelado <= entrada < hasta):
+            movibles[f['tipo_habitacion_id']].append(Estancia(f['id'], f['habitacion_id'], entrada, salida))
+            datos[f['id']] = f
+        else:
+            fijas[f['habitacion_id']].append((entrada, salida))
+
+    tipos, movimientos, completo = [], [], True
+    for tipo_id, ids in por_tipo.items():
+        estancias = movibles.get(tipo_id, [])
+        actuales = {h: LineaTiempo(fijas.get(h, []) + [(e.entrada, e.salida) for e in estancias
+                                                        if e.habitacion_id == h]) for h in ids}
+        antes = metricas(actuales, desde, hasta, corto)
+        resumen = {'tipo_habitacion_id': tipo_id, 'habitaciones': len(ids), 'reservas_movibles': len(estancias),
+                   **{f'{k}_antes': v for k, v in antes.items()}}
+        propuestas = [Estancia(e.id, e.habitacion_id, e.entrada, e.salida) for e in estancias]
+        lineas = repartir(ids, fijas, propuestas, corto, limite) if estancias else None
+        if lineas is None:
+            if estancias and time.monotonic() > limite:
+                completo = False
+            despues, cambios, motivo = antes, [], 'sin reservas movibles' if not estancias else (
+                'sin tiempo' if time.monotonic() > limite else 'no caben sin la asignación actual')
+        else:
+            despues = metricas(lineas, desde, hasta, corto)
+            cambios = [(e, o) for e, o in zip(propuestas, estancias) if e.habitacion_id != o.habitacion_id]
+            motivo = None
+            if _clave(despues) >= _clave(antes):
+                despues, cambios, motivo = antes, [], 'la asignación actual ya es igual o mejor'
+        resumen.update({f'{k}_despues': v for k, v in despues.items()}, movimientos=len(cambios), motivo=motivo)
+        tipos.append(resumen)
+        for nueva, original in cambios:
+            f = datos[nueva.id]
+            movimientos.append({
+                'reserva_id': nueva.id, 'codigo_reserva': f['codigo_reserva'],
+                'huesped': f"{f['huesped_nombre'] or ''} {f['huesped_apellido'] or ''}".strip(),
+                'tipo_habitacion_id': tipo_id,
+                'fecha_check_in': f['fecha_check_in'], 'fecha_check_out': f['fecha_check_out'],
+                'desde_habitacion_id': original.habitacion_id, 'desde_numero': numero.get(original.habitacion_id),
+                'hasta_habitacion_id': nueva.habitacion_id, 'hasta_numero': numero.get(nueva.habitacion_id),
+            })
+
+    # Reservas en habitaciones inactivas: se cuentan como fijas, no entran en ningún tipo
+    sin_tipo = sum(1 for h in fijas if h not in tipo_de)
+    calculado_ms = round((time.perf_counter() - inicio) * 1000, 1)
+    logger.info(f"🧩 Asignación propuesta: {len(movimientos)} movimientos en {len(tipos)} tipos "
+                f"({calculado_ms} ms{'' if completo else ', límite de tiempo alcanzado'})")
+    return {
+        'tipos': sorted(tipos, key=lambda t: t['tipo_habitacion_id']),
+        'movimientos': sorted(movimientos, key=lambda m: (m['fecha_check_in'], m['codigo_reserva'])),
+        'desde': hoy, 'hasta': hoy + timedelta(days=settings.ASSIGNMENT_HORIZON_DAYS),
+        'congelado_hasta': hoy + timedelta(days=settings.ASSIGNMENT_FREEZE_DAYS),
+        'habitaciones_inactivas_ocupadas': sin_tipo,
+        'completo': completo, 'calculado_ms': calculado_ms,
+    }
@@ -0,0 +1,207 @@
+"""Auditoría nocturna: cierre del día de operación con SQL por conjuntos.
+
+Cada paso es una sentencia (o dos) sobre todas las filas afectadas, en su
+propia transacción, y es idempotente, así que la auditoría de un día se puede
+repetir sin duplicar nada (requiere database/migrations/009_auditoria_nocturna.sql):
+
+1. ``no_shows``: las reservas confirmadas con llegada hasta el día y sin
+   check-in pasan a ``no_show``, con su fila en el historial. Un no-show
+   libera la habitación para todas sus noches: ni ``verificar_disponibilidad``
+   (redefinida en 009) ni la cartera, el calendario o la previsión lo cuentan.
+2. ``cargos_noche``: una fila por estancia en curso esa noche, con la
+   tarifa media de la reserva (``ON CONFLICT DO NOTHING``).
+3. ``estados_habitacion``: ``ocupada`` si hay un alojamiento abierto y
+   ``disponible`` si figuraba ocupada sin huésped (estado actual, no del día).
+4. ``hechos_diarios``: ocupación, llegadas, salidas, no-shows,
+   cancelaciones, ingresos, ADR y RevPAR del día (``ON CONFLICT DO UPDATE``).
+
+Los pasos toman un advisory lock: dos auditorías a la vez se ejecutan por turnos.
+"""
+import json
+import time
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+
+from config.database import db
+from models.reserva import ESTANCIA_MAXIMA_DIAS
+from utils import cache, catalogo
+from utils.logger import logger
+
+_CANDADO = "SELECT pg_advisory_xact_lock(hashtext('auditoria_nocturna'))"
+
+_SQL_NO_SHOWS = f"""
+    WITH marcadas AS (
+        UPDATE reservas r
+        SET estado = 'no_show', updated_at = CURRENT_TIMESTAMP
+        WHERE r.estado = 'confirmada'
+          AND r.fecha_check_in <= %(fecha)s
+          AND r.fecha_check_in > %(fecha)s::date - {ESTANCIA_MAXIMA_DIAS}
+          AND NOT EXISTS (SELECT 1 FROM alojamientos a WHERE a.reserva_id = r.id)
+        RETURNING r.id
+    )
+    INSERT INTO historial_estados_reserva (reserva_id, estado_anterior, estado_nuevo, usuario_id, motivo)
+    SELECT id, 'confirmada', 'no_show', %(usuario)s, 'Auditoría nocturna del ' || %(fecha)s::text
+    FROM marcadas
+"""
+
+# Noche de la fecha: check-in hasta ese día y sin check-out antes del día siguiente
+_SQL_CARGOS = f"""
+    INSERT INTO cargos_noche (reserva_id, alojamiento_id, habitacion_id, fecha, importe, auditoria_id)
+    SELECT r.id, a.id, a.habitacion_asignada_id, %(fecha)s,
+           ROUND(r.tarifa_total / GREATEST(r.fecha_check_out - r.fecha_check_in, 1), 2), %(auditoria)s
+    FROM alojamientos a
+    JOIN reservas r ON r.id = a.reserva_id
+    WHERE a.fecha_check_in < %(fecha)s::date + 1
+      AND (a.fecha_check_out IS NULL OR a.fecha_check_out >= %(fecha)s::date + 1)
+      AND a.habitacion_asignada_id IS NOT NULL
+      AND r.fecha_check_in > %(fecha)s::date - {ESTANCIA_MAXIMA_DIAS}
+    ON CONFLICT (reserva_id, fecha) DO NOTHING
+"""
+
+_SQL_OCUPAR = """
+    UPDATE habitaciones h SET estado_id = %(ocupada)s
+    WHERE h.estado_id <> %(ocupada)s
+      AND EXISTS (SELECT 1 FROM alojamientos a
+                  WHERE a.habitacion_asignada_id = h.id AND a.fecha_check_out IS NULL)
+"""
+
+_SQL_LIBERAR = """
+    UPDATE habitaciones h SET estado_id = %(disponible)s
+    WHERE h.estado_id = %(ocupada)s
+      AND NOT EXISTS (SELECT 1 FROM alojamientos a
+                      WHERE a.habitacion_asignada_id = h.id AND a.fecha_check_out IS NULL)
+"""
+
+_SQL_HECHOS = f"""
+    INSERT INTO hechos_diarios (fecha, habitaciones_activas, habitaciones_ocupadas, ocupacion_pct, llegadas,
+                                salidas, no_shows, cancelaciones, ingresos_alojamiento, ingresos_servicios,
+                                adr, revpar, auditoria_id, actualizado_en)
+    SELECT %(fecha)s, act.n, car.ocupadas, ROUND(100.0 * car.ocupadas / NULLIF(act.n, 0), 2),
+           lle.n, sal.n, nos.n, can.n, car.ingresos, ser.ingresos,
+           ROUND(car.ingresos / NULLIF(car.ocupadas, 0), 2), ROUND(car.ingresos / NULLIF(act.n, 0), 2),
+           %(auditoria)s, CURRENT_TIMESTAMP
+    FROM (SELECT COUNT(*) AS n FROM habitaciones WHERE activa = true) act,
+         (SELECT COUNT(DISTINCT habitacion_id) AS ocupadas, COALESCE(SUM(importe), 0) AS ingresos
+          FROM cargos_noche WHERE fecha = %(fecha)s) car,
+         (SELECT COUNT(*) AS n FROM alojamientos
+          WHERE fecha_check_in >= %(fecha)s AND fecha_check_in < %(fecha)s::date + 1) lle,
+         (SELECT COUNT(*) AS n FROM alojamientos
+          WHERE fecha_check_out >= %(fecha)s AND fecha_check_out < %(fecha)s::date + 1) sal,
+         (SELECT COUNT(*) AS n FROM reservas WHERE estado = 'no_show' AND fecha_check_in = %(fecha)s) nos,
+         (SELECT COUNT(*) AS n FROM reservas
+          WHERE estado = 'cancelada' AND fecha_cancelacion >= %(fecha)s
+            AND fecha_cancelacion < %(fecha)s::date + 1
+            AND fecha_check_in > %(fecha)s::date - {ESTANCIA_MAXIMA_DIAS}) can,
+         (SELECT COALESCE(SUM(cantidad * precio_unitario), 0) AS ingresos FROM consumos_servicios
+          WHERE fecha_consumo >= %(fecha)s AND fecha_consumo < %(fecha)s::date + 1) ser
+    ON CONFLICT (fecha) DO UPDATE SET
+        habitaciones_activas = EXCLUDED.habitaciones_activas,
+        habitaciones_ocupadas = EXCLUDED.habitaciones_ocupadas,
+        ocupacion_pct = EXCLUDED.ocupacion_pct,
+        llegadas = EXCLUDED.llegadas,
+        salidas = EXCLUDED.salidas,
+        no_shows = EXCLUDED.no_shows,
+        cancelaciones = EXCLUDED.cancelaciones,
+        ingresos_alojamiento = EXCLUDED.ingresos_alojamiento,
+        ingresos_servicios = EXCLUDED.ingresos_servicios,
+        adr = EXCLUDED.adr,
+        revpar = EXCLUDED.revpar,
+        auditoria_id = EXCLUDED.auditoria_id,
+        actualizado_en = EXCLUDED.actualizado_en
+"""
+
+
+def _no_shows(cursor, parametros: Dict) -> Dict[str, int]:
+    cursor.execute(_SQL_NO_SHOWS, parametros)
+    return {'no_shows': cursor.rowcount}
+
+
+def _cargos(cursor, parametros: Dict) -> Dict[str, int]:
+    cursor.execute(_SQL_CARGOS, parametros)
+    return {'cargos': cursor.rowcount}
+
+
+def _estados(cursor, parametros: Dict) -> Dict[str, int]:
+    cursor.execute(_SQL_OCUPAR, parametros)
+    ocupadas = cursor.rowcount
+    cursor.execute(_SQL_LIBERAR, parametros)
+    return {'marcadas_ocupadas': ocupadas, 'liberadas': cursor.rowcount}
+
+
+def _hechos(cursor, parametros: Dict) -> Dict[str, int]:
+    cursor.execute(_SQL_HECHOS, parametros)
+    return {'dias': cursor.rowcount}
+
+
+# Paso -> (función, tablas cuya caché invalida)
+PASOS = {
+    'no_shows': (_no_shows, ('reservas',)),
+    'cargos_noche': (_cargos, ()),
+    'estados_habitacion': (_estados, ('habitaciones',)),
+    'hechos_diarios': (_hechos, ()),
+}
+
+
+def auditar(fecha: Optional[date] = None, usuario_id: Optional[int] = None,
+            pasos: Optional[Sequence[str]] = None) -> Dict:
+    """Cierra el día ``fecha`` (por defecto hoy); cada paso en su transacción, con filas y tiempo"""
+    fecha = fecha or date.today()
+    pasos = list(pasos or PASOS)
+    resultados: Dict[str, Dict] = {}
+    if fecha > date.today():
+        return {'success': False, 'error': 'No se puede auditar un día que aún no ha llegado', 'pasos': resultados}
+    desconocidos = [p for p in pasos if p not in PASOS]
+    if desconocidos:
+        return {'success': False, 'error': f"Pasos desconocidos: {', '.join(desconocidos)}", 'pasos': resultados}
+    # Siempre en el orden de PASOS: los hechos dependen de los cargos de la noche
+    pasos = [p for p in PASOS if p in pasos]
+    inicio = time.perf_counter()
+    try:
+        cat = catalogo.actual()
+        with db.get_cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO auditorias_nocturnas (fecha, usuario_id) VALUES (%s, %s) RETURNING id
+            """, (fecha, usuario_id))
+            auditoria_id = cursor.fetchone()['id']
+        parametros = {'fecha': fecha, 'usuario': usuario_id, 'auditoria': auditoria_id,
+                      'ocupada': cat.estado_id('ocupada'), 'disponible': cat.estado_id('disponible')}
+
+        for paso in pasos:
+            funcion, tablas = PASOS[paso]
+            inicio_paso = time.perf_counter()
+            with cache.invalidando(*tablas), db.get_cursor() as cursor:
+                cursor.execute(_CANDADO)
+                filas = funcion(cursor, parametros)
+            resultados[paso] = dict(filas, ms=round((time.perf_counter() - inicio_paso) * 1000, 1))
+            logger.info(f"🌙 Auditoría {auditoria_id} ({fecha}) · {paso}: {resultados[paso]}")
+
+        duracion = time.perf_counter() - inicio
+        with db.get_cursor() as cursor:
+            cursor.execute("""
+                UPDATE auditorias_nocturnas SET terminada_en = CURRENT_TIMESTAMP, pasos = %s WHERE id = %s
+            """, (json.dumps(resultados), auditoria_id))
+            if usuario_id:
+                cursor.execute("""
+                    INSERT INTO logs_actividad (usuario_id, accion, entidad, entidad_id, detalles)
+                    VALUES (%s, 'AUDITORIA_NOCTURNA', 'auditorias_nocturnas', %s, %s)
+                """, (usuario_id, auditoria_id, json.dumps({'fecha': str(fecha), 'pasos': resultados})))
+        logger.info(f"Auditoría nocturna {auditoria_id} del {fecha} terminada en {duracion:.2f} s")
+        return {'success': True, 'auditoria_id': auditoria_id, 'fecha': fecha, 'pasos': resultados,
+                'duracion_s': round(duracion, 2)}
+    except Exception as e:
+        logger.error(f"Error en auditoría nocturna del {fecha}: {str(e)}")
+        return {'success': False, 'error': str(e), 'pasos': resultados}
+
+
+def auditorias(limite: int = 20) -> List[Dict]:
+    """Últimas ejecuciones con los hechos del día que cerraron"""
+    with db.get_cursor() as cursor:
+        cursor.execute("""
+            SELECT a.*, h.habitaciones_ocupadas, h.ocupacion_pct, h.ingresos_alojamiento,
+                   h.ingresos_servicios, h.adr, h.revpar
+            FROM auditorias_nocturnas a
+            LEFT JOIN hechos_diarios h ON h.fecha = a.fecha
+            ORDER BY a.id DESC
+            LIMIT %s
+        """, (limite,))
+        return cursor.fetchall()
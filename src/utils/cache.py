@@ -0,0 +1,154 @@
+"""Caché de datos compartida por todas las sesiones del proceso.
+
+Cada función cacheada declara su clase de dato y las tablas que lee (los
+catálogos pequeños no pasan por aquí: ver ``utils/catalogo.py``):
+
+- ``LENTO``: habitaciones, usuarios, agregados de varios días. TTL de minutos.
+- ``VIVO``: reservas del día, huéspedes alojados, KPIs. TTL de segundos.
+
+Las escrituras invalidan por tabla (``invalidar`` o, para que ocurra después
+del commit, ``with cache.invalidando(...), db.get_cursor() as cursor:``). Otro
+proceso (la API, otro servidor) no se entera: su copia caduca con el TTL.
+
+Los valores se entregan como copia: quien los modifique no altera la caché.
+"""
+import copy
+import functools
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List
+
+from config.settings import settings
+from utils.logger import logger
+
+LENTO = 'lento'
+VIVO = 'vivo'
+
+# Tablas de referencia de cada clase (las funciones pueden leer de varias)
+TABLAS = {
+    LENTO: ('habitaciones', 'usuarios', 'huespedes'),
+    VIVO: ('reservas', 'alojamientos', 'facturas', 'detalle_factura', 'consumos_servicios'),
+}
+
+
+def ttl(clase: str) -> int:
+    return {LENTO: settings.CACHE_TTL_SLOW, VIVO: settings.CACHE_TTL_LIVE}[clase]
+
+
+class _Espacio:
+    """Entradas de una función cacheada, con sus contadores"""
+
+    def __init__(self, nombre: str, clase: str, tablas: tuple):
+        self.nombre = nombre
+        self.clase = clase
+        self.tablas = tablas
+        self.entradas: 'OrderedDict[tuple, tuple]' = OrderedDict()
+        self.generacion = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.invalidaciones = 0
+        self.lock = threading.Lock()
+
+    def obtener(self, clave: tuple, cargar):
+        ahora = time.monotonic()
+        with self.lock:
+            entrada = self.entradas.get(clave)
+            if entrada and entrada[0] > ahora:
+                self.aciertos += 1
+                self.entradas.move_to_end(clave)
+                return copy.deepcopy(entrada[1])
+            self.fallos += 1
+            generacion = self.generacion
+        valor = cargar()
+        with self.lock:
+            # Si se invalidó mientras se cargaba, el valor puede ser anterior a la escritura
+            if generacion == self.generacion:
+                self.entradas[clave] = (ahora + ttl(self.clase), copy.deepcopy(valor))
+                while len(self.entradas) > settings.CACHE_MAX_ENTRIES:
+                    self.entradas.popitem(last=False)
+        return valor
+
+    def vaciar(self) -> None:
+        with self.lock:
+            self.generacion += 1
+            self.invalidaciones += 1
+            self.entradas.clear()
+
+
+_ESPACIOS: Dict[str, _Espacio] = {}
+
+
+def cacheado(clase: str, *tablas: str):
+    """Cachea el resultado según los argumentos; ``tablas`` son las que lee la función"""
+    def decorador(funcion):
+        espacio = _ESPACIOS.setdefault(f"{funcion.__module__}.{funcion.__qualname__}",
+                                       _Espacio(f"{funcion.__module__}.{funcion.__qualname__}", clase, tablas))
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not settings.CACHE_ENABLED:
+                return funcion(*args, **kwargs)
+            clave = (args, tuple(sorted(kwargs.items())))
+            try:
+                hash(clave)
+            except TypeError:
+                return funcion(*args, **kwargs)
+            return espacio.obtener(clave, lambda: funcion(*args, **kwargs))
+
+        envoltura.espacio = espacio
+        return envoltura
+    return decorador
+
+
+def invalidar(*tablas: str) -> None:
+    """Descarta lo cacheado que lee alguna de las tablas"""
+    afectadas = set(tablas)
+    for espacio in list(_ESPACIOS.values()):
+        if afectadas.intersection(espacio.tablas):
+            espacio.vaciar()
+
+
+@contextmanager
+def invalidando(*tablas: str):
+    """Invalida al salir; va antes de ``db.get_cursor()`` para que sea tras el commit"""
+    try:
+        yield
+    finally:
+        invalidar(*tablas)
+
+
+def purgar(clase: str = None) -> int:
+    """Vacía todo (o una clase); devuelve cuántas entradas se descartaron"""
+    descartadas = 0
+    for espacio in list(_ESPACIOS.values()):
+        if clase in (None, espacio.clase):
+            descartadas += len(espacio.entradas)
+            espacio.vaciar()
+    logger.info(f"🧹 Caché purgada ({clase or 'todas las clases'}): {descartadas} entradas")
+    return descartadas
+
+
+def estadisticas() -> List[Dict]:
+    """Aciertos, fallos y entradas por función cacheada"""
+    filas = []
+    for espacio in _ESPACIOS.values():
+        consultas = espacio.aciertos + espacio.fallos
+        filas.append({
+            'funcion': espacio.nombre,
+            'clase': espacio.clase,
+            'ttl_s': ttl(espacio.clase),
+            'tablas': ', '.join(espacio.tablas),
+            'entradas': len(espacio.entradas),
+            'aciertos': espacio.aciertos,
+            'fallos': espacio.fallos,
+            'tasa_aciertos': round(espacio.aciertos / consultas, 3) if consultas else 0.0,
+            'invalidaciones': espacio.invalidaciones,
+        })
+    return sorted(filas, key=lambda f: f['aciertos'] + f['fallos'], reverse=True)
+
+
+def reiniciar_estadisticas() -> None:
+    for espacio in _ESPACIOS.values():
+        espacio.aciertos = espacio.fallos = espacio.invalidaciones = 0
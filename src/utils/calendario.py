@@ -0,0 +1,124 @@
+"""Calendario de ocupación: matriz habitaciones × días para la vista tipo Gantt.
+
+Las reservas se leen por bloques de ``BLOQUE_DIAS`` días alineados (una
+consulta de rango por bloque, cacheada como dato VIVO): al desplazar el
+calendario solo se piden los bloques que aún no están en caché. Cada bloque
+guarda las reservas como arreglos de enteros y la matriz se llena de una vez
+con NumPy, expandiendo cada estancia a sus noches:
+
+* ``estado[h, d]``: ``LIBRE``, ``RESERVADA`` o ``ALOJADA`` (int8).
+* ``reserva[h, d]``: posición en ``reservas`` de la estancia de esa noche, -1 si no hay (int32).
+"""
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from config.database import db
+from models.reserva import ESTANCIA_MAXIMA_DIAS
+from utils import archivo, cache
+from utils.cartera import expandir_noches
+
+LIBRE, RESERVADA, ALOJADA = 0, 1, 2
+ESTADOS = ('libre', 'reservada', 'alojada')
+BLOQUE_DIAS = 14
+
+# Parámetros: desde, hasta, desde. Con salida anticipada, la estancia acaba el día que se fue
+_SQL_RANGO = f"""
+    SELECT r.id, r.codigo_reserva, r.fecha_check_in, r.estado,
+           CASE WHEN a.fecha_check_out IS NOT NULL
+                THEN LEAST(r.fecha_check_out, GREATEST(a.fecha_check_out::date, r.fecha_check_in + 1))
+                ELSE r.fecha_check_out END AS fecha_check_out,
+           COALESCE(a.habitacion_asignada_id, r.habitacion_id) AS habitacion_id,
+           hu.nombre AS huesped_nombre, hu.apellido AS huesped_apellido
+    FROM {{reservas}} r
+    LEFT JOIN {{alojamientos}} a ON a.reserva_id = r.id
+    LEFT JOIN huespedes hu ON hu.id = r.huesped_id
+    WHERE r.fecha_check_in > %s::date - {ESTANCIA_MAXIMA_DIAS}
+      AND r.fecha_check_in < %s
+      AND r.fecha_check_out > %s
+      AND r.estado IN ('confirmada', 'completada')
+"""
+
+
+def inicio_bloque(fecha: date) -> date:
+    """Primer día del bloque que contiene la fecha (bloques alineados desde el ordinal 0)"""
+    return date.fromordinal(fecha.toordinal() - fecha.toordinal() % BLOQUE_DIAS)
+
+
+@cache.cacheado(cache.VIVO, 'reservas', 'alojamientos', 'huespedes')
+def bloque(desde: date) -> Dict:
+    """Estancias con noches en [desde, desde + BLOQUE_DIAS) como arreglos de enteros"""
+    hasta = desde + timedelta(days=BLOQUE_DIAS)
+    sql = _SQL_RANGO.format(reservas=archivo.origen('reservas', desde),
+                            alojamientos=archivo.origen('alojamientos', desde))
+    with db.get_cursor() as cursor:
+        cursor.execute(sql, (desde, hasta, desde))
+        filas = cursor.fetchall()
+    return {
+        'id': np.array([f['id'] for f in filas], dtype=np.int64),
+        'habitacion_id': np.array([f['habitacion_id'] or 0 for f in filas], dtype=np.int64),
+        'entrada': np.array([f['fecha_check_in'].toordinal() for f in filas], dtype=np.int64),
+        'salida': np.array([f['fecha_check_out'].toordinal() for f in filas], dtype=np.int64),
+        'estado': np.array([ALOJADA if f['estado'] == 'completada' else RESERVADA for f in filas], dtype=np.int8),
+        'detalle': {f['id']: {'codigo_reserva': f['codigo_reserva'],
+                              'huesped': f"{f['huesped_nombre'] or ''} {f['huesped_apellido'] or ''}".strip(),
+                              'fecha_check_in': f['fecha_check_in'], 'fecha_check_out': f['fecha_check_out'],
+                              'estado': f['estado']} for f in filas},
+    }
+
+
+def matriz(fecha_inicio: date, dias: int, habitaciones: Sequence[Dict]) -> Dict:
+    """Estado y reserva de cada habitación (en el orden recibido) y día a partir de ``fecha_inicio``"""
+    inicio = time.perf_counter()
+    primero = inicio_bloque(fecha_inicio)
+    bloques = [bloque(primero + timedelta(days=i))
+               for i in range(0, (fecha_inicio - primero).days + dias, BLOQUE_DIAS)]
+    columnas = {c: np.concatenate([b[c] for b in bloques]) for c in ('id', 'habitacion_id', 'entrada', 'salida', 'estado')}
+    # Una estancia larga aparece en varios bloques
+    ids, unicas = np.unique(columnas['id'], return_index=True)
+    columnas = {c: v[unicas] for c, v in columnas.items()}
+
+    posicion = {h['id']: i for i, h in enumerate(habitaciones)}
+    fila = np.array([posicion.get(h, -1) for h in columnas['habitacion_id'].tolist()], dtype=np.int64)
+
+    estado = np.full((len(habitaciones), dias), LIBRE, dtype=np.int8)
+    reserva = np.full((len(habitaciones), dias), -1, dtype=np.int32)
+    # Los alojados se escriben al final: en una sobreventa prevalece quien está en la habitación
+    escritura = np.argsort(columnas['estado'], kind='stable')
+    r, noche = expandir_noches(columnas['entrada'][escritura], columnas['salida'][escritura])
+    r = escritura[r]
+    columna = noche - fecha_inicio.toordinal()
+    ok = (fila[r] >= 0) & (columna >= 0) & (columna < dias)
+    estado[fila[r][ok], columna[ok]] = columnas['estado'][r][ok]
+    reserva[fila[r][ok], columna[ok]] = r[ok]
+
+    detalle = {}
+    for b in bloques:
+        detalle.update(b['detalle'])
+    return {
+        'fecha_inicio': fecha_inicio,
+        'dias': dias,
+        'habitaciones': list(habitaciones),
+        'estado': estado,
+        'reserva': reserva,
+        'reservas': [dict(detalle[int(i)], id=int(i)) for i in ids],
+        'bloques': len(bloques),
+        'calculado_ms': round((time.perf_counter() - inicio) * 1000, 1),
+    }
+
+
+def tramos(estado_fila: np.ndarray, reserva_fila: np.ndarray) -> List[tuple]:
+    """Tramos (inicio, fin, estado, reserva) de días consecutivos iguales de una fila"""
+    if not len(estado_fila):
+        return []
+    corte = np.flatnonzero((np.diff(estado_fila) != 0) | (np.diff(reserva_fila) != 0)) + 1
+    inicios = np.concatenate([[0], corte])
+    fines = np.concatenate([corte, [len(estado_fila)]])
+    return [(int(i), int(f), int(estado_fila[i]), int(reserva_fila[i])) for i, f in zip(inicios, fines)]
+
+
+def a_listas(grid: Dict) -> Dict:
+    """Copia serializable a JSON (las matrices como listas de enteros)"""
+    return dict(grid, estado=grid['estado'].tolist(), reserva=grid['reserva'].tolist())
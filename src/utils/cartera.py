@@ -0,0 +1,209 @@
+"""Cartera de reservas futuras: habitaciones reservadas por noche y tipo.
+
+Una matriz ``noches desde hoy × tipo de habitación`` con las reservas
+confirmadas de los próximos ``INVENTORY_HORIZON_DAYS`` días, compartida por el
+pronóstico de ocupación (utils/pronostico.py) y el motor de tarifas
+(utils/tarifas.py). Se construye una vez al día (o si cambian los tipos) y,
+como mucho cada ``INVENTORY_REFRESH_SECONDS``, solo se leen las reservas con
+``updated_at`` posterior a la última lectura: a cada una se le resta su
+aportación anterior y se suma la nueva. Cada lectura que cambia algo sube
+``version`` y deja en el historial qué noches tocó, para que quien derive
+datos de la matriz recalcule solo esas noches (``instantanea(desde_version)``).
+"""
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from config.database import db
+from config.settings import settings
+from models.reserva import ESTANCIA_MAXIMA_DIAS
+from utils import catalogo
+from utils.logger import logger
+
+ESTADOS_EN_CARTERA = ('confirmada', 'completada')
+SIN_FECHA = np.iinfo(np.int64).max // 4
+_HISTORIAL = 64
+_SOLAPE_CAMBIOS = timedelta(minutes=5)   # transacciones largas confirman con un updated_at anterior
+
+# Parámetros: hoy, hoy + horizonte, hoy
+_SQL_RESERVAS = f"""
+    SELECT r.id, r.fecha_check_in, r.fecha_check_out, r.estado, h.tipo_habitacion_id, r.updated_at
+    FROM reservas r
+    JOIN habitaciones h ON h.id = r.habitacion_id
+    WHERE r.fecha_check_in > %s::date - {ESTANCIA_MAXIMA_DIAS}
+      AND r.fecha_check_in < %s
+      AND r.fecha_check_out > %s
+"""
+
+# Parámetros: hoy, marca, hoy (updated_at lo mantiene el trigger update_reservas_updated_at)
+_SQL_CAMBIOS = f"""
+    SELECT r.id, r.fecha_check_in, r.fecha_check_out, r.estado, h.tipo_habitacion_id, r.updated_at
+    FROM reservas r
+    JOIN habitaciones h ON h.id = r.habitacion_id
+    WHERE r.fecha_check_in > %s::date - {ESTANCIA_MAXIMA_DIAS}
+      AND r.updated_at > COALESCE(%s::timestamp, '-infinity')
+      AND r.fecha_check_out > %s
+"""
+
+_SQL_CAPACIDAD = """
+    SELECT tipo_habitacion_id, COUNT(*) AS habitaciones
+    FROM habitaciones WHERE activa = true
+    GROUP BY tipo_habitacion_id
+"""
+
+
+def dias(fechas: Iterable) -> np.ndarray:
+    """Fechas → número de día (int64, 0 = 1970-01-01); None/NaT → SIN_FECHA"""
+    valores = np.array([None if f is None or f != f else np.datetime64(f, 'D') for f in fechas],
+                       dtype='datetime64[D]')
+    numeros = valores.astype(np.int64)
+    numeros[np.isnat(valores)] = SIN_FECHA
+    return numeros
+
+
+def expandir_noches(entrada: np.ndarray, salida: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Índice de reserva y número de día de cada noche de estancia"""
+    noches = np.maximum(salida - entrada, 0)
+    reserva = np.repeat(np.arange(len(entrada)), noches)
+    inicio = np.repeat(np.cumsum(noches) - noches, noches)
+    return reserva, entrada[reserva] + np.arange(noches.sum()) - inicio
+
+
+@dataclass(frozen=True)
+class Instantanea:
+    version: int
+    hoy: int                        # número de día de la fila 0
+    tipos: Tuple[int, ...]          # tipo_habitacion_id de cada columna
+    reservadas: np.ndarray          # noche × tipo
+    capacidad: np.ndarray           # habitaciones activas por tipo
+    tocadas: Optional[np.ndarray]   # filas cambiadas desde la versión pedida; None = todas
+
+
+class Cartera:
+    """Matriz noches × tipos de habitaciones reservadas, con versión e historial de noches tocadas"""
+
+    def __init__(self):
+        self.version = 0
+        self.tipos: Tuple[int, ...] = ()
+        self.hoy = 0                  # número de día de la fila 0
+        self.capacidad = np.zeros(0, dtype=np.int64)
+        self.actualizado_en: Optional[datetime] = None
+        self.cambios_aplicados = 0
+        self._clave = None
+        self._reservadas = np.zeros((0, 0), dtype=np.int32)
+        self._aportes: Dict[int, tuple] = {}   # id → (entrada, salida, tipo)
+        self._marca: Optional[datetime] = None
+        self._comprobado = float('-inf')
+        self._cambios: deque = deque(maxlen=_HISTORIAL)   # (version, noches tocadas)
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------ lectura
+    def instantanea(self, desde_version: Optional[int] = None) -> Instantanea:
+        """Matriz al día (copia) y noches tocadas después de ``desde_version``"""
+        with self._lock:
+            self._al_dia()
+            return Instantanea(self.version, self.hoy, self.tipos, self._reservadas.copy(),
+                               self.capacidad.copy(), self._tocadas_desde(desde_version))
+
+    def _tocadas_desde(self, version: Optional[int]) -> Optional[np.ndarray]:
+        if version is None or version > self.version:
+            return None
+        if version == self.version:
+            return np.zeros(0, dtype=np.int64)
+        if not self._cambios or self._cambios[0][0] > version + 1:
+            return None
+        return np.unique(np.concatenate([filas for v, filas in self._cambios if v > version]))
+
+    def indice_tipo(self, tipo_ids: Iterable) -> np.ndarray:
+        """Columna de cada tipo de habitación; -1 si no está en el catálogo"""
+        posicion = {t: i for i, t in enumerate(self.tipos)}
+        return np.array([posicion.get(t, -1) for t in tipo_ids], dtype=np.int64)
+
+    # ------------------------------------------------------------ actualización
+    def _al_dia(self) -> None:
+        hoy = date.today()
+        clave = (hoy, tuple(sorted(t.id for t in catalogo.actual().tipos)))
+        if clave != self._clave:
+            self._reconstruir(clave)
+        elif time.monotonic() - self._comprobado >= settings.INVENTORY_REFRESH_SECONDS:
+            self._incremental(hoy)
+        else:
+            return
+        self._comprobado = time.monotonic()
+
+    def _reconstruir(self, clave) -> None:
+        hoy, self.tipos = clave
+        horizonte = settings.INVENTORY_HORIZON_DAYS
+        with db.get_cursor() as cursor:
+            cursor.execute(_SQL_RESERVAS, (hoy, hoy + timedelta(days=horizonte), hoy))
+            filas = cursor.fetchall()
+        self.hoy = int(dias([hoy])[0])
+        self._reservadas = np.zeros((horizonte, len(self.tipos)), dtype=np.int32)
+        self._aportes = {}
+        self._marca = None
+        self._leer_capacidad()
+        self._aplicar(filas)
+        self._clave = clave
+        self._cambios.clear()
+        self.version += 1
+        self.cambios_aplicados = 0
+        self.actualizado_en = datetime.now()
+        logger.info(f"📅 Cartera reconstruida: {len(self._aportes)} reservas en {horizonte} días")
+
+    def _incremental(self, hoy: date) -> None:
+        marca = self._marca - _SOLAPE_CAMBIOS if self._marca else None
+        with db.get_cursor() as cursor:
+            cursor.execute(_SQL_CAMBIOS, (hoy, marca, hoy))
+            filas = cursor.fetchall()
+        tocadas, cambiadas = self._aplicar(filas)
+        if self._leer_capacidad():
+            tocadas = np.arange(len(self._reservadas))
+        if len(tocadas):
+            self.version += 1
+            self._cambios.append((self.version, tocadas))
+        self.cambios_aplicados += cambiadas
+        self.actualizado_en = datetime.now()
+
+    def _leer_capacidad(self) -> bool:
+        """Habitaciones activas por tipo; True si cambió"""
+        with db.get_cursor() as cursor:
+            cursor.execute(_SQL_CAPACIDAD)
+            por_tipo = {f['tipo_habitacion_id']: f['habitaciones'] for f in cursor.fetchall()}
+        capacidad = np.array([por_tipo.get(t, 0) for t in self.tipos], dtype=np.int64)
+        cambio = not np.array_equal(capacidad, self.capacidad)
+        self.capacidad = capacidad
+        return cambio
+
+    def _sumar(self, entrada: np.ndarray, salida: np.ndarray, tipo: np.ndarray, signo: int) -> np.ndarray:
+        r, noche = expandir_noches(entrada, salida)
+        fila = noche - self.hoy
+        ok = (fila >= 0) & (fila < len(self._reservadas)) & (tipo[r] >= 0)
+        np.add.at(self._reservadas, (fila[ok], tipo[r][ok]), signo)
+        return fila[ok]
+
+    def _aplicar(self, filas) -> Tuple[np.ndarray, int]:
+        """Cambia la aportación de las reservas que difieren de la guardada; devuelve noches tocadas y cuántas"""
+        activas = [f for f in filas if f['estado'] in ESTADOS_EN_CARTERA]
+        e = dias(f['fecha_check_in'] for f in activas)
+        s = dias(f['fecha_check_out'] for f in activas)
+        t = self.indice_tipo(f['tipo_habitacion_id'] for f in activas)
+        nuevas = {f['id']: (int(e[i]), int(s[i]), int(t[i])) for i, f in enumerate(activas) if s[i] > self.hoy}
+        # Las filas releídas por el solape y sin cambios no tocan nada
+        cambiadas = [i for i in {f['id'] for f in filas} if self._aportes.get(i) != nuevas.get(i)]
+        tocadas = [np.zeros(0, dtype=np.int64)]
+        for aportes, signo in (([self._aportes.pop(i) for i in cambiadas if i in self._aportes], -1),
+                               ([nuevas[i] for i in cambiadas if i in nuevas], 1)):
+            if aportes:
+                tocadas.append(self._sumar(*(np.array(c, dtype=np.int64) for c in zip(*aportes)), signo))
+        self._aportes.update((i, nuevas[i]) for i in cambiadas if i in nuevas)
+        marcas = [f['updated_at'] for f in filas if f['updated_at'] is not None]
+        if marcas:
+            self._marca = max(marcas + ([self._marca] if self._marca else []))
+        return np.unique(np.concatenate(tocadas)), len(cambiadas)
+
+cartera = Cartera()
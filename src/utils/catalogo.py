@@ -0,0 +1,207 @@
+"""Catálogos pequeños en memoria: tipos y estados de habitación, características,
+servicios activos, temporadas y tarifas especiales por temporada.
+
+``actual()`` devuelve una instantánea inmutable con búsquedas id ↔ nombre,
+colores y capacidades, de modo que las consultas no necesiten unir
+``tipos_habitacion`` / ``estados_habitacion`` ni resolver
+``(SELECT id FROM estados_habitacion WHERE nombre = ...)``.
+
+Cada instantánea lleva la versión de ``catalogo_version`` (migración 005), que
+un trigger incrementa con cualquier escritura en esas tablas. Como mucho cada
+``CATALOG_CHECK_SECONDS`` se lee la versión y, si cambió, se recarga todo: así
+se enteran todos los procesos (app, API, scripts). Al recargar se invalidan en
+``utils.cache`` las funciones que leen estas tablas.
+"""
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import date
+from decimal import Decimal
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from config.database import db
+from config.settings import settings
+from utils import cache
+from utils.logger import logger
+
+TABLAS = ('tipos_habitacion', 'estados_habitacion', 'caracteristicas_habitacion', 'servicios', 'temporadas',
+          'tarifas_temporada')
+
+
+@dataclass(frozen=True)
+class TipoHabitacion:
+    id: int
+    nombre: str
+    descripcion: Optional[str]
+    capacidad_maxima: int
+
+
+@dataclass(frozen=True)
+class EstadoHabitacion:
+    id: int
+    nombre: str
+    descripcion: Optional[str]
+    color_hex: Optional[str]
+
+
+@dataclass(frozen=True)
+class Caracteristica:
+    id: int
+    nombre: str
+    icono: Optional[str]
+
+
+@dataclass(frozen=True)
+class Servicio:
+    id: int
+    nombre: str
+    precio_base: Decimal
+    categoria: Optional[str]
+
+
+@dataclass(frozen=True)
+class Temporada:
+    id: int
+    nombre: str
+    fecha_inicio: date
+    fecha_fin: date
+    factor_multipliador: Optional[Decimal]
+
+
+@dataclass(frozen=True)
+class TarifaEspecial:
+    tipo_habitacion_id: int
+    temporada_id: int
+    tarifa_especial: Decimal
+
+
+class Catalogo:
+    """Instantánea inmutable de los catálogos en una versión dada"""
+
+    def __init__(self, version: Optional[int], tipos: List[TipoHabitacion], estados: List[EstadoHabitacion],
+                 caracteristicas: List[Caracteristica], servicios: List[Servicio], temporadas: List[Temporada],
+                 tarifas_especiales: List[TarifaEspecial] = ()):
+        self.version = version
+        self.cargado_en = time.time()
+        self.tipos: Tuple[TipoHabitacion, ...] = tuple(sorted(tipos, key=lambda t: (t.capacidad_maxima, t.id)))
+        self.estados: Tuple[EstadoHabitacion, ...] = tuple(sorted(estados, key=lambda e: e.id))
+        self.caracteristicas: Tuple[Caracteristica, ...] = tuple(sorted(caracteristicas, key=lambda c: c.nombre))
+        self.servicios: Tuple[Servicio, ...] = tuple(servicios)
+        self.temporadas: Tuple[Temporada, ...] = tuple(sorted(temporadas, key=lambda t: t.fecha_inicio))
+        self.tarifas_especiales: Tuple[TarifaEspecial, ...] = tuple(tarifas_especiales)
+        self._tipos: Mapping[int, TipoHabitacion] = MappingProxyType({t.id: t for t in tipos})
+        self._estados: Mapping[int, EstadoHabitacion] = MappingProxyType({e.id: e for e in estados})
+        self._tipo_ids: Mapping[str, int] = MappingProxyType({t.nombre.lower(): t.id for t in tipos})
+        self._estado_ids: Mapping[str, int] = MappingProxyType({e.nombre.lower(): e.id for e in estados})
+
+    def tipo(self, tipo_id: int) -> Optional[TipoHabitacion]:
+        return self._tipos.get(tipo_id)
+
+    def estado(self, estado_id: int) -> Optional[EstadoHabitacion]:
+        return self._estados.get(estado_id)
+
+    def nombre_tipo(self, tipo_id: int, defecto: Optional[str] = None) -> Optional[str]:
+        tipo = self._tipos.get(tipo_id)
+        return tipo.nombre if tipo else defecto
+
+    def tipo_id(self, nombre: str) -> int:
+        try:
+            return self._tipo_ids[nombre.lower()]
+        except KeyError:
+            raise KeyError(f"Tipo de habitación desconocido: {nombre}") from None
+
+    def estado_id(self, nombre: str) -> int:
+        """Id de un estado por nombre ('disponible', 'ocupada', 'mantenimiento'...)"""
+        try:
+            return self._estado_ids[nombre.lower()]
+        except KeyError:
+            raise KeyError(f"Estado de habitación desconocido: {nombre}") from None
+
+    def completar_habitacion(self, fila: Dict) -> Dict:
+        """Añade a una fila de ``habitaciones`` el nombre y la capacidad del tipo y el nombre y color del estado"""
+        tipo = self._tipos.get(fila.get('tipo_habitacion_id'))
+        estado = self._estados.get(fila.get('estado_id'))
+        fila['tipo_nombre'] = tipo.nombre if tipo else None
+        fila['capacidad_maxima'] = tipo.capacidad_maxima if tipo else None
+        fila['estado_nombre'] = estado.nombre if estado else None
+        fila['estado_color'] = estado.color_hex if estado else None
+        return fila
+
+    def factor_temporada(self, fecha: date) -> float:
+        """Mayor factor de las temporadas que cubren la fecha, o 1.0"""
+        factores = [float(t.factor_multipliador) for t in self.temporadas
+                    if t.fecha_inicio <= fecha <= t.fecha_fin and t.factor_multipliador is not None]
+        return max(factores) if factores else 1.0
+
+    def tarifa_especial(self, tipo_id: int, temporada_id: int) -> Optional[Decimal]:
+        """Tarifa por noche de ``tarifas_temporada`` para el tipo y la temporada, si la hay"""
+        for t in self.tarifas_especiales:
+            if t.tipo_habitacion_id == tipo_id and t.temporada_id == temporada_id:
+                return t.tarifa_especial
+        return None
+
+    @staticmethod
+    def como_dicts(filas) -> List[Dict]:
+        return [asdict(f) for f in filas]
+
+
+_actual: Optional[Catalogo] = None
+_comprobado = float('-inf')
+_lock = threading.Lock()
+
+
+def _version_bd() -> Optional[int]:
+    try:
+        with db.get_cursor() as cursor:
+            cursor.execute("SELECT version FROM catalogo_version")
+            fila = cursor.fetchone()
+            return fila['version'] if fila else None
+    except Exception as e:
+        logger.warning(f"Sin versión de catálogo (¿falta 005_catalogo_version.sql?), se recarga siempre: {e}")
+        return None
+
+
+def _cargar(version: Optional[int]) -> Catalogo:
+    with db.get_cursor() as cursor:
+        cursor.execute("SELECT id, nombre, descripcion, capacidad_maxima FROM tipos_habitacion")
+        tipos = [TipoHabitacion(**f) for f in cursor.fetchall()]
+        cursor.execute("SELECT id, nombre, descripcion, color_hex FROM estados_habitacion")
+        estados = [EstadoHabitacion(**f) for f in cursor.fetchall()]
+        cursor.execute("SELECT id, nombre, icono FROM caracteristicas_habitacion")
+        caracteristicas = [Caracteristica(**f) for f in cursor.fetchall()]
+        cursor.execute("SELECT id, nombre, precio_base, categoria FROM servicios WHERE activo = true ORDER BY id")
+        servicios = [Servicio(**f) for f in cursor.fetchall()]
+        cursor.execute("SELECT id, nombre, fecha_inicio, fecha_fin, factor_multipliador FROM temporadas")
+        temporadas = [Temporada(**f) for f in cursor.fetchall()]
+        cursor.execute("""
+            SELECT tipo_habitacion_id, temporada_id, tarifa_especial FROM tarifas_temporada
+            WHERE tipo_habitacion_id IS NOT NULL AND temporada_id IS NOT NULL AND tarifa_especial IS NOT NULL
+        """)
+        tarifas = [TarifaEspecial(**f) for f in cursor.fetchall()]
+    return Catalogo(version, tipos, estados, caracteristicas, servicios, temporadas, tarifas)
+
+
+def actual() -> Catalogo:
+    """Instantánea vigente; comprueba la versión como mucho cada CATALOG_CHECK_SECONDS"""
+    global _actual, _comprobado
+    if _actual is not None and time.monotonic() - _comprobado < settings.CATALOG_CHECK_SECONDS:
+        return _actual
+    with _lock:
+        if _actual is not None and time.monotonic() - _comprobado < settings.CATALOG_CHECK_SECONDS:
+            return _actual
+        # La versión se lee antes que los datos: si cambian entre medias, la próxima comprobación recarga
+        version = _version_bd()
+        if _actual is None or version is None or version != _actual.version:
+            anterior, _actual = _actual, _cargar(version)
+            if anterior is not None:
+                logger.info(f"📚 Catálogo recargado: versión {anterior.version} → {version}")
+                cache.invalidar(*TABLAS)
+        _comprobado = time.monotonic()
+        return _actual
+
+
+def invalidar() -> None:
+    """Fuerza la comprobación de versión en la próxima llamada a ``actual()``"""
+    global _comprobado
+    _comprobado = float('-inf')
@@ -0,0 +1,157 @@
+"""Normalización de huéspedes y detección de duplicados.
+
+Todo trabaja sobre DataFrames por bloques, así que sirve para archivos de
+millones de registros sin tenerlos enteros en memoria. Los candidatos a
+duplicado se buscan por claves de bloqueo (documento, email, teléfono,
+apellido + nacimiento) y cada par se puntúa de forma vectorizada: el nombre se
+compara con una huella de 128 bits de sus trigramas (Jaccard aproximado con
+popcount) y se suman las coincidencias de contacto y fecha de nacimiento.
+"""
+import zlib
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+CAMPOS_HUESPED = (
+    'tipo_documento', 'numero_documento', 'nombre', 'apellido', 'fecha_nacimiento',
+    'nacionalidad', 'email', 'telefono', 'ciudad', 'pais', 'direccion', 'codigo_postal',
+    'preferencias',
+)
+CLAVES = ('k_documento', 'k_email', 'k_telefono', 'k_nombre', 'm1', 'm2')
+
+# Alias habituales de los sistemas de origen -> valores que usa la aplicación
+TIPOS_DOCUMENTO = {
+    'DNI': 'DNI', 'D.N.I.': 'DNI', 'D.N.I': 'DNI',
+    'PASAPORTE': 'Pasaporte', 'PASSPORT': 'Pasaporte', 'PAS': 'Pasaporte', 'PP': 'Pasaporte',
+    'CE': 'Carné de Extranjería', 'C.E.': 'Carné de Extranjería',
+    'CARNE DE EXTRANJERIA': 'Carné de Extranjería', 'CARNÉ DE EXTRANJERÍA': 'Carné de Extranjería',
+}
+
+PESO_NOMBRE = 0.60
+PESO_CONTACTO = 0.35        # mismo email o mismo teléfono
+PESO_NACIMIENTO = 0.25
+PENALIZACION_NACIMIENTO = 0.50  # ambas fechas conocidas y distintas
+UMBRAL_DUPLICADO = 0.80
+UMBRAL_POSIBLE = 0.60
+
+_MASCARA_64 = (1 << 64) - 1
+
+
+def _vacios_a_none(serie: pd.Series) -> pd.Series:
+    serie = serie.astype('string').str.strip()
+    return serie.mask(serie == '')
+
+
+def _ascii(serie: pd.Series) -> pd.Series:
+    return (serie.str.normalize('NFKD').str.encode('ascii', 'ignore')
+            .str.decode('ascii').str.lower())
+
+
+def _huella_trigramas(texto) -> int:
+    """128 bits: uno por trigrama (hash) del nombre con los tokens ordenados"""
+    if not isinstance(texto, str) or not texto:
+        return 0
+    t = f"  {' '.join(sorted(texto.split()))} "
+    bits = 0
+    for i in range(len(t) - 2):
+        bits |= 1 << (zlib.crc32(t[i:i + 3].encode()) & 127)
+    return bits
+
+
+def _fechas(serie: pd.Series) -> pd.Series:
+    iso = pd.to_datetime(serie, errors='coerce', format='%Y-%m-%d')
+    local = pd.to_datetime(serie, errors='coerce', format='%d/%m/%Y')
+    fechas = iso.fillna(local)
+    fechas = fechas.mask((fechas > pd.Timestamp.today()) | (fechas.dt.year < 1900))
+    return fechas.dt.strftime('%Y-%m-%d').astype('string')
+
+
+def normalizar(df: pd.DataFrame) -> pd.DataFrame:
+    """Limpia los campos de ``CAMPOS_HUESPED`` y añade las claves de bloqueo y la huella"""
+    df = df.reindex(columns=[c for c in df.columns if c not in CAMPOS_HUESPED] + list(CAMPOS_HUESPED))
+    for campo in CAMPOS_HUESPED:
+        df[campo] = _vacios_a_none(df[campo].fillna(''))
+
+    for campo in ('nombre', 'apellido', 'ciudad', 'pais', 'nacionalidad'):
+        df[campo] = df[campo].str.replace(r'\s+', ' ', regex=True).str.title()
+    df['numero_documento'] = _vacios_a_none(
+        df['numero_documento'].str.upper().str.replace(r'[^0-9A-Z]', '', regex=True).fillna(''))
+    tipo = df['tipo_documento'].str.upper()
+    df['tipo_documento'] = tipo.map(TIPOS_DOCUMENTO).fillna(df['tipo_documento']).fillna('DNI')
+
+    email = df['email'].str.lower()
+    df['email'] = email.where(email.str.fullmatch(r'[^@\s]+@[^@\s]+\.[^@\s]+').fillna(False))
+    df['telefono'] = _vacios_a_none(df['telefono'].str.replace(r'[^\d+]', '', regex=True).fillna(''))
+    df['fecha_nacimiento'] = _fechas(df['fecha_nacimiento'])
+
+    nombre = _ascii(df['nombre'].fillna(''))
+    apellido = _ascii(df['apellido'].fillna(''))
+    digitos = df['telefono'].str.replace(r'\D', '', regex=True)
+    df['k_documento'] = df['numero_documento']
+    df['k_email'] = df['email']
+    df['k_telefono'] = digitos.str[-9:].where(digitos.str.len().fillna(0) >= 7)
+    df['k_nombre'] = (apellido.str.replace(' ', '').str[:4] + nombre.str[:1] + '|'
+                      + df['fecha_nacimiento']).where(apellido.str.len() > 0)
+
+    huellas = [_huella_trigramas(t) for t in (nombre + ' ' + apellido).str.strip()]
+    df['m1'] = np.array([h & _MASCARA_64 for h in huellas], dtype=np.uint64).view(np.int64)
+    df['m2'] = np.array([h >> 64 for h in huellas], dtype=np.uint64).view(np.int64)
+    return df
+
+
+def puntuar(pares: pd.DataFrame) -> np.ndarray:
+    """Puntuación 0-1 de cada par candidato.
+
+    ``pares`` trae las huellas de ambos lados (m1_a, m2_a, m1_b, m2_b) y las
+    coincidencias ya calculadas en SQL: mismo_documento, mismo_email,
+    mismo_telefono, misma_fecha, fecha_distinta.
+    """
+    def bits(columna):
+        return pares[columna].to_numpy(dtype=np.int64).view(np.uint64)
+
+    a1, a2, b1, b2 = bits('m1_a'), bits('m2_a'), bits('m1_b'), bits('m2_b')
+    interseccion = np.bitwise_count(a1 & b1) + np.bitwise_count(a2 & b2)
+    union = np.bitwise_count(a1 | b1) + np.bitwise_count(a2 | b2)
+    similitud = interseccion / np.maximum(union, 1)
+
+    contacto = pares['mismo_email'].to_numpy(dtype=bool) | pares['mismo_telefono'].to_numpy(dtype=bool)
+    puntuacion = (PESO_NOMBRE * similitud
+                  + PESO_CONTACTO * contacto
+                  + PESO_NACIMIENTO * pares['misma_fecha'].to_numpy(dtype=bool)
+                  - PENALIZACION_NACIMIENTO * pares['fecha_distinta'].to_numpy(dtype=bool))
+    puntuacion = np.where(pares['mismo_documento'].to_numpy(dtype=bool), 1.0, puntuacion)
+    return np.clip(puntuacion, 0.0, 1.0)
+
+
+class Agrupador:
+    """Unión-búsqueda sobre los nodos emparejados (solo guarda los que tienen pareja)"""
+
+    def __init__(self):
+        self._padre: Dict[int, int] = {}
+        self.puntuacion: Dict[int, float] = {}
+
+    def raiz(self, nodo: int) -> int:
+        raiz = self._padre.setdefault(nodo, nodo)
+        while self._padre[raiz] != raiz:
+            raiz = self._padre[raiz]
+        while nodo != raiz:  # compresión de camino
+            self._padre[nodo], nodo = raiz, self._padre[nodo]
+        return raiz
+
+    def unir(self, a: int, b: int, puntuacion: float) -> None:
+        ra, rb = self.raiz(a), self.raiz(b)
+        if ra != rb:
+            self._padre[max(ra, rb)] = min(ra, rb)
+        for nodo in (a, b):
+            self.puntuacion[nodo] = max(self.puntuacion.get(nodo, 0.0), puntuacion)
+
+    def unir_pares(self, origen: Iterable, destino: Iterable, puntuaciones: Iterable) -> None:
+        for a, b, p in zip(origen, destino, puntuaciones):
+            self.unir(int(a), int(b), float(p))
+
+    def grupos(self) -> List[List[int]]:
+        por_raiz: Dict[int, List[int]] = {}
+        for nodo in list(self._padre):
+            por_raiz.setdefault(self.raiz(nodo), []).append(nodo)
+        return [sorted(g) for g in por_raiz.values() if len(g) > 1]
@@ -0,0 +1,105 @@
+"""Búsqueda de habitaciones para grupos: N habitaciones de tipos mezclados.
+
+Las habitaciones libres se recorren en el orden físico del hotel (piso y
+número) con dos punteros: para cada primera habitación se busca la ventana
+más corta que cumple lo pedido (cantidades por tipo, número de habitaciones
+y capacidad total) y, dentro de ella, se eligen las habitaciones. Cada
+ventana mínima es una opción; se ordenan por pisos distintos, habitaciones
+ajenas intercaladas (ocupadas o de otros tipos, contadas sobre todas las
+habitaciones activas) y precio total. El recorrido es lineal en el número de
+habitaciones libres y se corta al agotar el presupuesto de tiempo.
+"""
+import re
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Sequence
+
+
+def orden_fisico(habitacion: Dict) -> tuple:
+    """Piso y número con orden natural ('101' < '102' < '1010')"""
+    numero = str(habitacion['numero'])
+    return (habitacion['piso'], [int(p) if p.isdigit() else p for p in re.split(r'(\d+)', numero)])
+
+
+def _elegir(ventana: Sequence[Dict], tipos: Dict[int, int], cantidad: int) -> List[Dict]:
+    """Las habitaciones de la ventana para el grupo: las pedidas por tipo y, el resto, las de más capacidad"""
+    elegidas, restantes = [], []
+    faltan = dict(tipos)
+    # Dentro de cada tipo, las más baratas
+    for habitacion in sorted(ventana, key=lambda h: h['total_estancia']):
+        if faltan.get(habitacion['tipo_habitacion_id'], 0) > 0:
+            faltan[habitacion['tipo_habitacion_id']] -= 1
+            elegidas.append(habitacion)
+        else:
+            restantes.append(habitacion)
+    libres = cantidad - len(elegidas)
+    if libres > 0:
+        elegidas += sorted(restantes, key=lambda h: (-h['capacidad_maxima'], h['total_estancia']))[:libres]
+    return elegidas
+
+
+def buscar(disponibles: Sequence[Dict], todas: Sequence[Dict], tipos: Dict[int, int], cantidad: int,
+           personas: int, opciones: int, presupuesto_ms: float) -> Dict:
+    """Opciones de asignación ordenadas; ``disponibles`` ya trae ``total_estancia``.
+
+    ``tipos`` son cantidades mínimas por tipo; ``cantidad`` el total de
+    habitaciones (al menos la suma de ``tipos``) y ``personas`` la capacidad total.
+    """
+    inicio = time.perf_counter()
+    cantidad = max(cantidad, sum(tipos.values()))
+    posicion = {h['id']: i for i, h in enumerate(sorted(todas, key=orden_fisico))}
+    libres = sorted((h for h in disponibles if h['id'] in posicion), key=lambda h: posicion[h['id']])
+
+    def cumple(conteo: Counter, ventana: Sequence[Dict]) -> bool:
+        if len(ventana) < cantidad or any(conteo[t] < n for t, n in tipos.items()):
+            return False
+        return sum(h['capacidad_maxima'] for h in _elegir(ventana, tipos, cantidad)) >= personas
+
+    encontradas, vistas, completo = [], set(), True
+    conteo: Counter = Counter()
+    fin = 0
+    for i in range(len(libres)):
+        if (time.perf_counter() - inicio) * 1000 > presupuesto_ms:
+            completo = False
+            break
+        # La ventana mínima desde i termina donde terminó la de i - 1 o más adelante
+        while fin < len(libres) and not cumple(conteo, libres[i:fin]):
+            conteo[libres[fin]['tipo_habitacion_id']] += 1
+            fin += 1
+        if not cumple(conteo, libres[i:fin]):
+            break
+        elegidas = sorted(_elegir(libres[i:fin], tipos, cantidad), key=lambda h: posicion[h['id']])
+        clave = frozenset(h['id'] for h in elegidas)
+        if clave not in vistas:
+            vistas.add(clave)
+            posiciones = [posicion[h['id']] for h in elegidas]
+            pisos = sorted({h['piso'] for h in elegidas})
+            encontradas.append({
+                'habitaciones': elegidas,
+                'pisos': pisos,
+                'intercaladas': posiciones[-1] - posiciones[0] + 1 - len(elegidas),
+                'capacidad': sum(h['capacidad_maxima'] for h in elegidas),
+                'total': round(sum(h['total_estancia'] for h in elegidas), 2),
+                'por_tipo': dict(Counter(h['tipo_habitacion_id'] for h in elegidas)),
+            })
+        conteo[libres[i]['tipo_habitacion_id']] -= 1
+
+    encontradas.sort(key=lambda o: (len(o['pisos']), o['intercaladas'], o['total']))
+    return {
+        'opciones': encontradas[:opciones],
+        'evaluadas': len(encontradas),
+        'disponibles': len(libres),
+        'completo': completo,
+        'calculado_ms': round((time.perf_counter() - inicio) * 1000, 1),
+    }
+
+
+def requisito_valido(tipos: Dict[int, int], cantidad: int, personas: int) -> Optional[str]:
+    """Mensaje de error si el pedido no tiene sentido"""
+    if any(n < 0 for n in tipos.values()):
+        return 'Las cantidades por tipo no pueden ser negativas'
+    if max(cantidad, sum(tipos.values())) <= 0:
+        return 'Indique cuántas habitaciones necesita el grupo'
+    if personas < 0:
+        return 'El número de personas no puede ser negativo'
+    return None
@@ -0,0 +1,235 @@
+"""Claves de idempotencia: una operación enviada dos veces con la misma clave
+(doble clic, rerun de Streamlit, reintento de un cliente de la API) se ejecuta
+una sola vez y la repetición recibe la respuesta registrada.
+
+La respuesta se guarda en ``claves_idempotencia`` (migración 001) y, para el
+camino rápido, en una caché en memoria del proceso. Solo se registran los
+resultados exitosos: tras un error, reintentar con la misma clave vuelve a
+ejecutar la operación.
+"""
+import functools
+import hashlib
+import inspect
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Sequence
+
+from config.database import db
+from config.settings import settings
+from utils.logger import logger
+
+# Una operación en curso cuyo proceso murió deja de bloquear la clave tras este plazo
+_EN_CURSO_SEGUNDOS = 300
+
+
+class ClaveReutilizada(Exception):
+    """La clave ya se usó con datos distintos"""
+
+
+class OperacionEnCurso(Exception):
+    """Otra ejecución con la misma clave todavía no terminó"""
+
+
+def _huella(solicitud) -> str:
+    return hashlib.sha256(json.dumps(solicitud, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class RegistroIdempotencia:
+
+    def __init__(self, ttl_segundos: int, max_memoria: int = 5000, purga_segundos: int = 600):
+        self.ttl_segundos = ttl_segundos
+        self.max_memoria = max_memoria
+        self.purga_segundos = purga_segundos
+        self._memoria: 'OrderedDict[tuple, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._ultima_purga = time.monotonic()
+        self.repeticiones = 0
+
+    # ------------------------------------------------------------ caché local
+    def _de_memoria(self, llave: tuple, huella: str):
+        with self._lock:
+            entrada = self._memoria.get(llave)
+            if entrada is None:
+                return None
+            expira, huella_previa, respuesta = entrada
+            if expira <= time.time():
+                del self._memoria[llave]
+                return None
+            self._memoria.move_to_end(llave)
+        if huella_previa != huella:
+            raise ClaveReutilizada()
+        return respuesta
+
+    def _a_memoria(self, llave: tuple, huella: str, respuesta) -> None:
+        with self._lock:
+            self._memoria[llave] = (time.time() + self.ttl_segundos, huella, respuesta)
+            self._memoria.move_to_end(llave)
+            while len(self._memoria) > self.max_memoria:
+                self._memoria.popitem(last=False)
+
+    # ------------------------------------------------------------ ejecución
+    def ejecutar(self, clave: Optional[str], operacion: str, solicitud, funcion: Callable,
+                 registrar: Callable = lambda r: isinstance(r, dict) and r.get('success')):
+        """Ejecuta ``funcion()`` a lo sumo una vez por (operación, clave).
+
+        Devuelve (resultado, repetida). Sin clave, simplemente ejecuta.
+        """
+        if not clave:
+            return funcion(), False
+
+        llave = (operacion, clave)
+        huella = _huella(solicitud)
+        respuesta = self._de_memoria(llave, huella)
+        if respuesta is not None:
+            self.repeticiones += 1
+            return respuesta, True
+
+        self._purgar_si_toca()
+        try:
+            with db.get_cursor() as cursor:
+                # Reclamar la clave (o reutilizarla si expiró) dejando la respuesta pendiente
+                cursor.execute("""
+                    INSERT INTO claves_idempotencia (operacion, clave, huella_solicitud, expira_en)
+                    VALUES (%s, %s, %s, CURRENT_TIMESTAMP + make_interval(secs => %s))
+                    ON CONFLICT (operacion, clave) DO UPDATE
+                        SET huella_solicitud = EXCLUDED.huella_solicitud, respuesta = NULL,
+                            creado_en = CURRENT_TIMESTAMP, expira_en = EXCLUDED.expira_en
+                        WHERE claves_idempotencia.expira_en <= CURRENT_TIMESTAMP
+                    RETURNING clave
+                """, (operacion, clave, huella, _EN_CURSO_SEGUNDOS))
+                reclamada = cursor.fetchone() is not None
+                if not reclamada:
+                    cursor.execute("""
+                        SELECT huella_solicitud, respuesta FROM claves_idempotencia
+                        WHERE operacion = %s AND clave = %s
+                    """, (operacion, clave))
+                    previa = cursor.fetchone()
+        except Exception as e:
+            # Sin la tabla (migración 001 sin aplicar) o sin BD se ejecuta sin protección
+            logger.error(f"Idempotencia no disponible para {operacion}: {str(e)}")
+            return funcion(), False
+
+        if not reclamada:
+            if previa is None:  # la liberó otra ejecución que falló justo ahora
+                raise OperacionEnCurso()
+            if previa['huella_solicitud'] != huella:
+                raise ClaveReutilizada()
+            if previa['respuesta'] is None:
+                raise OperacionEnCurso()
+            self._a_memoria(llave, huella, previa['respuesta'])
+            self.repeticiones += 1
+            return previa['respuesta'], True
+
+        try:
+            resultado = funcion()
+        except BaseException:
+            self._liberar(operacion, clave)
+            raise
+        if registrar(resultado):
+            # Ida y vuelta por JSON: la repetición devuelve exactamente lo mismo
+            resultado = json.loads(json.dumps(resultado, default=str))
+            self._a_memoria(llave, huella, resultado)
+            try:
+                with db.get_cursor() as cursor:
+                    cursor.execute("""
+                        UPDATE claves_idempotencia
+                        SET respuesta = %s, expira_en = CURRENT_TIMESTAMP + make_interval(secs => %s)
+                        WHERE operacion = %s AND clave = %s
+                    """, (json.dumps(resultado), self.ttl_segundos, operacion, clave))
+            except Exception as e:
+                # La operación ya se hizo: no se convierte en error por no poder registrarla
+                logger.error(f"Error registrando respuesta idempotente {operacion}/{clave}: {str(e)}")
+        else:
+            self._liberar(operacion, clave)
+        return resultado, False
+
+    def _liberar(self, operacion: str, clave: str) -> None:
+        try:
+            with db.get_cursor() as cursor:
+                cursor.execute("""
+                    DELETE FROM claves_idempotencia
+                    WHERE operacion = %s AND clave = %s AND respuesta IS NULL
+                """, (operacion, clave))
+        except Exception as e:
+            logger.error(f"Error liberando clave de idempotencia {operacion}/{clave}: {str(e)}")
+
+    # ------------------------------------------------------------ purga
+    def _purgar_si_toca(self) -> None:
+        ahora = time.monotonic()
+        if ahora - self._ultima_purga < self.purga_segundos:
+            return
+        self._ultima_purga = ahora
+        self.purgar()
+
+    def purgar(self) -> int:
+        """Borra las claves expiradas; devuelve cuántas"""
+        try:
+            with db.get_cursor() as cursor:
+                cursor.execute("DELETE FROM claves_idempotencia WHERE expira_en <= CURRENT_TIMESTAMP")
+                borradas = cursor.rowcount
+            if borradas:
+                logger.info(f"Claves de idempotencia purgadas: {borradas}")
+            return borradas
+        except Exception as e:
+            logger.error(f"Error purgando claves de idempotencia: {str(e)}")
+            return 0
+
+
+registro = RegistroIdempotencia(settings.IDEMPOTENCY_TTL, purga_segundos=settings.IDEMPOTENCY_PURGE_SECONDS)
+
+
+def idempotente(operacion: str, sin_huella: Sequence[str] = ()):
+    """Decorador para métodos de controlador: acepta ``clave_idempotencia=...``.
+
+    Con la misma clave y los mismos argumentos devuelve el resultado registrado
+    sin volver a ejecutar; con otros argumentos devuelve un error. Los
+    parámetros de ``sin_huella`` no cuentan al comparar (p. ej. quién reintenta).
+    """
+    def decorador(funcion):
+        firma = inspect.signature(funcion)
+
+        def solicitud(args, kwargs):
+            if not sin_huella:
+                return {'args': args, 'kwargs': kwargs}
+            argumentos = firma.bind(*args, **kwargs).arguments
+            return {k: v for k, v in argumentos.items() if k not in sin_huella}
+
+        @functools.wraps(funcion)
+        def envoltura(*args, clave_idempotencia: Optional[str] = None, **kwargs):
+            try:
+                resultado, _ = registro.ejecutar(
+                    clave_idempotencia, operacion, solicitud(args, kwargs),
+                    lambda: funcion(*args, **kwargs))
+                return resultado
+            except ClaveReutilizada:
+                return {'success': False, 'error': 'La clave de idempotencia ya se usó con otros datos'}
+            except OperacionEnCurso:
+                return {'success': False, 'error': 'La operación ya se está procesando'}
+            except Exception as e:
+                logger.error(f"Error de idempotencia en {operacion}: {str(e)}")
+                return {'success': False, 'error': f'Error al procesar la operación: {str(e)}'}
+        return envoltura
+    return decorador
+
+
+def clave_formulario(estado: Dict, nombre: str, datos=None) -> str:
+    """Clave para un formulario de Streamlit.
+
+    ``estado`` es ``st.session_state``. Los reruns y dobles clics con los mismos
+    ``datos`` producen la misma clave; si el usuario cambia los datos, la clave
+    cambia. La clave vive lo que el formulario: tras un envío correcto se llama
+    a ``renovar_clave`` justo antes del ``st.rerun()`` que lo retira, así un clic
+    que interrumpe la ejecución antes recibe el resultado registrado y un envío
+    posterior con los mismos datos (volver a reservar tras cancelar) es nuevo.
+    """
+    campo = f"_idem_{nombre}"
+    if campo not in estado:
+        estado[campo] = uuid.uuid4().hex
+    return estado[campo] if datos is None else f"{estado[campo]}:{_huella(datos)[:16]}"
+
+
+def renovar_clave(estado: Dict, nombre: str) -> None:
+    estado.pop(f"_idem_{nombre}", None)
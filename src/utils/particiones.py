@@ -0,0 +1,383 @@
+"""Particionado mensual por rango de fechas de las tablas que más crecen.
+
+``migrar`` convierte una tabla normal en una tabla particionada por mes (la
+original queda como ``<tabla>_sin_particionar`` hasta que se borra), y a partir
+de ahí ``crear_futuras`` mantiene creadas las particiones de los próximos meses
+y ``desenganchar`` saca del conjunto activo las de meses antiguos, moviéndolas
+al esquema de archivo o exportándolas a CSV comprimido.
+
+Restricciones de PostgreSQL que condicionan el diseño:
+
+- La clave primaria y los UNIQUE tienen que incluir la clave de partición, así
+  que pasan a ser (id, fecha). La unicidad global de ``codigo_reserva`` y
+  ``numero_factura`` la garantiza el trigger ``verificar_unicidad_global``
+  (migración 002) y la de ``id``, su secuencia.
+- Sin un UNIQUE sobre ``id`` no puede haber claves foráneas que apunten a la
+  tabla: las que existían (alojamientos, historial, facturas, detalle) se
+  eliminan y se informan en el resultado.
+"""
+import gzip
+import re
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config.database import db
+from config.settings import settings
+from models.reserva import ESTANCIA_MAXIMA_DIAS
+from utils.logger import logger
+
+# Tabla -> columna de partición
+TABLAS = {
+    'reservas': 'fecha_check_in',
+    'facturas': 'fecha_emision',
+    'detalle_factura': 'fecha_emision',
+    'logs_actividad': 'created_at',
+}
+# Columnas que eran UNIQUE por sí solas y conservan la unicidad global por trigger
+UNICAS_GLOBALES = {
+    'reservas': 'codigo_reserva',
+    'facturas': 'numero_factura',
+}
+
+_RUTA_VISTAS = settings.BASE_DIR / 'database' / 'views.sql'
+_PARTICION_MES = re.compile(r'_p(\d{4})(\d{2})$')
+
+
+def _mes(fecha: date, desplazamiento: int = 0) -> date:
+    indice = fecha.year * 12 + fecha.month - 1 + desplazamiento
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def _nombre_particion(tabla: str, mes: date) -> str:
+    return f"{tabla}_p{mes:%Y%m}"
+
+
+def esta_particionada(cursor, tabla: str) -> bool:
+    cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", (tabla,))
+    return cursor.fetchone() is not None
+
+
+def particiones(cursor, tabla: str) -> List[Dict]:
+    """Particiones de ``tabla`` con su mes (None para la de por defecto) y filas estimadas"""
+    cursor.execute("""
+        SELECT c.relname AS nombre, c.reltuples::bigint AS filas_estimadas,
+               pg_get_expr(c.relpartbound, c.oid) AS limites
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s)
+        ORDER BY c.relname
+    """, (tabla,))
+    resultado = []
+    for fila in cursor.fetchall():
+        coincidencia = _PARTICION_MES.search(fila['nombre'])
+        mes = date(int(coincidencia.group(1)), int(coincidencia.group(2)), 1) if coincidencia else None
+        resultado.append(dict(fila, mes=mes))
+    return resultado
+
+
+# ------------------------------------------------------------ conversión
+def migrar(tabla: str, meses_futuros: Optional[int] = None, borrar_original: bool = False) -> Dict:
+    """Convierte ``tabla`` en particionada por mes, en una sola transacción"""
+    if tabla not in TABLAS:
+        return {'success': False, 'error': f"Tabla no particionable: {tabla}"}
+    clave = TABLAS[tabla]
+    meses_futuros = settings.PARTITION_MONTHS_AHEAD if meses_futuros is None else meses_futuros
+    original = f"{tabla}_sin_particionar"
+    try:
+        with db.get_cursor() as cursor:
+            if esta_particionada(cursor, tabla):
+                return {'success': True, 'tabla': tabla, 'ya_particionada': True}
+            if tabla == 'detalle_factura' and not _tiene_columna(cursor, tabla, clave):
+                return {'success': False, 'error': "Falta detalle_factura.fecha_emision: aplicar la migración 002"}
+
+            cursor.execute(f"LOCK TABLE {tabla} IN ACCESS EXCLUSIVE MODE")
+            cursor.execute(f"""
+                SELECT COUNT(*) FILTER (WHERE {clave} IS NULL) AS sin_clave,
+                       MIN({clave})::date AS desde, MAX({clave})::date AS hasta, COUNT(*) AS filas
+                FROM {tabla}
+            """)
+            rango = cursor.fetchone()
+            if rango['sin_clave']:
+                return {'success': False, 'error': f"{rango['sin_clave']} filas de {tabla} sin {clave}"}
+            if tabla == 'reservas':
+                cursor.execute("SELECT COUNT(*) AS n FROM reservas WHERE fecha_check_out - fecha_check_in > %s",
+                               (ESTANCIA_MAXIMA_DIAS,))
+                largas = cursor.fetchone()['n']
+                if largas:
+                    return {'success': False,
+                            'error': f"{largas} reservas superan {ESTANCIA_MAXIMA_DIAS} noches"}
+
+            definicion = _capturar_definicion(cursor, tabla)
+            for origen, nombre in definicion['entrantes']:
+                cursor.execute(f'ALTER TABLE {origen} DROP CONSTRAINT "{nombre}"')
+
+            # La original se aparta con sus índices renombrados para liberar los nombres
+            cursor.execute(f"ALTER TABLE {tabla} RENAME TO {original}")
+            for indice in definicion['indices_originales']:
+                cursor.execute(f'ALTER INDEX "{indice}" RENAME TO "{(indice + "_sp")[:63]}"')
+
+            cursor.execute(f"""
+                CREATE TABLE {tabla} (LIKE {original} INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+                                      INCLUDING STORAGE INCLUDING COMMENTS)
+                PARTITION BY RANGE ({clave})
+            """)
+            cursor.execute(f"ALTER TABLE {tabla} ADD CONSTRAINT {tabla}_pkey PRIMARY KEY (id, {clave})")
+            for nombre, columnas in definicion['unicas']:
+                cursor.execute(f'ALTER TABLE {tabla} ADD CONSTRAINT "{nombre}" '
+                               f'UNIQUE ({", ".join(columnas)}, {clave})')
+
+            hoy = date.today()
+            primero = _mes(rango['desde'] or hoy)
+            ultimo = max(_mes(rango['hasta'] or hoy), _mes(hoy, meses_futuros))
+            creadas = 0
+            mes = primero
+            while mes <= ultimo:
+                cursor.execute(f"""
+                    CREATE TABLE {_nombre_particion(tabla, mes)} PARTITION OF {tabla}
+                    FOR VALUES FROM (%s) TO (%s)
+                """, (mes, _mes(mes, 1)))
+                creadas += 1
+                mes = _mes(mes, 1)
+            cursor.execute(f"CREATE TABLE {tabla}_default PARTITION OF {tabla} DEFAULT")
+
+            # Datos antes que índices y triggers: la carga no recalcula códigos ni fechas
+            cursor.execute(f"INSERT INTO {tabla} SELECT * FROM {original}")
+            copiadas = cursor.rowcount
+            for sentencia in definicion['salientes'] + definicion['indices'] + definicion['triggers']:
+                cursor.execute(sentencia)
+            if tabla in UNICAS_GLOBALES:
+                columna = UNICAS_GLOBALES[tabla]
+                cursor.execute(f"""
+                    CREATE TRIGGER trigger_unicidad_{columna}
+                        BEFORE INSERT OR UPDATE OF {columna} ON {tabla}
+                        FOR EACH ROW EXECUTE PROCEDURE verificar_unicidad_global('{tabla}', '{columna}')
+                """)
+            for columna, secuencia in definicion['secuencias']:
+                cursor.execute(f"ALTER SEQUENCE {secuencia} OWNED BY {tabla}.{columna}")
+
+            # Las vistas seguían apuntando a la tabla original (por OID)
+            cursor.execute(_RUTA_VISTAS.read_text(encoding='utf-8'))
+            cursor.execute(f"ANALYZE {tabla}")
+            if borrar_original:
+                cursor.execute(f"DROP TABLE {original}")
+
+        logger.info(f"Tabla {tabla} particionada: {copiadas} filas en {creadas} particiones mensuales")
+        return {
+            'success': True,
+            'tabla': tabla,
+            'filas': copiadas,
+            'particiones': creadas,
+            'desde': primero,
+            'hasta': ultimo,
+            'claves_foraneas_eliminadas': [f"{o}.{n}" for o, n in definicion['entrantes']],
+            'original': None if borrar_original else original,
+        }
+    except Exception as e:
+        logger.error(f"Error particionando {tabla}: {str(e)}")
+        return {'success': False, 'error': str(e)}
+
+
+def _tiene_columna(cursor, tabla: str, columna: str) -> bool:
+    cursor.execute("""
+        SELECT 1 FROM pg_attribute
+        WHERE attrelid = to_regclass(%s) AND attname = %s AND NOT attisdropped
+    """, (tabla, columna))
+    return cursor.fetchone() is not None
+
+
+def _capturar_definicion(cursor, tabla: str) -> Dict:
+    """Todo lo que CREATE TABLE ... LIKE no copia, como sentencias para la tabla nueva"""
+    cursor.execute("""
+        SELECT i.relname AS nombre, pg_get_indexdef(x.indexrelid) AS definicion,
+               EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid) AS de_restriccion
+        FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid
+        WHERE x.indrelid = to_regclass(%s)
+    """, (tabla,))
+    indices = cursor.fetchall()
+
+    cursor.execute("""
+        SELECT c.conname, array_agg(a.attname ORDER BY a.attnum) AS columnas
+        FROM pg_constraint c
+        JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = ANY (c.conkey)
+        WHERE c.conrelid = to_regclass(%s) AND c.contype = 'u'
+        GROUP BY c.conname
+    """, (tabla,))
+    unicas = [(f['conname'], f['columnas']) for f in cursor.fetchall()]
+
+    cursor.execute("""
+        SELECT conname, pg_get_constraintdef(oid) AS definicion FROM pg_constraint
+        WHERE conrelid = to_regclass(%s) AND contype = 'f'
+    """, (tabla,))
+    salientes = [f'ALTER TABLE {tabla} ADD CONSTRAINT "{f["conname"]}" {f["definicion"]}'
+                 for f in cursor.fetchall()]
+
+    cursor.execute("""
+        SELECT conrelid::regclass::text AS origen, conname FROM pg_constraint
+        WHERE confrelid = to_regclass(%s) AND contype = 'f' AND conrelid <> confrelid
+    """, (tabla,))
+    entrantes = [(f['origen'], f['conname']) for f in cursor.fetchall()]
+
+    cursor.execute("""
+        SELECT pg_get_triggerdef(oid) AS definicion FROM pg_trigger
+        WHERE tgrelid = to_regclass(%s) AND NOT tgisinternal
+    """, (tabla,))
+    triggers = [f['definicion'] for f in cursor.fetchall()]
+
+    cursor.execute("""
+        SELECT attname AS columna, pg_get_serial_sequence(%s, attname) AS secuencia
+        FROM pg_attribute
+        WHERE attrelid = to_regclass(%s) AND attnum > 0 AND NOT attisdropped
+    """, (tabla, tabla))
+    secuencias = [(f['columna'], f['secuencia']) for f in cursor.fetchall() if f['secuencia']]
+
+    return {
+        'indices_originales': [i['nombre'] for i in indices],
+        # Las definiciones se capturan con el nombre actual, que pasa a ser el de la tabla nueva
+        'indices': [i['definicion'] for i in indices if not i['de_restriccion']],
+        'unicas': unicas,
+        'salientes': salientes,
+        'entrantes': entrantes,
+        'triggers': triggers,
+        'secuencias': secuencias,
+    }
+
+
+# ------------------------------------------------------------ mantenimiento
+def crear_futuras(meses: Optional[int] = None, tablas: Optional[List[str]] = None) -> Dict[str, int]:
+    """Asegura las particiones desde el mes actual hasta ``meses`` por delante.
+
+    Es barata si ya existen, así que se puede llamar en cada auditoría nocturna.
+    Devuelve cuántas creó por tabla (solo tablas particionadas).
+    """
+    meses = settings.PARTITION_MONTHS_AHEAD if meses is None else meses
+    creadas = {}
+    hoy = date.today()
+    try:
+        with db.get_cursor() as cursor:
+            for tabla in tablas or TABLAS:
+                if not esta_particionada(cursor, tabla):
+                    continue
+                creadas[tabla] = 0
+                for desplazamiento in range(meses + 1):
+                    cursor.execute("SELECT crear_particion_mensual(%s, %s) AS creada",
+                                   (tabla, _mes(hoy, desplazamiento)))
+                    creadas[tabla] += int(cursor.fetchone()['creada'])
+        if any(creadas.values()):
+            logger.info(f"Particiones creadas: {creadas}")
+    except Exception as e:
+        logger.error(f"Error creando particiones futuras: {str(e)}")
+    return creadas
+
+
+def desenganchar(tabla: str, meses_retencion: Optional[int] = None,
+                 exportar_a: Optional[Path] = None) -> Dict:
+    """Saca de ``tabla`` las particiones anteriores a la retención.
+
+    Cada partición se desengancha en su propia transacción y pasa al esquema
+    de archivo (sigue consultable como ``archivo.<particion>``) o, con
+    ``exportar_a``, se vuelca a ``<particion>.csv.gz`` y se borra. Las de
+    reservas con reservas todavía confirmadas se dejan en su sitio.
+    """
+    meses_retencion = settings.PARTITION_RETENTION_MONTHS if meses_retencion is None else meses_retencion
+    limite = _mes(date.today(), -meses_retencion)
+    esquema = settings.PARTITION_ARCHIVE_SCHEMA
+    resultado = {'success': True, 'tabla': tabla, 'limite': limite, 'desenganchadas': [], 'omitidas': []}
+    try:
+        with db.get_cursor() as cursor:
+            if not esta_particionada(cursor, tabla):
+                return {'success': False, 'error': f"{tabla} no está particionada"}
+            antiguas = [p for p in particiones(cursor, tabla) if p['mes'] and p['mes'] < limite]
+
+        for particion in antiguas:
+            nombre = particion['nombre']
+            with db.get_cursor() as cursor:
+                if tabla == 'reservas':
+                    cursor.execute(f"SELECT 1 FROM {nombre} WHERE estado = 'confirmada' LIMIT 1")
+                    if cursor.fetchone():
+                        resultado['omitidas'].append(nombre)
+                        continue
+                cursor.execute(f"ALTER TABLE {tabla} DETACH PARTITION {nombre}")
+                if exportar_a:
+                    ruta = Path(exportar_a) / f"{nombre}.csv.gz"
+                    with gzip.open(ruta, 'wt', encoding='utf-8', newline='') as destino:
+                        cursor.copy_expert(f"COPY {nombre} TO STDOUT WITH (FORMAT csv, HEADER)", destino)
+                    cursor.execute(f"DROP TABLE {nombre}")
+                else:
+                    cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {esquema}")
+                    cursor.execute(f"ALTER TABLE {nombre} SET SCHEMA {esquema}")
+            resultado['desenganchadas'].append(nombre)
+            logger.info(f"Partición {nombre} desenganchada"
+                        + (f" y exportada a {exportar_a}" if exportar_a else f" al esquema {esquema}"))
+    except Exception as e:
+        logger.error(f"Error desenganchando particiones de {tabla}: {str(e)}")
+        resultado.update(success=False, error=str(e))
+    return resultado
+
+
+# ------------------------------------------------------------ verificación de poda
+def _consultas_poda() -> List[tuple]:
+    """(nombre, tabla, sql, parámetros) de las consultas que deben descartar particiones"""
+    from controllers import reporte_controller as reportes
+    from models import factura, reserva
+
+    hoy = date.today()
+    inicio_mes = hoy.replace(day=1)
+    consultas = [
+        ('Reserva.get_activas', 'reservas', reserva._SQL_ACTIVAS, None),
+        ('Reserva.get_alojados_ahora', 'reservas', reserva._SQL_ALOJADOS_AHORA, None),
+        ('Reserva.get_by_fechas', 'reservas', reserva._SQL_POR_FECHAS, (hoy, hoy + timedelta(days=30))),
+        ('Factura.get_por_rango_fechas', 'facturas', factura._SQL_POR_RANGO_FECHAS, (inicio_mes, hoy)),
+        ('ReporteController.get_ocupacion_periodo', 'reservas',
+         reportes._SQL_OCUPACION_PERIODO.format(reservas='reservas'),
+         (hoy - timedelta(days=30), hoy, hoy, hoy - timedelta(days=30))),
+        ('ReporteController.get_ingresos_periodo', 'facturas',
+         reportes._SQL_INGRESOS_PERIODO.format(facturas='facturas'),
+         (inicio_mes, hoy)),
+    ]
+    for nombre in ('ocupacion', 'reservas_futuras', 'estancia_promedio',
+                   'ingresos_hoy', 'revpar', 'ingresos_mes'):
+        tabla = 'reservas' if nombre in ('ocupacion', 'reservas_futuras', 'estancia_promedio') else 'facturas'
+        consultas.append((f"ReporteController.kpis_hoy[{nombre}]", tabla, reportes._SQL_KPIS_HOY[nombre], None))
+    return consultas
+
+
+def _relaciones_del_plan(nodo: Dict, encontradas: List[str]) -> None:
+    if 'Relation Name' in nodo:
+        encontradas.append(nodo['Relation Name'])
+    for hijo in nodo.get('Plans', []):
+        _relaciones_del_plan(hijo, encontradas)
+
+
+def verificar_poda() -> List[Dict]:
+    """EXPLAIN de cada consulta registrada: cuántas particiones de su tabla explora.
+
+    Sin ANALYZE, pero EXPLAIN sí inicializa el ejecutor, así que la poda que
+    depende de CURRENT_DATE (se resuelve al arrancar, no al planificar) también
+    se refleja. Una consulta poda si explora menos particiones de las que hay.
+    """
+    resultados = []
+    with db.get_cursor() as cursor:
+        totales = {t: {p['nombre'] for p in particiones(cursor, t)} for t in TABLAS
+                   if esta_particionada(cursor, t)}
+        for nombre, tabla, sql, parametros in _consultas_poda():
+            if tabla not in totales:
+                resultados.append({'consulta': nombre, 'tabla': tabla, 'error': 'tabla sin particionar'})
+                continue
+            try:
+                cursor.execute("EXPLAIN (FORMAT JSON) " + sql, parametros)
+                plan = list(cursor.fetchone().values())[0][0]['Plan']
+            except Exception as e:
+                resultados.append({'consulta': nombre, 'tabla': tabla, 'error': str(e)})
+                continue
+            relaciones = []
+            _relaciones_del_plan(plan, relaciones)
+            exploradas = totales[tabla] & set(relaciones)
+            resultados.append({
+                'consulta': nombre,
+                'tabla': tabla,
+                'particiones': len(totales[tabla]),
+                'exploradas': len(exploradas),
+                'poda': len(exploradas) < len(totales[tabla]),
+            })
+    return resultados
@@ -1,7 +1,5 @@
 from fpdf import FPDF
 from datetime import datetime
-import pandas as pd
-import os
 
 def sanitize_text(text):
     """Reemplaza caracteres especiales no soportados por Arial/Helvetica"""
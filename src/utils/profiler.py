@@ -0,0 +1,191 @@
+"""Perfilador de renderizado por página (opt-in).
+
+Descompone el tiempo de cada recarga de una vista en fases: base de datos
+(medida por la instrumentación de consultas), pandas, plotly (tiempo propio
+según cProfile) e inyección de CSS (fase explícita). Guarda un historial por
+página y rol y, bajo demanda, un informe cProfile en el directorio de logs.
+"""
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from config.database import db
+from config.settings import settings
+from utils.logger import logger
+
+
+# Perfil en curso para la solicitud (hilo de Streamlit) actual
+_perfil_actual: ContextVar[Optional['PerfilRender']] = ContextVar('perfil_render_actual', default=None)
+
+# Fragmentos de ruta / nombre de función que identifican cada fase en cProfile
+_FASES_CPROFILE = {
+    'pandas': ('/pandas/', '/numpy/', 'pandas.', 'numpy.'),
+    'plotly': ('/plotly/', '/_plotly_utils/', 'plotly.'),
+}
+
+FASES = ('db', 'pandas', 'plotly', 'css', 'otros')
+
+
+class PerfilRender:
+    """Mediciones de una recarga de una página"""
+
+    def __init__(self, pagina: str, rol: str, con_informe: bool):
+        self.pagina = pagina
+        self.rol = rol
+        self.con_informe = con_informe
+        self.fases = dict.fromkeys(FASES, 0.0)
+        self.consultas = 0
+        self.total_ms = 0.0
+        self.informe = None
+        self.profiler = None
+
+    def sumar(self, fase: str, ms: float) -> None:
+        self.fases[fase] += ms
+
+    def _clasificar_cprofile(self) -> None:
+        """Asigna el tiempo propio (tottime) de cada función a pandas/plotly"""
+        estadisticas = pstats.Stats(self.profiler)
+        for (archivo, _, funcion), (_, _, tottime, _, _) in estadisticas.stats.items():
+            ruta = f"{archivo.replace(chr(92), '/')}:{funcion}"
+            for fase, marcas in _FASES_CPROFILE.items():
+                if any(m in ruta for m in marcas):
+                    self.fases[fase] += tottime * 1000
+                    break
+
+    def _generar_informe(self, limite: int = 40) -> str:
+        salida = io.StringIO()
+        pstats.Stats(self.profiler, stream=salida).strip_dirs().sort_stats('cumulative').print_stats(limite)
+        return salida.getvalue()
+
+    def cerrar(self, total_ms: float) -> None:
+        self.total_ms = total_ms
+        if self.profiler is not None:
+            self._clasificar_cprofile()
+            if self.con_informe:
+                self.informe = self._generar_informe()
+        medido = sum(v for k, v in self.fases.items() if k != 'otros')
+        self.fases['otros'] = max(total_ms - medido, 0.0)
+
+    def to_dict(self) -> Dict:
+        return {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'pagina': self.pagina,
+            'rol': self.rol,
+            'total_ms': round(self.total_ms, 1),
+            **{f'{fase}_ms': round(ms, 1) for fase, ms in self.fases.items()},
+            'consultas': self.consultas,
+        }
+
+
+class PerfiladorRender:
+    def __init__(self, habilitado: bool = False, historial: int = 50, directorio=None):
+        self.habilitado = habilitado
+        self.directorio = directorio
+        self._historial_max = historial
+        self._historial: Dict[tuple, deque] = {}
+        self._lock = threading.Lock()
+        self._archivo = directorio / 'render_profile.jsonl' if directorio else None
+        db.stats.agregar_oyente(self._registrar_consulta)
+
+    @staticmethod
+    def _registrar_consulta(huella: str, duracion_ms: float) -> None:
+        perfil = _perfil_actual.get()
+        if perfil is not None:
+            perfil.sumar('db', duracion_ms)
+            perfil.consultas += 1
+
+    @contextmanager
+    def pagina(self, pagina: str, rol: str, activo: Optional[bool] = None, informe: bool = False):
+        """Perfila el renderizado de una página si el perfilador está activo
+        (globalmente o para la sesión actual con ``activo=True``)"""
+        if not (self.habilitado if activo is None else activo):
+            yield None
+            return
+
+        perfil = PerfilRender(pagina, rol, informe)
+        token = _perfil_actual.set(perfil)
+        perfil.profiler = cProfile.Profile()
+        try:
+            perfil.profiler.enable()
+        except ValueError:
+            # Otro perfilador ya está activo en este hilo: sólo medimos DB y CSS
+            perfil.profiler = None
+        t0 = time.perf_counter()
+        try:
+            yield perfil
+        finally:
+            total_ms = (time.perf_counter() - t0) * 1000
+            if perfil.profiler is not None:
+                perfil.profiler.disable()
+            _perfil_actual.reset(token)
+            try:
+                perfil.cerrar(total_ms)
+                self._guardar(perfil)
+            except Exception as e:
+                logger.error(f"Error guardando perfil de {pagina}: {e}")
+
+    @contextmanager
+    def fase(self, nombre: str):
+        """Mide explícitamente una fase (p. ej. 'css') dentro de la página en curso"""
+        perfil = _perfil_actual.get()
+        if perfil is None:
+            yield
+            return
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            perfil.sumar(nombre, (time.perf_counter() - t0) * 1000)
+
+    def _guardar(self, perfil: PerfilRender) -> None:
+        registro = perfil.to_dict()
+        with self._lock:
+            clave = (perfil.pagina, perfil.rol)
+            if clave not in self._historial:
+                self._historial[clave] = deque(maxlen=self._historial_max)
+            self._historial[clave].append(registro)
+
+        if self._archivo:
+            with open(self._archivo, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+
+        if perfil.informe and self.directorio:
+            nombre = f"perfil_{perfil.pagina}_{datetime.now():%Y%m%d_%H%M%S}"
+            (self.directorio / f"{nombre}.txt").write_text(
+                json.dumps(registro, ensure_ascii=False, indent=2) + '\n\n' + perfil.informe,
+                encoding='utf-8'
+            )
+            perfil.profiler.dump_stats(str(self.directorio / f"{nombre}.prof"))
+            registro['informe'] = f"{nombre}.txt"
+            logger.info(f"Informe de perfilado guardado en {self.directorio / nombre}.txt")
+
+    def historial(self) -> List[Dict]:
+        with self._lock:
+            return [r for serie in self._historial.values() for r in serie]
+
+    def informes(self, limite: int = 20) -> list:
+        """Últimos informes cProfile escritos en disco"""
+        if not self.directorio or not self.directorio.exists():
+            return []
+        archivos = sorted(self.directorio.glob('perfil_*.txt'), key=lambda p: p.stat().st_mtime, reverse=True)
+        return archivos[:limite]
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._historial.clear()
+
+
+# Instancia global
+perfilador = PerfiladorRender(
+    habilitado=settings.RENDER_PROFILING,
+    historial=settings.RENDER_PROFILE_HISTORY,
+    directorio=settings.LOGS_DIR,
+)
@@ -0,0 +1,164 @@
+"""Pronóstico de ocupación por tipo de habitación con curvas de pickup.
+
+Todo se calcula con matrices de NumPy, sin bucles por reserva ni por noche:
+
+* Cada reserva se expande a sus noches (``np.repeat``) y, para cada noche,
+  se sabe en qué antelaciones estaba en cartera: desde que se reservó hasta
+  que se canceló (o, si fue no-show, hasta la llegada). Con una matriz de
+  diferencias y ``cumsum`` sale ``H[noche, tipo, antelación]``: habitaciones
+  reservadas (on the books) para esa noche tantos días antes.
+* El pickup esperado a L días es la media, por día de la semana y tipo, de lo
+  que se sumó desde L días antes hasta la noche: ``H[.., 0] - H[.., L]``.
+* Pronóstico = cartera actual + pickup, acotado a [0, capacidad del tipo].
+* El ritmo frente al año anterior (STLY) compara la cartera actual con la que
+  tenía la misma noche 364 días antes, a la misma antelación.
+
+``Pronosticador`` guarda el historial ya reducido a pickups y lo reconstruye
+una vez al día (o si cambian los tipos de habitación). La cartera actual es la
+de ``utils.cartera``, que se mantiene al día leyendo solo las reservas
+modificadas.
+"""
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from config.settings import settings
+from utils.cartera import cartera, dias, expandir_noches
+from utils.logger import logger
+
+SEMANA_STLY = 364            # misma noche de la semana, un año antes
+
+
+def dia_semana(numeros: np.ndarray) -> np.ndarray:
+    """Lunes = 0 (el 1970-01-01 fue jueves)"""
+    return (numeros + 3) % 7
+
+
+def matriz_cartera(reservada: np.ndarray, baja: np.ndarray, entrada: np.ndarray, salida: np.ndarray,
+                   tipo: np.ndarray, desde: int, noches: int, tipos: int, antelacion: int) -> np.ndarray:
+    """H[noche - desde, tipo, L]: reservas en cartera para la noche L días antes de ella.
+
+    Una reserva está en cartera en la fecha x si ``reservada <= x < baja``; para
+    la noche n eso es ``n - baja < L <= n - reservada``.
+    """
+    r, noche = expandir_noches(entrada, salida)
+    desde_l = np.maximum(noche - baja[r] + 1, 0)
+    hasta_l = np.minimum(noche - reservada[r], antelacion)
+    ok = (noche >= desde) & (noche < desde + noches) & (desde_l <= hasta_l) & (tipo[r] >= 0)
+    fila, t = noche[ok] - desde, tipo[r][ok]
+    delta = np.zeros((noches, tipos, antelacion + 2), dtype=np.int32)
+    np.add.at(delta, (fila, t, desde_l[ok]), 1)
+    np.add.at(delta, (fila, t, hasta_l[ok] + 1), -1)
+    return np.cumsum(delta, axis=2)[:, :, :antelacion + 1]
+
+
+def pickup_por_dia_semana(cartera: np.ndarray, desde: int) -> np.ndarray:
+    """P[día de la semana, tipo, L]: media de lo que entra desde L días antes hasta la noche"""
+    entra = cartera[:, :, :1] - cartera
+    semana = np.eye(7)[dia_semana(desde + np.arange(cartera.shape[0]))]
+    suma = np.einsum('nw,ntl->wtl', semana, entra)
+    return suma / np.maximum(semana.sum(axis=0), 1)[:, None, None]
+
+
+def curva_reservas(cartera: np.ndarray) -> np.ndarray:
+    """% de la ocupación final que ya estaba reservada L días antes, por tipo (última columna: total)"""
+    por_tipo = cartera.sum(axis=0).astype(float)                     # tipo × L
+    total = np.vstack([por_tipo, por_tipo.sum(axis=0, keepdims=True)])
+    return (100 * total / np.maximum(total[:, :1], 1)).T             # L × (tipos + 1)
+
+
+class Pronosticador:
+    """Historial reducido a pickups y curva de reservas, compartido por las sesiones del proceso.
+
+    ``cargar(desde, hasta)`` devuelve las reservas con noches en el rango con id,
+    reservada, baja, fecha_check_in, fecha_check_out y tipo_habitacion_id (ver
+    ReporteController). La cartera actual sale de ``utils.cartera``.
+    """
+
+    def __init__(self, cargar: Callable):
+        self._cargar = cargar
+        self._lock = threading.Lock()
+        self._clave = None            # (hoy, tipos)
+        self._pickup = None           # 7 × tipos × L
+        self._curva = None            # L × (tipos + 1)
+        self._stly = None             # noches del año anterior × tipos × L
+        self.reconstruido_en: Optional[datetime] = None
+        self.reservas_historial = 0
+
+    def _reconstruir(self, hoy: int, tipos) -> None:
+        antelacion = settings.INVENTORY_HORIZON_DAYS
+        historial = settings.FORECAST_HISTORY_DAYS
+        dia = np.datetime64(hoy, 'D').astype(date)
+        df = pd.DataFrame(self._cargar(dia - timedelta(days=historial), dia),
+                          columns=['id', 'reservada', 'baja', 'fecha_check_in', 'fecha_check_out',
+                                   'tipo_habitacion_id'])
+        posicion = {t: i for i, t in enumerate(tipos)}
+        tipo = np.array([posicion.get(t, -1) for t in df['tipo_habitacion_id']], dtype=np.int64)
+        cartera_historica = matriz_cartera(
+            dias(df['reservada']), dias(df['baja']), dias(df['fecha_check_in']), dias(df['fecha_check_out']),
+            tipo, hoy - historial, historial, len(tipos), antelacion)
+        self._pickup = pickup_por_dia_semana(cartera_historica, hoy - historial)
+        self._curva = curva_reservas(cartera_historica)
+        self._stly = cartera_historica[max(historial - SEMANA_STLY, 0):]
+        self.reservas_historial = len(df)
+        self._clave = (hoy, tipos)
+        self.reconstruido_en = datetime.now()
+        logger.info(f"📈 Pronóstico reconstruido: {len(df)} reservas, {historial} días de historial")
+
+    # ------------------------------------------------------------ resultado
+    def resultado(self, horizonte: int, nombres: Dict[int, str]) -> Dict[str, pd.DataFrame]:
+        """Pronóstico por noche y tipo para los próximos ``horizonte`` días y curva de reservas"""
+        actual = cartera.instantanea()
+        hoy, tipos, reservadas, capacidad = actual.hoy, actual.tipos, actual.reservadas, actual.capacidad
+        with self._lock:
+            inicio = time.perf_counter()
+            if self._clave != (hoy, tipos):
+                self._reconstruir(hoy, tipos)
+            horizonte = max(1, min(horizonte, len(reservadas)))
+            n, t = np.arange(horizonte), np.arange(len(tipos))
+
+            en_cartera = reservadas[:horizonte].astype(float)
+            pickup = self._pickup[dia_semana(hoy + n)[:, None], t[None, :], n[:, None]]
+            cap = capacidad.astype(float)
+            pronostico = np.clip(en_cartera + pickup, 0, cap[None, :])
+
+            # La noche de hace 364 días, vista con la misma antelación que hoy
+            fila_stly = n + len(self._stly) - SEMANA_STLY
+            hay_stly = (fila_stly >= 0) & (fila_stly < len(self._stly))
+            stly = np.full((horizonte, len(tipos)), np.nan)
+            stly[hay_stly] = self._stly[fila_stly[hay_stly][:, None], t[None, :], n[hay_stly][:, None]]
+
+            curva = self._curva[:horizonte + 1]
+            meta = {'calculado_ms': round((time.perf_counter() - inicio) * 1000, 1),
+                    'reconstruido_en': self.reconstruido_en, 'actualizado_en': cartera.actualizado_en,
+                    'reservas_historial': self.reservas_historial, 'cambios_aplicados': cartera.cambios_aplicados,
+                    'historial_dias': settings.FORECAST_HISTORY_DAYS}
+
+        fechas = (hoy + n).astype('datetime64[D]').astype(date)
+        diario = pd.DataFrame({
+            'fecha': np.repeat(fechas, len(tipos)),
+            'tipo_habitacion_id': np.tile(tipos, horizonte),
+            'tipo': np.tile([nombres.get(i, str(i)) for i in tipos], horizonte),
+            'capacidad': np.tile(cap, horizonte).astype(int),
+            'en_cartera': en_cartera.ravel().astype(int),
+            'pickup': (pronostico - en_cartera).ravel().round(1),
+            'pronostico': pronostico.ravel().round(1),
+            'stly': stly.ravel(),
+        })
+        diario['ocupacion_pct'] = (100 * diario['pronostico'] / diario['capacidad'].where(diario['capacidad'] > 0)).round(1)
+        diario['ritmo'] = diario['en_cartera'] - diario['stly']
+        curva_df = pd.DataFrame(curva.round(1), columns=[nombres.get(i, str(i)) for i in tipos] + ['Total'])
+        curva_df.insert(0, 'dias_antes', np.arange(len(curva_df)))
+        return {'diario': diario, 'curva': curva_df, 'meta': meta}
+
+
+def ocupacion_total(diario: pd.DataFrame) -> pd.DataFrame:
+    """Suma los tipos por noche (la vista y las exportaciones lo usan)"""
+    total = diario.groupby('fecha', as_index=False)[['capacidad', 'en_cartera', 'pronostico', 'stly']].sum(min_count=1)
+    total['ocupacion_pct'] = (100 * total['pronostico'] / total['capacidad'].where(total['capacidad'] > 0)).round(1)
+    total['ritmo'] = total['en_cartera'] - total['stly']
+    return total
@@ -0,0 +1,200 @@
+"""Tablero de habitaciones en vivo: el estado de cada habitación en memoria,
+compartido por todas las sesiones y actualizado por deltas.
+
+Un hilo por proceso mantiene una conexión propia con ``LISTEN habitaciones``
+(los triggers de la migración 006 avisan con el id de la habitación al cambiar
+``habitaciones`` o ``alojamientos``). Los avisos se agrupan durante
+``TABLERO_COALESCE_MS`` y se relee solo ese conjunto de habitaciones en una
+consulta, de modo que un check-in de grupo cuesta una lectura y no una por
+habitación. Cada lote que cambia algo sube ``version`` y queda en el historial,
+para que la vista sepa qué casillas volver a pintar (``cambios_desde``).
+
+Si no se puede escuchar (migración sin aplicar, pgbouncer en modo transacción)
+se relee todo cada ``TABLERO_POLL_SECONDS`` y se aplica la diferencia. El mismo
+hilo escucha el canal ``catalogo`` (migración 005) para recargar el catálogo al
+momento.
+"""
+import select
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+
+import psycopg2
+
+from config.database import db
+from config.settings import settings
+from utils import catalogo
+from utils.logger import logger
+
+CANAL = 'habitaciones'
+_HISTORIAL = 256
+
+_SQL_CASILLAS = """
+    SELECT h.id, h.numero, h.piso, h.tipo_habitacion_id, h.estado_id, h.activa,
+           hu.nombre || ' ' || hu.apellido AS huesped, a.fecha_check_in AS alojado_desde
+    FROM habitaciones h
+    LEFT JOIN alojamientos a ON a.habitacion_asignada_id = h.id AND a.fecha_check_out IS NULL
+    LEFT JOIN reservas r ON r.id = a.reserva_id
+    LEFT JOIN huespedes hu ON hu.id = r.huesped_id
+"""
+
+
+@dataclass(frozen=True)
+class Casilla:
+    """Lo que muestra el tablero de una habitación"""
+    id: int
+    numero: str
+    piso: int
+    tipo_habitacion_id: int
+    estado_id: int
+    activa: bool
+    huesped: Optional[str] = None
+    alojado_desde: Optional[datetime] = None
+
+
+class Tablero:
+    """Mapa habitación → casilla, con versión e historial de cambios"""
+
+    def __init__(self):
+        self.version = 0
+        self.modo = None            # 'avisos' (LISTEN) o 'sondeo'
+        self.actualizado_en = None
+        self.lotes = 0              # relecturas parciales aplicadas
+        self.avisos = 0             # avisos recibidos (antes de agrupar)
+        self._casillas: Dict[int, Casilla] = {}
+        self._cambios: deque = deque(maxlen=_HISTORIAL)   # (version, ids)
+        self._cargado = threading.Event()
+        self._lock = threading.Lock()
+        self._hilo: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------ lectura
+    def instantanea(self) -> Tuple[int, Dict[int, Casilla]]:
+        """Versión y copia del mapa; arranca el hilo la primera vez"""
+        self._iniciar()
+        if not self._cargado.is_set():
+            self.recargar()
+        with self._lock:
+            return self.version, dict(self._casillas)
+
+    def cambios_desde(self, version: Optional[int]) -> Optional[FrozenSet[int]]:
+        """Habitaciones cambiadas después de ``version``; None si el historial no llega tan atrás"""
+        with self._lock:
+            if version is None or version > self.version:
+                return None
+            if version == self.version:
+                return frozenset()
+            if not self._cambios or self._cambios[0][0] > version + 1:
+                return None
+            return frozenset().union(*(ids for v, ids in self._cambios if v > version))
+
+    # ------------------------------------------------------------ actualización
+    def recargar(self) -> int:
+        """Relee todas las habitaciones y aplica la diferencia; devuelve cuántas cambiaron"""
+        with db.get_cursor() as cursor:
+            cursor.execute(_SQL_CASILLAS)
+            filas = cursor.fetchall()
+        return self._aplicar(filas, None)
+
+    def refrescar(self, ids: Iterable[int]) -> int:
+        """Relee solo las habitaciones indicadas"""
+        ids = sorted(set(ids))
+        if not ids:
+            return 0
+        with db.get_cursor() as cursor:
+            cursor.execute(_SQL_CASILLAS + " WHERE h.id = ANY(%s)", (ids,))
+            filas = cursor.fetchall()
+        self.lotes += 1
+        return self._aplicar(filas, ids)
+
+    def _aplicar(self, filas, ids_pedidos: Optional[list]) -> int:
+        nuevas = {f['id']: Casilla(**f) for f in filas}
+        with self._lock:
+            alcance = (self._casillas.keys() | nuevas.keys()) if ids_pedidos is None else ids_pedidos
+            cambiadas = set()
+            for habitacion_id in alcance:
+                nueva = nuevas.get(habitacion_id)
+                if self._casillas.get(habitacion_id) != nueva:
+                    cambiadas.add(habitacion_id)
+                    if nueva is None:
+                        self._casillas.pop(habitacion_id, None)
+                    else:
+                        self._casillas[habitacion_id] = nueva
+            if cambiadas:
+                self.version += 1
+                self._cambios.append((self.version, frozenset(cambiadas)))
+            self.actualizado_en = datetime.now()
+        self._cargado.set()
+        return len(cambiadas)
+
+    # ------------------------------------------------------------ hilo de escucha
+    def _iniciar(self) -> None:
+        if self._hilo is not None:
+            return
+        with self._lock:
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._bucle, name='tablero-habitaciones', daemon=True)
+                self._hilo.start()
+
+    def _bucle(self) -> None:
+        while True:
+            try:
+                self._escuchar()
+            except Exception as e:
+                if self.modo != 'sondeo':
+                    logger.warning(f"Tablero sin avisos de la BD, se relee cada "
+                                   f"{settings.TABLERO_POLL_SECONDS} s: {e}")
+                self.modo = 'sondeo'
+                try:
+                    self.recargar()
+                except Exception as e:
+                    logger.error(f"Error releyendo el tablero: {str(e)}")
+                time.sleep(settings.TABLERO_POLL_SECONDS)
+
+    def _escuchar(self) -> None:
+        conn = psycopg2.connect(**db._get_connection_params())
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_trigger WHERE tgname = 'tablero_habitaciones'")
+                if cursor.fetchone() is None:
+                    raise RuntimeError("falta la migración 006_tablero_habitaciones.sql")
+                cursor.execute(f"LISTEN {CANAL}")
+                cursor.execute("LISTEN catalogo")
+            # Lo que cambió mientras no se escuchaba
+            self.recargar()
+            self.modo = 'avisos'
+            logger.info("🗺️ Tablero de habitaciones escuchando cambios")
+            ultima_recarga = time.monotonic()
+            while True:
+                if select.select([conn], [], [], settings.TABLERO_POLL_SECONDS) == ([], [], []):
+                    conn.poll()  # detecta una conexión caída
+                    # Red de seguridad ante avisos perdidos (p. ej. triggers desactivados)
+                    if time.monotonic() - ultima_recarga >= settings.TABLERO_RESYNC_SECONDS:
+                        self.recargar()
+                        ultima_recarga = time.monotonic()
+                    continue
+                # Agrupa los avisos que lleguen durante la ventana en una sola relectura
+                pendientes = set()
+                limite = time.monotonic() + settings.TABLERO_COALESCE_MS / 1000
+                while True:
+                    conn.poll()
+                    while conn.notifies:
+                        aviso = conn.notifies.pop(0)
+                        if aviso.channel == 'catalogo':
+                            catalogo.invalidar()
+                        elif aviso.payload.isdigit():
+                            pendientes.add(int(aviso.payload))
+                            self.avisos += 1
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        break
+                    select.select([conn], [], [], restante)
+                self.refrescar(pendientes)
+        finally:
+            conn.close()
+
+
+tablero = Tablero()
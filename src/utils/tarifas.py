@@ -0,0 +1,191 @@
+"""Motor de tarifas: precio por noche según temporada, tarifas especiales y demanda.
+
+La tarifa de una habitación para una noche se compone así:
+
+1. Si alguna temporada que cubre la noche tiene tarifa especial para el tipo
+   de habitación (``tarifas_temporada``), esa es la base; si hay varias, la de
+   la temporada de mayor factor.
+2. Si no, ``tarifa_base`` de la habitación × factor de temporada (el mayor de
+   las temporadas que cubren la noche, o 1.0).
+3. × multiplicador de demanda según la ocupación ya reservada del tipo esa
+   noche (``PRICING_DEMAND_TIERS``, a partir de ``utils.cartera``).
+
+El total de la estancia se rebaja con ``PRICING_LOS_DISCOUNTS`` según las
+noches. Factores, tarifas especiales y multiplicadores se guardan como
+matrices tipo × noche para los próximos ``INVENTORY_HORIZON_DAYS`` días: se
+calculan de una vez al cambiar el día o el catálogo y, cuando cambian las
+reservas, solo se recalculan las noches que tocó la cartera.
+"""
+import threading
+from datetime import date, datetime
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config.settings import settings
+from utils import catalogo
+from utils.cartera import cartera, dias
+from utils.logger import logger
+
+
+def tramos(texto: str) -> Tuple[np.ndarray, np.ndarray]:
+    """'0.75:1.10,0.85:1.20' → umbrales y valores, ordenados por umbral"""
+    pares = sorted((float(umbral), float(valor))
+                   for umbral, valor in (p.split(':') for p in texto.split(',') if p.strip()))
+    return np.array([u for u, _ in pares], dtype=float), np.array([v for _, v in pares], dtype=float)
+
+
+def aplicar_tramos(valores: np.ndarray, umbrales: np.ndarray, resultados: np.ndarray, defecto: float) -> np.ndarray:
+    """Resultado del mayor umbral alcanzado por cada valor; ``defecto`` si no alcanza ninguno"""
+    if not len(umbrales):
+        return np.full(np.shape(valores), defecto, dtype=float)
+    i = np.searchsorted(umbrales, valores, side='right') - 1
+    return np.where(i >= 0, resultados[np.maximum(i, 0)], defecto)
+
+
+def temporadas(cat: catalogo.Catalogo, noches: np.ndarray, tipos: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """Factor de temporada por noche y tarifa especial tipo × noche (NaN si no hay)"""
+    factor = np.full(len(noches), -np.inf)
+    especial = np.full((len(tipos), len(noches)), np.nan)
+    columna = {t: i for i, t in enumerate(tipos)}
+    # De menor a mayor factor: la tarifa especial de la temporada de mayor factor queda encima
+    for temporada in sorted(cat.temporadas, key=lambda t: float(t.factor_multipliador or 0)):
+        cubre = (noches >= dias([temporada.fecha_inicio])[0]) & (noches <= dias([temporada.fecha_fin])[0])
+        if not cubre.any():
+            continue
+        if temporada.factor_multipliador is not None:
+            factor[cubre] = np.maximum(factor[cubre], float(temporada.factor_multipliador))
+        for tarifa in cat.tarifas_especiales:
+            if tarifa.temporada_id == temporada.id and tarifa.tipo_habitacion_id in columna:
+                especial[columna[tarifa.tipo_habitacion_id], cubre] = float(tarifa.tarifa_especial)
+    return np.where(np.isinf(factor), 1.0, factor), especial
+
+
+class MotorTarifas:
+    """Matrices de tarifas compartidas por las sesiones del proceso"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clave = None              # (hoy, versión del catálogo, tipos)
+        self._cat: Optional[catalogo.Catalogo] = None
+        self._version_cartera: Optional[int] = None
+        self.tipos: Tuple[int, ...] = ()
+        self.hoy = 0
+        self.factor = np.ones(0)        # noche
+        self.especial = np.zeros((0, 0))   # tipo × noche
+        self.ocupacion = np.zeros((0, 0))  # (tipos + hotel) × noche
+        self.demanda = np.ones((0, 0))     # (tipos + hotel) × noche
+        self.recalculos = 0             # cálculos completos
+        self.noches_recalculadas = 0    # noches recalculadas por cambios de reservas
+        self.actualizado_en: Optional[datetime] = None
+
+    # ------------------------------------------------------------ estado
+    def _al_dia(self) -> None:
+        cat = catalogo.actual()
+        if settings.PRICING_DEMAND_ENABLED:
+            actual = cartera.instantanea(self._version_cartera)
+            hoy, tipos = actual.hoy, actual.tipos
+        else:
+            actual, hoy = None, int(dias([date.today()])[0])
+            tipos = tuple(sorted(t.id for t in cat.tipos))
+        clave = (hoy, cat.version, tipos)
+        if clave != self._clave:
+            self._cat, self.hoy, self.tipos = cat, hoy, tipos
+            self.factor, self.especial = temporadas(cat, hoy + np.arange(settings.INVENTORY_HORIZON_DAYS), tipos)
+            self._demanda(actual, None)
+            self._clave = clave
+            self.recalculos += 1
+            logger.info(f"💲 Tarifas recalculadas: {len(tipos)} tipos × {len(self.factor)} noches")
+        elif actual is not None and (actual.tocadas is None or len(actual.tocadas)):
+            self._demanda(actual, actual.tocadas)
+        if actual is not None:
+            self._version_cartera = actual.version
+        self.actualizado_en = datetime.now()
+
+    def _demanda(self, actual, noches: Optional[np.ndarray]) -> None:
+        """Ocupación y multiplicador de demanda de las noches indicadas (None = todas)"""
+        if actual is None:
+            self.ocupacion = np.zeros((len(self.tipos) + 1, len(self.factor)))
+            self.demanda = np.ones_like(self.ocupacion)
+            return
+        reservadas = actual.reservadas.T.astype(float)                      # tipo × noche
+        reservadas = np.vstack([reservadas, reservadas.sum(axis=0, keepdims=True)])
+        capacidad = np.append(actual.capacidad, actual.capacidad.sum()).astype(float)[:, None]
+        if noches is None:
+            noches = np.arange(reservadas.shape[1])
+            self.ocupacion = np.zeros_like(reservadas)
+            self.demanda = np.ones_like(reservadas)
+        else:
+            self.noches_recalculadas += len(noches)
+        ocupacion = np.divide(reservadas[:, noches], capacidad, out=np.zeros((len(capacidad), len(noches))),
+                              where=capacidad > 0)
+        self.ocupacion[:, noches] = ocupacion
+        self.demanda[:, noches] = aplicar_tramos(ocupacion, *tramos(settings.PRICING_DEMAND_TIERS), 1.0)
+
+    def _noches(self, check_in: date, check_out: date):
+        """Factor, tarifa especial y demanda de cada noche de la estancia (fuera del horizonte, demanda 1)"""
+        noches = int(dias([check_in])[0]) + np.arange((check_out - check_in).days)
+        columna = noches - self.hoy
+        dentro = (columna >= 0) & (columna < len(self.factor))
+        factor, especial = np.empty(len(noches)), np.empty((len(self.tipos), len(noches)))
+        demanda = np.ones((len(self.tipos) + 1, len(noches)))
+        factor[dentro], especial[:, dentro] = self.factor[columna[dentro]], self.especial[:, columna[dentro]]
+        demanda[:, dentro] = self.demanda[:, columna[dentro]]
+        if not dentro.all():
+            factor[~dentro], especial[:, ~dentro] = temporadas(self._cat, noches[~dentro], self.tipos)
+        return factor, especial, demanda
+
+    # ------------------------------------------------------------ consultas
+    def precios(self, tipo_ids: Iterable, tarifas_base: Iterable, check_in: date, check_out: date) -> np.ndarray:
+        """Precio de cada noche (habitación × noche); tipo None o desconocido usa la demanda del hotel"""
+        tarifas_base = np.array([float(t or 0) for t in tarifas_base], dtype=float)
+        with self._lock:
+            self._al_dia()
+            factor, especial, demanda = self._noches(check_in, check_out)
+            posicion = {t: i for i, t in enumerate(self.tipos)}
+            fila = np.array([posicion.get(t, len(self.tipos)) for t in tipo_ids], dtype=np.int64)
+        especial = np.vstack([especial, np.full((1, especial.shape[1]), np.nan)])[fila]
+        base = np.where(np.isnan(especial), tarifas_base[:, None] * factor[None, :], especial)
+        return np.round(base * demanda[fila], 2)
+
+    @staticmethod
+    def descuento_estancia(noches) -> np.ndarray:
+        """Fracción de descuento por duración de la estancia (PRICING_LOS_DISCOUNTS)"""
+        return aplicar_tramos(np.asarray(noches, dtype=float), *tramos(settings.PRICING_LOS_DISCOUNTS), 0.0)
+
+    def tarifas_estancia(self, tipo_ids: Sequence, tarifas_base: Sequence, check_in: date,
+                         check_out: date) -> Dict[str, np.ndarray]:
+        """Tarifa media por noche (ya con el descuento por estancia), descuento y total por habitación"""
+        noches = (check_out - check_in).days
+        if noches <= 0:
+            ceros = np.zeros(len(tipo_ids))
+            return {'tarifa': ceros, 'descuento': ceros, 'total': ceros}
+        precios = self.precios(tipo_ids, tarifas_base, check_in, check_out)
+        descuento = float(self.descuento_estancia(noches))
+        total = np.round(precios.sum(axis=1) * (1 - descuento), 2)
+        return {'tarifa': np.round(total / noches, 2), 'descuento': np.full(len(total), descuento), 'total': total}
+
+    def calendario(self, dias_calendario: int, bases: Dict[int, float]) -> Dict:
+        """Matrices tipo × noche para los próximos días; ``bases`` es la tarifa de referencia de cada tipo"""
+        with self._lock:
+            self._al_dia()
+            n = min(dias_calendario, len(self.factor))
+            tipos = list(self.tipos)
+            base = np.array([float(bases.get(t, 0) or 0) for t in tipos])[:, None]
+            especial = self.especial[:, :n]
+            tarifa = np.where(np.isnan(especial), base * self.factor[None, :n], especial) * self.demanda[:-1, :n]
+            return {
+                'fechas': (self.hoy + np.arange(n)).astype('datetime64[D]').astype(date),
+                'tipos': tipos,
+                'tarifa': np.round(tarifa, 2),
+                'factor': self.factor[:n].copy(),
+                'especial': especial.copy(),
+                'ocupacion': self.ocupacion[:-1, :n].copy(),
+                'demanda': self.demanda[:-1, :n].copy(),
+                'recalculos': self.recalculos,
+                'noches_recalculadas': self.noches_recalculadas,
+                'actualizado_en': self.actualizado_en,
+            }
+
+
+motor = MotorTarifas()
@@ -0,0 +1,190 @@
+"""Trazas estructuradas (spans) para los caminos críticos de disponibilidad y tarifas.
+
+Cuando las trazas están desactivadas, ``tracer.span()`` devuelve un span nulo
+compartido: no se crean objetos, no se toma el tiempo y no se exporta nada.
+"""
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from config.settings import settings
+from utils.logger import logger
+
+
+# Activación por solicitud: None = usar el valor global
+_activo_solicitud: ContextVar[Optional[bool]] = ContextVar('trazas_activo_solicitud', default=None)
+_span_actual: ContextVar[Optional['Span']] = ContextVar('trazas_span_actual', default=None)
+
+
+class _SpanNulo:
+    """Span sin efecto usado cuando las trazas están desactivadas"""
+    recording = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, clave: str, valor: Any) -> None:
+        pass
+
+    def set_many(self, **atributos) -> None:
+        pass
+
+
+_SPAN_NULO = _SpanNulo()
+
+
+class Span:
+    """Intervalo con nombre, atributos y duración"""
+    recording = True
+
+    __slots__ = ('tracer', 'nombre', 'trace_id', 'span_id', 'parent_id',
+                 'atributos', 'inicio', 'duracion_ms', 'error', '_t0', '_token')
+
+    def __init__(self, tracer: 'Tracer', nombre: str, atributos: Dict[str, Any]):
+        padre = _span_actual.get()
+        self.tracer = tracer
+        self.nombre = nombre
+        self.trace_id = padre.trace_id if padre else uuid.uuid4().hex[:16]
+        self.span_id = uuid.uuid4().hex[:8]
+        self.parent_id = padre.span_id if padre else None
+        self.atributos = atributos
+        self.inicio = None
+        self.duracion_ms = None
+        self.error = None
+        self._t0 = None
+        self._token = None
+
+    def __enter__(self):
+        self.inicio = time.time()
+        self._t0 = time.perf_counter()
+        self._token = _span_actual.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duracion_ms = (time.perf_counter() - self._t0) * 1000
+        _span_actual.reset(self._token)
+        if exc is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.tracer._exportar(self)
+        return False
+
+    def set(self, clave: str, valor: Any) -> None:
+        self.atributos[clave] = valor
+
+    def set_many(self, **atributos) -> None:
+        self.atributos.update(atributos)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'nombre': self.nombre,
+            'inicio': datetime.fromtimestamp(self.inicio).isoformat(timespec='milliseconds'),
+            'duracion_ms': round(self.duracion_ms, 3),
+            'atributos': self.atributos,
+            'error': self.error,
+        }
+
+
+class RingBufferExporter:
+    """Guarda los últimos N spans en memoria (visibles desde Administración)"""
+
+    def __init__(self, capacidad: int = 500):
+        self._spans = deque(maxlen=capacidad)
+        self._lock = threading.Lock()
+
+    def exportar(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span.to_dict())
+
+    def spans(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._spans)
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+
+class JsonFileExporter:
+    """Añade cada span como una línea JSON en un archivo local"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+
+    def exportar(self, span: Span) -> None:
+        linea = json.dumps(span.to_dict(), default=str, ensure_ascii=False)
+        try:
+            with self._lock, open(self.ruta, 'a', encoding='utf-8') as f:
+                f.write(linea + '\n')
+        except OSError as e:
+            logger.error(f"No se pudo escribir la traza en {self.ruta}: {e}")
+
+
+class Tracer:
+    def __init__(self, habilitado: bool = False, exportadores: Optional[list] = None):
+        self.habilitado = habilitado
+        self.exportadores = exportadores or []
+
+    @property
+    def enabled(self) -> bool:
+        """Indica si la solicitud actual debe trazarse"""
+        forzado = _activo_solicitud.get()
+        return self.habilitado if forzado is None else forzado
+
+    def set_enabled(self, habilitado: bool) -> None:
+        """Activa o desactiva las trazas para todo el proceso"""
+        self.habilitado = habilitado
+        logger.info(f"Trazas {'activadas' if habilitado else 'desactivadas'} globalmente")
+
+    @contextmanager
+    def solicitud(self, activo: Optional[bool]):
+        """Fuerza las trazas (True/False) sólo durante la solicitud actual"""
+        token = _activo_solicitud.set(activo)
+        try:
+            yield
+        finally:
+            _activo_solicitud.reset(token)
+
+    def span(self, nombre: str, **atributos):
+        if not self.enabled:
+            return _SPAN_NULO
+        return Span(self, nombre, atributos)
+
+    def _exportar(self, span: Span) -> None:
+        for exportador in self.exportadores:
+            try:
+                exportador.exportar(span)
+            except Exception as e:
+                logger.error(f"Error exportando traza: {e}")
+
+    @property
+    def buffer(self) -> Optional[RingBufferExporter]:
+        for exportador in self.exportadores:
+            if isinstance(exportador, RingBufferExporter):
+                return exportador
+        return None
+
+
+def _crear_tracer() -> Tracer:
+    exportadores = []
+    if settings.TRACING_EXPORTER in ('memoria', 'ambos'):
+        exportadores.append(RingBufferExporter(settings.TRACING_BUFFER_SIZE))
+    if settings.TRACING_EXPORTER in ('json', 'ambos'):
+        exportadores.append(JsonFileExporter(settings.TRACING_FILE))
+    return Tracer(settings.TRACING_ENABLED, exportadores)
+
+
+# Instancia global
+tracer = _crear_tracer()
@@ -1,7 +1,15 @@
-"""Vistas de la aplicación"""
-from . import recepcion
-from . import administracion
-from . import dashboard
-from . import reportes
+"""Vistas de la aplicación.
+
+Cada vista se importa la primera vez que se usa (``from views import dashboard``
+o ``importlib.import_module('views.dashboard')``): el login no paga pandas,
+plotly ni fpdf.
+"""
+import importlib
 
 __all__ = ['recepcion', 'administracion', 'dashboard', 'reportes']
+
+
+def __getattr__(nombre):
+    if nombre in __all__:
+        return importlib.import_module(f'{__name__}.{nombre}')
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
@@ -1,19 +1,28 @@
 """Vista de administración del sistema"""
+import json
 import streamlit as st
 import pandas as pd
 from datetime import date, timedelta, datetime
 from config.database import db
+from config.settings import settings
 from models.usuario import Usuario
 from models.habitacion import Habitacion
 from models.reserva import Reserva
 from models.huesped import Huesped
 from models.factura import Factura
+from models.servicio import Servicio
 from controllers.reserva_controller import ReservaController
 from controllers.factura_controller import FacturaController
+from controllers.importacion_controller import ImportacionController, COLUMNAS_RESERVAS
+from controllers.tarifa_controller import TarifaController
+from controllers.asignacion_controller import AsignacionController
+from utils.deduplicacion import CAMPOS_HUESPED
+from utils import cache, catalogo
 from utils.auth import Auth
 from utils.logger import logger
 from utils.permissions import Permission
-from utils.pdf_generator import PDFGenerator
+from utils.tracing import tracer
+from utils.profiler import perfilador
 
 # ── Paleta (misma que el resto) ────────────────────────────────────────────────
 C = {
@@ -288,9 +297,21 @@ def _check_permission(permission: Permission) -> bool:
     return perm_checker and perm_checker.can(permission)
 
 
+def _recordar(clave_widget: str, clave_sesion: str):
+    """on_change que copia el valor del widget a una clave que no es de widget.
+
+    Streamlit borra el estado de un widget en las recargas en que no se dibuja,
+    así que lo que otras páginas deban leer se guarda en ``clave_sesion``.
+    """
+    def copiar():
+        st.session_state[clave_sesion] = st.session_state[clave_widget]
+    return copiar
+
+
 # =============================================================================
 def show():
-    _css()
+    with perfilador.fase('css'):
+        _css()
 
     perm_checker = st.session_state.get('permission_checker', None)
     if not perm_checker:
@@ -319,13 +340,27 @@ def show():
         tabs_disponibles.append("🛏️ Habitaciones")
         tab_funciones.append(mostrar_gestion_habitaciones)
 
+    if perm_checker.can(Permission.ROOM_VIEW):
+        tabs_disponibles.append("💲 Tarifas")
+        tab_funciones.append(mostrar_calendario_tarifas)
+
     if perm_checker.can(Permission.BOOKING_VIEW_ALL):
         tabs_disponibles.append("📋 Reservas")
         tab_funciones.append(mostrar_gestion_reservas)
 
+    if perm_checker.can(Permission.BOOKING_EDIT):
+        tabs_disponibles.append("🧩 Asignación")
+        tab_funciones.append(mostrar_asignacion_habitaciones)
+
     tabs_disponibles.append("👤 Huéspedes")
     tab_funciones.append(mostrar_gestion_huespedes)
 
+    if perm_checker.can(Permission.BOOKING_CREATE):
+        tabs_disponibles.append("📥 Importación")
+        tab_funciones.append(mostrar_importacion)
+        tabs_disponibles.append("👥 Importar Huéspedes")
+        tab_funciones.append(mostrar_importacion_huespedes)
+
     if perm_checker.can(Permission.INVOICE_VIEW):
         tabs_disponibles.append("🧾 Facturas")
         tab_funciones.append(mostrar_gestion_facturas)
@@ -336,6 +371,12 @@ def show():
     if perm_checker.can(Permission.CONFIG_EDIT):
         tabs_disponibles.append("📊 Sistema")
         tab_funciones.append(mostrar_estado_sistema)
+        tabs_disponibles.append("🔬 Trazas")
+        tab_funciones.append(mostrar_trazas)
+        tabs_disponibles.append("⚡ Rendimiento")
+        tab_funciones.append(mostrar_rendimiento)
+        tabs_disponibles.append("⏱️ Perfilador")
+        tab_funciones.append(mostrar_perfilador)
 
     tab_objects = st.tabs(tabs_disponibles)
     for i, tab in enumerate(tab_objects):
@@ -400,7 +441,7 @@ def crear_usuario(username, nombre_completo, email, rol, password):
         if Usuario.get_by_username(username):
             return {'success': False, 'error': 'El nombre de usuario ya existe'}
         password_hash = Auth.hash_password(password)
-        with db.get_cursor() as cursor:
+        with cache.invalidando('usuarios'), db.get_cursor() as cursor:
             cursor.execute("""
                 INSERT INTO usuarios (username, password_hash, nombre_completo, email, rol)
                 VALUES (%s, %s, %s, %s, %s) RETURNING id
@@ -419,12 +460,7 @@ def crear_usuario(username, nombre_completo, email, rol, password):
 def mostrar_tipos_habitacion():
     _seccion("🏨", "Tipos de Habitación")
 
-    with db.get_cursor() as cursor:
-        cursor.execute("""
-            SELECT id, nombre, descripcion, capacidad_maxima
-            FROM tipos_habitacion ORDER BY capacidad_maxima
-        """)
-        tipos = cursor.fetchall()
+    tipos = Habitacion.get_tipos()
 
     if tipos:
         st.dataframe(pd.DataFrame(tipos), use_container_width=True, hide_index=True,
@@ -483,6 +519,253 @@ def mostrar_estado_sistema():
     )
 
 
+# =============================================================================
+def mostrar_trazas():
+    _seccion("🔬", "Trazas de Disponibilidad y Tarifas")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        global_activo = st.checkbox(
+            "Trazar todas las solicitudes (proceso)", value=tracer.habilitado,
+            key="trazas_global"
+        )
+        if global_activo != tracer.habilitado:
+            tracer.set_enabled(global_activo)
+    with col2:
+        st.checkbox(
+            "Trazar sólo mis solicitudes", key="trazas_solicitud",
+            value=st.session_state.get('trazas_solicitud_activa', False),
+            on_change=_recordar('trazas_solicitud', 'trazas_solicitud_activa'),
+            help="Activa las trazas únicamente para esta sesión, sin afectar al resto de usuarios"
+        )
+
+    buffer = tracer.buffer
+    if buffer is None:
+        _card_info(
+            f"ℹ️ El exportador en memoria está desactivado. Las trazas se escriben en "
+            f"<strong>{settings.TRACING_FILE}</strong>", "info"
+        )
+        return
+
+    spans = buffer.spans()
+    if not spans:
+        _card_info("📭 No hay trazas registradas. Activa las trazas y realiza una búsqueda.", "info")
+        return
+
+    df = pd.DataFrame(spans)
+    nombres = ["Todos"] + sorted(df['nombre'].unique().tolist())
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        filtro = st.selectbox("Filtrar por span", nombres, key="trazas_filtro")
+    with col2:
+        st.markdown("<br>", unsafe_allow_html=True)
+        if st.button("🗑️ Vaciar buffer", key="trazas_vaciar"):
+            buffer.limpiar()
+            st.rerun()
+
+    if filtro != "Todos":
+        df = df[df['nombre'] == filtro]
+
+    col1, col2, col3 = st.columns(3)
+    with col1: st.metric("Spans", len(df))
+    with col2: st.metric("Duración media", f"{df['duracion_ms'].mean():.1f} ms")
+    with col3: st.metric("Duración máx.", f"{df['duracion_ms'].max():.1f} ms")
+
+    df_display = df.iloc[::-1][['inicio', 'nombre', 'duracion_ms', 'trace_id', 'atributos', 'error']].copy()
+    df_display['atributos'] = df_display['atributos'].apply(lambda a: json.dumps(a, default=str, ensure_ascii=False))
+    st.dataframe(df_display, use_container_width=True, hide_index=True,
+        column_config={"inicio": "Inicio", "nombre": "Span", "duracion_ms": "Duración (ms)",
+                       "trace_id": "Traza", "atributos": "Atributos", "error": "Error"})
+
+    st.download_button(
+        "📥 Descargar trazas (JSON)",
+        data=json.dumps(spans, default=str, ensure_ascii=False, indent=2),
+        file_name=f"trazas_{datetime.now():%Y%m%d_%H%M%S}.json",
+        mime="application/json",
+        key="trazas_descargar"
+    )
+
+
+# =============================================================================
+def mostrar_rendimiento():
+    _seccion("⚡", "Rendimiento de Consultas")
+    stats = db.stats
+
+    if not stats.habilitado:
+        _card_info("ℹ️ La instrumentación está desactivada (<strong>DB_INSTRUMENTATION=false</strong>)", "info")
+        return
+
+    resumen = stats.resumen_conexiones()
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1: st.metric("Conexiones abiertas", resumen['conexiones'])
+    with col2: st.metric("Máx. simultáneas", resumen['max_simultaneas'])
+    with col3: st.metric("Espera media", f"{resumen['espera_media_ms']:.1f} ms")
+    with col4: st.metric("Espera p95", f"{resumen['espera_p95_ms']:.1f} ms")
+    with col5: st.metric("Espera máx.", f"{resumen['espera_max_ms']:.1f} ms")
+
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        orden = st.selectbox(
+            "Ordenar por", ["total_ms", "p95_ms", "llamadas"], key="rend_orden",
+            format_func=lambda o: {"total_ms": "Tiempo total", "p95_ms": "Latencia p95",
+                                   "llamadas": "Nº de llamadas"}[o]
+        )
+    with col2:
+        limite = st.number_input("Mostrar", min_value=5, max_value=100, value=20, step=5, key="rend_limite")
+    with col3:
+        st.markdown("<br>", unsafe_allow_html=True)
+        if st.button("🔄 Reiniciar métricas", key="rend_reiniciar"):
+            stats.reiniciar()
+            st.rerun()
+
+    top = stats.top(int(limite), orden)
+    if not top:
+        _card_info("📭 Aún no se han registrado consultas en este proceso.", "info")
+    else:
+        st.dataframe(pd.DataFrame(top), use_container_width=True, hide_index=True,
+            column_config={
+                "huella": st.column_config.TextColumn("Consulta", width="large"),
+                "llamadas": "Llamadas",
+                "total_ms": st.column_config.NumberColumn("Total (ms)", format="%.1f"),
+                "media_ms": st.column_config.NumberColumn("Media (ms)", format="%.2f"),
+                "p50_ms": st.column_config.NumberColumn("p50 (ms)", format="%.2f"),
+                "p95_ms": st.column_config.NumberColumn("p95 (ms)", format="%.2f"),
+                "p99_ms": st.column_config.NumberColumn("p99 (ms)", format="%.2f"),
+                "max_ms": st.column_config.NumberColumn("Máx. (ms)", format="%.2f"),
+                "filas_promedio": "Filas (prom.)",
+                "espera_conexion_ms": st.column_config.NumberColumn("Espera conexión (ms)", format="%.1f"),
+                "llamador": "Llamador",
+            })
+        st.download_button(
+            "📥 Exportar sentencias", stats.exportar_muestras(), file_name="sentencias.json",
+            mime="application/json", key="rend_exportar",
+            help="Última ejecución de cada consulta, para revisar sus planes con "
+                 "python -m benchmarks.planes --desde sentencias.json. Los parámetros "
+                 "solo se incluyen con DB_CAPTURE_PARAMS=true"
+        )
+
+    _divider()
+    mostrar_cache_datos()
+
+    _divider()
+    _seccion("🐢", f"Consultas Lentas (≥ {stats.umbral_lento_ms} ms)")
+    auto_explain = st.checkbox(
+        "Adjuntar plan EXPLAIN a las consultas lentas", value=stats.auto_explain,
+        key="rend_auto_explain",
+        help="Ejecuta EXPLAIN (sin ANALYZE) sobre cada SELECT que supere el umbral"
+    )
+    if auto_explain != stats.auto_explain:
+        stats.auto_explain = auto_explain
+
+    lentas = stats.lentas()
+    if not lentas:
+        _card_info("✅ No hay consultas lentas registradas.", "success")
+        return
+
+    for entrada in reversed(lentas):
+        with st.expander(f"{entrada['fecha']} · {entrada['duracion_ms']:.0f} ms · {entrada['llamador']}"):
+            st.code(entrada['huella'], language="sql")
+            st.caption(f"Filas: {entrada['filas']}")
+            if entrada['plan']:
+                st.code(entrada['plan'], language="text")
+
+
+def mostrar_cache_datos():
+    _seccion("🗃️", "Caché de Datos")
+    if not settings.CACHE_ENABLED:
+        _card_info("ℹ️ La caché de datos está desactivada (<strong>CACHE_ENABLED=false</strong>)", "info")
+        return
+
+    filas = cache.estadisticas()
+    aciertos = sum(f['aciertos'] for f in filas)
+    consultas = aciertos + sum(f['fallos'] for f in filas)
+    col1, col2, col3, col4, col5 = st.columns([1, 1, 1, 1, 1])
+    with col1: st.metric("Tasa de aciertos", f"{aciertos / consultas:.0%}" if consultas else "—")
+    with col2: st.metric("Entradas", sum(f['entradas'] for f in filas))
+    with col3: st.metric("Versión del catálogo", catalogo.actual().version or "—")
+    with col4:
+        if st.button("🧹 Purgar cachés", key="cache_purgar",
+                     help="Descarta todo lo cacheado en este proceso y comprueba la versión del catálogo"):
+            cache.purgar()
+            catalogo.invalidar()
+            st.rerun()
+    with col5:
+        if st.button("🔄 Reiniciar contadores", key="cache_reiniciar"):
+            cache.reiniciar_estadisticas()
+            st.rerun()
+
+    st.dataframe(pd.DataFrame(filas), use_container_width=True, hide_index=True,
+        column_config={
+            "funcion": st.column_config.TextColumn("Función", width="large"),
+            "clase": "Clase",
+            "ttl_s": "TTL (s)",
+            "tablas": "Tablas",
+            "entradas": "Entradas",
+            "aciertos": "Aciertos",
+            "fallos": "Fallos",
+            "tasa_aciertos": st.column_config.ProgressColumn("Tasa de aciertos", min_value=0, max_value=1,
+                                                             format="%.2f"),
+            "invalidaciones": "Invalidaciones",
+        })
+
+
+# =============================================================================
+def mostrar_perfilador():
+    _seccion("⏱️", "Perfilador de Renderizado")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.checkbox(
+            "Perfilar mis páginas", key="perfil_render",
+            value=st.session_state.get('perfil_render_activo', perfilador.habilitado),
+            on_change=_recordar('perfil_render', 'perfil_render_activo'),
+            help="Mide el tiempo de cada recarga por fases (DB, pandas, plotly, CSS) sólo para esta sesión"
+        )
+    with col2:
+        if st.button("📝 Informe cProfile en la próxima carga", key="perfil_pedir_informe"):
+            st.session_state.perfil_informe = True
+            st.success(f"Se guardará un informe en {settings.LOGS_DIR}")
+    with col3:
+        if st.button("🗑️ Vaciar historial", key="perfil_vaciar"):
+            perfilador.limpiar()
+            st.rerun()
+
+    historial = perfilador.historial()
+    if not historial:
+        _card_info("📭 No hay perfiles registrados. Activa el perfilador y navega por las páginas.", "info")
+        return
+
+    df = pd.DataFrame(historial)
+    columnas_fase = ['db_ms', 'pandas_ms', 'plotly_ms', 'css_ms', 'otros_ms']
+    resumen = (df.groupby(['pagina', 'rol'])
+                 .agg(cargas=('total_ms', 'size'), total_ms=('total_ms', 'mean'),
+                      p95_ms=('total_ms', lambda s: s.quantile(0.95)),
+                      **{c: (c, 'mean') for c in columnas_fase}, consultas=('consultas', 'mean'))
+                 .round(1).reset_index()
+                 .sort_values('total_ms', ascending=False))
+    st.dataframe(resumen, use_container_width=True, hide_index=True,
+        column_config={"pagina": "Página", "rol": "Rol", "cargas": "Cargas",
+                       "total_ms": "Media total (ms)", "p95_ms": "p95 (ms)",
+                       "db_ms": "DB (ms)", "pandas_ms": "pandas (ms)", "plotly_ms": "plotly (ms)",
+                       "css_ms": "CSS (ms)", "otros_ms": "Otros (ms)", "consultas": "Consultas"})
+
+    st.bar_chart(resumen.assign(vista=resumen['pagina'] + ' · ' + resumen['rol'])
+                        .set_index('vista')[columnas_fase])
+
+    with st.expander("📜 Últimas cargas"):
+        st.dataframe(df.iloc[::-1], use_container_width=True, hide_index=True)
+
+    informes = perfilador.informes()
+    if informes:
+        _divider()
+        _seccion("📝", "Informes cProfile")
+        elegido = st.selectbox("Informe", informes, format_func=lambda p: p.name, key="perfil_informe_sel")
+        texto = elegido.read_text(encoding='utf-8')
+        st.code(texto, language="text")
+        st.download_button("📥 Descargar informe", data=texto, file_name=elegido.name,
+                           mime="text/plain", key="perfil_descargar")
+
+
 # =============================================================================
 def mostrar_gestion_habitaciones():
     _seccion("🛏️", "Gestión de Habitaciones")
@@ -497,9 +780,11 @@ def mostrar_gestion_habitaciones():
         mostrar_inactivas = st.checkbox("Mostrar inactivas", value=False)
     with col2:
         filtro_piso = st.selectbox("Filtrar por piso", ["Todos"] + [str(i) for i in range(1, 11)])
+    cat = catalogo.actual()
+    estados = [(e.id, e.nombre.title()) for e in cat.estados]
+    tipos = [(t.id, t.nombre) for t in cat.tipos]
     with col3:
-        filtro_estado = st.selectbox("Filtrar por estado",
-            ["Todos","Disponible","Ocupada","Mantenimiento","Reservada","Limpieza"])
+        filtro_estado = st.selectbox("Filtrar por estado", ["Todos"] + [nombre for _, nombre in estados])
 
     habitaciones = Habitacion.get_all(activas_only=not mostrar_inactivas)
 
@@ -533,9 +818,9 @@ def mostrar_gestion_habitaciones():
             with st.form("form_editar_habitacion"):
                 col1, col2 = st.columns(2)
                 with col1:
-                    nuevo_estado = st.selectbox("Estado",
-                        [(1,"Disponible"),(2,"Ocupada"),(3,"Mantenimiento"),(4,"Reservada"),(5,"Limpieza")],
-                        index=hab['estado_id']-1, format_func=lambda x: x[1])
+                    nuevo_estado = st.selectbox("Estado", estados,
+                        index=next((i for i, (eid, _) in enumerate(estados) if eid == hab['estado_id']), 0),
+                        format_func=lambda x: x[1])
                     if puede_cambiar_tarifas:
                         nueva_tarifa = st.number_input("Tarifa base (S/) *", min_value=0.0,
                             value=float(hab['tarifa_base']), step=10.0)
@@ -569,15 +854,11 @@ def mostrar_gestion_habitaciones():
                 with col1:
                     numero  = st.text_input("Número *")
                     piso    = st.number_input("Piso *", min_value=1, max_value=20, value=1)
-                    tipo_id = st.selectbox("Tipo *",
-                        [(1,"Individual"),(2,"Doble"),(3,"Suite"),(4,"Familiar"),(5,"Presidencial")],
-                        format_func=lambda x: x[1])
+                    tipo_id = st.selectbox("Tipo *", tipos, format_func=lambda x: x[1])
                 with col2:
                     tarifa_base = st.number_input("Tarifa base (S/) *", min_value=0.0, value=100.0, step=10.0)
                     metros      = st.number_input("m²", min_value=0.0, value=20.0, step=0.5)
-                    estado_id   = st.selectbox("Estado inicial",
-                        [(1,"Disponible"),(2,"Ocupada"),(3,"Mantenimiento"),(4,"Reservada"),(5,"Limpieza")],
-                        format_func=lambda x: x[1])
+                    estado_id   = st.selectbox("Estado inicial", estados, format_func=lambda x: x[1])
                 tiene_vista  = st.checkbox("Tiene vista")
                 tiene_balcon = st.checkbox("Tiene balcón")
                 notas        = st.text_area("Notas")
@@ -602,6 +883,110 @@ def mostrar_gestion_habitaciones():
         _card_info("📭 No hay habitaciones registradas", "info")
 
 
+# =============================================================================
+def mostrar_calendario_tarifas():
+    _seccion("💲", "Calendario de Tarifas")
+    st.caption("Tarifa por noche = tarifa especial de la temporada o tarifa base × factor de temporada, "
+               "× multiplicador de demanda según la ocupación ya reservada del tipo "
+               f"(tramos {settings.PRICING_DEMAND_TIERS or '—'}"
+               f"{'' if settings.PRICING_DEMAND_ENABLED else ', desactivados'}). "
+               f"Descuentos por estancia: {settings.PRICING_LOS_DISCOUNTS or 'ninguno'}.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        dias = st.selectbox("Días", [30, 90, 180, 365], index=1, key="tarifas_dias")
+    with col2:
+        vista = st.selectbox("Mostrar", ["Tarifa (S/)", "Ocupación reservada", "Multiplicador de demanda"],
+                             key="tarifas_vista")
+
+    calendario = TarifaController.get_calendario(dias)
+    if not calendario:
+        _card_info("❌ No se pudo calcular el calendario de tarifas (revisa el log)", "danger")
+        return
+    if not calendario['tipos']:
+        _card_info("📭 No hay tipos de habitación registrados", "info")
+        return
+
+    nombres = calendario['nombres']
+    valores = {"Tarifa (S/)": calendario['tarifa'], "Ocupación reservada": calendario['ocupacion'],
+               "Multiplicador de demanda": calendario['demanda']}[vista]
+    df = pd.DataFrame(valores.T, columns=nombres)
+    df.insert(0, 'Fecha', pd.to_datetime(calendario['fechas']))
+    df.insert(1, 'Factor temporada', calendario['factor'])
+    con_especial = ~pd.isna(calendario['especial']).all(axis=0)
+    df.insert(2, 'Tarifa especial', ["⭐" if e else "" for e in con_especial])
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Tarifa media", f"S/ {calendario['tarifa'].mean():,.2f}")
+    with col2:
+        st.metric("Noches recalculadas por reservas", f"{calendario['noches_recalculadas']:,}",
+                  help="Noches cuyo multiplicador se recalculó al cambiar la cartera, sin rehacer el resto")
+    with col3:
+        actualizado = calendario['actualizado_en']
+        st.metric("Actualizado", actualizado.strftime('%H:%M:%S') if actualizado else "—")
+
+    st.line_chart(df.set_index('Fecha')[nombres], height=260)
+    formato = {"Tarifa (S/)": "S/ %.2f", "Ocupación reservada": "%.0f%%",
+               "Multiplicador de demanda": "× %.2f"}[vista]
+    if vista == "Ocupación reservada":
+        df[nombres] = df[nombres] * 100
+    st.dataframe(df, use_container_width=True, hide_index=True,
+        column_config={
+            "Fecha": st.column_config.DateColumn("Fecha", format="ddd DD/MM/YYYY"),
+            "Factor temporada": st.column_config.NumberColumn("Factor temporada", format="× %.2f"),
+            **{n: st.column_config.NumberColumn(n, format=formato) for n in nombres},
+        })
+    st.caption("Tarifa de referencia por tipo (media de tarifa base): " + " · ".join(
+        f"{n}: S/ {b:,.2f}" for n, b in zip(nombres, calendario['bases']) if b is not None))
+
+    _divider()
+    _seccion("⭐", "Tarifas Especiales por Temporada")
+    especiales = TarifaController.get_tarifas_especiales()
+    if especiales:
+        st.dataframe(pd.DataFrame(especiales)[['temporada', 'fecha_inicio', 'fecha_fin', 'tipo', 'tarifa_especial']],
+            use_container_width=True, hide_index=True,
+            column_config={"temporada": "Temporada", "fecha_inicio": "Desde", "fecha_fin": "Hasta",
+                           "tipo": "Tipo", "tarifa_especial": st.column_config.NumberColumn("Tarifa", format="S/ %.2f")})
+    else:
+        _card_info("📭 No hay tarifas especiales: se usa tarifa base × factor de temporada", "info")
+
+    perm_checker = st.session_state.get('permission_checker', None)
+    if not (perm_checker and perm_checker.can(Permission.ROOM_CHANGE_RATES)):
+        return
+
+    cat = catalogo.actual()
+    tipos = [(t.id, t.nombre) for t in cat.tipos]
+    temporadas = [(t.id, f"{t.nombre} ({t.fecha_inicio:%d/%m/%Y} - {t.fecha_fin:%d/%m/%Y})") for t in cat.temporadas]
+    if not temporadas:
+        _card_info("ℹ️ No hay temporadas definidas", "info")
+        return
+    with st.form("form_tarifa_especial"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            temporada = st.selectbox("Temporada *", temporadas, format_func=lambda x: x[1])
+        with col2:
+            tipo = st.selectbox("Tipo *", tipos, format_func=lambda x: x[1])
+        with col3:
+            tarifa = st.number_input("Tarifa por noche (S/) *", min_value=0.0, value=100.0, step=10.0)
+        col_guardar, col_quitar = st.columns(2)
+        with col_guardar:
+            guardar = st.form_submit_button("💾 Guardar tarifa especial", type="primary", use_container_width=True)
+        with col_quitar:
+            quitar = st.form_submit_button("🗑️ Quitar tarifa especial", use_container_width=True)
+    if guardar or quitar:
+        usuario_id = st.session_state.user['id']
+        if guardar:
+            resultado = TarifaController.guardar_tarifa_especial(tipo[0], temporada[0], tarifa, usuario_id)
+        else:
+            resultado = TarifaController.eliminar_tarifa_especial(tipo[0], temporada[0], usuario_id)
+        if resultado['success']:
+            st.success("Tarifa especial guardada" if guardar else "Tarifa especial eliminada")
+            st.rerun()
+        else:
+            st.error(resultado['error'])
+
+
 # =============================================================================
 def mostrar_gestion_reservas():
     _seccion("📋", "Gestión de Reservas")
@@ -673,6 +1058,216 @@ def mostrar_gestion_reservas():
         _card_info("📭 No hay reservas para mostrar", "info")
 
 
+# =============================================================================
+def mostrar_asignacion_habitaciones():
+    _seccion("🧩", "Asignación de Habitaciones")
+    st.caption(f"Reparte las llegadas de los próximos {settings.ASSIGNMENT_HORIZON_DAYS} días entre las "
+               f"habitaciones de su tipo para no dejar huecos de 1 a {settings.ASSIGNMENT_SHORT_GAP_NIGHTS} "
+               f"noches. No se mueven alojados, reservas con habitación fija ni llegadas de los próximos "
+               f"{settings.ASSIGNMENT_FREEZE_DAYS} días.")
+
+    if st.button("🔍 Calcular propuesta", type="primary"):
+        st.session_state.asignacion_propuesta = AsignacionController.proponer()
+
+    propuesta = st.session_state.get('asignacion_propuesta')
+    if propuesta:
+        if not propuesta['success']:
+            _card_info(f"❌ {propuesta['error']}", "danger")
+        else:
+            if not propuesta['completo']:
+                _card_info("⏱️ Se alcanzó el límite de tiempo: algunos tipos se dejaron como están", "warning")
+            movimientos = propuesta['movimientos']
+            tipos = pd.DataFrame(propuesta['tipos'])
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Reservas a mover", len(movimientos))
+            with col2:
+                if len(tipos):
+                    antes = int(tipos['noches_en_huecos_cortos_antes'].sum())
+                    despues = int(tipos['noches_en_huecos_cortos_despues'].sum())
+                    st.metric("Noches en huecos cortos", despues, delta=despues - antes, delta_color="inverse")
+            with col3:
+                st.metric("Calculado en", f"{propuesta['calculado_ms']:,.0f} ms")
+
+            if len(tipos):
+                st.dataframe(tipos[['tipo', 'habitaciones', 'reservas_movibles', 'movimientos',
+                                    'huecos_cortos_antes', 'huecos_cortos_despues',
+                                    'mayor_libre_antes', 'mayor_libre_despues', 'motivo']],
+                    use_container_width=True, hide_index=True,
+                    column_config={"tipo": "Tipo", "habitaciones": "Habitaciones",
+                                   "reservas_movibles": "Movibles", "movimientos": "Movimientos",
+                                   "huecos_cortos_antes": "Huecos cortos (antes)",
+                                   "huecos_cortos_despues": "Huecos cortos (después)",
+                                   "mayor_libre_antes": "Mayor tramo libre (antes)",
+                                   "mayor_libre_despues": "Mayor tramo libre (después)",
+                                   "motivo": "Sin cambios porque"})
+
+            if movimientos:
+                df = pd.DataFrame(movimientos)
+                st.dataframe(df[['codigo_reserva', 'huesped', 'tipo', 'fecha_check_in', 'fecha_check_out',
+                                 'desde_numero', 'hasta_numero']],
+                    use_container_width=True, hide_index=True,
+                    column_config={"codigo_reserva": "Código", "huesped": "Huésped", "tipo": "Tipo",
+                                   "fecha_check_in": st.column_config.DateColumn("Check-in", format="DD/MM/YYYY"),
+                                   "fecha_check_out": st.column_config.DateColumn("Check-out", format="DD/MM/YYYY"),
+                                   "desde_numero": "Habitación actual", "hasta_numero": "Nueva habitación"})
+                if st.button(f"✅ Aplicar {len(movimientos)} movimientos", type="primary"):
+                    resultado = AsignacionController.aplicar(movimientos, st.session_state.user['id'])
+                    if resultado['success']:
+                        st.session_state.pop('asignacion_propuesta', None)
+                        st.success(f"{resultado['movidas']} reservas cambiadas de habitación")
+                        st.rerun()
+                    else:
+                        st.error(resultado['error'])
+            else:
+                _card_info("✅ La asignación actual ya es la mejor que encuentra el optimizador", "success")
+
+    _divider()
+    _seccion("📌", "Habitación Fija")
+    with st.form("form_habitacion_fija"):
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            codigo = st.text_input("Código de reserva")
+        with col2:
+            fija = st.selectbox("Habitación", ["Fija (no mover)", "Libre (se puede mover)"])
+        if st.form_submit_button("💾 Guardar"):
+            if codigo:
+                resultado = AsignacionController.fijar_habitacion(codigo, fija.startswith("Fija"),
+                                                                   st.session_state.user['id'])
+                if resultado['success']:
+                    st.session_state.pop('asignacion_propuesta', None)
+                    st.success("Reserva actualizada")
+                else:
+                    st.error(resultado['error'])
+            else:
+                st.warning("Indique el código de reserva")
+
+
+# =============================================================================
+def mostrar_importacion():
+    _seccion("📥", "Importar Reservas (grupos y OTAs)")
+    _card_info(
+        "ℹ️ CSV con cabecera o JSON (lista de objetos) con las columnas "
+        f"<code>{', '.join(COLUMNAS_RESERVAS)}</code>. El huésped se indica por "
+        "<code>huesped_id</code> o <code>numero_documento</code> y la habitación por "
+        "<code>habitacion_id</code> o <code>numero_habitacion</code>; sin <code>tarifa_total</code> "
+        "se calcula con las temporadas. Todo el lote se importa en una sola transacción.",
+        "info"
+    )
+    st.download_button(
+        "📄 Plantilla CSV",
+        data=','.join(COLUMNAS_RESERVAS) + '\n',
+        file_name="plantilla_reservas.csv", mime="text/csv"
+    )
+
+    with st.form("form_importar_reservas"):
+        archivo = st.file_uploader("Archivo de reservas", type=['csv', 'json'])
+        col1, col2 = st.columns(2)
+        with col1:
+            solo_validar = st.checkbox("Solo validar (no importa nada)")
+        with col2:
+            todo_o_nada = st.checkbox("Cancelar todo el lote si alguna fila tiene errores")
+        importar = st.form_submit_button("📥 Importar", type="primary")
+
+    if importar:
+        if not archivo:
+            st.warning("Seleccione un archivo")
+            return
+        formato = 'json' if archivo.name.lower().endswith('.json') else 'csv'
+        with st.spinner("Importando..."):
+            resultado = ImportacionController.importar_reservas(
+                archivo.getvalue(), formato, st.session_state.user['id'],
+                solo_validar=solo_validar, todo_o_nada=todo_o_nada
+            )
+        st.session_state.resultado_importacion = resultado
+
+    resultado = st.session_state.get('resultado_importacion')
+    if not resultado:
+        return
+    if not resultado['success']:
+        st.error(resultado['error'])
+        return
+
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Filas", f"{resultado['total']:,}")
+    c2.metric("Válidas", f"{resultado['validas']:,}")
+    c3.metric("Importadas", f"{resultado['importadas']:,}")
+    c4.metric("Tiempo", f"{resultado['tiempos']['total']:.2f} s")
+    if resultado['importadas']:
+        st.success(f"✅ {resultado['importadas']:,} reservas importadas")
+    elif resultado['validas'] and resultado['errores']:
+        _card_info("⚠️ No se importó nada: corrija las filas con errores o desmarque "
+                   "'Cancelar todo el lote'", "warning")
+
+    if resultado['errores']:
+        _seccion("⚠️", f"Filas con errores ({len(resultado['errores']):,})")
+        df_errores = pd.DataFrame(resultado['errores'])
+        st.dataframe(df_errores, use_container_width=True, hide_index=True,
+                     column_config={"fila": "Fila", "error": "Error"})
+        st.download_button("📥 Descargar informe de errores", data=df_errores.to_csv(index=False),
+                           file_name="errores_importacion.csv", mime="text/csv")
+    if resultado['reservas']:
+        st.download_button("📥 Descargar reservas creadas",
+                           data=pd.DataFrame(resultado['reservas']).to_csv(index=False),
+                           file_name="reservas_importadas.csv", mime="text/csv")
+
+
+def mostrar_importacion_huespedes():
+    _seccion("👥", "Importar Huéspedes (migración desde otro PMS)")
+    _card_info(
+        "ℹ️ CSV con cabecera y las columnas "
+        f"<code>{', '.join(CAMPOS_HUESPED)}</code> (obligatorias: documento, nombre y apellido). "
+        "Se normalizan nombres, documentos, emails y teléfonos; los duplicados seguros se fusionan "
+        "(completando los huéspedes existentes) y los dudosos solo se informan.",
+        "info"
+    )
+    with st.form("form_importar_huespedes"):
+        archivo = st.file_uploader("Archivo de huéspedes", type=['csv'])
+        col1, col2 = st.columns(2)
+        with col1:
+            comparar = st.checkbox("Buscar duplicados entre los huéspedes existentes", value=True)
+        with col2:
+            solo_analizar = st.checkbox("Solo analizar (no importa nada)")
+        importar = st.form_submit_button("📥 Importar huéspedes", type="primary")
+
+    if importar:
+        if not archivo:
+            st.warning("Seleccione un archivo")
+            return
+        estado = st.empty()
+        resultado = ImportacionController.importar_huespedes(
+            archivo, st.session_state.user['id'], comparar_existentes=comparar,
+            solo_analizar=solo_analizar,
+            progreso=lambda etapa, filas: estado.caption(f"⏳ {etapa}: {filas:,}")
+        )
+        estado.empty()
+        st.session_state.resultado_importacion_huespedes = resultado
+
+    resultado = st.session_state.get('resultado_importacion_huespedes')
+    if not resultado:
+        return
+    if not resultado['success']:
+        st.error(resultado['error'])
+        return
+
+    c1, c2, c3, c4, c5 = st.columns(5)
+    c1.metric("Filas", f"{resultado['total']:,}")
+    c2.metric("Nuevos", f"{resultado['insertados']:,}")
+    c3.metric("Completados", f"{resultado['actualizados']:,}")
+    c4.metric("Fusionadas", f"{resultado['fusionadas']:,}")
+    c5.metric("Posibles duplicados", f"{resultado['posibles_duplicados']:,}")
+    st.caption(f"⏱️ {resultado['tiempos']['total']:.1f} s · "
+               f"{resultado['existentes_comparados']:,} huéspedes existentes comparados · "
+               f"{resultado['errores']:,} filas con errores")
+    if resultado['informe']:
+        df_informe = pd.DataFrame(resultado['informe'])
+        st.dataframe(df_informe.head(1000), use_container_width=True, hide_index=True,
+                     column_config={"fila": "Fila", "accion": "Acción",
+                                    "huesped_id": "Huésped", "detalle": "Detalle"})
+        st.download_button("📥 Descargar informe de fusión", data=df_informe.to_csv(index=False),
+                           file_name="informe_huespedes.csv", mime="text/csv")
+
+
 # =============================================================================
 def mostrar_gestion_huespedes():
     _seccion("👤", "Gestión de Huéspedes")
@@ -844,6 +1439,7 @@ def mostrar_gestion_facturas():
                             detalle = cursor.fetchall()
 
                         if fac_completa:
+                            from utils.pdf_generator import PDFGenerator  # fpdf solo al generar el PDF
                             pdf = PDFGenerator()
                             factura_data = {
                                 'numero_factura':    fac_completa['numero_factura'],
@@ -901,9 +1497,7 @@ def mostrar_gestion_facturas():
                     st.session_state.servicios_factura = []
 
                 _seccion("🛎️", "Servicios Adicionales (opcional)")
-                with db.get_cursor() as cursor:
-                    cursor.execute("SELECT id, nombre, precio_base, categoria FROM servicios WHERE activo = true")
-                    servicios_disp = cursor.fetchall()
+                servicios_disp = Servicio.get_activos()
 
                 if servicios_disp:
                     col1, col2, col3 = st.columns(3)
@@ -4,7 +4,11 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta, date
 from config.database import db
+from controllers.reporte_controller import ReporteController
+from models.reserva import ESTANCIA_MAXIMA_DIAS
+from utils import cache, catalogo
 from utils.permissions import Permission
+from utils.profiler import perfilador
 
 # ── Paleta consistente con el sidebar ──────────────────────────────────────────
 C = {
@@ -89,47 +93,15 @@ def _metrica(label: str, valor: str, delta: str = "", delta_ok: bool = True) ->
     )
 
 
-def _get_ocupacion_hoy() -> dict:
+def _ocupacion(fila: dict) -> dict:
     """Devuelve ocupadas, total y porcentaje de ocupación actual."""
-    with db.get_cursor() as cursor:
-        cursor.execute("""
-            SELECT
-                COUNT(DISTINCT CASE
-                    WHEN r.fecha_check_in <= CURRENT_DATE
-                    AND r.fecha_check_out > CURRENT_DATE
-                    THEN r.habitacion_id
-                END) as ocupadas_hoy,
-                COUNT(h.id) as total_habitaciones
-            FROM habitaciones h
-            LEFT JOIN reservas r ON h.id = r.habitacion_id
-                AND r.estado IN ('confirmada', 'completada')
-                AND r.fecha_check_in <= CURRENT_DATE
-                AND r.fecha_check_out > CURRENT_DATE
-            WHERE h.activa = true
-        """)
-        result = cursor.fetchone()
-    ocupadas  = result['ocupadas_hoy'] or 0
-    total     = result['total_habitaciones'] or 1
+    ocupadas  = fila['ocupadas_hoy'] or 0
+    total     = fila['total_habitaciones'] or 1
     porcentaje = (ocupadas / total * 100)
     return {'ocupadas': ocupadas, 'total': total, 'porcentaje': porcentaje}
 
 
-def _get_reservas_futuras() -> int:
-    """Reservas confirmadas con check-in en el futuro."""
-    with db.get_cursor() as cursor:
-        cursor.execute("""
-            SELECT COUNT(*) as total FROM reservas
-            WHERE estado = 'confirmada' AND fecha_check_in > CURRENT_DATE
-        """)
-        return cursor.fetchone()['total']
-
-
-def show():
-    perm_checker = st.session_state.get('permission_checker', None)
-    if not perm_checker:
-        st.error("Error de permisos")
-        return
-
+def _css():
     st.markdown(f"""
     <style>
     .stApp {{ background-color: #0d1b36; }}
@@ -196,6 +168,102 @@ def show():
     </style>
     """, unsafe_allow_html=True)
 
+
+# ── Consultas (cacheadas para todas las sesiones; ver utils/cache.py) ─────────
+@cache.cacheado(cache.VIVO, 'reservas')
+def _ocupacion_semana():
+    """Habitaciones ocupadas en cada uno de los últimos 7 días"""
+    with db.get_cursor() as cursor:
+        cursor.execute("""
+            WITH fechas AS (
+                SELECT generate_series(
+                    CURRENT_DATE - INTERVAL '6 days',
+                    CURRENT_DATE, '1 day'::interval
+                )::date as fecha
+            )
+            SELECT f.fecha, COUNT(DISTINCT r.habitacion_id) as habitaciones_ocupadas
+            FROM fechas f
+            LEFT JOIN reservas r ON
+                r.fecha_check_in <= f.fecha AND r.fecha_check_out > f.fecha
+                AND r.estado IN ('confirmada', 'completada')
+                AND r.fecha_check_in > CURRENT_DATE - 6 - %s
+            GROUP BY f.fecha ORDER BY f.fecha
+        """, (ESTANCIA_MAXIMA_DIAS,))
+        return cursor.fetchall()
+
+
+@cache.cacheado(cache.LENTO, 'facturas', 'detalle_factura', 'reservas', 'habitaciones', 'tipos_habitacion')
+def _ingresos_por_tipo():
+    """Ingresos de alojamiento de los últimos 30 días por tipo de habitación"""
+    with db.get_cursor() as cursor:
+        cursor.execute("""
+            SELECT h.tipo_habitacion_id, SUM(df.importe) as ingresos
+            FROM detalle_factura df
+            JOIN facturas f ON df.factura_id = f.id
+            JOIN reservas r ON f.reserva_id = r.id
+            JOIN habitaciones h ON r.habitacion_id = h.id
+            WHERE f.fecha_emision >= CURRENT_DATE - INTERVAL '30 days'
+            AND df.fecha_emision >= CURRENT_DATE - INTERVAL '30 days'
+            AND df.tipo = 'alojamiento'
+            GROUP BY h.tipo_habitacion_id ORDER BY ingresos DESC
+        """)
+        filas = cursor.fetchall()
+    cat = catalogo.actual()
+    return [{'tipo_habitacion': cat.nombre_tipo(f['tipo_habitacion_id'], '—'), 'ingresos': f['ingresos']}
+            for f in filas]
+
+
+@cache.cacheado(cache.VIVO, 'alojamientos')
+def _checkins_semana():
+    """Check-ins de cada uno de los últimos 7 días"""
+    with db.get_cursor() as cursor:
+        cursor.execute("""
+            WITH fechas AS (
+                SELECT generate_series(
+                    CURRENT_DATE - INTERVAL '6 days',
+                    CURRENT_DATE, '1 day'::interval
+                )::date as fecha
+            )
+            SELECT f.fecha, COUNT(a.id) as check_ins
+            FROM fechas f
+            LEFT JOIN alojamientos a ON a.fecha_check_in >= f.fecha
+                AND a.fecha_check_in < f.fecha + 1
+            GROUP BY f.fecha ORDER BY f.fecha
+        """)
+        return cursor.fetchall()
+
+
+@cache.cacheado(cache.VIVO, 'reservas', 'huespedes', 'habitaciones')
+def _proximos_checkins():
+    """Reservas confirmadas que llegan en los próximos 7 días"""
+    with db.get_cursor() as cursor:
+        cursor.execute("""
+            SELECT
+                r.codigo_reserva,
+                h.nombre || ' ' || h.apellido as huesped,
+                r.fecha_check_in,
+                r.fecha_check_out,
+                hab.numero as habitacion,
+                (r.fecha_check_out - r.fecha_check_in) as noches
+            FROM reservas r
+            JOIN huespedes h ON r.huesped_id = h.id
+            JOIN habitaciones hab ON r.habitacion_id = hab.id
+            WHERE r.fecha_check_in BETWEEN CURRENT_DATE AND CURRENT_DATE + INTERVAL '7 days'
+            AND r.estado = 'confirmada'
+            ORDER BY r.fecha_check_in
+        """)
+        return cursor.fetchall()
+
+
+def show():
+    perm_checker = st.session_state.get('permission_checker', None)
+    if not perm_checker:
+        st.error("Error de permisos")
+        return
+
+    with perfilador.fase('css'):
+        _css()
+
     st.markdown(
         f'<h2 style="color:{C["accent"]}; font-weight:700; margin-bottom:1.25rem; font-size:1.4rem;">'
         f'📊 Panel de Gestión Hotelera'
@@ -204,8 +272,10 @@ def show():
     )
 
     # ── Datos compartidos ──────────────────────────────────────────────────────
-    ocup             = _get_ocupacion_hoy()
-    reservas_futuras = _get_reservas_futuras()
+    kpi_all          = perm_checker.can(Permission.DASHBOARD_VIEW_KPI_ALL)
+    kpis             = ReporteController.get_kpis_hoy(completos=kpi_all)
+    ocup             = _ocupacion(kpis['ocupacion'])
+    reservas_futuras = kpis['reservas_futuras']['total']
 
     # ═══════════════════════════════════════════════════════════════════════════
     # KPIs PRINCIPALES
@@ -219,41 +289,16 @@ def show():
                  ocup['porcentaje'] > 50)
 
     with col2:
-        if perm_checker.can(Permission.DASHBOARD_VIEW_KPI_ALL):
-            with db.get_cursor() as cursor:
-                cursor.execute("""
-                    SELECT COALESCE(SUM(total), 0) as ingresos_hoy
-                    FROM facturas
-                    WHERE DATE(fecha_emision) = CURRENT_DATE AND estado = 'pagada'
-                """)
-                result = cursor.fetchone()
-            _metrica("Ingresos Hoy", f"S/ {result['ingresos_hoy']:,.2f}")
+        if kpi_all:
+            _metrica("Ingresos Hoy", f"S/ {kpis['ingresos_hoy']['ingresos_hoy']:,.2f}")
         else:
-            with db.get_cursor() as cursor:
-                cursor.execute("""
-                    SELECT COUNT(*) as total FROM alojamientos
-                    WHERE DATE(fecha_check_in) = CURRENT_DATE
-                """)
-                result = cursor.fetchone()
-            _metrica("Check-ins Hoy", str(result['total'] or 0))
+            _metrica("Check-ins Hoy", str(kpis['checkins_hoy']['total'] or 0))
 
     with col3:
-        if perm_checker.can(Permission.DASHBOARD_VIEW_KPI_ALL):
-            with db.get_cursor() as cursor:
-                cursor.execute("""
-                    SELECT COUNT(*) as total FROM alojamientos
-                    WHERE DATE(fecha_check_in) = CURRENT_DATE
-                """)
-                result = cursor.fetchone()
-            _metrica("Check-ins Hoy", str(result['total'] or 0))
+        if kpi_all:
+            _metrica("Check-ins Hoy", str(kpis['checkins_hoy']['total'] or 0))
         else:
-            with db.get_cursor() as cursor:
-                cursor.execute("""
-                    SELECT COUNT(*) as total FROM alojamientos
-                    WHERE DATE(fecha_check_out) = CURRENT_DATE
-                """)
-                result = cursor.fetchone()
-            _metrica("Check-outs Hoy", str(result['total'] or 0))
+            _metrica("Check-outs Hoy", str(kpis['checkouts_hoy']['total'] or 0))
 
     with col4:
         _metrica("Reservas Futuras", str(reservas_futuras))
@@ -265,74 +310,22 @@ def show():
     # ═══════════════════════════════════════════════════════════════════════════
     col1, col2, col3 = st.columns(3)
 
-    if perm_checker.can(Permission.DASHBOARD_VIEW_KPI_ALL):
+    if kpi_all:
         with col1:
-            with db.get_cursor() as cursor:
-                cursor.execute("""
-                    SELECT COALESCE(AVG(fecha_check_out - fecha_check_in), 0) as estancia_promedio
-                    FROM reservas
-                    WHERE fecha_check_out >= CURRENT_DATE - INTERVAL '30 days'
-                    AND estado = 'completada'
-                """)
-                result = cursor.fetchone()
-            _metrica("Estancia Promedio", f"{float(result['estancia_promedio'] or 0):.1f} días")
-
+            _metrica("Estancia Promedio",
+                     f"{float(kpis['estancia_promedio']['estancia_promedio'] or 0):.1f} días")
         with col2:
-            with db.get_cursor() as cursor:
-                cursor.execute("""
-                    WITH stats AS (
-                        SELECT
-                            (SELECT COUNT(*) FROM habitaciones WHERE activa = true) as total_hab,
-                            COALESCE(SUM(total), 0) as ingresos,
-                            EXTRACT(DAY FROM DATE_TRUNC('month', CURRENT_DATE + INTERVAL '1 month')
-                                - DATE_TRUNC('month', CURRENT_DATE)) as dias_mes
-                        FROM facturas
-                        WHERE estado = 'pagada'
-                        AND DATE_TRUNC('month', fecha_emision) = DATE_TRUNC('month', CURRENT_DATE)
-                    )
-                    SELECT ingresos / NULLIF(total_hab * dias_mes, 0) as revpar FROM stats
-                """)
-                result = cursor.fetchone()
-            _metrica("RevPAR (Mes Actual)", f"S/ {float(result['revpar'] or 0):,.2f}")
-
+            _metrica("RevPAR (Mes Actual)", f"S/ {float(kpis['revpar']['revpar'] or 0):,.2f}")
         with col3:
-            with db.get_cursor() as cursor:
-                cursor.execute("""
-                    SELECT COALESCE(SUM(total), 0) as ingresos_mes FROM facturas
-                    WHERE estado = 'pagada'
-                    AND DATE_TRUNC('month', fecha_emision) = DATE_TRUNC('month', CURRENT_DATE)
-                """)
-                result = cursor.fetchone()
-            _metrica("Ingresos del Mes", f"S/ {result['ingresos_mes']:,.2f}")
+            _metrica("Ingresos del Mes", f"S/ {kpis['ingresos_mes']['ingresos_mes']:,.2f}")
 
     else:
         with col1:
-            with db.get_cursor() as cursor:
-                cursor.execute("""
-                    SELECT COUNT(*) as total FROM alojamientos
-                    WHERE DATE(fecha_check_in) = CURRENT_DATE
-                """)
-                result = cursor.fetchone()
-            _metrica("Huéspedes Hoy", str(result['total'] or 0))
-
+            _metrica("Huéspedes Hoy", str(kpis['checkins_hoy']['total'] or 0))
         with col2:
-            with db.get_cursor() as cursor:
-                cursor.execute("""
-                    SELECT COUNT(*) as total FROM habitaciones
-                    WHERE estado_id = (SELECT id FROM estados_habitacion WHERE nombre = 'disponible')
-                    AND activa = true
-                """)
-                result = cursor.fetchone()
-            _metrica("Habitaciones Libres", str(result['total'] or 0))
-
+            _metrica("Habitaciones Libres", str(kpis['habitaciones_libres']['total'] or 0))
         with col3:
-            with db.get_cursor() as cursor:
-                cursor.execute("""
-                    SELECT COUNT(*) as total FROM habitaciones
-                    WHERE estado_id = (SELECT id FROM estados_habitacion WHERE nombre = 'mantenimiento')
-                """)
-                result = cursor.fetchone()
-            _metrica("En Mantenimiento", str(result['total'] or 0))
+            _metrica("En Mantenimiento", str(kpis['en_mantenimiento']['total'] or 0))
 
     # ═══════════════════════════════════════════════════════════════════════════
     # GRÁFICOS
@@ -342,22 +335,7 @@ def show():
 
     with col1:
         _seccion("📈", "Ocupación — Últimos 7 días")
-        with db.get_cursor() as cursor:
-            cursor.execute("""
-                WITH fechas AS (
-                    SELECT generate_series(
-                        CURRENT_DATE - INTERVAL '6 days',
-                        CURRENT_DATE, '1 day'::interval
-                    )::date as fecha
-                )
-                SELECT f.fecha, COUNT(DISTINCT r.habitacion_id) as habitaciones_ocupadas
-                FROM fechas f
-                LEFT JOIN reservas r ON
-                    r.fecha_check_in <= f.fecha AND r.fecha_check_out > f.fecha
-                    AND r.estado IN ('confirmada', 'completada')
-                GROUP BY f.fecha ORDER BY f.fecha
-            """)
-            datos = cursor.fetchall()
+        datos = _ocupacion_semana()
 
         df = pd.DataFrame(datos)
         if not df.empty:
@@ -379,19 +357,7 @@ def show():
     with col2:
         if perm_checker.can(Permission.REPORT_VIEW_FINANCIAL):
             _seccion("💰", "Ingresos por Tipo de Habitación")
-            with db.get_cursor() as cursor:
-                cursor.execute("""
-                    SELECT th.nombre as tipo_habitacion, SUM(df.importe) as ingresos
-                    FROM detalle_factura df
-                    JOIN facturas f ON df.factura_id = f.id
-                    JOIN reservas r ON f.reserva_id = r.id
-                    JOIN habitaciones h ON r.habitacion_id = h.id
-                    JOIN tipos_habitacion th ON h.tipo_habitacion_id = th.id
-                    WHERE f.fecha_emision >= CURRENT_DATE - INTERVAL '30 days'
-                    AND df.tipo = 'alojamiento'
-                    GROUP BY th.nombre ORDER BY ingresos DESC
-                """)
-                datos = cursor.fetchall()
+            datos = _ingresos_por_tipo()
 
             if datos:
                 df = pd.DataFrame(datos)
@@ -410,20 +376,7 @@ def show():
 
         else:
             _seccion("✅", "Check-ins por Día")
-            with db.get_cursor() as cursor:
-                cursor.execute("""
-                    WITH fechas AS (
-                        SELECT generate_series(
-                            CURRENT_DATE - INTERVAL '6 days',
-                            CURRENT_DATE, '1 day'::interval
-                        )::date as fecha
-                    )
-                    SELECT f.fecha, COUNT(a.id) as check_ins
-                    FROM fechas f
-                    LEFT JOIN alojamientos a ON DATE(a.fecha_check_in) = f.fecha
-                    GROUP BY f.fecha ORDER BY f.fecha
-                """)
-                datos = cursor.fetchall()
+            datos = _checkins_semana()
 
             if datos:
                 df = pd.DataFrame(datos)
@@ -444,23 +397,7 @@ def show():
     # ═══════════════════════════════════════════════════════════════════════════
     _seccion("📅", "Próximos Check-ins — 7 días")
 
-    with db.get_cursor() as cursor:
-        cursor.execute("""
-            SELECT
-                r.codigo_reserva,
-                h.nombre || ' ' || h.apellido as huesped,
-                r.fecha_check_in,
-                r.fecha_check_out,
-                hab.numero as habitacion,
-                (r.fecha_check_out - r.fecha_check_in) as noches
-            FROM reservas r
-            JOIN huespedes h ON r.huesped_id = h.id
-            JOIN habitaciones hab ON r.habitacion_id = hab.id
-            WHERE r.fecha_check_in BETWEEN CURRENT_DATE AND CURRENT_DATE + INTERVAL '7 days'
-            AND r.estado = 'confirmada'
-            ORDER BY r.fecha_check_in
-        """)
-        proximos = cursor.fetchall()
+    proximos = _proximos_checkins()
 
     if proximos:
         df = pd.DataFrame(proximos)
@@ -1,17 +1,24 @@
 import streamlit as st
 import pandas as pd
-from datetime import date, timedelta, datetime
-import plotly.express as px
+from collections import Counter
+from datetime import date, timedelta
+from html import escape
 import time
 
 from controllers.reserva_controller import ReservaController
 from controllers.habitacion_controller import HabitacionController
 from controllers.huesped_controller import HuespedController
+from controllers.factura_controller import FacturaController
+from controllers.calendario_controller import CalendarioController
 from models.reserva import Reserva
 from config.database import db
+from config.settings import settings
+from utils import cache, catalogo
+from utils.tablero import tablero
+from utils.idempotencia import clave_formulario, renovar_clave
 from utils.logger import logger
 from utils.permissions import Permission
-from utils.pdf_generator import PDFGenerator
+from utils.profiler import perfilador
 
 # ── Paleta (misma que dashboard) ───────────────────────────────────────────────
 C = {
@@ -270,7 +277,8 @@ def _card_info(texto: str, tipo: str = "info"):
 
 
 def show():
-    _css()
+    with perfilador.fase('css'):
+        _css()
     
     # Inicializar contadores para limpiar inputs
     if 'checkin_counter' not in st.session_state:
@@ -345,6 +353,14 @@ def show():
         tabs_disponibles.append("✅ Check-in / Check-out")
         tab_funciones.append(mostrar_check_in_out)
 
+    # Tablero de habitaciones en vivo
+    tabs_disponibles.append("🗺️ Tablero")
+    tab_funciones.append(mostrar_tablero_habitaciones)
+
+    # Calendario de ocupación (habitaciones × días)
+    tabs_disponibles.append("📆 Calendario")
+    tab_funciones.append(mostrar_calendario)
+
     # Huéspedes Alojados Ahora
     tabs_disponibles.append("🏨 Alojados Ahora")
     tab_funciones.append(mostrar_alojados_ahora)
@@ -579,9 +595,10 @@ def mostrar_busqueda_disponibilidad():
                     
                     with col5:
                         total_dias = (st.session_state.fecha_check_out_actual - st.session_state.fecha_check_in_actual).days
-                        tarifa_float = float(habitacion['tarifa_calculada']) if hasattr(habitacion['tarifa_calculada'], 'item') else float(habitacion['tarifa_calculada'])
-                        total_estancia = tarifa_float * total_dias
-                        st.metric("Total estancia", f"S/ {total_estancia:,.2f}", f"{total_dias} días")
+                        total_estancia = float(habitacion.get('total_estancia') or float(habitacion['tarifa_calculada']) * total_dias)
+                        descuento = habitacion.get('descuento_estancia') or 0
+                        st.metric("Total estancia", f"S/ {total_estancia:,.2f}",
+                                  f"{total_dias} días" + (f" · -{descuento:.0%} por estancia" if descuento else ""))
                     
                     notas = st.text_area("Notas adicionales", key="notas_final")
                     
@@ -610,19 +627,21 @@ def mostrar_busqueda_disponibilidad():
                             )
                             st.stop()
                         
-                        # Crear reserva
+                        # Crear reserva (un doble envío devuelve la misma reserva)
+                        datos_reserva = {
+                            'huesped_id': huesped_id,
+                            'fecha_check_in': st.session_state.fecha_check_in_actual,
+                            'fecha_check_out': st.session_state.fecha_check_out_actual,
+                            'numero_adultos': adultos,
+                            'numero_ninos': ninos,
+                            'habitacion_id': habitacion['id'],
+                            'tarifa_total': total_estancia,
+                            'notas': notas
+                        }
                         resultado = ReservaController.crear_reserva(
-                            {
-                                'huesped_id': huesped_id,
-                                'fecha_check_in': st.session_state.fecha_check_in_actual,
-                                'fecha_check_out': st.session_state.fecha_check_out_actual,
-                                'numero_adultos': adultos,
-                                'numero_ninos': ninos,
-                                'habitacion_id': habitacion['id'],
-                                'tarifa_total': total_estancia,
-                                'notas': notas
-                            },
-                            st.session_state.user['id']
+                            datos_reserva,
+                            st.session_state.user['id'],
+                            clave_idempotencia=clave_formulario(st.session_state, 'crear_reserva', datos_reserva)
                         )
                         
                         if resultado['success']:
@@ -635,6 +654,7 @@ def mostrar_busqueda_disponibilidad():
                             st.session_state.habitacion_idx = 0
                             if 'reservas_activas_cache' in st.session_state:
                                 st.session_state.reservas_activas_cache = None
+                            renovar_clave(st.session_state, 'crear_reserva')
                             st.rerun()
                         else:
                             st.error(f"Error: {resultado['error']}")
@@ -646,6 +666,61 @@ def mostrar_busqueda_disponibilidad():
                 st.session_state.busqueda_realizada = False
                 st.rerun()
 
+    with st.expander("👥 Búsqueda para grupos"):
+        _busqueda_grupo()
+
+
+def _busqueda_grupo():
+    """N habitaciones de tipos mezclados para las mismas fechas, juntas y con su precio"""
+    cat = catalogo.actual()
+    with st.form("form_busqueda_grupo"):
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            check_in = st.date_input("Check-in", min_value=date.today(), value=date.today(), key="grupo_checkin")
+        with col2:
+            check_out = st.date_input("Check-out", min_value=date.today() + timedelta(days=1),
+                                      value=date.today() + timedelta(days=1), key="grupo_checkout")
+        with col3:
+            habitaciones = st.number_input("Habitaciones", min_value=0, value=5, key="grupo_habitaciones",
+                                           help="Total; si es menor que la suma por tipo, manda la suma")
+        with col4:
+            personas = st.number_input("Personas", min_value=0, value=10, key="grupo_personas")
+        st.caption("Mínimo por tipo (opcional)")
+        columnas = st.columns(max(len(cat.tipos), 1))
+        tipos = {}
+        for col, tipo in zip(columnas, cat.tipos):
+            with col:
+                tipos[tipo.id] = st.number_input(tipo.nombre, min_value=0, value=0, key=f"grupo_tipo_{tipo.id}")
+        buscar = st.form_submit_button("🔍 Buscar para el grupo", type="primary", use_container_width=True)
+
+    if buscar:
+        with st.spinner("Buscando habitaciones para el grupo..."):
+            st.session_state.resultado_grupo = ReservaController.buscar_grupo(
+                check_in, check_out, tipos, int(habitaciones), int(personas))
+
+    resultado = st.session_state.get('resultado_grupo')
+    if not resultado:
+        return
+    if not resultado['success']:
+        _card_info(f"⚠️ {resultado['error']}", "warning")
+        return
+    _card_info(f"✅ {len(resultado['opciones'])} opciones de {resultado['evaluadas']} evaluadas entre "
+               f"{resultado['disponibles']} habitaciones libres ({resultado['calculado_ms']:,.0f} ms"
+               f"{'' if resultado['completo'] else ', búsqueda cortada por tiempo'})", "success")
+    for n, opcion in enumerate(resultado['opciones'], 1):
+        pisos = ", ".join(str(p) for p in opcion['pisos'])
+        tipos_txt = " · ".join(f"{cantidad} {cat.nombre_tipo(t)}" for t, cantidad in opcion['por_tipo'].items())
+        st.markdown(f"**Opción {n}** — piso{'s' if len(opcion['pisos']) > 1 else ''} {pisos} · {tipos_txt} · "
+                    f"{opcion['capacidad']} personas · **S/ {opcion['total']:,.2f}**"
+                    + (f" · {opcion['intercaladas']} habitaciones intercaladas" if opcion['intercaladas'] else ""))
+        df = pd.DataFrame(opcion['habitaciones'])[['numero', 'tipo_nombre', 'piso', 'capacidad_maxima',
+                                                   'tarifa_calculada', 'total_estancia']]
+        st.dataframe(df, use_container_width=True, hide_index=True,
+            column_config={"numero": "Habitación", "tipo_nombre": "Tipo", "piso": "Piso",
+                           "capacidad_maxima": "Capacidad",
+                           "tarifa_calculada": st.column_config.NumberColumn("Tarifa/noche", format="S/ %.2f"),
+                           "total_estancia": st.column_config.NumberColumn("Total", format="S/ %.2f")})
+
 
 def mostrar_reservas_activas():
     _seccion("📋", "Reservas Activas")
@@ -797,16 +872,8 @@ def mostrar_reservas_activas():
                                 else:
                                     # ===== VALIDACIÓN DE CAPACIDAD =====
                                     total_personas = nuevos_adultos + nuevos_ninos
-                                    with db.get_cursor() as cursor:
-                                        cursor.execute("""
-                                            SELECT th.capacidad_maxima
-                                            FROM habitaciones h
-                                            JOIN tipos_habitacion th ON h.tipo_habitacion_id = th.id
-                                            WHERE h.id = %s
-                                        """, (reserva['habitacion_id'],))
-                                        hab_info = cursor.fetchone()
-                                    
-                                    capacidad_maxima = hab_info['capacidad_maxima'] if hab_info else 0
+                                    hab_info = HabitacionController.get_by_id(reserva['habitacion_id'])
+                                    capacidad_maxima = (hab_info['capacidad_maxima'] or 0) if hab_info else 0
                                     if total_personas > capacidad_maxima:
                                         st.error(
                                             f"⚠️ La habitación tiene capacidad máxima de {capacidad_maxima} personas. "
@@ -826,7 +893,7 @@ def mostrar_reservas_activas():
                                             st.stop()
                                     
                                     try:
-                                        with db.get_cursor() as cursor:
+                                        with cache.invalidando('reservas'), db.get_cursor() as cursor:
                                             cursor.execute("""
                                                 UPDATE reservas 
                                                 SET fecha_check_in = %s,
@@ -901,6 +968,168 @@ def mostrar_reservas_activas():
 # =============================================================================
 # FUNCIÓN: Mostrar huéspedes alojados actualmente
 # =============================================================================
+def mostrar_tablero_habitaciones():
+    _seccion("🗺️", "Tablero de Habitaciones")
+    _tablero_en_vivo()
+
+
+def _html_casilla(casilla, cat) -> str:
+    estado = cat.estado(casilla.estado_id)
+    color = (estado.color_hex if estado and estado.color_hex else C['secondary'])
+    nombre_estado = estado.nombre.title() if estado else '—'
+    detalle = casilla.huesped or cat.nombre_tipo(casilla.tipo_habitacion_id, '')
+    return (
+        f'<div title="{escape(detalle)}" style="border-left:4px solid {color}; background:{color}1f; '
+        f'border-radius:8px; padding:0.45rem 0.6rem; width:8rem;">'
+        f'<div style="font-weight:700; color:{C["text"]};">{escape(casilla.numero)}</div>'
+        f'<div style="font-size:0.72rem; color:{color};">{nombre_estado}</div>'
+        f'<div style="font-size:0.72rem; color:{C["muted"]}; white-space:nowrap; overflow:hidden; '
+        f'text-overflow:ellipsis;">{escape(detalle)}</div></div>'
+    )
+
+
+def _html_piso(piso: int, casillas_html) -> str:
+    return (
+        f'<div style="display:flex; flex-wrap:wrap; align-items:center; gap:0.5rem; margin-bottom:0.75rem;">'
+        f'<span style="width:4rem; color:{C["muted"]}; font-size:0.8rem; font-weight:600;">Piso {piso}</span>'
+        + ''.join(casillas_html) + '</div>'
+    )
+
+
+@st.fragment(run_every=settings.TABLERO_REFRESH_SECONDS)
+def _tablero_en_vivo():
+    """Solo este fragmento se vuelve a ejecutar; el mapa viene de utils/tablero.py
+    (sin consultas) y solo se rehace el HTML de las casillas que cambiaron"""
+    try:
+        version, casillas = tablero.instantanea()
+        cat = catalogo.actual()
+    except Exception as e:
+        logger.error(f"Error leyendo el tablero de habitaciones: {str(e)}")
+        _card_info("❌ No se pudo leer el estado de las habitaciones", "danger")
+        return
+
+    # HTML por casilla y por piso de esta sesión; si cambia el catálogo se rehace todo
+    memo = st.session_state.get('tablero_memo')
+    if memo is None or memo['catalogo'] != cat.version:
+        memo = {'version': None, 'catalogo': cat.version, 'casillas': {}, 'pisos': {}}
+        st.session_state.tablero_memo = memo
+    if memo['version'] != version:
+        cambiadas = tablero.cambios_desde(memo['version'])
+        if cambiadas is None:
+            memo['casillas'], memo['pisos'] = {}, {}
+            cambiadas = casillas.keys()
+        pisos = set()
+        for habitacion_id in cambiadas:
+            anterior = memo['casillas'].pop(habitacion_id, None)
+            if anterior:
+                pisos.add(anterior[0])
+            casilla = casillas.get(habitacion_id)
+            if casilla and casilla.activa:
+                memo['casillas'][habitacion_id] = (casilla.piso, casilla.numero, _html_casilla(casilla, cat))
+                pisos.add(casilla.piso)
+        for piso in pisos:
+            fila = sorted((numero, html) for p, numero, html in memo['casillas'].values() if p == piso)
+            if fila:
+                memo['pisos'][piso] = _html_piso(piso, [html for _, html in fila])
+            else:
+                memo['pisos'].pop(piso, None)
+        memo['version'] = version
+
+    conteo = Counter(c.estado_id for c in casillas.values() if c.activa)
+    for col, estado in zip(st.columns(len(cat.estados) or 1), cat.estados):
+        with col:
+            st.metric(estado.nombre.title(), conteo.get(estado.id, 0))
+
+    if not memo['pisos']:
+        _card_info("📭 No hay habitaciones activas", "info")
+    for piso in sorted(memo['pisos']):
+        st.markdown(memo['pisos'][piso], unsafe_allow_html=True)
+
+    modo = {'avisos': 'en vivo', 'sondeo': f"sondeo cada {settings.TABLERO_POLL_SECONDS} s"}.get(tablero.modo, 'iniciando')
+    actualizado = tablero.actualizado_en.strftime('%H:%M:%S') if tablero.actualizado_en else '—'
+    st.caption(f"🔄 {modo} · actualizado {actualizado} · versión {version}")
+
+
+def mostrar_calendario():
+    _seccion("📆", "Calendario de Ocupación")
+    if 'calendario_inicio' not in st.session_state:
+        st.session_state.calendario_inicio = date.today()
+
+    cat = catalogo.actual()
+    col1, col2, col3, col4, col5 = st.columns([2, 1, 1, 1, 1])
+    with col1:
+        tipo = st.selectbox("Tipo de habitación", [None] + [t.id for t in cat.tipos],
+                            format_func=lambda t: "Todos" if t is None else cat.nombre_tipo(t),
+                            key="calendario_tipo")
+    with col2:
+        dias = st.selectbox("Días", [30, 60, 90], index=1, key="calendario_dias")
+    # Al desplazar solo se leen los bloques de fechas que no estaban en caché
+    with col3:
+        if st.button("◀ 7 días", use_container_width=True):
+            st.session_state.calendario_inicio -= timedelta(days=7)
+    with col4:
+        if st.button("Hoy", use_container_width=True):
+            st.session_state.calendario_inicio = date.today()
+    with col5:
+        if st.button("7 días ▶", use_container_width=True):
+            st.session_state.calendario_inicio += timedelta(days=7)
+
+    inicio = st.session_state.calendario_inicio
+    grid = CalendarioController.grid(inicio, inicio + timedelta(days=dias), tipo)
+    if grid is None:
+        _card_info("❌ No se pudo cargar el calendario", "danger")
+        return
+    if not grid['habitaciones']:
+        _card_info("📭 No hay habitaciones activas", "info")
+        return
+
+    st.markdown(_html_calendario(grid), unsafe_allow_html=True)
+    st.caption(f"{len(grid['habitaciones'])} habitaciones × {dias} días · {len(grid['reservas'])} reservas · "
+               f"{grid['calculado_ms']:,.0f} ms")
+
+
+def _html_calendario(grid) -> str:
+    """Tabla tipo Gantt: una celda por tramo de días iguales (colspan), no una por día"""
+    from utils import calendario
+    colores = {calendario.RESERVADA: C['primary'], calendario.ALOJADA: C['success']}
+    fechas = [grid['fecha_inicio'] + timedelta(days=d) for d in range(grid['dias'])]
+    hoy = date.today()
+    dias_semana = "LMXJVSD"
+    celda = "padding:0; height:1.5rem; border-right:1px solid rgba(157,180,199,0.08);"
+    cabecera = ''.join(
+        f'<th style="min-width:1.6rem; font-size:0.65rem; font-weight:600; text-align:center; '
+        f'color:{C["accent"] if f == hoy else C["muted"]};">{dias_semana[f.weekday()]}<br>{f.day}</th>'
+        for f in fechas)
+    filas = []
+    for h, habitacion in enumerate(grid['habitaciones']):
+        celdas = []
+        for desde, hasta, estado, reserva in calendario.tramos(grid['estado'][h], grid['reserva'][h]):
+            ancho = hasta - desde
+            if estado == calendario.LIBRE:
+                celdas.append(f'<td colspan="{ancho}" style="{celda}"></td>')
+                continue
+            datos = grid['reservas'][reserva]
+            color = colores[estado]
+            texto = escape(datos['huesped'] or datos['codigo_reserva'])
+            titulo = escape(f"{datos['codigo_reserva']} · {datos['huesped']} · "
+                            f"{datos['fecha_check_in']:%d/%m} - {datos['fecha_check_out']:%d/%m}")
+            celdas.append(
+                f'<td colspan="{ancho}" title="{titulo}" style="{celda}">'
+                f'<div style="background:{color}40; border-left:3px solid {color}; border-radius:4px; '
+                f'margin:2px 1px; padding:0 0.3rem; font-size:0.68rem; color:{C["text"]}; white-space:nowrap; '
+                f'overflow:hidden; text-overflow:ellipsis; max-width:{ancho * 1.6}rem;">{texto}</div></td>')
+        filas.append(
+            f'<tr><td style="position:sticky; left:0; background:#0d1b36; font-size:0.75rem; font-weight:700; '
+            f'color:{C["text"]}; padding:0 0.5rem; white-space:nowrap;">{escape(habitacion["numero"])}</td>'
+            + ''.join(celdas) + '</tr>')
+    return (
+        f'<div style="overflow-x:auto; border:1px solid {C["border"]}; border-radius:10px;">'
+        f'<table style="border-collapse:collapse; table-layout:fixed; width:max-content;">'
+        f'<thead><tr><th style="position:sticky; left:0; background:#0d1b36;"></th>{cabecera}</tr></thead>'
+        f'<tbody>{"".join(filas)}</tbody></table></div>'
+    )
+
+
 def mostrar_alojados_ahora():
     """Muestra los huéspedes que están actualmente en el hotel"""
     _seccion("🏨", "Huéspedes Alojados Ahora")
@@ -1033,8 +1262,10 @@ def mostrar_check_in_out():
                     reserva = Reserva.get_by_codigo(codigo_reserva)
                     if reserva:
                         if reserva['estado'] == 'confirmada':
+                            # Una reserva solo tiene un check-in: la clave es la propia reserva
                             resultado = ReservaController.check_in(
-                                reserva['id'], reserva['habitacion_id'], st.session_state.user['id']
+                                reserva['id'], reserva['habitacion_id'], st.session_state.user['id'],
+                                clave_idempotencia=f"reserva-{reserva['id']}"
                             )
                             if resultado['success']:
                                 st.success("✅ Check-in realizado exitosamente")
@@ -1246,6 +1477,7 @@ def mostrar_facturas():
 
         if st.button("📄 Generar PDF", key=f"pdf_factura_{reserva['id']}", type="primary"):
             with st.spinner("Generando PDF..."):
+                from utils.pdf_generator import PDFGenerator  # fpdf solo al generar el PDF
                 pdf = PDFGenerator()
                 factura_data = {
                     'numero_factura': factura['numero_factura'],
@@ -1309,32 +1541,36 @@ def mostrar_facturas():
                 crear = st.form_submit_button("✅ Crear Factura", type="primary", use_container_width=True)
 
             if crear:
-                with db.get_cursor() as cursor:
-                    cursor.execute("SELECT nextval('facturas_numero_seq')")
-                    factura_seq = cursor.fetchone()['nextval']
-                    numero = f"FAC-{datetime.now().strftime('%Y%m%d')}-{factura_seq}"
-                    cursor.execute("""
-                        INSERT INTO facturas
-                        (numero_factura, huesped_id, reserva_id, fecha_emision,
-                         subtotal, impuestos, total, estado, metodo_pago)
-                        VALUES (%s, %s, %s, CURRENT_TIMESTAMP, %s, %s, %s, %s, %s)
-                        RETURNING id
-                    """, (numero, reserva['huesped_id'], reserva['id'],
-                          subtotal, impuestos, total,
-                          'pagada' if metodo_pago else 'pendiente',
-                          metodo_pago if metodo_pago else None))
-                    factura_nueva_id = cursor.fetchone()['id']
-                    cursor.execute("""
-                        INSERT INTO detalle_factura
-                        (factura_id, concepto, cantidad, precio_unitario, importe, tipo)
-                        VALUES (%s, %s, %s, %s, %s, %s)
-                    """, (factura_nueva_id,
-                          f"Alojamiento - {dias} noches - Hab {reserva['habitacion_numero']}",
-                          1, subtotal, subtotal, 'alojamiento'))
+                datos_factura = {
+                    'huesped_id': reserva['huesped_id'],
+                    'reserva_id': reserva['id'],
+                    'subtotal': subtotal,
+                    'impuestos': impuestos,
+                    'total': total,
+                    'estado': 'pagada' if metodo_pago else 'pendiente',
+                    'metodo_pago': metodo_pago if metodo_pago else None,
+                    'detalle': [{
+                        'concepto': f"Alojamiento - {dias} noches - Hab {reserva['habitacion_numero']}",
+                        'cantidad': 1,
+                        'precio_unitario': subtotal,
+                        'importe': subtotal,
+                        'tipo': 'alojamiento',
+                    }],
+                }
+                nombre_clave = f"factura_{reserva['id']}"
+                resultado = FacturaController.crear_factura(
+                    datos_factura,
+                    clave_idempotencia=clave_formulario(st.session_state, nombre_clave, datos_factura)
+                )
+                if not resultado['success']:
+                    st.error(f"Error: {resultado['error']}")
+                    st.stop()
+                numero = resultado['numero_factura']
                 st.success(f"✅ Factura {numero} creada correctamente")
                 # Guardar el código para mostrarlo después del rerun
                 st.session_state.factura_creada_codigo = codigo_buscar
                 time.sleep(0.5)
+                renovar_clave(st.session_state, nombre_clave)
                 st.rerun()
 
 
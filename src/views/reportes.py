@@ -2,9 +2,10 @@ import streamlit as st
 import pandas as pd
 from datetime import date, timedelta, datetime
 import plotly.express as px
-from config.database import db
-from utils.pdf_generator import PDFGenerator, sanitize_text
+from controllers.reporte_controller import ReporteController
 from utils.logger import logger
+from utils.profiler import perfilador
+from utils.pronostico import ocupacion_total
 
 C = {
     'dark':      '#1a2744',
@@ -195,6 +196,17 @@ def _card_info(texto, tipo="info"):
 # =============================================================================
 # Helpers PDF (eliminan duplicación de encabezados)
 # =============================================================================
+# fpdf se importa al generar el primer PDF, no al abrir la vista
+def _nuevo_pdf():
+    from utils.pdf_generator import PDFGenerator
+    return PDFGenerator()
+
+
+def sanitize_text(text):
+    from utils.pdf_generator import sanitize_text as sanitizar
+    return sanitizar(text)
+
+
 def _pdf_header(pdf, subtitulo, fecha_inicio, fecha_fin):
     """Encabezado estándar para todos los reportes PDF."""
     pdf.add_page()
@@ -275,7 +287,8 @@ def _pdf_footer(pdf):
 
 # =============================================================================
 def show():
-    _css()
+    with perfilador.fase('css'):
+        _css()
 
     st.markdown(
         f'<h2 style="color:{C["accent"]}; font-weight:700; margin-bottom:1.25rem; font-size:1.4rem;">'
@@ -288,11 +301,16 @@ def show():
     with col_tipo:
         tipo_reporte = st.selectbox(
             "Tipo de reporte",
-            ["Ocupación", "Ingresos", "Reservas", "Análisis de Huéspedes", "Rendimiento Hotelero"]
+            ["Ocupación", "Ingresos", "Reservas", "Análisis de Huéspedes", "Rendimiento Hotelero",
+             "Pronóstico de Ocupación"]
         )
 
     with col_periodo:
-        periodo = st.selectbox("Período", ["Hoy", "Esta semana", "Este mes", "Personalizado"])
+        if tipo_reporte == "Pronóstico de Ocupación":
+            horizonte = st.selectbox("Horizonte", [90, 180, 365], format_func=lambda d: f"Próximos {d} días")
+            periodo = None
+        else:
+            periodo = st.selectbox("Período", ["Hoy", "Esta semana", "Este mes", "Personalizado"])
 
     fecha_inicio = fecha_fin = date.today()
 
@@ -306,6 +324,9 @@ def show():
         with col_f2:
             fecha_fin = st.date_input("Hasta", value=date.today())
 
+    if ReporteController.incluye_archivo(fecha_inicio):
+        _caption("🗄️ El período incluye datos archivados: el reporte puede tardar algo más")
+
     st.markdown("<div style='height:0.5rem;'></div>", unsafe_allow_html=True)
 
     if   tipo_reporte == "Ocupación":             mostrar_reporte_ocupacion(fecha_inicio, fecha_fin)
@@ -313,6 +334,7 @@ def show():
     elif tipo_reporte == "Reservas":              mostrar_reporte_reservas(fecha_inicio, fecha_fin)
     elif tipo_reporte == "Análisis de Huéspedes": mostrar_reporte_huespedes(fecha_inicio, fecha_fin)
     elif tipo_reporte == "Rendimiento Hotelero":  mostrar_reporte_kpis(fecha_inicio, fecha_fin)
+    elif tipo_reporte == "Pronóstico de Ocupación": mostrar_reporte_pronostico(horizonte)
 
 
 # =============================================================================
@@ -320,27 +342,7 @@ def mostrar_reporte_ocupacion(fecha_inicio, fecha_fin):
     _seccion("📊", "Reporte de Ocupación")
     _caption(f"Período: {fecha_inicio.strftime('%d/%m/%Y')} — {fecha_fin.strftime('%d/%m/%Y')}")
 
-    with db.get_cursor() as cursor:
-        cursor.execute("""
-            WITH fechas AS (
-                SELECT generate_series(%s::date, %s::date, '1 day'::interval)::date as fecha
-            )
-            SELECT
-                f.fecha,
-                COUNT(DISTINCT CASE
-                    WHEN r.fecha_check_in <= f.fecha AND r.fecha_check_out > f.fecha
-                    AND r.estado IN ('confirmada','completada') THEN r.habitacion_id
-                END) as habitaciones_ocupadas,
-                COUNT(DISTINCT r.id) as reservas_activas,
-                COALESCE(SUM(CASE
-                    WHEN r.fecha_check_in <= f.fecha AND r.fecha_check_out > f.fecha
-                    AND r.estado IN ('confirmada','completada') THEN 1
-                END), 0) as huespedes
-            FROM fechas f
-            LEFT JOIN reservas r ON r.fecha_check_in <= f.fecha AND r.fecha_check_out > f.fecha
-            GROUP BY f.fecha ORDER BY f.fecha
-        """, (fecha_inicio, fecha_fin))
-        datos = cursor.fetchall()
+    datos = ReporteController.get_ocupacion_periodo(fecha_inicio, fecha_fin)
 
     if not datos:
         _card_info("📭 No hay datos de ocupación para el período seleccionado", "info")
@@ -376,7 +378,7 @@ def mostrar_reporte_ocupacion(fecha_inicio, fecha_fin):
     st.markdown("<div style='height:1rem;'></div>", unsafe_allow_html=True)
     if st.button("📄 Generar Reporte de Ocupación", type="primary", key="btn_pdf_ocupacion"):
         with st.spinner("Generando PDF..."):
-            pdf = PDFGenerator()
+            pdf = _nuevo_pdf()
             _pdf_header(pdf, 'Reporte de Ocupación', fecha_inicio, fecha_fin)
             _pdf_section_title(pdf, 'RESUMEN DE OCUPACIÓN')
             _pdf_kv_rows(pdf, [
@@ -407,20 +409,7 @@ def mostrar_reporte_ingresos(fecha_inicio, fecha_fin):
     _seccion("💰", "Reporte de Ingresos")
     _caption(f"Período: {fecha_inicio.strftime('%d/%m/%Y')} — {fecha_fin.strftime('%d/%m/%Y')}")
 
-    with db.get_cursor() as cursor:
-        cursor.execute("""
-            SELECT
-                DATE(fecha_emision) as fecha,
-                COUNT(DISTINCT id) as total_facturas,
-                SUM(total) as ingresos,
-                SUM(CASE WHEN metodo_pago='efectivo'     THEN total ELSE 0 END) as efectivo,
-                SUM(CASE WHEN metodo_pago='tarjeta'      THEN total ELSE 0 END) as tarjeta,
-                SUM(CASE WHEN metodo_pago='transferencia' THEN total ELSE 0 END) as transferencia
-            FROM facturas
-            WHERE DATE(fecha_emision) BETWEEN %s AND %s AND estado='pagada'
-            GROUP BY DATE(fecha_emision) ORDER BY fecha
-        """, (fecha_inicio, fecha_fin))
-        datos = cursor.fetchall()
+    datos = ReporteController.get_ingresos_periodo(fecha_inicio, fecha_fin)
 
     if not datos:
         _card_info("📭 No hay datos de ingresos para el período seleccionado", "info")
@@ -462,7 +451,7 @@ def mostrar_reporte_ingresos(fecha_inicio, fecha_fin):
     st.markdown("<div style='height:1rem;'></div>", unsafe_allow_html=True)
     if st.button("📄 Generar Reporte de Ingresos", type="primary", key="btn_pdf_ingresos"):
         with st.spinner("Generando PDF..."):
-            pdf = PDFGenerator()
+            pdf = _nuevo_pdf()
             _pdf_header(pdf, 'Reporte de Ingresos', fecha_inicio, fecha_fin)
             _pdf_section_title(pdf, 'RESUMEN FINANCIERO')
             _pdf_kv_rows(pdf, [
@@ -502,24 +491,7 @@ def mostrar_reporte_reservas(fecha_inicio, fecha_fin):
     _seccion("📋", "Reporte de Reservas")
     _caption(f"Período: {fecha_inicio.strftime('%d/%m/%Y')} — {fecha_fin.strftime('%d/%m/%Y')}")
 
-    with db.get_cursor() as cursor:
-        cursor.execute("""
-            SELECT
-                r.codigo_reserva,
-                r.fecha_reserva::date as fecha_reserva,
-                r.fecha_check_in, r.fecha_check_out,
-                r.tarifa_total, r.estado,
-                h.nombre || ' ' || h.apellido as huesped,
-                hab.numero as habitacion,
-                th.nombre as tipo_habitacion
-            FROM reservas r
-            JOIN huespedes h ON r.huesped_id = h.id
-            LEFT JOIN habitaciones hab ON r.habitacion_id = hab.id
-            LEFT JOIN tipos_habitacion th ON hab.tipo_habitacion_id = th.id
-            WHERE r.fecha_reserva::date BETWEEN %s AND %s
-            ORDER BY r.fecha_reserva DESC
-        """, (fecha_inicio, fecha_fin))
-        datos = cursor.fetchall()
+    datos = ReporteController.get_reservas_periodo(fecha_inicio, fecha_fin)
 
     if not datos:
         _card_info("📭 No hay reservas en el período seleccionado", "info")
@@ -560,7 +532,7 @@ def mostrar_reporte_reservas(fecha_inicio, fecha_fin):
     st.markdown("<div style='height:1rem;'></div>", unsafe_allow_html=True)
     if st.button("📄 Generar Reporte de Reservas", type="primary", key="btn_pdf_reservas"):
         with st.spinner("Generando PDF..."):
-            pdf = PDFGenerator()
+            pdf = _nuevo_pdf()
             _pdf_header(pdf, 'Reporte de Reservas', fecha_inicio, fecha_fin)
             _pdf_section_title(pdf, 'RESUMEN DE RESERVAS')
             _pdf_kv_rows(pdf, [
@@ -594,28 +566,7 @@ def mostrar_reporte_kpis(fecha_inicio, fecha_fin):
     _seccion("📊", "KPIs — Rendimiento Hotelero")
     _caption(f"Período: {fecha_inicio.strftime('%d/%m/%Y')} — {fecha_fin.strftime('%d/%m/%Y')}")
 
-    with db.get_cursor() as cursor:
-        cursor.execute("""
-            WITH stats AS (
-                SELECT
-                    COUNT(DISTINCT r.id) as total_reservas,
-                    COALESCE(SUM(r.tarifa_total), 0) as ingresos_totales,
-                    COALESCE(AVG(r.fecha_check_out - r.fecha_check_in), 0) as estancia_promedio,
-                    COUNT(DISTINCT r.huesped_id) as huespedes_unicos,
-                    SUM(CASE WHEN r.estado='cancelada' THEN 1 ELSE 0 END) as cancelaciones
-                FROM reservas r WHERE r.fecha_reserva::date BETWEEN %s AND %s
-            ),
-            habitaciones_stats AS (
-                SELECT COUNT(*) as total_habitaciones, AVG(tarifa_base) as tarifa_promedio
-                FROM habitaciones WHERE activa = true
-            )
-            SELECT s.*, h.total_habitaciones, h.tarifa_promedio,
-                CASE WHEN s.total_reservas > 0
-                    THEN (s.cancelaciones::DECIMAL / s.total_reservas * 100) ELSE 0
-                END as tasa_cancelacion
-            FROM stats s, habitaciones_stats h
-        """, (fecha_inicio, fecha_fin))
-        kpis = cursor.fetchone()
+    kpis = ReporteController.get_kpis_periodo(fecha_inicio, fecha_fin)
 
     if not kpis:
         _card_info("📭 No hay datos para el período seleccionado", "info")
@@ -655,7 +606,7 @@ def mostrar_reporte_kpis(fecha_inicio, fecha_fin):
     st.markdown("<div style='height:1rem;'></div>", unsafe_allow_html=True)
     if st.button("📄 Generar Reporte de Rendimiento Hotelero", type="primary", key="btn_pdf_kpis"):
         with st.spinner("Generando PDF..."):
-            pdf = PDFGenerator()
+            pdf = _nuevo_pdf()
             _pdf_header(pdf, 'Reporte de Rendimiento Hotelero', fecha_inicio, fecha_fin)
             _pdf_section_title(pdf, 'INDICADORES CLAVE DE RENDIMIENTO (KPIs)')
             kpis_filas = [
@@ -695,23 +646,7 @@ def mostrar_reporte_huespedes(fecha_inicio, fecha_fin):
     _seccion("👤", "Análisis de Huéspedes")
     _caption(f"Período: {fecha_inicio.strftime('%d/%m/%Y')} — {fecha_fin.strftime('%d/%m/%Y')}")
 
-    with db.get_cursor() as cursor:
-        cursor.execute("""
-            SELECT
-                h.id, h.nombre, h.apellido, h.numero_documento,
-                h.email, h.nacionalidad, h.es_vip,
-                h.created_at::date as fecha_registro,
-                COUNT(r.id) as total_reservas,
-                COALESCE(SUM(CASE WHEN r.estado != 'cancelada' THEN r.tarifa_total ELSE 0 END), 0) as total_consumido
-            FROM huespedes h
-            LEFT JOIN reservas r ON h.id = r.huesped_id
-                AND r.fecha_reserva::date BETWEEN %s AND %s
-            WHERE h.created_at::date BETWEEN %s AND %s
-            GROUP BY h.id, h.nombre, h.apellido, h.numero_documento,
-                     h.email, h.nacionalidad, h.es_vip, h.created_at
-            ORDER BY total_reservas DESC, total_consumido DESC
-        """, (fecha_inicio, fecha_fin, fecha_inicio, fecha_fin))
-        datos = cursor.fetchall()
+    datos = ReporteController.get_huespedes_periodo(fecha_inicio, fecha_fin)
 
     if not datos:
         _card_info("📭 No hay datos de huéspedes para el período seleccionado", "info")
@@ -753,7 +688,7 @@ def mostrar_reporte_huespedes(fecha_inicio, fecha_fin):
     st.markdown("<div style='height:1rem;'></div>", unsafe_allow_html=True)
     if st.button("📄 Generar Reporte de Huéspedes", type="primary", key="btn_pdf_huespedes"):
         with st.spinner("Generando PDF..."):
-            pdf = PDFGenerator()
+            pdf = _nuevo_pdf()
             _pdf_header(pdf, 'Reporte de Análisis de Huéspedes', fecha_inicio, fecha_fin)
             _pdf_section_title(pdf, 'RESUMEN EJECUTIVO')
             _pdf_kv_rows(pdf, [
@@ -781,4 +716,132 @@ def mostrar_reporte_huespedes(fecha_inicio, fecha_fin):
             _pdf_footer(pdf)
             st.download_button("📥 Descargar Reporte de Huéspedes", data=_get_pdf_data(pdf),
                 file_name=f"reporte_huespedes_{fecha_inicio:%Y%m%d}_{fecha_fin:%Y%m%d}.pdf",
-                mime="application/pdf")
\ No newline at end of file
+                mime="application/pdf")
+
+
+# =============================================================================
+def mostrar_reporte_pronostico(horizonte):
+    fecha_inicio = date.today()
+    fecha_fin = fecha_inicio + timedelta(days=horizonte - 1)
+    _seccion("🔮", "Pronóstico de Ocupación")
+    _caption(f"Próximos {horizonte} días: {fecha_inicio.strftime('%d/%m/%Y')} — {fecha_fin.strftime('%d/%m/%Y')} · "
+             "reservas en cartera + pickup esperado por día de la semana y antelación")
+
+    datos = ReporteController.get_pronostico_ocupacion(horizonte)
+
+    if not datos:
+        _card_info("❌ No se pudo calcular el pronóstico (revisa el log)", "danger")
+        return
+    diario, curva, meta = datos['diario'], datos['curva'], datos['meta']
+    if diario.empty:
+        _card_info("📭 No hay tipos de habitación con habitaciones activas", "info")
+        return
+
+    tipos = list(dict.fromkeys(diario['tipo']))
+    tipo_sel = st.selectbox("Tipo de habitación", ["Todos"] + tipos, key="pronostico_tipo")
+    df = ocupacion_total(diario if tipo_sel == "Todos" else diario[diario['tipo'] == tipo_sel])
+
+    capacidad = df['capacidad'].sum()
+    ocupacion = 100 * df['pronostico'].sum() / capacidad if capacidad else 0
+    en_cartera = 100 * df['en_cartera'].sum() / capacidad if capacidad else 0
+    con_stly = df[df['stly'].notna()]
+    ritmo = con_stly['en_cartera'].sum() - con_stly['stly'].sum()
+    ritmo_pct = 100 * ritmo / con_stly['stly'].sum() if con_stly['stly'].sum() else 0
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1: st.metric("Ocupación Pronosticada", f"{ocupacion:.1f}%")
+    with col2: st.metric("Ya Reservado", f"{en_cartera:.1f}%")
+    with col3: st.metric("Pickup Esperado", f"{df['pronostico'].sum() - df['en_cartera'].sum():,.0f} noches")
+    with col4: st.metric("Ritmo vs Año Anterior", f"{ritmo:+,.0f} noches", f"{ritmo_pct:+.1f}%")
+
+    grafico = df.rename(columns={'pronostico': 'Pronóstico', 'en_cartera': 'En cartera',
+                                 'stly': 'Año anterior', 'capacidad': 'Capacidad'})
+    fig = px.line(grafico, x='fecha', y=['Pronóstico', 'En cartera', 'Año anterior', 'Capacidad'],
+                  color_discrete_sequence=COLORES_GRAFICOS)
+    fig.update_layout(**PLOTLY_LAYOUT, height=340, xaxis_title="Noche", yaxis_title="Habitaciones",
+                      legend_title_text="")
+    st.plotly_chart(fig, use_container_width=True)
+
+    _seccion("📈", "Curva de Reservas (pickup)")
+    _caption(f"% de la ocupación final que ya estaba reservada N días antes · "
+             f"últimos {meta['historial_dias']} días")
+    columna = 'Total' if tipo_sel == "Todos" else tipo_sel
+    fig_curva = px.line(curva, x='dias_antes', y=columna, color_discrete_sequence=COLORES_GRAFICOS)
+    fig_curva.update_layout(**PLOTLY_LAYOUT, height=280, xaxis_title="Días antes de la noche",
+                            yaxis_title="% reservado", showlegend=False)
+    fig_curva.update_xaxes(autorange="reversed")
+    st.plotly_chart(fig_curva, use_container_width=True)
+
+    _seccion("🛏️", "Resumen por Tipo de Habitación")
+    por_tipo = diario.groupby('tipo', sort=False).agg(
+        capacidad=('capacidad', 'sum'), en_cartera=('en_cartera', 'sum'),
+        pronostico=('pronostico', 'sum'), stly=('stly', 'sum')).reset_index()
+    por_tipo['ocupacion_pct'] = (100 * por_tipo['pronostico'] / por_tipo['capacidad'].where(por_tipo['capacidad'] > 0)).round(1)
+    st.dataframe(
+        por_tipo, use_container_width=True, hide_index=True,
+        column_config={
+            "tipo": "Tipo", "capacidad": "Noches disponibles", "en_cartera": "En cartera",
+            "pronostico": st.column_config.NumberColumn("Pronóstico", format="%.0f"),
+            "stly": st.column_config.NumberColumn("Año anterior", format="%.0f"),
+            "ocupacion_pct": st.column_config.NumberColumn("Ocupación", format="%.1f%%"),
+        }
+    )
+    actualizado = meta['actualizado_en'].strftime('%H:%M:%S') if meta['actualizado_en'] else '—'
+    _caption(f"{meta['reservas_historial']:,} reservas en el historial · {meta['cambios_aplicados']} cambios "
+             f"aplicados desde la última reconstrucción · actualizado {actualizado} · {meta['calculado_ms']} ms")
+
+    st.markdown("<div style='height:1rem;'></div>", unsafe_allow_html=True)
+    col_csv, col_pdf = st.columns(2)
+    with col_csv:
+        st.download_button("📥 Descargar CSV", data=diario.to_csv(index=False).encode('utf-8'),
+            file_name=f"pronostico_ocupacion_{fecha_inicio:%Y%m%d}_{horizonte}d.csv",
+            mime="text/csv", use_container_width=True)
+    with col_pdf:
+        generar = st.button("📄 Generar Reporte de Pronóstico", type="primary", key="btn_pdf_pronostico",
+                            use_container_width=True)
+    if generar:
+        with st.spinner("Generando PDF..."):
+            semanal = df.assign(semana=pd.to_datetime(df['fecha']).dt.to_period('W').dt.start_time)
+            semanal = semanal.groupby('semana').agg(
+                capacidad=('capacidad', 'sum'), en_cartera=('en_cartera', 'sum'),
+                pronostico=('pronostico', 'sum'), stly=('stly', 'sum')).reset_index()
+            pdf = _nuevo_pdf()
+            _pdf_header(pdf, f'Pronóstico de Ocupación - {tipo_sel}', fecha_inicio, fecha_fin)
+            _pdf_section_title(pdf, 'RESUMEN DEL PRONÓSTICO')
+            _pdf_kv_rows(pdf, [
+                ('Ocupación pronosticada:', f'{ocupacion:.1f}%'),
+                ('Ya reservado:',           f'{en_cartera:.1f}%'),
+                ('Pickup esperado:',        f'{df["pronostico"].sum() - df["en_cartera"].sum():,.0f} noches'),
+                ('Ritmo vs año anterior:',  f'{ritmo:+,.0f} noches ({ritmo_pct:+.1f}%)'),
+            ])
+            _pdf_section_title(pdf, 'POR TIPO DE HABITACIÓN')
+            _pdf_table_header(pdf, [('Tipo',50),('Disponibles',30),('En cartera',30),
+                                     ('Pronóstico',30),('Año ant.',25),('Ocup.',25)])
+            pdf.set_font('Arial', '', 8)
+            pdf.set_text_color(0, 0, 0)
+            for i, (_, row) in enumerate(por_tipo.iterrows()):
+                pdf.set_fill_color(250,250,250) if i%2==0 else pdf.set_fill_color(240,240,240)
+                pdf.cell(50, 7, sanitize_text(str(row['tipo'])), 1, 0, 'L', 1)
+                pdf.cell(30, 7, sanitize_text(f"{row['capacidad']:,.0f}"), 1, 0, 'R', 1)
+                pdf.cell(30, 7, sanitize_text(f"{row['en_cartera']:,.0f}"), 1, 0, 'R', 1)
+                pdf.cell(30, 7, sanitize_text(f"{row['pronostico']:,.0f}"), 1, 0, 'R', 1)
+                pdf.cell(25, 7, sanitize_text(f"{row['stly']:,.0f}"), 1, 0, 'R', 1)
+                pdf.cell(25, 7, sanitize_text(f"{row['ocupacion_pct']:.1f}%"), 1, 1, 'R', 1)
+            pdf.ln(8)
+            _pdf_section_title(pdf, 'DETALLE SEMANAL')
+            _pdf_table_header(pdf, [('Semana',40),('En cartera',35),('Pronóstico',35),
+                                     ('Año ant.',35),('Ocupación',45)])
+            pdf.set_font('Arial', '', 8)
+            pdf.set_text_color(0, 0, 0)
+            for i, (_, row) in enumerate(semanal.iterrows()):
+                pdf.set_fill_color(250,250,250) if i%2==0 else pdf.set_fill_color(240,240,240)
+                ocup = 100 * row['pronostico'] / row['capacidad'] if row['capacidad'] else 0
+                pdf.cell(40, 7, sanitize_text(row['semana'].strftime('%d/%m/%Y')), 1, 0, 'C', 1)
+                pdf.cell(35, 7, sanitize_text(f"{row['en_cartera']:,.0f}"), 1, 0, 'R', 1)
+                pdf.cell(35, 7, sanitize_text(f"{row['pronostico']:,.0f}"), 1, 0, 'R', 1)
+                pdf.cell(35, 7, sanitize_text(f"{row['stly']:,.0f}"), 1, 0, 'R', 1)
+                pdf.cell(45, 7, sanitize_text(f"{ocup:.1f}%"), 1, 1, 'R', 1)
+            _pdf_footer(pdf)
+            st.download_button("📥 Descargar Reporte de Pronóstico", data=_get_pdf_data(pdf),
+                file_name=f"pronostico_ocupacion_{fecha_inicio:%Y%m%d}_{horizonte}d.pdf",
+                mime="application/pdf")
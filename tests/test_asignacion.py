@@ -0,0 +1,128 @@
+"""Asignación de habitaciones: líneas de tiempo, reparto y propuesta por tipo"""
+import sys
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'src'))
+
+pytest.importorskip('psycopg2')
+
+from utils import asignacion  # noqa: E402
+from utils.asignacion import Estancia, LineaTiempo, repartir  # noqa: E402
+
+HOY = date(2030, 1, 1)
+
+
+def test_huecos_en_los_bordes():
+    linea = LineaTiempo([(10, 12), (15, 18)])
+    # La salida de una estancia es la noche de entrada de la siguiente: no se solapan
+    assert linea.huecos(12, 15) == (0, 0)
+    assert linea.huecos(13, 14) == (1, 1)
+    assert linea.huecos(5, 10) == (None, 0)
+    assert linea.huecos(18, 20) == (0, None)
+    assert linea.huecos(11, 13) is None
+    assert linea.huecos(14, 16) is None
+    assert linea.huecos(9, 19) is None
+    assert LineaTiempo().huecos(1, 2) == (None, None)
+
+
+def test_ocupar_mantiene_el_orden():
+    linea = LineaTiempo([(10, 12), (15, 18)])
+    linea.ocupar(12, 15)
+    linea.ocupar(1, 3)
+    assert linea.inicios == [1, 10, 12, 15]
+    assert linea.fines == [3, 12, 15, 18]
+    assert linea.huecos(12, 13) is None
+    assert linea.huecos(3, 10) == (0, 0)
+
+
+def test_fijas_solapadas_se_unen_en_un_bloque():
+    linea = LineaTiempo([(5, 8), (1, 6), (2, 3), (8, 10), (20, 22)])
+    # (1,6), (2,3) y (5,8) se solapan; (8,10) solo toca el bloque y queda aparte
+    assert linea.inicios == [1, 8, 20]
+    assert linea.fines == [8, 10, 22]
+    assert linea.huecos(7, 9) is None
+    assert linea.huecos(10, 20) == (0, 0)
+
+
+def test_repartir_devuelve_none_si_no_cabe():
+    fijas = {1: [(10, 20)], 2: [(5, 13)]}
+    assert repartir([1, 2], fijas, [Estancia(1, 1, 12, 14)], 2, time.monotonic() + 5) is None
+
+
+def test_repartir_devuelve_none_sin_tiempo():
+    assert repartir([1], {}, [Estancia(1, 1, 12, 14)], 2, time.monotonic() - 1) is None
+
+
+def test_repartir_encadena_y_evita_huecos_cortos():
+    estancias = [Estancia(1, 1, 10, 12), Estancia(2, 1, 13, 15)]
+    lineas = repartir([1, 2], {}, estancias, 2, time.monotonic() + 5)
+    # Dejar una noche suelta entre las dos estancias sería un hueco invendible
+    assert [e.habitacion_id for e in estancias] == [1, 2]
+    assert lineas[1].inicios == [10] and lineas[2].inicios == [13]
+
+
+@pytest.fixture
+def estancias(monkeypatch):
+    """Sustituye la lectura de la BD de ``proponer`` por filas dadas"""
+    for nombre, valor in (('ASSIGNMENT_HORIZON_DAYS', 20), ('ASSIGNMENT_FREEZE_DAYS', 1),
+                          ('ASSIGNMENT_SHORT_GAP_NIGHTS', 2), ('ASSIGNMENT_TIME_LIMIT_SECONDS', 5)):
+        monkeypatch.setattr(asignacion.settings, nombre, valor)
+    habitaciones = [{'id': 1, 'numero': '101', 'tipo_habitacion_id': 1},
+                    {'id': 2, 'numero': '102', 'tipo_habitacion_id': 1}]
+
+    def cargar(filas):
+        reservas = [{'id': i, 'codigo_reserva': f'RES{i:03d}', 'habitacion_id': h,
+                     'fecha_check_in': HOY + timedelta(days=entrada), 'fecha_check_out': HOY + timedelta(days=salida),
+                     'estado': 'confirmada', 'habitacion_fija': False, 'tipo_habitacion_id': 1, 'activa': True,
+                     'alojamiento_id': None, 'huesped_nombre': 'Ana', 'huesped_apellido': 'Gil'}
+                    for i, h, entrada, salida in filas]
+
+        class Cursor:
+            def execute(self, sql, params=None):
+                self.filas = habitaciones if sql == asignacion._SQL_HABITACIONES else reservas
+
+            def fetchall(self):
+                return self.filas
+
+        @contextmanager
+        def get_cursor():
+            yield Cursor()
+
+        monkeypatch.setattr(asignacion.db, 'get_cursor', get_cursor)
+
+    return cargar
+
+
+def test_proponer_mueve_si_mejora(estancias):
+    estancias([(1, 1, 10, 12), (2, 1, 13, 15)])
+    propuesta = asignacion.proponer(HOY)
+    tipo = propuesta['tipos'][0]
+    assert tipo['noches_en_huecos_cortos_antes'] == 1 and tipo['noches_en_huecos_cortos_despues'] == 0
+    assert [(m['reserva_id'], m['desde_habitacion_id'], m['hasta_habitacion_id'])
+            for m in propuesta['movimientos']] == [(2, 1, 2)]
+
+
+def test_proponer_conserva_la_actual_si_no_mejora(estancias):
+    # El reparto voraz intercambia las reservas 1 y 3 con las mismas métricas
+    estancias([(1, 1, 5, 7), (2, 2, 2, 4), (3, 2, 5, 8)])
+    propuesta = asignacion.proponer(HOY)
+    tipo = propuesta['tipos'][0]
+    assert propuesta['movimientos'] == []
+    assert tipo['movimientos'] == 0
+    assert tipo['motivo'] == 'la asignación actual ya es igual o mejor'
+    assert tipo['noches_en_huecos_cortos_despues'] == tipo['noches_en_huecos_cortos_antes']
+
+
+def test_proponer_sin_hueco_para_la_propuesta(estancias):
+    # Sobreventa en la 101 y la 102 ocupada por una llegada congelada (hoy): el reparto no cabe
+    estancias([(1, 2, 0, 10), (2, 1, 3, 6), (3, 1, 5, 8)])
+    tipo = asignacion.proponer(HOY)['tipos'][0]
+    assert tipo['movimientos'] == 0
+    assert tipo['motivo'] == 'no caben sin la asignación actual'
@@ -0,0 +1,91 @@
+"""Búsqueda de habitaciones para grupos: ventanas mínimas, elección y orden de las opciones"""
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'src'))
+
+from utils.grupos import _elegir, buscar  # noqa: E402
+
+
+def _hab(numero, tipo=1, capacidad=2, total=100.0):
+    numero = str(numero)
+    return {'id': int(numero), 'numero': numero, 'piso': int(numero[0]), 'tipo_habitacion_id': tipo,
+            'capacidad_maxima': capacidad, 'total_estancia': total}
+
+
+def _buscar(libres, tipos=None, cantidad=0, personas=0, ocupadas=(), opciones=10):
+    todas = list(libres) + [_hab(n) for n in ocupadas]
+    return buscar(libres, todas, tipos or {}, cantidad, personas, opciones, presupuesto_ms=10_000)
+
+
+def _ids(opcion):
+    return [h['id'] for h in opcion['habitaciones']]
+
+
+def test_elegir_cubre_cada_tipo_con_las_mas_baratas_y_completa_por_capacidad():
+    ventana = [_hab(101, 1, total=90), _hab(102, 1, total=80), _hab(103, 2, total=70),
+               _hab(104, 3, capacidad=4, total=200), _hab(105, 3, capacidad=2, total=50)]
+    elegidas = _elegir(ventana, {1: 1, 2: 1}, 3)
+    assert [h['id'] for h in elegidas] == [103, 102, 104]
+
+
+def test_minimos_por_tipo():
+    libres = [_hab(101, 1), _hab(102, 1), _hab(103, 2), _hab(104, 1), _hab(105, 2)]
+    resultado = _buscar(libres, tipos={1: 2, 2: 1})
+    assert resultado['opciones']
+    for opcion in resultado['opciones']:
+        assert opcion['por_tipo'][1] >= 2 and opcion['por_tipo'][2] >= 1
+    assert _ids(resultado['opciones'][0]) == [101, 102, 103]
+
+
+def test_la_ventana_crece_hasta_cubrir_la_capacidad():
+    libres = [_hab(101, capacidad=2), _hab(102, capacidad=2), _hab(103, capacidad=2), _hab(104, capacidad=4)]
+    resultado = _buscar(libres, cantidad=2, personas=6)
+    # Dos habitaciones de 2 no bastan: cada ventana crece hasta la de 4 plazas
+    assert [_ids(o) for o in resultado['opciones']] == [[103, 104], [102, 104], [101, 104]]
+    assert [o['intercaladas'] for o in resultado['opciones']] == [0, 1, 2]
+    assert all(o['capacidad'] == 6 for o in resultado['opciones'])
+
+
+def test_sin_capacidad_suficiente_no_hay_opciones():
+    resultado = _buscar([_hab(101), _hab(102)], cantidad=2, personas=5)
+    assert resultado['opciones'] == [] and resultado['evaluadas'] == 0
+
+
+def test_cantidad_menor_que_la_suma_de_tipos():
+    libres = [_hab(101, 1), _hab(102, 2), _hab(103, 1), _hab(104, 2)]
+    resultado = _buscar(libres, tipos={1: 2, 2: 1}, cantidad=1)
+    assert resultado['opciones']
+    assert all(len(o['habitaciones']) == 3 for o in resultado['opciones'])
+
+
+def test_ventanas_con_la_misma_eleccion_cuentan_una_vez():
+    # Desde la 101 la ventana mínima es 101-102 y elige la 102, igual que la que empieza en la 102
+    libres = [_hab(101, 2), _hab(102, 1), _hab(103, 1)]
+    resultado = _buscar(libres, tipos={1: 1})
+    assert resultado['evaluadas'] == 2
+    assert sorted(_ids(o) for o in resultado['opciones']) == [[102], [103]]
+
+
+def test_orden_por_pisos_intercaladas_y_total():
+    libres = [_hab(101, total=100), _hab(103, total=100),
+              _hab(201, total=50), _hab(202, total=50),
+              _hab(301, total=10), _hab(303, total=10)]
+    resultado = _buscar(libres, cantidad=2, ocupadas=(102, 302))
+    assert [_ids(o) for o in resultado['opciones']] == [
+        [201, 202],   # un piso, contiguas
+        [301, 303],   # un piso, una intercalada, la más barata
+        [101, 103],   # un piso, una intercalada
+        [202, 301],   # dos pisos, la más barata
+        [103, 201],   # dos pisos
+    ]
+    assert [o['intercaladas'] for o in resultado['opciones']] == [0, 1, 1, 0, 0]
+
+
+def test_opciones_limita_la_lista_pero_no_las_evaluadas():
+    libres = [_hab(n) for n in (101, 102, 103, 104)]
+    resultado = _buscar(libres, cantidad=2, opciones=2)
+    assert len(resultado['opciones']) == 2
+    assert resultado['evaluadas'] == 3
+    assert resultado['completo']
@@ -0,0 +1,70 @@
+"""Importación de reservas: solapes dentro del lote (requiere la BD configurada en .env)"""
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'src'))
+
+pytest.importorskip('psycopg2')
+
+from config.database import db  # noqa: E402
+from controllers.importacion_controller import ImportacionController  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def datos():
+    if not db.test_connection():
+        pytest.skip('Base de datos no disponible')
+    with db.get_cursor() as cursor:
+        cursor.execute("SELECT numero_documento FROM huespedes ORDER BY id LIMIT 1")
+        huesped = cursor.fetchone()
+        cursor.execute("SELECT numero FROM habitaciones WHERE activa ORDER BY id LIMIT 1")
+        habitacion = cursor.fetchone()
+    if not huesped or not habitacion:
+        pytest.skip('Faltan huéspedes o habitaciones (cargar database/seeds.sql)')
+    return huesped['numero_documento'], habitacion['numero']
+
+
+def _csv(documento, habitacion, estancias):
+    lineas = ['numero_documento,numero_habitacion,fecha_check_in,fecha_check_out,numero_adultos']
+    lineas += [f'{documento},{habitacion},{entrada},{salida},1' for entrada, salida in estancias]
+    return '\n'.join(lineas)
+
+
+def test_cadena_de_solapes_mas_larga_que_cualquier_limite(datos):
+    # Cada estancia se solapa con la siguiente: se conservan las impares y se descartan las pares
+    documento, habitacion = datos
+    inicio = date.today() + timedelta(days=3000)
+    eslabones = 120
+    estancias = [(inicio + timedelta(days=i), inicio + timedelta(days=i + 2)) for i in range(eslabones)]
+
+    resultado = ImportacionController.importar_reservas(
+        _csv(documento, habitacion, estancias), 'csv', usuario_id=1, solo_validar=True)
+
+    assert resultado['success'], resultado.get('error')
+    assert resultado['validas'] == eslabones // 2
+    assert [e['fila'] for e in resultado['errores']] == list(range(2, eslabones + 1, 2))
+    assert all(e['error'] == f"Se solapa con la fila {e['fila'] - 1} del mismo lote"
+               for e in resultado['errores'])
+
+
+def test_solape_con_varias_filas_conservadas(datos):
+    documento, habitacion = datos
+    inicio = date.today() + timedelta(days=3000)
+    estancias = [
+        (inicio, inicio + timedelta(days=2)),
+        (inicio + timedelta(days=5), inicio + timedelta(days=7)),
+        (inicio + timedelta(days=1), inicio + timedelta(days=6)),   # choca con la 1 y la 2
+        (inicio + timedelta(days=2), inicio + timedelta(days=5)),   # cabe entre ambas
+    ]
+
+    resultado = ImportacionController.importar_reservas(
+        _csv(documento, habitacion, estancias), 'csv', usuario_id=1, solo_validar=True)
+
+    assert resultado['success'], resultado.get('error')
+    assert resultado['validas'] == 3
+    assert resultado['errores'] == [{'fila': 3, 'error': 'Se solapa con la fila 1 del mismo lote'}]